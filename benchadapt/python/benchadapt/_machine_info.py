@@ -1,8 +1,12 @@
+import json
 import logging
 import os
 import platform
 import subprocess
-from typing import Dict, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
 
 
 def _sysctl(stat):
@@ -116,14 +120,60 @@ def gh_commit_info_from_env() -> Dict[str, str]:
     return result
 
 
-def machine_info(host_name: Optional[str] = None):
-    os_name, os_version = platform.platform(terse=True).split("-", maxsplit=1)
+def machine_info(host_name: Optional[str] = None, refresh: bool = False):
+    """
+    Return information about the current machine, for `BenchmarkResult`.
 
+    The host properties are probed once per process (see `host_info()`); this
+    returns a new dict every time (which the caller may mutate). Set
+    `refresh=True` to probe again.
+    """
     host_name = host_name or os.environ.get("CONBENCH_MACHINE_INFO_NAME")
     host_name = host_name or platform.node()
 
-    info = {
-        "name": host_name,
+    info: Dict[str, Any] = {"name": host_name}
+    for key, value in host_info(refresh=refresh).items():
+        info[key] = list(value) if isinstance(value, tuple) else value
+
+    return info
+
+
+# Result of `_probe_host_info()`, see `host_info()`.
+_host_info: Optional[Mapping[str, Any]] = None
+_host_info_lock = threading.Lock()
+
+
+def host_info(refresh: bool = False) -> Mapping[str, Any]:
+    """
+    Return the properties of the current machine (all of `machine_info()`
+    but the host name) as a read-only mapping, shared by all callers.
+
+    Probing the machine takes a while (it runs a number of external
+    commands), and its properties do not change while a benchmark suite is
+    running: probe only once per process, unless `refresh` is set. If the
+    environment variable `CONBENCH_MACHINE_INFO_CACHE_PATH` is set, also
+    store the result in that file and use it in other processes running on
+    the same machine, until the next reboot.
+    """
+    global _host_info
+
+    with _host_info_lock:
+        if _host_info is None or refresh:
+            info = None if refresh else _read_host_info_cache()
+            if info is None:
+                info = _probe_host_info()
+                _write_host_info_cache(info)
+            # Lists (e.g. gpu_product_names) become tuples: immutable, too.
+            _host_info = MappingProxyType(
+                {k: tuple(v) if isinstance(v, list) else v for k, v in info.items()}
+            )
+        return _host_info
+
+
+def _probe_host_info() -> Dict[str, Any]:
+    os_name, os_version = platform.platform(terse=True).split("-", maxsplit=1)
+
+    info: Dict[str, Any] = {
         "os_name": os_name,
         "os_version": os_version,
         "architecture_name": platform.machine(),
@@ -141,12 +191,25 @@ def machine_info(host_name: Optional[str] = None):
         "gpu_product_names": [],
     }
 
-    _commands(info)
-    _meminfo(info)
-    _lscpu(info)
+    # Run the external commands concurrently; then fill `info` from their
+    # output in order of precedence.
+    with ThreadPoolExecutor(max_workers=len(COMMANDS) + 3) as pool:
+        commands = {
+            key: pool.submit(_exec_command, command)
+            for key, command in COMMANDS.items()
+        }
+        meminfo = pool.submit(_run, ["cat", "/proc/meminfo"])
+        lscpu = pool.submit(_run, ["lscpu", "--bytes"])
+        nvidia_smi = pool.submit(
+            _run, ["nvidia-smi", "--query-gpu=gpu_name", "--format=csv,noheader"]
+        )
+
+    _commands(info, commands)
+    _meminfo(info, meminfo.result())
+    _lscpu(info, lscpu.result())
     _cpuinfo(info)
     _psutil(info)
-    _nvidia_smi(info)
+    _nvidia_smi(info, nvidia_smi.result())
 
     for key in MUST_BE_INTS:
         try:
@@ -163,16 +226,61 @@ def machine_info(host_name: Optional[str] = None):
     return info
 
 
+def _boot_id() -> Optional[str]:
+    """Return an ID that changes upon reboot, or None (if not on Linux)."""
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _read_host_info_cache() -> Optional[Dict[str, Any]]:
+    path = os.environ.get("CONBENCH_MACHINE_INFO_CACHE_PATH")
+    boot_id = _boot_id()
+    if not path or boot_id is None:
+        return None
+
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(cached, dict) or cached.get("boot_id") != boot_id:
+        return None
+    log.debug("using machine info from %s", path)
+    return cached.get("info")
+
+
+def _write_host_info_cache(info: Dict[str, Any]) -> None:
+    path = os.environ.get("CONBENCH_MACHINE_INFO_CACHE_PATH")
+    boot_id = _boot_id()
+    if not path or boot_id is None:
+        return
+
+    # Write to a temporary file first so that other processes never read a
+    # partially written file.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump({"boot_id": boot_id, "info": info}, f)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        log.warning("could not write machine info cache file %s: %s", path, exc)
+
+
 def _round_memory(value):
     # B -> GiB -> B
     gigs = 1024**3
     return int("{:.0f}".format(value / gigs)) * gigs
 
 
-def _commands(info):
-    for key, command in COMMANDS.items():
+def _commands(info, results):
+    # `results`: futures of `_exec_command()`, by key.
+    for key in COMMANDS:
         try:
-            result = _exec_command(command)
+            result = results[key].result()
             info[key] = result if result else ""
         except:
             info[key] = ""
@@ -207,54 +315,42 @@ def _cpuinfo(info):
         pass
 
 
-def _lscpu(info):
-    missing = _has_missing(info, LSCPU_MAPPING)
-    if not missing:
-        return
-
+def _run(command) -> Optional[str]:
+    """Return stdout of the command, or None if it could not be run or failed."""
     try:
-        command = ["lscpu", "--bytes"]
         result = subprocess.run(command, capture_output=True)
         if result.returncode != 0:
-            return
+            return None
     except:
+        return None
+
+    return result.stdout.decode("utf-8").strip()
+
+
+def _lscpu(info, stdout: Optional[str]):
+    missing = _has_missing(info, LSCPU_MAPPING)
+    if not missing or stdout is None:
         return
 
-    parts = result.stdout.decode("utf-8").strip().split("\n")
+    parts = stdout.split("\n")
     _fill_from_lscpu(info, parts)
 
 
-def _meminfo(info):
+def _meminfo(info, stdout: Optional[str]):
     missing = _has_missing(info, MEMINFO_MAPPING)
-    if not missing:
+    if not missing or stdout is None:
         return
 
-    try:
-        command = ["cat", "/proc/meminfo"]
-        result = subprocess.run(command, capture_output=True)
-        if result.returncode != 0:
-            return
-    except:
-        return
-
-    parts = result.stdout.decode("utf-8").strip().split("\n")
+    parts = stdout.split("\n")
     _fill_from_meminfo(info, parts)
 
 
-def _nvidia_smi(info):
+def _nvidia_smi(info, stdout: Optional[str]):
     missing = _has_missing(info, NVIDIA_SMI_MAPPING)
-    if not missing:
-        return
-
-    try:
-        command = ["nvidia-smi", "--query-gpu=gpu_name", "--format=csv,noheader"]
-        result = subprocess.run(command, capture_output=True)
-        if result.returncode != 0:
-            return
-    except:
+    if not missing or stdout is None:
         return
 
-    parts = result.stdout.decode("utf-8").strip().split("\n")
+    parts = stdout.split("\n")
     if parts:
         info["gpu_count"] = len(parts)
         info["gpu_product_names"] = parts
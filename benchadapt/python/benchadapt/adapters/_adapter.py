@@ -1,12 +1,15 @@
 import abc
-import datetime
 import logging
 import subprocess
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List
 
-import requests
 from benchclients.conbench import ConbenchClient
+from benchclients.http import (
+    RetryingHTTPClientException,
+    RetryingHTTPClientNonRetryableResponse,
+)
 from benchclients.logging import fatal_and_log
 
 from ..result import BenchmarkResult
@@ -77,7 +80,7 @@ class BenchmarkAdapter(abc.ABC):
             Passed through to `run()`
         """
         self.run(**kwargs)
-        self.post_results()
+        self.submit_results()
 
     def run(self, params: List[str] = None) -> List[BenchmarkResult]:
         """
@@ -165,9 +168,24 @@ class BenchmarkAdapter(abc.ABC):
 
         return result
 
-    def post_results(self) -> list:
+    def post_results(self, max_in_flight: int = 8) -> list:
         """
-        Post results of run to conbench
+        Post results of run to conbench, one result per request
+
+        Up to ``max_in_flight`` requests are in flight at the same time (sharing
+        the connection pool of one client). For submitting results in batches,
+        see ``submit_results()``.
+
+        Parameters
+        ----------
+        max_in_flight : int
+            Maximum number of concurrent requests
+
+        Returns
+        -------
+        A list with the server response for each result, in the order of
+        ``results``. Raises an exception (after having tried to post all results)
+        if any result could not be posted.
         """
         if not self.results:
             fatal_and_log(
@@ -175,36 +193,108 @@ class BenchmarkAdapter(abc.ABC):
             )
 
         log.info("Initializing conbench client")
-        client = ConbenchClient()
+        # One kept-alive connection per concurrent request.
+        client = ConbenchClient(pool_maxsize=max_in_flight)
 
         log.info("Posting results to conbench")
-        res_list = []
-        error = None
-        for result in self.results:
-            result_dict = result.to_publishable_dict()
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            res_list = list(
+                pool.map(
+                    lambda result: client.post(
+                        path="/benchmarks/", json=result.to_publishable_dict()
+                    ),
+                    self.results,
+                )
+            )
+
+        log.info("All results sent to conbench")
+        return res_list
+
+    def submit_results(
+        self, max_in_flight: int = 8, batch_size: int = 500, raise_on_error: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Post results of run to conbench, in batches if the server supports that
+
+        Up to ``max_in_flight`` requests are in flight at the same time (sharing
+        the connection pool of one client). If the Conbench server supports batch
+        submission, up to ``batch_size`` results are sent with one request;
+        otherwise one result per request.
+
+        Parameters
+        ----------
+        max_in_flight : int
+            Maximum number of concurrent requests
+        batch_size : int
+            Maximum number of results per request, if the server supports batch
+            submission. Use 1 to always submit results one by one.
+        raise_on_error : bool
+            Whether to raise an exception (after having tried to post all results)
+            if any result could not be posted
+
+        Returns
+        -------
+        A list with one status report per result, in the order of ``results``:
+        ``{"status": 201, "id": ...}`` for a result that was posted, or
+        ``{"status": ..., "description": ...}`` for one that was not (``status`` is
+        the HTTP response status code, or ``None`` if there was no response).
+        """
+        if not self.results:
+            fatal_and_log(
+                "No results attribute to post! Was `run()` called on this instance?"
+            )
+
+        log.info("Initializing conbench client")
+        # One kept-alive connection per concurrent request.
+        client = ConbenchClient(pool_maxsize=max_in_flight)
+
+        result_dicts = [result.to_publishable_dict() for result in self.results]
+
+        use_batch = batch_size > 1 and client.supports_benchmark_results_batch()
+        if not use_batch:
+            batch_size = 1
+        chunks = [
+            list(range(start, min(start + batch_size, len(result_dicts))))
+            for start in range(0, len(result_dicts), batch_size)
+        ]
 
+        def _post_chunk(indices: List[int]) -> List[Dict[str, Any]]:
             try:
-                res = client.post(path="/benchmarks/", json=result_dict)
-            except requests.exceptions.ReadTimeout as e:
-                error_time = datetime.datetime.utcnow()
-                log.info(f"{error_time} POST timed out: {repr(e)}. Retrying...")
-                try:
-                    res = client.post(path="/benchmarks/", json=result_dict)
-                except requests.exceptions.ReadTimeout as ee:
-                    error_time2 = datetime.datetime.utcnow()
-                    log.warning(
-                        (
-                            f"{error_time2} POST timed out again: {repr(ee)}. "
-                            "Skipping and continuing to other results."
-                        )
+                if use_batch:
+                    return client.post_benchmark_results_batch(
+                        [result_dicts[i] for i in indices]
                     )
-                    error = ee
+                res = client.post(path="/benchmarks/", json=result_dicts[indices[0]])
+                return [{"status": 201, "id": res["id"]}]
+            except RetryingHTTPClientNonRetryableResponse as exc:
+                status = exc.error_response.status_code
+                return [{"status": status, "description": str(exc)} for _ in indices]
+            except RetryingHTTPClientException as exc:
+                return [{"status": None, "description": str(exc)} for _ in indices]
 
-            res_list.append(res)
+        log.info(
+            "Posting %s results to conbench (%s requests, up to %s at a time)",
+            len(result_dicts),
+            len(chunks),
+            max_in_flight,
+        )
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            report = [
+                status for chunk in pool.map(_post_chunk, chunks) for status in chunk
+            ]
 
-        if error:
-            log.error(f"POST at {error_time} timed out twice:")
-            raise error
+        failed = [
+            (i, status) for i, status in enumerate(report) if status["status"] != 201
+        ]
+        if not failed:
+            log.info("All results sent to conbench")
+            return report
 
-        log.info("All results sent to conbench")
-        return res_list
+        for i, status in failed:
+            log.error("result %s could not be posted: %s", i, status["description"])
+        if raise_on_error:
+            fatal_and_log(
+                f"{len(failed)} of {len(report)} results could not be posted",
+                etype=RuntimeError,
+            )
+        return report
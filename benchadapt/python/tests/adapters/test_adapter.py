@@ -1,7 +1,11 @@
+import json
 from pathlib import Path
 from typing import List
 
+import pytest
 from benchadapt.adapters import BenchmarkAdapter
+from pytest_httpserver import HTTPServer
+from werkzeug.wrappers import Response
 
 from benchadapt import BenchmarkResult
 
@@ -76,3 +80,82 @@ class TestBenchmarkAdapter:
             **RESULTS_DICT["tags"],
             **results_fields_append["tags"],
         }
+
+    def _adapter_with_results(self, n: int) -> FakeAdapter:
+        fake_adapter = FakeAdapter(command=["echo", "hello"])
+        fake_adapter.results = [
+            BenchmarkResult(**{**RESULTS_DICT, "tags": {"name": f"bm-{i}"}})
+            for i in range(n)
+        ]
+        return fake_adapter
+
+    def test_post_results(
+        self, monkeypatch: pytest.MonkeyPatch, httpserver: HTTPServer
+    ) -> None:
+        monkeypatch.setenv("CONBENCH_URL", httpserver.url_for("/"))
+        monkeypatch.delenv("CONBENCH_EMAIL", raising=False)
+        httpserver.expect_request(
+            "/api/benchmarks/", method="POST"
+        ).respond_with_handler(
+            lambda request: Response(
+                json.dumps({"id": request.json["tags"]["name"], "stats": {}}),
+                status=201,
+            )
+        )
+
+        res_list = self._adapter_with_results(5).post_results(max_in_flight=3)
+        assert res_list == [{"id": f"bm-{i}", "stats": {}} for i in range(5)]
+
+    def test_submit_results_one_by_one(
+        self, monkeypatch: pytest.MonkeyPatch, httpserver: HTTPServer
+    ) -> None:
+        monkeypatch.setenv("CONBENCH_URL", httpserver.url_for("/"))
+        monkeypatch.delenv("CONBENCH_EMAIL", raising=False)
+        # Server without batch submission endpoint.
+        httpserver.expect_request("/api/docs.json").respond_with_json({"paths": {}})
+        httpserver.expect_request(
+            "/api/benchmarks/", method="POST"
+        ).respond_with_handler(
+            lambda request: Response(
+                json.dumps({"id": request.json["tags"]["name"]}), status=201
+            )
+        )
+
+        report = self._adapter_with_results(5).submit_results(max_in_flight=3)
+        assert report == [{"status": 201, "id": f"bm-{i}"} for i in range(5)]
+
+    def test_submit_results_batch(
+        self, monkeypatch: pytest.MonkeyPatch, httpserver: HTTPServer
+    ) -> None:
+        monkeypatch.setenv("CONBENCH_URL", httpserver.url_for("/"))
+        monkeypatch.delenv("CONBENCH_EMAIL", raising=False)
+        httpserver.expect_request("/api/docs.json").respond_with_json(
+            {"paths": {"/api/benchmark-results/batch/": {}}}
+        )
+
+        def _batch_handler(request):
+            statuses = [
+                (
+                    {"status": 400, "description": "bad"}
+                    if r["tags"]["name"] == "bm-3"
+                    else {"status": 201, "id": r["tags"]["name"]}
+                )
+                for r in request.json
+            ]
+            return Response(json.dumps({"results": statuses}), status=200)
+
+        httpserver.expect_request(
+            "/api/benchmark-results/batch/", method="POST"
+        ).respond_with_handler(_batch_handler)
+
+        fake_adapter = self._adapter_with_results(5)
+        report = fake_adapter.submit_results(batch_size=2, raise_on_error=False)
+        assert [s["status"] for s in report] == [201, 201, 201, 400, 201]
+        assert report[4]["id"] == "bm-4"
+        batch_requests = [
+            req for req, _ in httpserver.log if req.path.endswith("/batch/")
+        ]
+        assert sorted(len(req.json) for req in batch_requests) == [1, 2, 2]
+
+        with pytest.raises(RuntimeError, match="1 of 5 results could not be posted"):
+            fake_adapter.submit_results(batch_size=2)
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from benchadapt import BenchmarkResult, _machine_info
+
+
+@pytest.fixture
+def probe_counter(monkeypatch):
+    """Count calls to `_probe_host_info()`, start with an empty cache."""
+    calls = []
+    probe = _machine_info._probe_host_info
+
+    def _counting_probe():
+        calls.append(1)
+        return probe()
+
+    monkeypatch.setattr(_machine_info, "_host_info", None)
+    monkeypatch.setattr(_machine_info, "_probe_host_info", _counting_probe)
+    monkeypatch.delenv("CONBENCH_MACHINE_INFO_CACHE_PATH", raising=False)
+    return calls
+
+
+class TestMachineInfo:
+    def test_probed_once_per_process(self, probe_counter):
+        github = {"commit": "2z8c9c49", "repository": "git@github.com:org/repo"}
+        results = [BenchmarkResult(github=github) for _ in range(3)]
+        assert len(probe_counter) == 1
+        assert results[0].machine_info == results[2].machine_info
+        # Every result gets its own dict.
+        results[0].machine_info["name"] = "other"
+        assert results[1].machine_info["name"] != "other"
+        assert isinstance(results[1].machine_info["gpu_product_names"], list)
+
+        _machine_info.machine_info(refresh=True)
+        assert len(probe_counter) == 2
+
+    def test_host_info_is_read_only(self, probe_counter):
+        info = _machine_info.host_info()
+        assert "name" not in info
+        with pytest.raises(TypeError):
+            info["os_name"] = "x"  # type: ignore[index]
+        assert _machine_info.host_info() is info
+
+    def test_disk_cache(self, probe_counter, monkeypatch, tmp_path):
+        path = tmp_path / "machine-info.json"
+        monkeypatch.setenv("CONBENCH_MACHINE_INFO_CACHE_PATH", str(path))
+        monkeypatch.setattr(_machine_info, "_boot_id", lambda: "boot-1")
+
+        info = _machine_info.machine_info()
+        assert len(probe_counter) == 1
+        assert json.loads(path.read_text())["boot_id"] == "boot-1"
+
+        # Another process on the same machine (empty in-memory cache).
+        monkeypatch.setattr(_machine_info, "_host_info", None)
+        assert _machine_info.machine_info() == info
+        assert len(probe_counter) == 1
+
+        # After a reboot.
+        monkeypatch.setattr(_machine_info, "_host_info", None)
+        monkeypatch.setattr(_machine_info, "_boot_id", lambda: "boot-2")
+        assert _machine_info.machine_info() == info
+        assert len(probe_counter) == 2
+        assert json.loads(path.read_text())["boot_id"] == "boot-2"
@@ -1,17 +1,46 @@
 import logging
 import os
-from typing import List, Optional
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Iterator, List, Optional, Sequence
 
 import requests
 
 from .http import (
+    RequestTiming,
     RetryingHTTPClient,
     RetryingHTTPClientBadCredentials,
+    RetryingHTTPClientException,
     RetryingHTTPClientLoginError,
 )
 
 log = logging.getLogger(__name__)
 
+# Put by `ConbenchClient._fetch_range()` after the last page of a range.
+_RANGE_DONE = object()
+
+
+def hex_range_cursors(n: int) -> List[str]:
+    """
+    Return the cursors splitting the space of (uniformly distributed)
+    lowercase hex strings, e.g. MD5 digests, into `n` ranges of equal size;
+    for `ConbenchClient.iter_all_partitioned()`. Ascending order.
+    """
+    return [format(i * 0x10000 // n, "04x") for i in range(1, n)]
+
+
+def uuid7_cursor(t: datetime) -> str:
+    """
+    Return the cursor between UUID7 values (hex representation, as used for
+    Conbench entity IDs) generated before and at/after time `t` (naive:
+    UTC); for `ConbenchClient.iter_all_partitioned()`.
+    """
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=timezone.utc)
+    # UUID7: the first 48 bits are the Unix timestamp in milliseconds.
+    return format(int(t.timestamp() * 1000), "012x") + "0" * 20
+
 
 class ConbenchClientException(Exception):
     """
@@ -35,12 +64,25 @@ class ConbenchClient(RetryingHTTPClient):
 
     Credentials can be left undefined when only reading state from a 'public
     mode' API server.
+
+    Transport options
+    -----------------
+    pool_maxsize
+        Number of connections kept open for reuse, see RetryingHTTPClient.
+    gzip_request_min_bytes
+        Send JSON request bodies of at least that size gzip-compressed.
+    on_request_timing
+        Called with a RequestTiming object after each HTTP request.
     """
 
     # We want each request to be retried for up to ~30 minutes, also
     # see https://github.com/conbench/conbench/issues/800
     default_retry_for_seconds = 30 * 60
 
+    # Retry deadline for feature probes (see supports_benchmark_results_batch()):
+    # a probe that fails is not an error, so do not hold up the caller.
+    probe_retry_for_seconds = 30
+
     # Note(JP): we bumped the recv timeout from 10 to 75 seconds to err on side
     # of caution (remove stress from DB, at the cost of potentially
     # longer-running jobs, and at the cost of time-between-useful-logmsgs). Now
@@ -63,6 +105,9 @@ class ConbenchClient(RetryingHTTPClient):
         email: Optional[str] = None,
         password: Optional[str] = None,
         default_retry_for_seconds=None,
+        pool_maxsize: Optional[int] = None,
+        gzip_request_min_bytes: Optional[int] = None,
+        on_request_timing: Optional[Callable[[RequestTiming], None]] = None,
     ):
         # If this library is embedded into a Python program that has stdlib
         # logging not set up yet (no root logger configured) then this call
@@ -84,7 +129,15 @@ class ConbenchClient(RetryingHTTPClient):
         # like https://conbench.ursa.dev/api
         self._url = url + "/api"
 
-        super().__init__()
+        # Cached result of supports_benchmark_results_batch().
+        self._supports_batch: Optional[bool] = None
+
+        if pool_maxsize:
+            self.pool_maxsize = pool_maxsize
+        if gzip_request_min_bytes is not None:
+            self.gzip_request_min_bytes = gzip_request_min_bytes
+
+        super().__init__(on_request_timing=on_request_timing)
 
         if default_retry_for_seconds:
             assert isinstance(default_retry_for_seconds, (float, int))
@@ -168,8 +221,8 @@ class ConbenchClient(RetryingHTTPClient):
                     "credentials not set via parameters or the environment"
                 )
 
-        self.session = requests.Session()
-
+        # Note: keep using the existing session (and its pooled connections).
+        # The login response sets a fresh session cookie.
         login_result = self._make_request_retry_until_deadline(
             method="POST",
             # Trailing slash is important so that we do not get redirected.
@@ -204,13 +257,209 @@ class ConbenchClient(RetryingHTTPClient):
         Return the deserialized concatenation of the JSON data or raise an exception.
 
         `params` can be used to pass URL query parameters, including `"page_size"`. If
-        `"cursor"` is given in `params`, it will be overwritten after the first request.
+        `"cursor"` is given in `params`, it is used for the first request.
+
+        See `iter_all()` for processing the items without holding all of them
+        in memory.
+        """
+        return list(self.iter_all(path, params))
+
+    def iter_all(
+        self, path: str, params: Optional[dict] = None, prefetch: int = 1
+    ) -> Iterator[dict]:
+        """
+        Like `get_all()`, but yield the items as pages arrive. While the
+        caller processes the items of one page, subsequent pages are fetched
+        in the background: up to `prefetch` pages are kept ready (plus the one
+        being fetched).
+
+        Memory usage is bound by the page size, independent of the total
+        number of items.
+        """
+        return self.iter_all_partitioned(path, [], "", params, prefetch=prefetch)
+
+    def iter_all_partitioned(
+        self,
+        path: str,
+        cursors: Sequence[str],
+        key: str,
+        params: Optional[dict] = None,
+        descending: bool = False,
+        prefetch: int = 1,
+    ) -> Iterator[dict]:
+        """
+        Like `iter_all()`, but split the key space into ranges and paginate
+        through them concurrently (one request in flight per range). This
+        requires an endpoint whose cursor can be derived: items are ordered by
+        (and the cursor value is) the top-level item property `key`, and a
+        page contains the items after the cursor value.
+
+        `cursors` are the start cursors of the second, third, ... range, in
+        traversal order (ascending, or with `descending=True` descending).
+        Each range ends at the start cursor of the next one. See
+        `hex_range_cursors()` and `uuid7_cursor()` for deriving them.
+
+        Items are yielded in the same order as with `iter_all()`. Each range
+        buffers at most `prefetch` pages ahead of the caller.
+
+        Examples:
+
+            # Comparisons: ordered by history fingerprint (md5 hex digest).
+            client.iter_all_partitioned(
+                f"/compare/runs/{baseline_id}...{contender_id}/",
+                hex_range_cursors(4),
+                "history_fingerprint",
+                {"page_size": 500},
+            )
+
+            # Benchmark results: ordered by ID (UUID7), latest first.
+            client.iter_all_partitioned(
+                "/benchmark-results/",
+                [uuid7_cursor(t) for t in (end_of_week_2, end_of_week_1)],
+                "id",
+                {"run_id": run_id, "page_size": 1000},
+                descending=True,
+            )
         """
+        if prefetch < 1:
+            raise ValueError("prefetch must be at least 1")
+
         params = params or {}
-        resp_json = super().get(path, params)
-        data = resp_json["data"]
-        while resp_json["metadata"]["next_page_cursor"]:
-            params["cursor"] = resp_json["metadata"]["next_page_cursor"]
-            resp_json = super().get(path, params)
-            data += resp_json["data"]
-        return data
+        starts: List[Optional[str]] = [params.get("cursor"), *cursors]
+        stops: List[Optional[str]] = [*cursors, None]
+        queues: List["queue.Queue"] = [queue.Queue(maxsize=prefetch) for _ in starts]
+        cancelled = threading.Event()
+
+        threads = [
+            threading.Thread(
+                target=self._fetch_range,
+                args=(path, params, start, stop, key, descending, q, cancelled),
+                daemon=True,
+            )
+            for start, stop, q in zip(starts, stops, queues)
+        ]
+        for t in threads:
+            t.start()
+
+        try:
+            for q in queues:
+                while True:
+                    page = q.get()
+                    if page is _RANGE_DONE:
+                        break
+                    if isinstance(page, Exception):
+                        raise page
+                    yield from page
+        finally:
+            # Also if the caller stopped iterating early: let the remaining
+            # threads quit (without waiting for them).
+            cancelled.set()
+
+    def _fetch_range(
+        self,
+        path: str,
+        params: dict,
+        start: Optional[str],
+        stop: Optional[str],
+        key: str,
+        descending: bool,
+        out: "queue.Queue",
+        cancelled: threading.Event,
+    ) -> None:
+        """
+        Paginate from cursor `start` to the item with key `stop` (inclusive;
+        None: to the end), put pages (lists of items) into `out`, then
+        `_RANGE_DONE`. Put an exception instead if one was raised.
+        """
+
+        def beyond_stop(value: str) -> bool:
+            assert stop is not None
+            return value < stop if descending else value > stop
+
+        def put(item) -> bool:
+            while not cancelled.is_set():
+                try:
+                    out.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        cursor = start
+        try:
+            while True:
+                resp_json = self.get(path, {**params, "cursor": cursor})
+                page = resp_json["data"]
+                cursor = resp_json["metadata"]["next_page_cursor"]
+                if stop is not None:
+                    page = [item for item in page if not beyond_stop(item[key])]
+                    if len(page) < len(resp_json["data"]) or cursor == stop:
+                        cursor = None
+                if page and not put(page):
+                    return
+                if not cursor:
+                    break
+        except Exception as exc:
+            put(exc)
+            return
+
+        put(_RANGE_DONE)
+
+    def supports_benchmark_results_batch(self) -> bool:
+        """
+        Return True if the Conbench server advertises the batch submission
+        endpoint (see `post_benchmark_results_batch()`) in its API
+        specification.
+
+        The server is asked once per client (retrying for a short while only);
+        the answer is remembered.
+        """
+        if self._supports_batch is not None:
+            return self._supports_batch
+
+        try:
+            resp = self._make_request(
+                "GET",
+                self._abs_url_from_path("/docs.json"),
+                200,
+                retry_for_seconds=self.probe_retry_for_seconds,
+            )
+            spec = resp.json()
+        except RetryingHTTPClientException as exc:
+            log.info(
+                "could not get API specification, assume no batch endpoint: %s", exc
+            )
+            spec = {}
+
+        self._supports_batch = isinstance(
+            spec, dict
+        ) and "/api/benchmark-results/batch/" in spec.get("paths", {})
+        return self._supports_batch
+
+    def post_benchmark_results_batch(self, results: List[dict]) -> List[dict]:
+        """
+        Submit many benchmark results with one request. Expect a response with
+        status code 200.
+
+        Return one status object per result, in the same order: `{"status":
+        201, "id": ...}`, or `{"status": 400, "description": ...}` if the
+        server rejected that result. Raise an exception if the request as a
+        whole failed.
+        """
+        resp = self._make_request(
+            "POST",
+            self._abs_url_from_path("/benchmark-results/batch/"),
+            200,
+            json=results,
+        )
+        return resp.json()["results"]
+
+    def finish_run(self, run_id: str) -> None:
+        """
+        Tell the Conbench server that all results of the run `run_id` were
+        submitted (so that it can start comparing the run against its
+        baseline runs). Expect a response with status code 202.
+        """
+        self._make_request(
+            "POST", self._abs_url_from_path(f"/runs/{run_id}/finish/"), 202
+        )
@@ -1,10 +1,15 @@
+import dataclasses
+import gzip
 import logging
+import threading
 import time
 from abc import ABC, abstractmethod
 from json import dumps as jsondumps
-from typing import Dict, List, Literal, Optional, Tuple, Union
+from typing import Callable, Dict, List, Literal, Optional, Tuple, Union
 
 import requests
+import urllib3
+from requests.adapters import HTTPAdapter
 
 log = logging.getLogger(__name__)
 
@@ -50,6 +55,66 @@ class RetryingHTTPClientNonRetryableResponse(RetryingHTTPClientException):
         self.error_response = error_response
 
 
+@dataclasses.dataclass
+class RequestTiming:
+    """
+    Timing of one HTTP request/response cycle (one attempt, in case of
+    retrying), as passed to `RetryingHTTPClient.on_request_timing`. All
+    durations in seconds.
+    """
+
+    method: str
+    url: str
+    # None if no response was received.
+    status_code: Optional[int]
+    # Establishing a new connection (DNS resolution, TCP connect, TLS
+    # handshake). None if a pooled (kept-alive) connection was reused.
+    connect: Optional[float]
+    # From sending the request until the response headers were parsed. None
+    # if no response was received.
+    ttfb: Optional[float]
+    # Including reading the response body.
+    total: float
+
+
+# Connect duration of the most recently established connection, per thread
+# (connections are established in the thread that emits the request).
+_connect_timing = threading.local()
+
+
+class _TimedHTTPConnection(urllib3.connection.HTTPConnection):
+    def connect(self) -> None:
+        t0 = time.monotonic()
+        super().connect()
+        _connect_timing.seconds = time.monotonic() - t0
+
+
+class _TimedHTTPSConnection(urllib3.connection.HTTPSConnection):
+    def connect(self) -> None:
+        t0 = time.monotonic()
+        super().connect()
+        _connect_timing.seconds = time.monotonic() - t0
+
+
+class _TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter recording connect durations, see RequestTiming."""
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
 class RetryingHTTPClient(ABC):
     """
     HTTP client abstraction tuned towards use cases in the context of
@@ -64,11 +129,34 @@ class RetryingHTTPClient(ABC):
     timeout_login_request: Tuple[float, float]
     timeout_long_running_requests: Tuple[float, float]
 
-    def __init__(self) -> None:
+    # Maximum number of connections (per host) kept open for reuse. Should be
+    # at least the number of concurrent requests emitted via one client
+    # instance; otherwise connections are closed after use and new ones need
+    # to be established.
+    pool_maxsize: int = 16
+
+    # Send JSON request bodies of at least that many bytes gzip-compressed
+    # (`Content-Encoding: gzip`). None: never compress.
+    gzip_request_min_bytes: Optional[int] = None
+
+    def __init__(
+        self, on_request_timing: Optional[Callable[[RequestTiming], None]] = None
+    ) -> None:
+        # Called with timing details after each HTTP request/response cycle.
+        self.on_request_timing = on_request_timing
+
         # This is to retain state across request, mainly authentication state.
         # self._login_or_raise() has to persist its authentication state here,
-        # via e.g. cookies.
+        # via e.g. cookies. It also holds the pool of kept-alive connections:
+        # keep using this session for the lifetime of this client.
         self.session = requests.Session()
+        adapter = _TimedHTTPAdapter(pool_maxsize=self.pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._login_lock = threading.Lock()
+        # Incremented upon each (re)login in view of a 401 response.
+        self._login_generation = 0
 
     @property
     @abstractmethod
@@ -84,9 +172,8 @@ class RetryingHTTPClient(ABC):
         """
         Perform login.
 
-        Is expected to set self.session to an instance of requests.Session.
-
-        Persist authentication state in self.session.
+        Persist authentication state in self.session (do not replace
+        self.session: that would drop the pooled connections).
 
         Raise RetryingHTTPClientBadCredentials or RetryingHTTPClientLoginError.
 
@@ -174,6 +261,7 @@ class RetryingHTTPClient(ABC):
         url: str,
         expected_status_code: int,
         # body: Optional[Union[Dict, List]] = None,
+        retry_for_seconds: Optional[float] = None,
         **kwargs,
     ) -> requests.Response:
         """
@@ -200,10 +288,26 @@ class RetryingHTTPClient(ABC):
         error response details to have been logged (that's the design trade-off
         of this client implementation: it does opinionated centralized error
         handling).
+
+        `retry_for_seconds`: retry deadline for this request, instead of
+        `default_retry_for_seconds`.
         """
+        if "json" in kwargs and self.gzip_request_min_bytes is not None:
+            body = jsondumps(kwargs.pop("json")).encode("utf-8")
+            headers = {**kwargs.pop("headers", {}), "Content-Type": "application/json"}
+            if len(body) >= self.gzip_request_min_bytes:
+                body = gzip.compress(body, compresslevel=5)
+                headers["Content-Encoding"] = "gzip"
+            kwargs.update(data=body, headers=headers)
+
         # Assume that authentication state is good (it might not be).
+        login_generation = self._login_generation
         result = self._make_request_retry_until_deadline(
-            method, url, expected_status_code, **kwargs
+            method,
+            url,
+            expected_status_code,
+            retry_for_seconds=retry_for_seconds,
+            **kwargs,
         )
 
         if result != "401":
@@ -213,11 +317,23 @@ class RetryingHTTPClient(ABC):
         # or that that presented authentication proof was bad (e.g., expired).
         # Trigger machinery for obtaining fresh authentication proof.
         log.info("got a 401 response during non-login request, login (again)")
-        self._login_or_raise()
+        # Concurrent requests may all get a 401 response: do not log in
+        # concurrently, and only once (skip if another thread logged in since
+        # this request was sent).
+        with self._login_lock:
+            if self._login_generation == login_generation:
+                self._login_or_raise()
+                self._login_generation += 1
+            else:
+                log.info("logged in by another thread meanwhile")
 
         log.info("login succeeded, repeat earlier request")
         result = self._make_request_retry_until_deadline(
-            method, url, expected_status_code, **kwargs
+            method,
+            url,
+            expected_status_code,
+            retry_for_seconds=retry_for_seconds,
+            **kwargs,
         )
         if result != "401":
             return result
@@ -231,6 +347,7 @@ class RetryingHTTPClient(ABC):
         method: TypeHTTPMethods,
         url: str,
         expected_status_code: int,
+        retry_for_seconds: Optional[float] = None,
         # body: Optional[Union[Dict, List]] = None,
         **kwargs,
     ) -> Union[Literal["401"], requests.Response]:
@@ -254,8 +371,10 @@ class RetryingHTTPClient(ABC):
         requests.session.request(...)
         """
 
+        if retry_for_seconds is None:
+            retry_for_seconds = self.default_retry_for_seconds  # 30 * 60
         t0 = time.monotonic()
-        deadline = t0 + self.default_retry_for_seconds  # 30 * 60
+        deadline = t0 + retry_for_seconds
         cycle: int = 0
 
         log.info("try: %s to %s", method, url)
@@ -319,6 +438,7 @@ class RetryingHTTPClient(ABC):
             kwargs["timeout"] = self.timeout_long_running_requests
 
         t0 = time.monotonic()
+        _connect_timing.seconds = None
 
         # The call to `request()` below is expected to raise exceptions
         # deriving from `requests.exceptions.RequestException`, all
@@ -342,12 +462,15 @@ class RetryingHTTPClient(ABC):
         try:
             resp = self.session.request(method=method, url=url, **kwargs)
         except requests.exceptions.RequestException as exc:
+            self._report_timing(method, url, None, t0)
             log.info(
                 "error during request/response cycle (treat as retryable, retry soon): %s",
                 exc,
             )
             return "retry"
 
+        self._report_timing(method, url, resp, t0)
+
         # Got an HTTP response. In the scope below, `resp` reflects that.
         log.info(
             "%s request to %s: took %.4f s, response status code: %s",
@@ -392,6 +515,29 @@ class RetryingHTTPClient(ABC):
 
         raise RetryingHTTPClientNonRetryableResponse(message=msg, error_response=resp)
 
+    def _report_timing(
+        self,
+        method: str,
+        url: str,
+        resp: Optional[requests.Response],
+        t0: float,
+    ) -> None:
+        if self.on_request_timing is None:
+            return
+
+        timing = RequestTiming(
+            method=method,
+            url=url,
+            status_code=resp.status_code if resp is not None else None,
+            connect=_connect_timing.seconds,
+            ttfb=resp.elapsed.total_seconds() if resp is not None else None,
+            total=time.monotonic() - t0,
+        )
+        try:
+            self.on_request_timing(timing)
+        except Exception as exc:
+            log.warning("on_request_timing hook raised an exception: %s", exc)
+
     def _retryable_status_code(self, code: int) -> bool:
         """
         Do we (want to) consider this response as retryable, based on the
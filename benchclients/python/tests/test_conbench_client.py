@@ -1,8 +1,21 @@
+import concurrent.futures
+import gzip
+import hashlib
+import json
 import os
+import threading
+from datetime import datetime, timezone
 
 import pytest
-from benchclients.conbench import ConbenchClientException
-from benchclients.http import RetryingHTTPClientDeadlineReached
+from benchclients.conbench import (
+    ConbenchClientException,
+    hex_range_cursors,
+    uuid7_cursor,
+)
+from benchclients.http import (
+    RetryingHTTPClientDeadlineReached,
+    RetryingHTTPClientNonRetryableResponse,
+)
 from pytest_httpserver import HTTPServer
 from pytest_httpserver.httpserver import HandlerType
 from werkzeug.wrappers import Response
@@ -52,6 +65,103 @@ def test_cc_get_all(httpserver: HTTPServer):
     assert c.get_all("/foobar") == [{"a": 1}, {"b": 2}, {"c": 3}]
 
 
+def _paginated_handler(keys, descending):
+    """Serve `keys` like Conbench serves entities: ordered, after the cursor."""
+    keys = sorted(keys, reverse=descending)
+
+    def handler(request):
+        cursor = request.args.get("cursor")
+        page_size = int(request.args["page_size"])
+        if cursor:
+            keys_after = [k for k in keys if (k < cursor if descending else k > cursor)]
+        else:
+            keys_after = keys
+        page = keys_after[:page_size]
+        next_page_cursor = page[-1] if len(page) == page_size else None
+        return Response(
+            json.dumps(
+                {
+                    "data": [{"id": k} for k in page],
+                    "metadata": {"next_page_cursor": next_page_cursor},
+                }
+            ),
+            content_type="application/json",
+        )
+
+    return handler
+
+
+def test_cc_iter_all(httpserver: HTTPServer):
+    set_cb_base_url(httpserver)
+    c = ConbenchClient()
+    keys = [f"{i:04x}" for i in range(25)]
+    httpserver.expect_request("/api/foobar").respond_with_handler(
+        _paginated_handler(keys, False)
+    )
+    items = c.iter_all("/foobar", {"page_size": 10})
+    assert next(items) == {"id": "0000"}
+    assert [i["id"] for i in items] == keys[1:]
+    assert len(httpserver.log) == 3
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_cc_iter_all_partitioned(httpserver: HTTPServer, descending):
+    set_cb_base_url(httpserver)
+    c = ConbenchClient()
+    keys = [hashlib.md5(str(i).encode()).hexdigest() for i in range(200)]
+    httpserver.expect_request("/api/foobar").respond_with_handler(
+        _paginated_handler(keys, descending)
+    )
+    cursors = hex_range_cursors(4)
+    assert cursors == ["4000", "8000", "c000"]
+    if descending:
+        cursors.reverse()
+
+    items = c.iter_all_partitioned(
+        "/foobar", cursors, "id", {"page_size": 20}, descending=descending
+    )
+    assert [i["id"] for i in items] == sorted(keys, reverse=descending)
+    requested_cursors = {req.args.get("cursor") for req, _ in httpserver.log}
+    assert set(cursors) < requested_cursors
+
+
+def test_cc_iter_all_partitioned_stop_early(httpserver: HTTPServer):
+    set_cb_base_url(httpserver)
+    c = ConbenchClient()
+    keys = [f"{i:04x}" for i in range(0, 0x10000, 0x100)]
+    httpserver.expect_request("/api/foobar").respond_with_handler(
+        _paginated_handler(keys, False)
+    )
+    items = c.iter_all_partitioned(
+        "/foobar", hex_range_cursors(2), "id", {"page_size": 5}
+    )
+    assert [next(items)["id"] for _ in range(3)] == keys[:3]
+    items.close()
+
+
+def test_cc_iter_all_partitioned_error(httpserver: HTTPServer):
+    set_cb_base_url(httpserver)
+    c = ConbenchClient()
+    httpserver.expect_request(
+        "/api/foobar", query_string={"cursor": "8000"}
+    ).respond_with_data("", 404)
+    httpserver.expect_request("/api/foobar").respond_with_json(
+        {"data": [{"id": "0001"}], "metadata": {"next_page_cursor": None}}
+    )
+    items = c.iter_all_partitioned("/foobar", hex_range_cursors(2), "id")
+    assert next(items) == {"id": "0001"}
+    with pytest.raises(RetryingHTTPClientNonRetryableResponse):
+        list(items)
+
+
+def test_uuid7_cursor():
+    t = datetime(2023, 6, 3, tzinfo=timezone.utc)
+    cursor = uuid7_cursor(t)
+    assert len(cursor) == 32
+    assert int(cursor[:12], 16) == 1685750400000
+    assert uuid7_cursor(t.replace(tzinfo=None)) == cursor
+
+
 @pytest.mark.parametrize("respjson", [[1, 2], {"1": "2"}])
 def test_cc_post(httpserver: HTTPServer, respjson):
     set_cb_base_url(httpserver)
@@ -105,6 +215,36 @@ def test_cc_get_401(httpserver: HTTPServer):
         assert len(httpserver.log) == 1
 
 
+def test_cc_concurrent_401_login_once(
+    monkeypatch: pytest.MonkeyPatch, httpserver: HTTPServer
+):
+    set_cb_base_url(httpserver)
+    c = ConbenchClient()
+    logins = []
+    monkeypatch.setattr(c, "_login_or_raise", lambda: logins.append(1))
+
+    n_threads = 4
+    # All requests get a 401 response before any thread logs in.
+    got_401 = threading.Barrier(n_threads)
+
+    def _request(method, url, expected_status_code, **kwargs):
+        if not logins:
+            got_401.wait(timeout=10)
+            return "401"
+        return "ok"
+
+    monkeypatch.setattr(c, "_make_request_retry_until_deadline", _request)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=n_threads) as pool:
+        futures = [
+            pool.submit(c._make_request, "GET", c._abs_url_from_path("/x"), 200)
+            for _ in range(n_threads)
+        ]
+        assert [f.result() for f in futures] == ["ok"] * n_threads
+
+    assert len(logins) == 1
+
+
 def test_cc_performs_login_when_env_is_set(
     monkeypatch: pytest.MonkeyPatch, httpserver: HTTPServer
 ):
@@ -160,3 +300,71 @@ def test_cc_get_500(httpserver: HTTPServer):
     httpserver.expect_request("/api/foobar").respond_with_response(Response(500))
     with pytest.raises(RetryingHTTPClientDeadlineReached, match="giving up after"):
         assert c.get("/foobar") == [1, 2]
+
+
+@pytest.mark.parametrize(
+    "status, paths, expected",
+    [
+        (200, {"/api/benchmark-results/batch/": {}}, True),
+        (200, {"/api/benchmarks/": {}}, False),
+        (404, {}, False),
+    ],
+)
+def test_cc_supports_benchmark_results_batch(
+    httpserver: HTTPServer, status, paths, expected
+):
+    set_cb_base_url(httpserver)
+    c = ConbenchClient()
+    httpserver.expect_request("/api/docs.json").respond_with_json(
+        {"paths": paths}, status=status
+    )
+    assert c.supports_benchmark_results_batch() is expected
+    # Remembered.
+    assert c.supports_benchmark_results_batch() is expected
+    assert len(httpserver.log) == 1
+
+
+def test_cc_supports_benchmark_results_batch_short_deadline(
+    monkeypatch: pytest.MonkeyPatch, httpserver: HTTPServer
+):
+    set_cb_base_url(httpserver)
+    c = ConbenchClient()
+    monkeypatch.setattr(c, "probe_retry_for_seconds", 1)
+    # Retryable error: give up after `probe_retry_for_seconds`, not after the
+    # default deadline of 30 minutes.
+    httpserver.expect_request("/api/docs.json").respond_with_data("", status=503)
+    assert c.supports_benchmark_results_batch() is False
+    n_requests = len(httpserver.log)
+    assert n_requests >= 1
+    assert c.supports_benchmark_results_batch() is False
+    assert len(httpserver.log) == n_requests
+
+
+def test_cc_request_timing_hook(httpserver: HTTPServer):
+    set_cb_base_url(httpserver)
+    timings = []
+    c = ConbenchClient(on_request_timing=timings.append)
+    httpserver.expect_request("/api/foobar").respond_with_json([1])
+    c.get("/foobar")
+    c.get("/foobar")
+    assert [t.status_code for t in timings] == [200, 200]
+    assert timings[0].method == "GET"
+    assert timings[0].url.endswith("/api/foobar")
+    assert timings[0].connect is not None
+    assert all(t.total >= t.ttfb >= 0 for t in timings)
+
+
+@pytest.mark.parametrize("min_bytes, compressed", [(0, True), (10**6, False)])
+def test_cc_post_gzip_request_body(httpserver: HTTPServer, min_bytes, compressed):
+    set_cb_base_url(httpserver)
+    c = ConbenchClient(gzip_request_min_bytes=min_bytes)
+    httpserver.expect_request("/api/foobar", method="POST").respond_with_json(
+        {}, status=201
+    )
+    c.post("/foobar", {"ql": "biz"})
+
+    req, _ = httpserver.log[0]
+    assert req.headers["Content-Type"] == "application/json"
+    assert (req.headers.get("Content-Encoding") == "gzip") is compressed
+    body = gzip.decompress(req.get_data()) if compressed else req.get_data()
+    assert json.loads(body) == {"ql": "biz"}
@@ -1,18 +1,40 @@
+from json import load
 from pathlib import Path
 
 import click
+from benchclients.conbench import ConbenchClient, ConbenchClientException
+from benchclients.http import RetryingHTTPClientException
+from benchclients.logging import log
 
 from ._start import STATEFILE
 from .utils import ENV_VAR_HELP
 
+# Give up retrying after that long: signaling is not critical, and should not
+# hold up the benchmark pipeline.
+FINISH_RETRY_SECONDS = 60
+
+
+def signal_run_finished(run_id: str) -> None:
+    """
+    Tell Conbench that all results of the run were submitted (so that it can
+    start comparing the run against its baseline runs). Not critical: log a
+    warning on failure (e.g. an older Conbench server without this endpoint).
+    """
+    try:
+        client = ConbenchClient(default_retry_for_seconds=FINISH_RETRY_SECONDS)
+        client.finish_run(run_id)
+    except (ConbenchClientException, RetryingHTTPClientException) as exc:
+        log.warning("could not signal that run %s is finished: %s", run_id, exc)
+
 
 @click.command(
     help=f"""
 Finalize and close a run
 
 This method is part of a workflow for posting a set of results to a Conbench
-API as a run. It removes a statefile called {STATEFILE} in the current working
-directory created by a call to `benchconnect start run`, closing a run.
+API as a run. It tells the Conbench server that all results of the run have
+been submitted, and removes a statefile called {STATEFILE} in the current
+working directory created by a call to `benchconnect start run`, closing a run.
 
 `benchconnect start run` must be called before this method. Because this method
 requires the statefile, changing working directories or deleting the statefile
@@ -38,6 +60,13 @@ Other methods in this workflow:
 )
 @click.argument("ndjson", required=False)
 def finish_run(json: str, path: str, ndjson: str) -> None:
-    "Close a run by deleting statefile"
+    "Close a run by signaling Conbench and deleting statefile"
     statefile_path = Path(STATEFILE).resolve()
+
+    with open(statefile_path, "r") as f:
+        run_id = load(f).get("run_id")
+
+    if run_id:
+        signal_run_finished(run_id=run_id)
+
     statefile_path.unlink()
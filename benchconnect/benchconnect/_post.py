@@ -1,7 +1,28 @@
+import json as jsonlib
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
 import click
 from benchclients.conbench import ConbenchClient
+from benchclients.http import RetryingHTTPClientException
+from benchclients.logging import fatal_and_log, log
 
-from .utils import ENV_VAR_HELP, load_json
+from .utils import ENV_VAR_HELP, iter_json_texts
+
+# Endpoints for which results can be sent via the batch submission endpoint
+RESULT_ENDPOINTS = ("/benchmark-results/", "/benchmarks/")
 
 
 def post_blob(json: dict, endpoint: str, client: ConbenchClient) -> None:
@@ -9,21 +30,239 @@ def post_blob(json: dict, endpoint: str, client: ConbenchClient) -> None:
     client.post(path=endpoint, json=json)
 
 
-def poster(json: str, path: str, ndjson: str, endpoint: str) -> None:
+class ResumeFile:
+    """
+    Append-only record of which blobs of an input (identified by their
+    position in it) were posted, and which failed.
+
+    One JSON object per line: `{"posted": [indices]}` or `{"failed": [indices],
+    "error": "..."}`. Each line is flushed once written, so that the record is
+    accurate also if the process is terminated. When posting the same input
+    again, blobs recorded as posted are skipped.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.posted: Set[int] = set()
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        self.posted.update(jsonlib.loads(line).get("posted", []))
+            log.info(
+                "resume file %s: skip %s blobs posted before",
+                self.path,
+                len(self.posted),
+            )
+        self._f = open(self.path, "a")
+
+    def record(self, indices: List[int], error: Optional[str]) -> None:
+        if error is None:
+            entry: Dict[str, Any] = {"posted": indices}
+        else:
+            entry = {"failed": indices, "error": error}
+        self._f.write(jsonlib.dumps(entry) + "\n")
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def _chunks(
+    blobs: Iterable[Union[str, dict]], size: int, skip: Set[int]
+) -> Iterator[List[Tuple[int, Union[str, dict]]]]:
+    "Group (index, blob) pairs, leave out the indices in `skip`"
+    chunk: List[Tuple[int, Union[str, dict]]] = []
+    for i, blob in enumerate(blobs):
+        if i in skip:
+            continue
+        chunk.append((i, blob))
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def post_blobs(
+    blobs: Iterable[Union[str, dict]],
+    endpoint: str,
+    client: ConbenchClient,
+    max_in_flight: int = 8,
+    batch_size: int = 1,
+    resume_file: Optional[str] = None,
+    transform: Optional[Callable[[dict], dict]] = None,
+) -> Tuple[int, int]:
+    """
+    Post blobs of JSON (deserialized, or JSON text) to Conbench, with up to
+    `max_in_flight` concurrent requests. `blobs` is consumed as requests
+    complete, so that only the blobs of in-flight requests are held in memory.
+
+    For result endpoints, if `batch_size` > 1 and the Conbench server supports
+    batch submission, up to `batch_size` blobs are sent with one request.
+
+    `transform` (e.g. augmenting a result) is applied to each blob before
+    posting it. With `resume_file`, blobs recorded there as posted (by an
+    earlier call for the same input) are skipped, see `ResumeFile`.
+
+    Try to post all blobs: invalid JSON text or an exception raised by
+    `transform` fails that blob only. Return the number of blobs posted and
+    the number of blobs that could not be posted.
+    """
+    use_batch = (
+        batch_size > 1
+        and endpoint in RESULT_ENDPOINTS
+        and client.supports_benchmark_results_batch()
+    )
+    if not use_batch:
+        batch_size = 1
+
+    resume = ResumeFile(resume_file) if resume_file else None
+    skip = resume.posted if resume else set()
+
+    def _prepare(blob: Union[str, dict]) -> dict:
+        json = jsonlib.loads(blob) if isinstance(blob, str) else blob
+        return transform(json) if transform else json
+
+    def _post_chunk(chunk: List[Tuple[int, Union[str, dict]]]) -> List[Optional[str]]:
+        "Return the error for each blob (None: posted)"
+        errors: List[Optional[str]] = []
+        jsons: List[dict] = []
+        for _, blob in chunk:
+            try:
+                jsons.append(_prepare(blob))
+                errors.append(None)
+            except Exception as exc:
+                errors.append(f"invalid blob: {exc}")
+        if not jsons:
+            return errors
+
+        try:
+            if use_batch:
+                statuses = client.post_benchmark_results_batch(jsons)
+            else:
+                post_blob(json=jsons[0], endpoint=endpoint, client=client)
+                statuses = [{"status": 201}]
+        except RetryingHTTPClientException as exc:
+            return [str(exc) if error is None else error for error in errors]
+
+        # Statuses are in the order of the valid blobs.
+        status_iter = iter(statuses)
+        for pos, error in enumerate(errors):
+            if error is None:
+                status = next(status_iter)
+                if status["status"] != 201:
+                    errors[pos] = status.get("description", str(status))
+        return errors
+
+    n_posted = 0
+    n_failed = 0
+
+    def _collect(future: "Future[List[Optional[str]]]", indices: List[int]) -> None:
+        nonlocal n_posted, n_failed
+        try:
+            errors = future.result()
+        except Exception as exc:
+            errors = [f"unexpected error: {exc}"] * len(indices)
+        posted = [i for i, error in zip(indices, errors) if error is None]
+        failed = [(i, error) for i, error in zip(indices, errors) if error is not None]
+        n_posted += len(posted)
+        n_failed += len(failed)
+        for i, error in failed:
+            log.warning("could not post blob %s: %s", i, error)
+        if resume:
+            if posted:
+                resume.record(posted, None)
+            for i, error in failed:
+                resume.record([i], error)
+
+    in_flight: Dict["Future[List[Optional[str]]]", List[int]] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            try:
+                for chunk in _chunks(blobs, batch_size, skip):
+                    if len(in_flight) >= max_in_flight:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            _collect(future, in_flight.pop(future))
+                    in_flight[pool.submit(_post_chunk, chunk)] = [i for i, _ in chunk]
+            finally:
+                # Also if reading the input failed: record the outcome of every
+                # request that was sent.
+                for future in list(in_flight):
+                    _collect(future, in_flight.pop(future))
+    finally:
+        if resume:
+            resume.close()
+
+    return n_posted, n_failed
+
+
+def poster(
+    json: str,
+    path: str,
+    ndjson: str,
+    endpoint: str,
+    max_in_flight: int = 8,
+    batch_size: int = 1,
+    resume_file: Optional[str] = None,
+    transform: Optional[Callable[[dict], dict]] = None,
+) -> None:
     "Take either a blob or a path and post the resulting JSON to Conbench"
-    client = ConbenchClient()
+    client = ConbenchClient(pool_maxsize=max_in_flight)
+
+    n_posted, n_failed = post_blobs(
+        iter_json_texts(json=json, path=path, ndjson=ndjson),
+        endpoint=endpoint,
+        client=client,
+        max_in_flight=max_in_flight,
+        batch_size=batch_size,
+        resume_file=resume_file,
+        transform=transform,
+    )
+    log.info("posted %s blobs", n_posted)
+    if n_failed:
+        hint = f" (run again with `--resume-file {resume_file}` to retry)"
+        fatal_and_log(
+            f"{n_failed} blobs could not be posted" + (hint if resume_file else ""),
+            click.ClickException,
+        )
 
-    blob_list = load_json(json=json, path=path, ndjson=ndjson)
 
-    for blob in blob_list:
-        post_blob(json=blob, endpoint=endpoint, client=client)
+def posting_options(f: Callable) -> Callable:
+    "Command line options for `poster()`"
+    f = click.option(
+        "--max-in-flight",
+        default=8,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Maximum number of concurrent requests",
+    )(f)
+    f = click.option(
+        "--batch-size",
+        default=500,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Maximum number of results per request, if the Conbench server supports batch submission",
+    )(f)
+    f = click.option(
+        "--resume-file",
+        default=None,
+        type=click.Path(dir_okay=False, resolve_path=True),
+        help="Record which results were posted in this file; when called again with the same input and file, skip them",
+    )(f)
+    return f
 
 
 @click.command(
     help="""
 Post benchmark result JSON[s] to a Conbench API
 
-Specify either `--json` or `--path`.
+Specify either `--json` or `--path`, or pass newline-delimited JSON (as an
+argument or via stdin). Files with a `.ndjson` or `.jsonl` suffix are read as
+newline-delimited JSON. Newline-delimited JSON is read line by line and
+results are posted concurrently, grouped into batch requests if the Conbench
+server supports it.
 
 JSON will not be altered before posting; to fill in missing fields, see
 `benchconnect augment result --help`.
@@ -39,10 +278,26 @@ JSON will not be altered before posting; to fill in missing fields, see
     type=click.Path(exists=True, resolve_path=True),
     help="Path to a JSON file or directory of JSON files containing results to send to a Conbench API",
 )
+@posting_options
 @click.argument(
     "ndjson",
     required=False,
     default=None,  # help="Newline-delimited JSON of results to post"
 )
-def result(json: dict, path: str, ndjson: str):
-    poster(json=json, path=path, ndjson=ndjson, endpoint="/benchmark-results/")
+def result(
+    json: dict,
+    path: str,
+    ndjson: str,
+    max_in_flight: int,
+    batch_size: int,
+    resume_file: Optional[str],
+):
+    poster(
+        json=json,
+        path=path,
+        ndjson=ndjson,
+        endpoint="/benchmark-results/",
+        max_in_flight=max_in_flight,
+        batch_size=batch_size,
+        resume_file=resume_file,
+    )
@@ -1,5 +1,6 @@
 from json import load
 from pathlib import Path
+from typing import Optional
 
 import click
 from benchadapt.result import BenchmarkResult
@@ -7,13 +8,13 @@ from benchclients.conbench import ConbenchClient
 from benchclients.logging import fatal_and_log
 
 from ._augment import augment_blob
-from ._post import post_blob
+from ._post import post_blob, poster, posting_options
 from ._start import STATEFILE
-from .utils import ENV_VAR_HELP, load_json
+from .utils import ENV_VAR_HELP
 
 
-def augment_and_post_result(json: dict, client: ConbenchClient) -> None:
-    "Augment a result from the statefile and class, then post it"
+def load_statefile() -> dict:
+    "Load the run metadata from the statefile"
     statefile_path = Path(STATEFILE).resolve()
 
     if not statefile_path.exists():
@@ -23,8 +24,11 @@ def augment_and_post_result(json: dict, client: ConbenchClient) -> None:
         )
 
     with open(statefile_path, "r") as f:
-        abstract_result = load(f)
+        return load(f)
 
+
+def augment_result(json: dict, abstract_result: dict) -> dict:
+    "Augment a result from the run metadata and class"
     for result_key in abstract_result:
         if result_key in json and abstract_result[result_key] != json[result_key]:
             fatal_and_log(
@@ -37,7 +41,12 @@ def augment_and_post_result(json: dict, client: ConbenchClient) -> None:
 
         json[result_key] = abstract_result[result_key]
 
-    augmented = augment_blob(json=json, cls=BenchmarkResult)
+    return augment_blob(json=json, cls=BenchmarkResult)
+
+
+def augment_and_post_result(json: dict, client: ConbenchClient) -> None:
+    "Augment a result from the statefile and class, then post it"
+    augmented = augment_result(json=json, abstract_result=load_statefile())
 
     post_blob(json=augmented, endpoint="/benchmarks/", client=client)
 
@@ -55,7 +64,9 @@ also with `benchadapt.BenchmarkResult`. See `benchmark augment result --help`
 to debug and augment without posting.
 
 `benchconnect start run` must be called before this method, which can be called
-as many times as necessary, with a single blob or multiple. Because it requires
+as many times as necessary, with a single blob or multiple. Newline-delimited
+JSON (e.g. from a `.ndjson` or `.jsonl` file or stdin) is read line by line,
+and results are posted concurrently. Because it requires
 the statefile, changing working directories or deleting the statefile will cause
 this method to fail.
 
@@ -78,10 +89,25 @@ Other methods in this workflow:
     type=click.Path(exists=True, resolve_path=True),
     help="Path to a JSON file or directory of JSON files containing results to augment and send to a Conbench API",
 )
+@posting_options
 @click.argument("ndjson", required=False)
-def submit_result(json: str, path: str, ndjson: str):
-    blob_list = load_json(json=json, path=path, ndjson=ndjson)
-    client = ConbenchClient()
-
-    for blob in blob_list:
-        augment_and_post_result(json=blob, client=client)
+def submit_result(
+    json: str,
+    path: str,
+    ndjson: str,
+    max_in_flight: int,
+    batch_size: int,
+    resume_file: Optional[str],
+):
+    abstract_result = load_statefile()
+
+    poster(
+        json=json,
+        path=path,
+        ndjson=ndjson,
+        endpoint="/benchmarks/",
+        max_in_flight=max_in_flight,
+        batch_size=batch_size,
+        resume_file=resume_file,
+        transform=lambda blob: augment_result(blob, abstract_result),
+    )
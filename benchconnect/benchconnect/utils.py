@@ -1,7 +1,8 @@
+import itertools
 import logging
-from json import dumps, load, loads
+from json import dumps, loads
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, TextIO
 
 import click
 from benchclients.logging import fatal_and_log, log
@@ -18,41 +19,82 @@ Environment variables:
 """
 
 
+# Files with these suffixes are read as newline-delimited JSON (one blob per line)
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+
 def load_json(json: str, path: str, ndjson: str) -> List[Dict[str, Any]]:
     "Load JSON from a string, file path, directory path, or stdin"
+    return list(iter_json(json=json, path=path, ndjson=ndjson))
+
+
+def iter_json(json: str, path: str, ndjson: str) -> Iterator[Dict[str, Any]]:
+    """
+    Like `load_json()`, but yield one blob at a time: newline-delimited JSON
+    from stdin or from a file is read line by line, JSON files in a directory
+    one by one (in order of their names).
+    """
+    for text in iter_json_texts(json=json, path=path, ndjson=ndjson):
+        yield loads(text)
+
+
+def iter_json_texts(json: str, path: str, ndjson: str) -> Iterator[str]:
+    """
+    Like `iter_json()`, but yield the (not yet deserialized) JSON text of each
+    blob, so that the caller can handle invalid JSON per blob.
+    """
+    lines: Iterable[str] = ndjson.strip().splitlines() if ndjson else []
 
     stdin = click.get_text_stream("stdin")
     if not ndjson and not stdin.isatty():
-        ndjson = stdin.read()
+        # Only consume stdin if it is not empty (it might be an empty pipe when
+        # another input is given).
+        first_line = _first_nonblank_line(stdin)
+        if first_line:
+            ndjson = "<stdin>"
+            lines = itertools.chain([first_line], stdin)
 
     if json:
         if path or ndjson:
             log.warning("Multiple inputs supplied! Using `--json`")
 
-        return [loads(json)]
+        yield json
 
     elif ndjson:
         if path:
             log.warning("Multiple inputs supplied! Using `NDJSON`")
 
-        return [loads(blob) for blob in ndjson.strip().splitlines()]
+        yield from _nonblank_lines(lines)
 
     elif path and Path(path).resolve().is_file():
         with open(Path(path).resolve(), "r") as f:
-            return [load(f)]
+            if Path(path).suffix in NDJSON_SUFFIXES:
+                yield from _nonblank_lines(f)
+            else:
+                yield f.read()
 
     elif path and Path(path).resolve().is_dir():
-        json_list = []
-        for filepath in Path(path).resolve().glob("*.json"):
-            with open(filepath, "r") as f:
-                json_list.append(load(f))
-
-        return json_list
+        for filepath in sorted(Path(path).resolve().glob("*.json")):
+            yield filepath.read_text()
 
     else:
         fatal_and_log("No JSON data found!", click.BadParameter)
 
 
+def _first_nonblank_line(stream: TextIO) -> str:
+    "Return the first non-blank line, or an empty string at the end of the stream"
+    for line in stream:
+        if line.strip():
+            return line
+    return ""
+
+
+def _nonblank_lines(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        if line.strip():
+            yield line
+
+
 def print_json(json: dict) -> None:
     "Print JSON nicely"
     click.echo(dumps(json))
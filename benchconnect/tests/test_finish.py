@@ -0,0 +1,46 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+from pytest_httpserver import HTTPServer
+
+from benchconnect import _finish
+from benchconnect._finish import finish_run
+from benchconnect._start import STATEFILE
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def statefile(monkeypatch, tmp_path, httpserver: HTTPServer):
+    monkeypatch.setenv("CONBENCH_URL", httpserver.url_for("/"))
+    monkeypatch.delenv("CONBENCH_EMAIL", raising=False)
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / STATEFILE
+    path.write_text(json.dumps({"run_id": "abc"}))
+    return path
+
+
+def test_finish_run(httpserver: HTTPServer, statefile):
+    httpserver.expect_request("/api/runs/abc/finish/", method="POST").respond_with_data(
+        "", status=202
+    )
+    res = runner.invoke(finish_run)
+    assert res.exit_code == 0, res.output
+    assert len(httpserver.log) == 1
+    assert not statefile.exists()
+
+
+@pytest.mark.parametrize("status", [404, 503])
+def test_finish_run_signal_fails(
+    monkeypatch, httpserver: HTTPServer, statefile, status: int
+):
+    # A retryable error is retried for a short while only.
+    monkeypatch.setattr(_finish, "FINISH_RETRY_SECONDS", 1)
+    httpserver.expect_request("/api/runs/abc/finish/", method="POST").respond_with_data(
+        "", status=status
+    )
+    res = runner.invoke(finish_run)
+    assert res.exit_code == 0, res.output
+    assert httpserver.log
+    assert not statefile.exists()
@@ -0,0 +1,124 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+from pytest_httpserver import HTTPServer
+from werkzeug.wrappers import Request, Response
+
+from benchconnect._post import result
+
+runner = CliRunner()
+
+results = [{"run_id": "abc", "tags": {"name": f"bench-{i}"}} for i in range(7)]
+
+
+@pytest.fixture
+def conbench(monkeypatch, httpserver: HTTPServer):
+    monkeypatch.setenv("CONBENCH_URL", httpserver.url_for("/"))
+    monkeypatch.delenv("CONBENCH_EMAIL", raising=False)
+    return httpserver
+
+
+def advertise_batch_endpoint(httpserver: HTTPServer, supported: bool) -> None:
+    paths = {"/api/benchmark-results/batch/": {}} if supported else {}
+    httpserver.expect_request("/api/docs.json").respond_with_json({"paths": paths})
+
+
+def batch_handler(received: list, reject: set):
+    "Accept the results of a batch request, except for those named in `reject`"
+
+    def handler(request: Request) -> Response:
+        statuses = []
+        for res in request.get_json():
+            received.append(res["tags"]["name"])
+            if res["tags"]["name"] in reject:
+                statuses.append({"status": 400, "description": "bad result"})
+            else:
+                statuses.append({"status": 201, "id": res["tags"]["name"]})
+        return Response(
+            json.dumps({"results": statuses}), content_type="application/json"
+        )
+
+    return handler
+
+
+def test_post_ndjson_file_in_batches_and_resume(conbench: HTTPServer, tmp_path):
+    advertise_batch_endpoint(conbench, supported=True)
+    received: list = []
+    reject = {"bench-2", "bench-5"}
+    conbench.expect_request(
+        "/api/benchmark-results/batch/", method="POST"
+    ).respond_with_handler(batch_handler(received, reject))
+
+    path = tmp_path / "results.ndjson"
+    path.write_text("".join(json.dumps(r) + "\n" for r in results))
+    resume_file = tmp_path / "resume.ndjson"
+    args = ["--path", str(path), "--batch-size", "3", "--resume-file", str(resume_file)]
+
+    res = runner.invoke(result, args=args)
+    assert res.exit_code == 1
+    assert "2 blobs could not be posted" in res.output
+    assert sorted(received) == sorted(r["tags"]["name"] for r in results)
+    # 7 results in batches of at most 3.
+    assert len([r for r, _ in conbench.log if r.path.endswith("/batch/")]) == 3
+
+    # Run again: only the rejected results are posted again.
+    received.clear()
+    reject.clear()
+    res = runner.invoke(result, args=args)
+    assert res.exit_code == 0, res.output
+    assert sorted(received) == ["bench-2", "bench-5"]
+
+    # Run again: nothing left to post.
+    received.clear()
+    res = runner.invoke(result, args=args)
+    assert res.exit_code == 0, res.output
+    assert received == []
+
+
+def test_post_stdin_one_by_one(conbench: HTTPServer):
+    advertise_batch_endpoint(conbench, supported=False)
+    conbench.expect_request("/api/benchmark-results/", method="POST").respond_with_json(
+        {"id": "x"}, status=201
+    )
+
+    ndjson = "\n".join(json.dumps(r) for r in results) + "\n\n"
+    res = runner.invoke(result, args=["--max-in-flight", "3"], input=ndjson)
+    assert res.exit_code == 0, res.output
+    posted = [
+        r.get_json()["tags"]["name"]
+        for r, _ in conbench.log
+        if r.path == "/api/benchmark-results/"
+    ]
+    assert sorted(posted) == sorted(r["tags"]["name"] for r in results)
+
+
+def test_post_ndjson_bad_line_midstream(conbench: HTTPServer, tmp_path):
+    advertise_batch_endpoint(conbench, supported=True)
+    received: list = []
+    conbench.expect_request(
+        "/api/benchmark-results/batch/", method="POST"
+    ).respond_with_handler(batch_handler(received, reject=set()))
+
+    lines = [json.dumps(r) for r in results]
+    lines[3] = '{"run_id": "abc", "tags": '
+    path = tmp_path / "results.ndjson"
+    path.write_text("\n".join(lines) + "\n")
+    resume_file = tmp_path / "resume.ndjson"
+    args = ["--path", str(path), "--batch-size", "2", "--resume-file", str(resume_file)]
+
+    # The invalid line fails on its own, all other results are posted.
+    res = runner.invoke(result, args=args)
+    assert res.exit_code == 1
+    assert "1 blobs could not be posted" in res.output
+    assert sorted(received) == sorted(
+        r["tags"]["name"] for i, r in enumerate(results) if i != 3
+    )
+
+    # After fixing the line, only that result is posted.
+    received.clear()
+    lines[3] = json.dumps(results[3])
+    path.write_text("\n".join(lines) + "\n")
+    res = runner.invoke(result, args=args)
+    assert res.exit_code == 0, res.output
+    assert received == ["bench-3"]
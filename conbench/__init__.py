@@ -13,11 +13,14 @@ in `create_application()` below.
 Also see https://github.com/conbench/conbench/pull/662#discussion_r1097781344
 """
 
+import gzip
 import importlib.metadata as importlib_metadata
+import io
 import json
 import logging
 import os
 import traceback
+import zlib
 from typing import TYPE_CHECKING
 
 import conbench.logger
@@ -173,6 +176,58 @@ def _init_flask_application(app):
                 if needle in haystack:
                     return flask.make_response(("unexpected user agent", 403))
 
+    @app.before_request
+    def decompress_request_body():
+        """
+        Accept gzip-compressed request bodies (`Content-Encoding: gzip`), as
+        sent by benchclients for large JSON documents: replace the request
+        body stream with a decompressing one.
+
+        MAX_CONTENT_LENGTH only limits the compressed size (Content-Length);
+        also limit the decompressed size (emit a 413 response beyond that).
+        """
+        if flask.request.headers.get("Content-Encoding", "").lower() == "gzip":
+            limit = app.config.get("MAX_CONTENT_LENGTH") or MAX_DECOMPRESSED_BYTES
+            flask.request.stream = io.BufferedReader(
+                _SizeLimitedReader(
+                    gzip.GzipFile(fileobj=flask.request.stream, mode="rb"), limit
+                )
+            )
+
+
+# Limit for the size of a decompressed request body if MAX_CONTENT_LENGTH is
+# not set, see decompress_request_body().
+MAX_DECOMPRESSED_BYTES = 512 * 1024 * 1024
+
+
+class _SizeLimitedReader(io.RawIOBase):
+    """
+    Read from `raw` (a decompressing stream); abort the request with 413
+    Content Too Large once more than `limit` bytes were read, and with 400 Bad
+    Request if the data is not valid gzip.
+    """
+
+    def __init__(self, raw, limit: int):
+        self._raw = raw
+        self._limit = limit
+        self._count = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        import flask
+
+        try:
+            n = self._raw.readinto(b)
+        except (OSError, EOFError, zlib.error) as exc:
+            # gzip.BadGzipFile is an OSError; EOFError: truncated stream.
+            flask.abort(400, description=f"invalid gzip request body: {exc}")
+        self._count += n
+        if self._count > self._limit:
+            flask.abort(413)
+        return n
+
 
 def _init_api_docs(application):
     from .api._docs import spec
@@ -0,0 +1,92 @@
+"""
+Helpers for emitting Apache Arrow data in streaming HTTP responses.
+
+Arrow writers (IPC stream, Parquet file) write to a file-like sink.
+`ChunkSink` collects what was written so far; after each record batch the
+generators here hand that over (as one chunk of the response body) and start
+over, so that memory usage is bound by the size of one record batch,
+independent of the total size of the response.
+"""
+
+from typing import Dict, Iterable, Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+MEDIA_TYPE_ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MEDIA_TYPE_PARQUET = "application/vnd.apache.parquet"
+
+
+class ChunkSink:
+    """Minimal writable file-like object, as required by pyarrow writers."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        self._chunks: list = []
+        self._pos = 0
+
+    def write(self, data) -> int:
+        b = bytes(data)
+        self._chunks.append(b)
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def pop(self) -> bytes:
+        """Return what was written since the last call, as one byte sequence."""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def schema_with_metadata(
+    schema: pa.Schema, metadata: Optional[Dict[str, str]]
+) -> pa.Schema:
+    if not metadata:
+        return schema
+    return schema.with_metadata({k: v for k, v in metadata.items() if v is not None})
+
+
+def ipc_stream_chunks(
+    schema: pa.Schema, batches: Iterable[pa.RecordBatch]
+) -> Iterator[bytes]:
+    """
+    Serialize `batches` to the Arrow IPC streaming format. Yield byte
+    sequences: the schema message, one per record batch, then the
+    end-of-stream marker.
+    """
+    sink = ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    yield sink.pop()
+    for batch in batches:
+        writer.write_batch(batch)
+        yield sink.pop()
+    writer.close()
+    yield sink.pop()
+
+
+def parquet_chunks(
+    schema: pa.Schema, batches: Iterable[pa.RecordBatch]
+) -> Iterator[bytes]:
+    """
+    Serialize `batches` to a Parquet file, one row group per record batch.
+    Yield byte sequences: one per row group, then the file footer (incl.
+    the schema and its metadata).
+    """
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    yield sink.pop()
+    for batch in batches:
+        writer.write_batch(batch)
+        yield sink.pop()
+    writer.close()
+    yield sink.pop()
@@ -77,6 +77,9 @@ spec.components.response(
     _200_ok({"data": [ex.BENCHMARK_ENTITY], "metadata": {"next_page_cursor": None}}),
 )
 spec.components.response("BenchmarkResultCreated", _201_created(ex.BENCHMARK_ENTITY))
+spec.components.response(
+    "BenchmarkResultBatchCreated", _200_ok(ex.BENCHMARK_RESULT_BATCH_CREATED)
+)
 spec.components.response("CommitEntity", _200_ok(ex.COMMIT_ENTITY))
 spec.components.response("CommitList", _200_ok([ex.COMMIT_ENTITY]))
 spec.components.response("CompareEntity", _200_ok(ex.COMPARE_ENTITY))
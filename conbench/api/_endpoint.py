@@ -31,17 +31,22 @@ def maybe_login_required(func):
     return maybe
 
 
+def empty_strings_to_none(data):
+    # Note(JP): replace first-level zero-length string values with
+    # None? So that users can pass "" instead of null | non-exist?
+    munged = data.copy() if data else data
+    for field, value in data.items():
+        if isinstance(value, str) and not value.strip():
+            munged[field] = None
+    return munged
+
+
 class ApiEndpoint(flask.views.MethodView):
     def validate(self, schema):
         # Emits a 400 response if req does not have expected Content-Type set.
         data = f.request.get_json()
 
-        # Note(JP): replace first-level zero-length string values with
-        # None? So that users can pass "" instead of null | non-exist?
-        munged = data.copy() if data else data
-        for field, value in data.items():
-            if isinstance(value, str) and not value.strip():
-                munged[field] = None
+        munged = empty_strings_to_none(data)
 
         try:
             # `schema.load()` (instead of only `schema.validate()`) implies
@@ -76,8 +81,8 @@ class ApiEndpoint(flask.views.MethodView):
     def response_204_no_content(self):
         return "", 204
 
-    # def response_202_accepted(self):
-    #     return "", 202
+    def response_202_accepted(self):
+        return "", 202
 
     def response_201_created(self, body):
         headers = {
@@ -549,6 +549,15 @@ BENCHMARK_ENTITY = _api_benchmark_entity(
     "file-write",
     "some-hexdigest",
 )
+BENCHMARK_RESULT_BATCH_CREATED = {
+    "results": [
+        {"status": 201, "id": "some-benchmark-uuid-1"},
+        {
+            "status": 400,
+            "description": {"run_id": ["Missing data for required field."]},
+        },
+    ]
+}
 COMMIT_ENTITY = _api_commit_entity(
     "some-commit-uuid-1",
     "some-commit-parent-uuid-1",
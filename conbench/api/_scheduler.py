@@ -0,0 +1,228 @@
+"""
+Admission control for expensive, read-only API requests (/api/compare/...).
+
+Context: https://github.com/voltrondata-labs/arrow-benchmarks-ci/issues/124
+The compare endpoints can be rather resource-heavy. Previously, only one
+request-handling thread at a time worked on a compare request; all others
+were responded to with 429 after waiting for 0.1 seconds. Under CI fan-out
+that meant that most compare requests had to be retried (with the client's
+backoff), regardless of how cheap they were.
+
+The scheduler here (one instance per process, shared by the request-handling
+threads) instead
+
+- runs up to `max_running` requests concurrently, as long as the sum of their
+  estimated costs is within `cost_budget` (a single request is always
+  allowed to run if nothing else is running, regardless of its cost),
+- lets requests wait in a bounded queue (at most `max_queued` requests, each
+  waiting at most `max_wait_seconds`),
+- serves the queue round-robin across clients (so that one client emitting
+  many requests does not starve other clients), first-in-first-out per
+  client,
+- lets identical requests (same key) share one computation: the first one
+  computes, the others wait for its result,
+- rejects requests that cannot be served (queue full, or waiting longer than
+  `max_wait_seconds`) with `SchedulerBusy`, which carries an estimate for how
+  long the client should wait before retrying (for the Retry-After response
+  header), based on the observed time per cost unit.
+"""
+
+import collections
+import math
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+
+
+class SchedulerBusy(Exception):
+    def __init__(self, reason: str, retry_after_seconds: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+
+class _Job:
+    __slots__ = ("key", "client", "cost", "admitted", "done", "result", "exc")
+
+    def __init__(self, key: Hashable, client: str, cost: float):
+        self.key = key
+        self.client = client
+        self.cost = cost
+        # Set by the scheduler when the job may start.
+        self.admitted = False
+        # Set once the result (or exception) is available for waiters.
+        self.done = threading.Event()
+        self.result: Any = None
+        self.exc: Optional[BaseException] = None
+
+
+class CostAwareScheduler:
+    def __init__(
+        self,
+        max_running: int,
+        cost_budget: float,
+        max_queued: int,
+        max_wait_seconds: float,
+        initial_seconds_per_cost: float = 0.0001,
+    ):
+        self.max_running = max_running
+        self.cost_budget = cost_budget
+        self.max_queued = max_queued
+        self.max_wait_seconds = max_wait_seconds
+
+        self._cond = threading.Condition()
+        # Waiting jobs per client; the dict order is the round-robin order
+        # (a client is moved to the end after one of its jobs was admitted).
+        self._queues: "collections.OrderedDict[str, Deque[_Job]]" = (
+            collections.OrderedDict()
+        )
+        self._n_queued = 0
+        self._queued_cost = 0.0
+        self._running: List[_Job] = []
+        # Queued or running jobs by key, for sharing computations.
+        self._inflight: Dict[Hashable, _Job] = {}
+        # Exponentially weighted moving average of the time it took to
+        # process one unit of cost.
+        self._seconds_per_cost = initial_seconds_per_cost
+
+    def run(
+        self, key: Hashable, client: str, cost: float, func: Callable[[], Any]
+    ) -> Any:
+        """
+        Run `func()` once admitted, return its return value (or raise what it
+        raised). If an identical request (same `key`) is already queued or
+        running, wait for that one's result instead.
+
+        Raise SchedulerBusy if this request is not admitted.
+        """
+        with self._cond:
+            shared = self._inflight.get(key)
+            if shared is None:
+                job = self._enqueue(key, client, cost)
+
+        if shared is not None:
+            return self._wait_for_shared_result(shared)
+
+        try:
+            self._wait_until_admitted(job)
+        except SchedulerBusy as exc:
+            job.exc = exc
+            job.done.set()
+            raise
+
+        t0 = time.monotonic()
+        try:
+            job.result = func()
+            return job.result
+        except BaseException as exc:
+            job.exc = exc
+            raise
+        finally:
+            self._finish(job, time.monotonic() - t0)
+
+    def retry_after_estimate(self) -> int:
+        """
+        Estimate for the time (seconds) until the currently queued and running
+        work is done.
+        """
+        with self._cond:
+            return self._retry_after_estimate()
+
+    def _retry_after_estimate(self) -> int:
+        # `_seconds_per_cost` is observed under concurrency (wall time), i.e.
+        # this is an optimistic estimate when large jobs run one at a time.
+        pending = self._queued_cost + sum(j.cost for j in self._running)
+        seconds = pending * self._seconds_per_cost / self.max_running
+        return max(1, math.ceil(seconds))
+
+    def _enqueue(self, key: Hashable, client: str, cost: float) -> _Job:
+        if self._n_queued >= self.max_queued:
+            raise SchedulerBusy(
+                "too many queued requests", self._retry_after_estimate()
+            )
+
+        estimate = self._retry_after_estimate()
+        if self._n_queued and estimate > self.max_wait_seconds:
+            raise SchedulerBusy("too much queued work", estimate)
+
+        job = _Job(key, client, cost)
+        self._queues.setdefault(client, collections.deque()).append(job)
+        self._n_queued += 1
+        self._queued_cost += cost
+        self._inflight[key] = job
+        self._admit()
+        return job
+
+    def _wait_until_admitted(self, job: _Job) -> None:
+        deadline = time.monotonic() + self.max_wait_seconds
+        with self._cond:
+            while not job.admitted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._dequeue(job)
+                    del self._inflight[job.key]
+                    # Others may fit now (head-of-line blocking).
+                    self._admit()
+                    raise SchedulerBusy(
+                        "timed out waiting in queue", self._retry_after_estimate()
+                    )
+                self._cond.wait(remaining)
+
+    def _wait_for_shared_result(self, job: _Job) -> Any:
+        # The computing request is itself bound by max_wait_seconds until
+        # admission; there is no timeout for the computation itself.
+        job.done.wait()
+        if job.exc is not None:
+            raise job.exc
+        return job.result
+
+    def _fits(self, job: _Job) -> bool:
+        if not self._running:
+            return True
+        if len(self._running) >= self.max_running:
+            return False
+        return sum(j.cost for j in self._running) + job.cost <= self.cost_budget
+
+    def _admit(self) -> None:
+        """
+        Admit queued jobs in round-robin order across clients, as long as they
+        fit. Stop at the first job that does not fit (do not let cheaper jobs
+        overtake it, so that expensive jobs do not starve). Call with the lock
+        held.
+        """
+        admitted_any = False
+        while self._queues:
+            client, queue = next(iter(self._queues.items()))
+            job = queue[0]
+            if not self._fits(job):
+                break
+            self._dequeue(job)
+            # Round robin: the next job of this client comes after the other
+            # clients' jobs.
+            if client in self._queues:
+                self._queues.move_to_end(client)
+            job.admitted = True
+            self._running.append(job)
+            admitted_any = True
+
+        if admitted_any:
+            self._cond.notify_all()
+
+    def _dequeue(self, job: _Job) -> None:
+        queue = self._queues[job.client]
+        queue.remove(job)
+        if not queue:
+            del self._queues[job.client]
+        self._n_queued -= 1
+        self._queued_cost -= job.cost
+
+    def _finish(self, job: _Job, duration: float) -> None:
+        with self._cond:
+            self._running.remove(job)
+            del self._inflight[job.key]
+            if job.exc is None and job.cost > 0:
+                self._seconds_per_cost = (
+                    0.8 * self._seconds_per_cost + 0.2 * duration / job.cost
+                )
+            self._admit()
+        job.done.set()
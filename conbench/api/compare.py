@@ -1,11 +1,10 @@
 import collections
 import logging
 import math
-import threading
-from contextlib import contextmanager
 from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 import flask as f
+import flask_login
 import sqlalchemy as s
 
 import conbench.units
@@ -16,9 +15,12 @@ from conbench.types import THistFingerprint
 from ..api import rule
 from ..api._endpoint import ApiEndpoint, maybe_login_required
 from ..api._resp import resp429
+from ..api._scheduler import CostAwareScheduler, SchedulerBusy
+from ..config import Config
 from ..entities.benchmark_result import BenchmarkResult
 from ..entities.commit import Commit
 from ..entities.history import set_z_scores
+from ..entities.run_comparison import get_run_comparison, get_run_comparison_items
 from ..hacks import set_display_benchmark_name, set_display_case_permutation
 
 log = logging.getLogger(__name__)
@@ -27,29 +29,48 @@ DEFAULT_PAIRWISE_PERCENT_THRESHOLD = 5.0
 DEFAULT_Z_SCORE_THRESHOLD = 5.0
 
 
-# Context: https://github.com/voltrondata-labs/arrow-benchmarks-ci/issues/124
-# The compare endpoint can be rather resource-heavy. This here is a pragmatic
-# QoS solution / DoS protection: only ever have one of the request-handling
-# threads work on an /api/compare/... request.
-# Under a lot of API pressure this helps keep the system going. In that case,
-# however, individual requests may be responded to after a longer waiting time.
-# In those contexts, it makes sense to apply large HTTP request timeout
+# The compare endpoints can be rather resource-heavy. Admission control / DoS
+# protection, shared by the request-handling threads of this process: see
+# conbench/api/_scheduler.py. Under a lot of API pressure individual requests
+# may be responded to after a longer waiting time (or with a 429 response). In
+# those contexts, it makes sense to apply large HTTP request timeout
 # constants.
-_semaphore_compare_get = threading.BoundedSemaphore(1)
+_compare_scheduler = CostAwareScheduler(
+    max_running=Config.COMPARE_MAX_RUNNING,
+    cost_budget=Config.COMPARE_COST_BUDGET,
+    max_queued=Config.COMPARE_MAX_QUEUED,
+    max_wait_seconds=Config.COMPARE_MAX_WAIT_SECONDS,
+)
+
 
+def _client_id() -> str:
+    """Identify the HTTP client for fair queueing: user, or else IP address."""
+    user = flask_login.current_user
+    if user and user.is_authenticated:
+        return f"user:{user.get_id()}"
+    return f"addr:{f.request.remote_addr}"
 
-@contextmanager
-def _sem_acquire(sem: threading.BoundedSemaphore, timeout: float):
+
+def _run_scheduled(key: tuple, n_fingerprints: int, func) -> f.Response:
     """
-    The stdlib-provided context manager does not allow for setting a timeout.
-    Build our own context manager that.
+    Run `func()` (returning a JSON-serializable object) via the compare
+    scheduler; identical concurrent requests (same `key`) share one
+    computation. Return JSON response, or 429 response if the request was not
+    admitted.
     """
-    acquired = sem.acquire(timeout=timeout)
     try:
-        yield acquired
-    finally:
-        if acquired:
-            sem.release()
+        result = _compare_scheduler.run(
+            key=key,
+            client=_client_id(),
+            cost=n_fingerprints * Config.DISTRIBUTION_COMMITS,
+            func=func,
+        )
+    except SchedulerBusy as exc:
+        resp = resp429(f"doing other /compare work ({exc.reason}), retry soon")
+        resp.headers["Retry-After"] = str(exc.retry_after_seconds)
+        return resp
+
+    return f.jsonify(result)
 
 
 def _parse_two_ids_or_abort(compare_ids: str) -> Tuple[str, str]:
@@ -227,7 +248,12 @@ class BenchmarkResultComparator:
         }
 
     @property
-    def pairwise_analysis(self) -> Optional[dict]:
+    def percent_change(self) -> Optional[float]:
+        """
+        The (unrounded) percent change of the contender's SVS relative to the
+        baseline's SVS, signed so that a negative value indicates a
+        regression. None if that cannot be computed.
+        """
         if not self.do_comparison:
             return None
 
@@ -247,39 +273,61 @@ class BenchmarkResultComparator:
         if self.less_is_better:
             relative_change = relative_change * -1
 
-        percent_change = relative_change * 100.0
-        regression_indicated = -percent_change > self.threshold
-        improvement_indicated = percent_change > self.threshold
-
-        percent_change_for_output = _round(relative_change * 100.0)
-        return {
-            "percent_change": percent_change_for_output,
-            "percent_threshold": self.threshold,
-            "regression_indicated": regression_indicated,
-            "improvement_indicated": improvement_indicated,
-        }
+        return relative_change * 100.0
 
     @property
-    def lookback_z_score_analysis(self) -> Optional[dict]:
+    def z_score(self) -> Optional[float]:
+        """The (unrounded) z-score of the contender, or None."""
         if not self.do_comparison:
             return None
 
-        assert self.baseline
         assert self.contender
 
         if self.contender.z_score is None or math.isnan(self.contender.z_score):
             return None
 
-        regression_indicated = -self.contender.z_score > self.threshold_z
-        improvement_indicated = self.contender.z_score > self.threshold_z
+        return self.contender.z_score
+
+    @staticmethod
+    def pairwise_analysis_for(percent_change: float, threshold: float) -> dict:
+        regression_indicated = -percent_change > threshold
+        improvement_indicated = percent_change > threshold
 
         return {
-            "z_threshold": self.threshold_z,
-            "z_score": _round(self.contender.z_score),
+            "percent_change": _round(percent_change),
+            "percent_threshold": threshold,
             "regression_indicated": regression_indicated,
             "improvement_indicated": improvement_indicated,
         }
 
+    @staticmethod
+    def lookback_z_score_analysis_for(z_score: float, threshold_z: float) -> dict:
+        regression_indicated = -z_score > threshold_z
+        improvement_indicated = z_score > threshold_z
+
+        return {
+            "z_threshold": threshold_z,
+            "z_score": _round(z_score),
+            "regression_indicated": regression_indicated,
+            "improvement_indicated": improvement_indicated,
+        }
+
+    @property
+    def pairwise_analysis(self) -> Optional[dict]:
+        percent_change = self.percent_change
+        if percent_change is None:
+            return None
+
+        return self.pairwise_analysis_for(percent_change, self.threshold)
+
+    @property
+    def lookback_z_score_analysis(self) -> Optional[dict]:
+        z_score = self.z_score
+        if z_score is None:
+            return None
+
+        return self.lookback_z_score_analysis_for(z_score, self.threshold_z)
+
     @property
     def _dict_for_api_json(self) -> dict:
         return {
@@ -375,18 +423,23 @@ class CompareBenchmarkResultsAPI(ApiEndpoint):
         tags:
           - Comparisons
         """
-        # Note(JP): a threading.BoundedSemaphore acquired and released with a
-        # context manager. Assumes the web application to be deployed in a
-        # model with N request-handling threads per process.
-        with _sem_acquire(_semaphore_compare_get, 0.1) as acquired:
-            if acquired:
-                return self._get(compare_ids)
-
-            return resp429("doing other /compare work, retry soon")
-
-    def _get(self, compare_ids: str) -> f.Response:
         baseline_result_id, contender_result_id = _parse_two_ids_or_abort(compare_ids)
         threshold, threshold_z = _get_threshold_args_from_request()
+        return _run_scheduled(
+            key=("benchmark-results", compare_ids, threshold, threshold_z),
+            n_fingerprints=1,
+            func=lambda: self._get(
+                baseline_result_id, contender_result_id, threshold, threshold_z
+            ),
+        )
+
+    def _get(
+        self,
+        baseline_result_id: str,
+        contender_result_id: str,
+        threshold: Optional[float],
+        threshold_z: Optional[float],
+    ) -> dict:
         baseline_result = self._get_a_result(baseline_result_id)
         contender_result = self._get_a_result(contender_result_id)
 
@@ -426,7 +479,7 @@ class CompareBenchmarkResultsAPI(ApiEndpoint):
         except UnmatchingUnitsError as e:
             f.abort(400, description=str(e))
 
-        return f.jsonify(comparator._dict_for_api_json)
+        return comparator._dict_for_api_json
 
 
 # from filprofiler.api import profile as filprofile
@@ -630,32 +683,36 @@ class CompareRunsAPI(ApiEndpoint):
         tags:
           - Comparisons
         """
-        # Note(JP): a threading.BoundedSemaphore acquired and released with a
-        # context manager. Assumes the web application to be deployed in a
-        # model with N request-handling threads per process. Wait in line for
-        # a small number of seconds
-        with _sem_acquire(_semaphore_compare_get, 0.1) as acquired:
-            if not acquired:
-                return resp429("doing other /compare work, retry soon")
-
-            page_size_arg = f.request.args.get("page_size", 100)
-            try:
-                page_size = int(page_size_arg)
-                assert 1 <= page_size <= 1000
-            except Exception:
-                self.abort_400_bad_request(
-                    "page_size must be a positive integer no greater than 1000"
-                )
+        page_size_arg = f.request.args.get("page_size", 100)
+        try:
+            page_size = int(page_size_arg)
+            assert 1 <= page_size <= 1000
+        except Exception:
+            self.abort_400_bad_request(
+                "page_size must be a positive integer no greater than 1000"
+            )
 
-            cursor_arg: Optional[str] = f.request.args.get("cursor")
-            cursor = None if cursor_arg == "null" else cursor_arg
+        cursor_arg: Optional[str] = f.request.args.get("cursor")
+        cursor = None if cursor_arg == "null" else cursor_arg
 
-            threshold, threshold_z = _get_threshold_args_from_request()
+        threshold, threshold_z = _get_threshold_args_from_request()
 
-            response = self._get_response_as_dict(
+        if Config.RUN_COMPARE_PRECOMPUTE:
+            # Cheap: does not need to go through the scheduler.
+            stored = self._get_stored_response_as_dict(
                 compare_ids, cursor, page_size, threshold, threshold_z
             )
-            return f.jsonify(response)
+            if stored is not None:
+                return f.jsonify(stored)
+
+        return _run_scheduled(
+            key=("runs", compare_ids, cursor, page_size, threshold, threshold_z),
+            # Upper bound: the number of fingerprints on this page.
+            n_fingerprints=page_size,
+            func=lambda: self._get_response_as_dict(
+                compare_ids, cursor, page_size, threshold, threshold_z
+            ),
+        )
 
     def _get_response_as_dict(
         self,
@@ -675,15 +732,62 @@ class CompareRunsAPI(ApiEndpoint):
         if not history_fingerprints:
             return {"data": [], "metadata": {"next_page_cursor": None}}
 
-        baseline_results = self._get_all_results_for_a_run(
+        comparators = self.get_comparators(
+            baseline_run_id,
+            contender_run_id,
+            history_fingerprints,
+            threshold,
+            threshold_z,
+        )
+        data = [comparator._dict_for_api_json for comparator in comparators]
+
+        return {
+            "data": data,
+            "metadata": {
+                "next_page_cursor": self._next_page_cursor(
+                    history_fingerprints, page_size
+                )
+            },
+        }
+
+    @staticmethod
+    def _next_page_cursor(
+        history_fingerprints: List[THistFingerprint], page_size: Optional[int]
+    ) -> Optional[str]:
+        if len(history_fingerprints) == page_size:
+            # There's an edge case here where the last page happens to have exactly
+            # page_size history_fingerprints. So the client will grab one more
+            # (empty) page. The alternative would be to query the DB here, every
+            # single time, to *make sure* the next page will contain
+            # history_fingerprints... but that feels very expensive.
+            return history_fingerprints[-1]
+
+        # If there were fewer than page_size history_fingerprints, the next page
+        # should be empty
+        return None
+
+    @classmethod
+    def get_comparators(
+        cls,
+        baseline_run_id: str,
+        contender_run_id: str,
+        history_fingerprints: List[THistFingerprint],
+        threshold: Optional[float],
+        threshold_z: Optional[float],
+    ) -> List[BenchmarkResultComparator]:
+        """
+        Compare the results of two runs with these history fingerprints. Return
+        the comparators, ordered by history fingerprint.
+        """
+        baseline_results = cls._get_all_results_for_a_run(
             baseline_run_id, history_fingerprints
         )
-        contender_results = self._get_all_results_for_a_run(
+        contender_results = cls._get_all_results_for_a_run(
             contender_run_id, history_fingerprints
         )
 
         # All baseline results share a run (and therefore a commit).
-        baseline_commit = self._get_commit(baseline_run_id)
+        baseline_commit = cls._get_commit(baseline_run_id)
 
         if baseline_commit:
             set_z_scores(
@@ -708,9 +812,11 @@ class CompareRunsAPI(ApiEndpoint):
             set_display_case_permutation(benchmark_result)
 
         comparators: List[BenchmarkResultComparator] = []
-        for fingerprint, baseline_result, contender_result in self._join_results(
-            baseline_results, contender_results
-        ):
+        joined_results = sorted(
+            cls._join_results(baseline_results, contender_results),
+            key=lambda joined: joined[0],
+        )
+        for fingerprint, baseline_result, contender_result in joined_results:
             try:
                 comparators.append(
                     BenchmarkResultComparator(
@@ -725,24 +831,63 @@ class CompareRunsAPI(ApiEndpoint):
                 # Don't return comparisons if their units mismatch.
                 pass
 
-        data = sorted(
-            [comparator._dict_for_api_json for comparator in comparators],
-            key=lambda x: x["history_fingerprint"],
+        return comparators
+
+    def _get_stored_response_as_dict(
+        self,
+        compare_ids: str,
+        cursor: Optional[str],
+        page_size: Optional[int],
+        threshold: Optional[float],
+        threshold_z: Optional[float],
+    ) -> Optional[dict]:
+        """
+        Build the response from the precomputed comparison of these two runs
+        (see conbench/runcompare.py). Return None if there is none.
+        """
+        baseline_run_id, contender_run_id = _parse_two_ids_or_abort(compare_ids)
+        comparison = get_run_comparison(baseline_run_id, contender_run_id)
+        if comparison is None:
+            return None
+
+        history_fingerprints, items = get_run_comparison_items(
+            comparison, cursor, page_size
         )
 
-        if len(history_fingerprints) == page_size:
-            next_page_cursor = history_fingerprints[-1]
-            # There's an edge case here where the last page happens to have exactly
-            # page_size history_fingerprints. So the client will grab one more
-            # (empty) page. The alternative would be to query the DB here, every
-            # single time, to *make sure* the next page will contain
-            # history_fingerprints... but that feels very expensive.
-        else:
-            # If there were fewer than page_size history_fingerprints, the next page
-            # should be empty
-            next_page_cursor = None
+        threshold = (
+            float(threshold)
+            if threshold is not None
+            else DEFAULT_PAIRWISE_PERCENT_THRESHOLD
+        )
+        threshold_z = (
+            float(threshold_z) if threshold_z is not None else DEFAULT_Z_SCORE_THRESHOLD
+        )
+
+        data = []
+        for item in items:
+            # Stored with the default thresholds: re-apply the given ones. Do
+            # not modify the (session-bound) stored item.
+            analysis = dict(item.data["analysis"])
+            if item.percent_change is not None:
+                analysis["pairwise"] = BenchmarkResultComparator.pairwise_analysis_for(
+                    item.percent_change, threshold
+                )
+            if item.z_score is not None:
+                analysis["lookback_z_score"] = (
+                    BenchmarkResultComparator.lookback_z_score_analysis_for(
+                        item.z_score, threshold_z
+                    )
+                )
+            data.append({**item.data, "analysis": analysis})
 
-        return {"data": data, "metadata": {"next_page_cursor": next_page_cursor}}
+        return {
+            "data": data,
+            "metadata": {
+                "next_page_cursor": self._next_page_cursor(
+                    history_fingerprints, page_size
+                )
+            },
+        }
 
 
 compare_benchmark_results_view = CompareBenchmarkResultsAPI.as_view(
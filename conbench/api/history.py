@@ -1,11 +1,13 @@
 import datetime
 import functools
 from io import BytesIO
-from typing import List
+from typing import Dict, Iterator, List, Optional
 
 import orjson
 import pandas as pd
-from flask import send_file
+import pyarrow as pa
+from flask import Response, request, send_file
+from werkzeug.http import dump_options_header
 
 import conbench.numstr
 from conbench.buildinfo import BUILD_INFO
@@ -15,6 +17,13 @@ from ..api import rule
 from ..api._endpoint import ApiEndpoint, maybe_login_required
 from ..entities._entity import NotFound
 from ..entities.history import HistorySample, get_history_for_benchmark
+from ._arrow import (
+    MEDIA_TYPE_ARROW_STREAM,
+    MEDIA_TYPE_PARQUET,
+    ipc_stream_chunks,
+    parquet_chunks,
+    schema_with_metadata,
+)
 from ._resp import json_response_for_byte_sequence
 
 
@@ -65,13 +74,47 @@ class HistoryEntityAPI(ApiEndpoint):
 
 
 class HistoryDownloadAPI(ApiEndpoint):
+    FORMATS = {
+        "csv": "text/csv",
+        "parquet": MEDIA_TYPE_PARQUET,
+        "arrow": MEDIA_TYPE_ARROW_STREAM,
+    }
+
+    def _format(self) -> str:
+        """
+        Return the requested download format, or abort with a 400 response.
+        The `format` query parameter takes precedence over the Accept header.
+        """
+        if format_arg := request.args.get("format"):
+            if format_arg not in self.FORMATS:
+                self.abort_400_bad_request(
+                    f"format must be one of {', '.join(self.FORMATS)}"
+                )
+            return format_arg
+
+        # Note: CSV comes first so that it wins for `*/*` (e.g. browsers).
+        best = request.accept_mimetypes.best_match(
+            list(self.FORMATS.values()), default=self.FORMATS["csv"]
+        )
+        return next(name for name, mt in self.FORMATS.items() if mt == best)
+
     @maybe_login_required
     def get(self, benchmark_result_id):
         """
         ---
-        description: Download time series
+        description: |
+            Download time series
+
+            The file format is CSV (default), Parquet, or an Apache Arrow IPC
+            stream (see the `format` query parameter). Parquet and Arrow
+            downloads also contain the per-iteration `data` and `times` (list
+            columns) and the lookback z-score analysis columns for each
+            result, and carry what all results have in common (history
+            fingerprint, benchmark name, case permutation, hardware, SVS type)
+            as schema metadata.
         responses:
             "200": "HistoryList"
+            "400": "400"
             "401": "401"
             "404": "404"
         parameters:
@@ -79,9 +122,21 @@ class HistoryDownloadAPI(ApiEndpoint):
             in: path
             schema:
                 type: string
+          - in: query
+            name: format
+            schema:
+              type: string
+              enum: [csv, parquet, arrow]
+            description: |
+                File format. If not given, the format is chosen based on the
+                Accept request header (`text/csv`,
+                `application/vnd.apache.parquet` or
+                `application/vnd.apache.arrow.stream`), defaulting to CSV.
         tags:
           - History
         """
+        download_format = self._format()
+
         # TODO: think about the case where samples if of zero length. Can this
         # happen? If it can happen: which response would we want to emit to the
         # HTTP client? An empty array, or something more convenient?
@@ -90,16 +145,43 @@ class HistoryDownloadAPI(ApiEndpoint):
         except NotFound:
             self.abort_404_not_found()
 
-        csv_buf = generate_csv_history_for_result(benchmark_result_id, items)
+        # Use a history fingerprint here that represents what all data
+        # points in this series have in common: benchmark name, case perm,
+        # hardware, context, repo.
+        download_name_stem = (
+            f"conbench-history-{items[0].benchmark_name}-{items[0].history_fingerprint}"
+        )
+
+        if download_format == "csv":
+            csv_buf = generate_csv_history_for_result(benchmark_result_id, items)
 
-        return send_file(
-            csv_buf,
-            as_attachment=True,
-            # Use a history fingerprint here that represents what all data
-            # points in this series have in common: benchmark name, case perm,
-            # hardware, context, repo.
-            download_name=f"conbench-history-{items[0].benchmark_name}-{items[0].history_fingerprint}.csv",
-            mimetype="text/csv",
+            return send_file(
+                csv_buf,
+                as_attachment=True,
+                download_name=f"{download_name_stem}.csv",
+                mimetype="text/csv",
+            )
+
+        schema = schema_with_metadata(
+            HISTORY_ARROW_SCHEMA,
+            history_metadata_for_result(benchmark_result_id, items),
+        )
+        batches = generate_history_record_batches(items)
+        if download_format == "parquet":
+            body = parquet_chunks(schema, batches)
+            download_name = f"{download_name_stem}.parquet"
+        else:
+            body = ipc_stream_chunks(schema, batches)
+            download_name = f"{download_name_stem}.arrows"
+
+        return Response(
+            body,
+            mimetype=self.FORMATS[download_format],
+            headers={
+                "Content-Disposition": dump_options_header(
+                    "attachment", {"filename": download_name}
+                )
+            },
         )
 
 
@@ -210,3 +292,109 @@ def generate_csv_history_for_result(
     buf.seek(0)
 
     return buf
+
+
+# Number of results (rows) per record batch (Arrow) / row group (Parquet) in
+# history downloads.
+HISTORY_RECORD_BATCH_SIZE = 1000
+
+HISTORY_ARROW_SCHEMA = pa.schema(
+    [
+        ("commit_time", pa.timestamp("us", tz="UTC")),
+        ("result_id", pa.string()),
+        ("commit_hash", pa.string()),
+        ("result_time", pa.timestamp("us", tz="UTC")),
+        ("svs", pa.float64()),
+        ("min", pa.float64()),
+        ("unit", pa.string()),
+        ("data", pa.list_(pa.float64())),
+        ("times", pa.list_(pa.float64())),
+        # Lookback z-score analysis, see HistorySampleZscoreStats.
+        ("begins_distribution_change", pa.bool_()),
+        ("segment_id", pa.int64()),
+        ("rolling_mean_excluding_this_commit", pa.float64()),
+        ("rolling_mean", pa.float64()),
+        ("residual", pa.float64()),
+        ("rolling_stddev", pa.float64()),
+        ("is_outlier", pa.bool_()),
+    ]
+)
+
+
+def history_metadata_for_result(
+    input_result_id: str, items: List[HistorySample]
+) -> Dict[str, str]:
+    """
+    Return what all items have in common (and details about the system
+    emitting the file), for the schema metadata of Parquet/Arrow downloads.
+    This corresponds to the comment header of CSV downloads.
+    """
+    assert len(items) > 0
+
+    now_iso = (
+        datetime.datetime.now(tz=datetime.timezone.utc)
+        .replace(microsecond=0)
+        .isoformat()
+    )
+    return {
+        "original_url": f"{Config.INTENDED_BASE_URL}api/history/download/{input_result_id}",
+        "generated_by": f"conbench, commit {BUILD_INFO.commit}",
+        "generated_at": now_iso,
+        "result_id": input_result_id,
+        "benchmark_name": items[0].benchmark_name,
+        "case_permutation": items[0].case_text_id,
+        "case_id": items[0].case_id,
+        "context_id": items[0].context_id,
+        "hardware_hash": items[0].hardware_hash,
+        "repository": items[0].repository,
+        "history_fingerprint": items[0].history_fingerprint,
+        "svs_type": items[0].svs_type,
+    }
+
+
+def _int_or_none(value) -> Optional[int]:
+    # Note: HistorySampleZscoreStats.segment_id is a (float) count in
+    # practice, or NaN.
+    if value is None or pd.isna(value):
+        return None
+    return int(value)
+
+
+def generate_history_record_batches(
+    items: List[HistorySample],
+) -> Iterator[pa.RecordBatch]:
+    """
+    Yield the history (sorted by commit time, old -> new) as record batches
+    of up to HISTORY_RECORD_BATCH_SIZE rows, conforming to
+    HISTORY_ARROW_SCHEMA. Datetime objects are tz-naive, to be interpreted in
+    UTC (which is what pyarrow does).
+    """
+    items = sorted(items, key=lambda i: i.commit_timestamp)
+    for start in range(0, len(items), HISTORY_RECORD_BATCH_SIZE):
+        end = start + HISTORY_RECORD_BATCH_SIZE
+        batch = items[start:end]
+        yield pa.RecordBatch.from_pydict(
+            {
+                "commit_time": [i.commit_timestamp for i in batch],
+                "result_id": [i.benchmark_result_id for i in batch],
+                "commit_hash": [i.commit_hash for i in batch],
+                "result_time": [i.result_timestamp for i in batch],
+                "svs": [i.svs for i in batch],
+                "min": [min(i.data) if i.data else None for i in batch],
+                "unit": [i.unit for i in batch],
+                "data": [i.data for i in batch],
+                "times": [i.times for i in batch],
+                "begins_distribution_change": [
+                    i.zscorestats.begins_distribution_change for i in batch
+                ],
+                "segment_id": [_int_or_none(i.zscorestats.segment_id) for i in batch],
+                "rolling_mean_excluding_this_commit": [
+                    i.zscorestats.rolling_mean_excluding_this_commit for i in batch
+                ],
+                "rolling_mean": [i.zscorestats.rolling_mean for i in batch],
+                "residual": [i.zscorestats.residual for i in batch],
+                "rolling_stddev": [i.zscorestats.rolling_stddev for i in batch],
+                "is_outlier": [i.zscorestats.is_outlier for i in batch],
+            },
+            schema=HISTORY_ARROW_SCHEMA,
+        )
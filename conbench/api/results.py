@@ -1,29 +1,40 @@
+import collections
 import logging
+from typing import Dict, Iterator, List, Optional, Sequence, Union
 
 import flask as f
 import flask_login
+import marshmallow
 import orjson
 import pandas as pd
+import pyarrow as pa
 from sqlalchemy import select
 from uuid_extensions import uuid7
 
+import conbench.bmrt
 import conbench.metrics
 from conbench.dbsession import current_session
 
 from ..api import rule
 from ..api._docs import spec
-from ..api._endpoint import ApiEndpoint, maybe_login_required
-from ..entities._entity import NotFound
+from ..api._endpoint import ApiEndpoint, empty_strings_to_none, maybe_login_required
+from ..entities._entity import NotFound, to_float
 from ..entities.benchmark_result import (
     BenchmarkResult,
     BenchmarkResultFacadeSchema,
     BenchmarkResultSerializer,
     BenchmarkResultValidationError,
+    CreatedBenchmarkResult,
 )
+from ..entities.case import Case
+from ._arrow import MEDIA_TYPE_ARROW_STREAM, ipc_stream_chunks
 from ._resp import json_response_for_byte_sequence, resp400
 
 log = logging.getLogger(__name__)
 
+# Maximum number of benchmark results per batch submission request.
+BATCH_MAX_RESULTS = 5000
+
 
 class BenchmarkValidationMixin:
     def validate_benchmark(self, schema):
@@ -110,6 +121,40 @@ class BenchmarkEntityAPI(ApiEndpoint, BenchmarkValidationMixin):
         return self.response_204_no_content()
 
 
+def _filters_from_query_args() -> list:
+    """
+    Build query filters from the `run_id`, `run_reason`, `earliest_timestamp`
+    and `latest_timestamp` query parameters of the current request.
+    """
+    filters = []
+
+    if run_id_arg := f.request.args.get("run_id"):
+        # It's assumed that the number of benchmark results corresponding to one
+        # run_id won't increase unbounded over time (since runs end at some point).
+        # So we don't have to filter out "old" results.
+        filters.append(BenchmarkResult.run_id == run_id_arg)
+    else:
+        # All Conbench instances used a non-UUID7 primary key for benchmark results
+        # before this date. We need to filter those out or they will be mixed in to
+        # the results here, which will mess up the ordering.
+        filters.append(BenchmarkResult.timestamp >= "2023-06-03")
+
+    if earliest_timestamp_arg := f.request.args.get("earliest_timestamp"):
+        filters.append(BenchmarkResult.timestamp >= earliest_timestamp_arg)
+        # Speed up the query by also filtering out results that were inserted into
+        # the database before the given timestamp
+        earliest_timestamp_ns = pd.Timestamp(earliest_timestamp_arg).timestamp() * 10**9
+        filters.append(BenchmarkResult.id >= uuid7(earliest_timestamp_ns).hex)
+
+    if latest_timestamp_arg := f.request.args.get("latest_timestamp"):
+        filters.append(BenchmarkResult.timestamp <= latest_timestamp_arg)
+
+    if run_reason_arg := f.request.args.get("run_reason"):
+        filters.append(BenchmarkResult.run_reason == run_reason_arg)
+
+    return filters
+
+
 class BenchmarkListAPI(ApiEndpoint, BenchmarkValidationMixin):
     serializer = BenchmarkResultSerializer()
     schema = BenchmarkResultFacadeSchema()
@@ -203,33 +248,7 @@ class BenchmarkListAPI(ApiEndpoint, BenchmarkValidationMixin):
         tags:
           - Benchmarks
         """
-        filters = []
-
-        if run_id_arg := f.request.args.get("run_id"):
-            # It's assumed that the number of benchmark results corresponding to one
-            # run_id won't increase unbounded over time (since runs end at some point).
-            # So we don't have to filter out "old" results.
-            filters.append(BenchmarkResult.run_id == run_id_arg)
-        else:
-            # All Conbench instances used a non-UUID7 primary key for benchmark results
-            # before this date. We need to filter those out or they will be mixed in to
-            # the results here, which will mess up the ordering.
-            filters.append(BenchmarkResult.timestamp >= "2023-06-03")
-
-        if earliest_timestamp_arg := f.request.args.get("earliest_timestamp"):
-            filters.append(BenchmarkResult.timestamp >= earliest_timestamp_arg)
-            # Speed up the query by also filtering out results that were inserted into
-            # the database before the given timestamp
-            earliest_timestamp_ns = (
-                pd.Timestamp(earliest_timestamp_arg).timestamp() * 10**9
-            )
-            filters.append(BenchmarkResult.id >= uuid7(earliest_timestamp_ns).hex)
-
-        if latest_timestamp_arg := f.request.args.get("latest_timestamp"):
-            filters.append(BenchmarkResult.timestamp <= latest_timestamp_arg)
-
-        if run_reason_arg := f.request.args.get("run_reason"):
-            filters.append(BenchmarkResult.run_reason == run_reason_arg)
+        filters = _filters_from_query_args()
 
         cursor_arg = f.request.args.get("cursor")
         if cursor_arg and cursor_arg != "null":
@@ -312,11 +331,357 @@ class BenchmarkListAPI(ApiEndpoint, BenchmarkValidationMixin):
         conbench.metrics.COUNTER_BENCHMARK_RESULTS_INGESTED.labels(
             repourl=benchmark_result.commit_repo_url
         ).inc()
-        return self.response_201_created(self.serializer.one.dump(benchmark_result))
+        body = self.serializer.one.dump(benchmark_result)
+
+        # Have the result show up in the BMRT cache (trends in the UI) within
+        # seconds. After serialization: this may commit (expiring the ORM
+        # object).
+        conbench.bmrt.enqueue_new_result(benchmark_result.id, current_session)
+        return self.response_201_created(body)
+
+
+class BenchmarkResultBatchAPI(ApiEndpoint):
+    schema = BenchmarkResultFacadeSchema()
+
+    def _read_batch(self) -> List:
+        """
+        Return the list of (JSON-deserialized) user-given results, or abort
+        with a 400 response.
+        """
+        if f.request.mimetype == "application/x-ndjson":
+            items = []
+            # Read line by line instead of reading the whole body at once.
+            for lineno, line in enumerate(f.request.stream, 1):
+                if not line.strip():
+                    continue
+                try:
+                    items.append(orjson.loads(line))
+                except orjson.JSONDecodeError as exc:
+                    self.abort_400_bad_request(f"line {lineno}: invalid JSON: {exc}")
+        else:
+            # Emits a 400 response if req does not have expected Content-Type set.
+            items = f.request.get_json()
+            if not isinstance(items, list):
+                self.abort_400_bad_request("expected a JSON array of benchmark results")
+
+        if not items:
+            self.abort_400_bad_request("Empty batch.")
+        if len(items) > BATCH_MAX_RESULTS:
+            self.abort_400_bad_request(
+                f"too many benchmark results ({len(items)}), "
+                f"at most {BATCH_MAX_RESULTS} per request"
+            )
+        return items
+
+    @flask_login.login_required
+    def post(self) -> f.Response:
+        """
+        ---
+        description:
+            Submit many BenchmarkResults with one request.
+
+            The request body is either a JSON array of BenchmarkResult objects
+            (with Content-Type `application/json`), or newline-delimited JSON,
+            one BenchmarkResult object per line (with Content-Type
+            `application/x-ndjson`). Each BenchmarkResult object is validated
+            and processed like in `POST /api/benchmark-results/`; the related
+            entities (case, context, hardware, commit, ...) are looked up (or
+            created) once per batch, and all valid results are inserted in one
+            transaction.
+
+            The response contains one status object per submitted result (in
+            the same order), with `status` 201 and the `id` of the new result,
+            or with `status` 400 and a `description` of why this result was
+            rejected (other results of the batch are not affected by that).
+        responses:
+            "200": "BenchmarkResultBatchCreated"
+            "400": "400"
+            "401": "401"
+        requestBody:
+            content:
+                application/json:
+                    schema:
+                        type: array
+                        items:
+                            $ref: "#/components/schemas/BenchmarkResultCreate"
+                application/x-ndjson:
+                    schema:
+                        $ref: "#/components/schemas/BenchmarkResultCreate"
+        tags:
+          - Benchmarks
+        """
+        items = self._read_batch()
+
+        statuses: List[Dict] = [{} for _ in items]
+        # Tuples of (index in `items`, validated user-given result).
+        loaded: List[tuple] = []
+        for idx, item in enumerate(items):
+            if not isinstance(item, dict) or not item:
+                statuses[idx] = {"status": 400, "description": "Empty or invalid item."}
+                continue
+            try:
+                loaded.append(
+                    (idx, self.schema.create.load(empty_strings_to_none(item)))
+                )
+            except marshmallow.ValidationError as exc:
+                statuses[idx] = {"status": 400, "description": exc.messages}
+
+        outcomes: List[
+            Union[CreatedBenchmarkResult, BenchmarkResultValidationError]
+        ] = []
+        if loaded:
+            outcomes = BenchmarkResult.create_many([data for _, data in loaded])
+
+        created: List[CreatedBenchmarkResult] = []
+        for (idx, _), outcome in zip(loaded, outcomes):
+            if isinstance(outcome, BenchmarkResultValidationError):
+                statuses[idx] = {"status": 400, "description": str(outcome)}
+            else:
+                statuses[idx] = {"status": 201, "id": outcome.id}
+                created.append(outcome)
+
+        for repo_url, count in collections.Counter(
+            br.commit_repo_url for br in created
+        ).items():
+            conbench.metrics.COUNTER_BENCHMARK_RESULTS_INGESTED.labels(
+                repourl=repo_url
+            ).inc(count)
+
+        if created:
+            conbench.bmrt.enqueue_new_results(
+                [br.id for br in created], current_session
+            )
+
+        return json_response_for_byte_sequence(orjson.dumps({"results": statuses}), 200)
+
+
+# Number of benchmark results fetched per round trip from the server-side
+# database cursor of the export endpoint; also the size of one NDJSON response
+# chunk / Arrow record batch.
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_ARROW_SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("run_id", pa.string()),
+        ("run_reason", pa.string()),
+        ("run_tags", pa.string()),
+        ("batch_id", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("benchmark_name", pa.string()),
+        ("case_permutation", pa.string()),
+        ("history_fingerprint", pa.string()),
+        ("commit_repo_url", pa.string()),
+        ("commit_hash", pa.string()),
+        ("hardware_name", pa.string()),
+        ("hardware_hash", pa.string()),
+        ("context_id", pa.string()),
+        ("info_id", pa.string()),
+        ("unit", pa.string()),
+        ("time_unit", pa.string()),
+        ("iterations", pa.int64()),
+        ("data", pa.list_(pa.float64())),
+        ("times", pa.list_(pa.float64())),
+        ("min", pa.float64()),
+        ("max", pa.float64()),
+        ("mean", pa.float64()),
+        ("median", pa.float64()),
+        ("stdev", pa.float64()),
+        ("q1", pa.float64()),
+        ("q3", pa.float64()),
+        ("iqr", pa.float64()),
+        ("error", pa.string()),
+        ("optional_benchmark_info", pa.string()),
+    ]
+)
+
+
+def _json_or_none(value) -> Optional[str]:
+    return orjson.dumps(value).decode() if value is not None else None
+
+
+def _to_arrow_record_batch(
+    benchmark_results: Sequence[BenchmarkResult],
+) -> pa.RecordBatch:
+    columns: Dict[str, list] = {name: [] for name in EXPORT_ARROW_SCHEMA.names}
+    for r in benchmark_results:
+        for name, value in (
+            ("id", r.id),
+            ("run_id", r.run_id),
+            ("run_reason", r.run_reason),
+            ("run_tags", _json_or_none(r.run_tags)),
+            ("batch_id", r.batch_id),
+            # tz-naive, to be interpreted in UTC (which is what pyarrow does).
+            ("timestamp", r.timestamp),
+            ("benchmark_name", r.case.name),
+            ("case_permutation", r.case.text_id),
+            ("history_fingerprint", r.history_fingerprint),
+            ("commit_repo_url", r.commit_repo_url),
+            ("commit_hash", r.commit.sha if r.commit else None),
+            ("hardware_name", r.hardware.name),
+            ("hardware_hash", r.hardware.hash),
+            ("context_id", r.context_id),
+            ("info_id", r.info_id),
+            ("unit", r.unit),
+            ("time_unit", r.time_unit),
+            ("iterations", r.iterations),
+            ("data", [to_float(x) for x in r.data] if r.data is not None else None),
+            ("times", [to_float(x) for x in r.times] if r.times is not None else None),
+            ("min", to_float(r.min)),
+            ("max", to_float(r.max)),
+            ("mean", to_float(r.mean)),
+            ("median", to_float(r.median)),
+            ("stdev", to_float(r.stdev)),
+            ("q1", to_float(r.q1)),
+            ("q3", to_float(r.q3)),
+            ("iqr", to_float(r.iqr)),
+            ("error", _json_or_none(r.error)),
+            ("optional_benchmark_info", _json_or_none(r.optional_benchmark_info)),
+        ):
+            columns[name].append(value)
+    return pa.RecordBatch.from_pydict(columns, schema=EXPORT_ARROW_SCHEMA)
+
+
+class BenchmarkResultExportAPI(ApiEndpoint):
+    FORMATS = {
+        "ndjson": "application/x-ndjson",
+        "arrow": MEDIA_TYPE_ARROW_STREAM,
+    }
+
+    def _format(self) -> str:
+        """
+        Return the requested export format, or abort with a 400 response.
+        The `format` query parameter takes precedence over the Accept header.
+        """
+        if format_arg := f.request.args.get("format"):
+            if format_arg not in self.FORMATS:
+                self.abort_400_bad_request(
+                    f"format must be one of {', '.join(self.FORMATS)}"
+                )
+            return format_arg
+
+        best = f.request.accept_mimetypes.best_match(
+            list(self.FORMATS.values()), default=self.FORMATS["ndjson"]
+        )
+        return "arrow" if best == MEDIA_TYPE_ARROW_STREAM else "ndjson"
+
+    @maybe_login_required
+    def get(self) -> f.Response:
+        """
+        ---
+        description: |
+            Export all benchmark results matching the given filters with a
+            single (streaming) response, in order of DB insertion.
+
+            The response body is newline-delimited JSON (one benchmark result
+            object per line, as in `GET /api/benchmark-results/`), or an
+            Apache Arrow IPC stream with one row per benchmark result (see the
+            `format` query parameter). The response is emitted while results
+            are read from the database, so that the size of the export is not
+            limited by memory.
+
+            As for `GET /api/benchmark-results/`, results from before
+            `2023-06-03 UTC` are only returned when the `run_id` query
+            parameter is used.
+        responses:
+            "200": "200"
+            "400": "400"
+            "401": "401"
+        parameters:
+          - in: query
+            name: format
+            schema:
+              type: string
+              enum: [ndjson, arrow]
+            description: |
+                Export format. If not given, the format is chosen based on the
+                Accept request header (`application/x-ndjson` or
+                `application/vnd.apache.arrow.stream`), defaulting to NDJSON.
+          - in: query
+            name: run_id
+            schema:
+              type: string
+            description: Filter results to one specific `run_id`.
+          - in: query
+            name: run_reason
+            schema:
+              type: string
+            description: Filter results to one specific `run_reason`.
+          - in: query
+            name: earliest_timestamp
+            schema:
+              type: string
+              format: date-time
+            description: The earliest (least recent) benchmark result timestamp to return.
+          - in: query
+            name: latest_timestamp
+            schema:
+              type: string
+              format: date-time
+            description: The latest (most recent) benchmark result timestamp to return.
+          - in: query
+            name: benchmark_name
+            schema:
+              type: string
+            description: Filter results to one specific benchmark name.
+          - in: query
+            name: history_fingerprint
+            schema:
+              type: string
+            description: Filter results to one specific history fingerprint.
+        tags:
+          - Benchmarks
+        """
+        export_format = self._format()
+
+        filters = _filters_from_query_args()
+        if benchmark_name_arg := f.request.args.get("benchmark_name"):
+            filters.append(
+                BenchmarkResult.case_id.in_(
+                    select(Case.id).filter(Case.name == benchmark_name_arg)
+                )
+            )
+        if history_fingerprint_arg := f.request.args.get("history_fingerprint"):
+            filters.append(
+                BenchmarkResult.history_fingerprint == history_fingerprint_arg
+            )
+
+        query = (
+            select(BenchmarkResult)
+            .filter(*filters)
+            .order_by(BenchmarkResult.id)
+            # Server-side cursor: fetch EXPORT_CHUNK_SIZE rows at a time.
+            .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+
+        def _chunks() -> Iterator[Sequence[BenchmarkResult]]:
+            # Note: the session's identity map only holds weak references to
+            # (unmodified) ORM objects, i.e. the objects of a chunk can be
+            # garbage-collected once the chunk was serialized.
+            yield from current_session.scalars(query).partitions()
+
+        if export_format == "arrow":
+            body = ipc_stream_chunks(
+                EXPORT_ARROW_SCHEMA,
+                (_to_arrow_record_batch(chunk) for chunk in _chunks()),
+            )
+        else:
+            body = (
+                b"".join(orjson.dumps(r.to_dict_for_json_api()) + b"\n" for r in chunk)
+                for chunk in _chunks()
+            )
+
+        # Keep the request context (and with that the DB session) around
+        # while the response body is being generated.
+        return f.Response(
+            f.stream_with_context(body), mimetype=self.FORMATS[export_format]
+        )
 
 
 benchmark_entity_view = BenchmarkEntityAPI.as_view("benchmark")
 benchmark_list_view = BenchmarkListAPI.as_view("benchmarks")
+benchmark_batch_view = BenchmarkResultBatchAPI.as_view("benchmark-results-batch")
+benchmark_export_view = BenchmarkResultExportAPI.as_view("benchmark-results-export")
 
 # Phase these out, at some point.
 # https://github.com/conbench/conbench/issues/972
@@ -343,6 +708,16 @@ rule(
     view_func=benchmark_entity_view,
     methods=["GET", "DELETE", "PUT"],
 )
+rule(
+    "/benchmark-results/batch/",
+    view_func=benchmark_batch_view,
+    methods=["POST"],
+)
+rule(
+    "/benchmark-results/export/",
+    view_func=benchmark_export_view,
+    methods=["GET"],
+)
 spec.components.schema(
     "BenchmarkResultCreate", schema=BenchmarkResultFacadeSchema.create
 )
@@ -3,6 +3,7 @@ import functools
 from typing import Dict, Optional, Sequence, Set
 
 import flask as f
+import flask_login
 import sqlalchemy as s
 
 from ..api import rule
@@ -12,6 +13,7 @@ from ..entities._entity import EntitySerializer
 from ..entities.benchmark_result import BenchmarkResult
 from ..entities.commit import CantFindAncestorCommitsError, Commit, CommitSerializer
 from ..entities.hardware import HardwareSerializer
+from ..entities.run_comparison import mark_run_completed
 from ..types import THistFingerprint
 from ..util import short_commit_msg, tznaive_dt_to_aware_iso8601_for_api
 
@@ -94,9 +96,7 @@ def _search_for_baseline_run(
         )
 
     try:
-        commit_query = baseline_commit.commit_ancestry_query.order_by(
-            s.desc("commit_order")
-        ).limit(commit_limit)
+        commit_query = baseline_commit.get_commit_ancestry_query(limit=commit_limit)
     except CantFindAncestorCommitsError as e:
         return _CandidateBaselineSearchResult(
             error=f"could not find the baseline commit's ancestry because {e}"
@@ -440,8 +440,46 @@ class RunListAPI(ApiEndpoint):
         }
 
 
+class RunFinishAPI(ApiEndpoint):
+    @flask_login.login_required
+    def post(self, run_id):
+        """
+        ---
+        description: |
+            Signal that all benchmark results of a run have been submitted.
+
+            If the Conbench server is configured to precompute run comparisons,
+            this triggers comparing the run against its candidate baseline runs
+            (see `GET /api/runs/{run_id}/`) in the background. Once done, `GET
+            /api/compare/runs/` responses for these comparisons are served from
+            the precomputed data. Without this signal, a run is considered to be
+            finished when no benchmark result has been submitted for it for a
+            while.
+
+            Submitting another benchmark result for the run later on is fine:
+            the run is then considered to be active again.
+        responses:
+            "202": "202"
+            "401": "401"
+            "404": "404"
+        parameters:
+          - name: run_id
+            in: path
+            schema:
+                type: string
+        tags:
+          - Runs
+        """
+        if not BenchmarkResult.first(run_id=run_id):
+            self.abort_404_not_found()
+
+        mark_run_completed(run_id)
+        return self.response_202_accepted()
+
+
 run_entity_view = RunEntityAPI.as_view("run")
 run_list_view = RunListAPI.as_view("runs")
+run_finish_view = RunFinishAPI.as_view("run-finish")
 
 rule(
     "/runs/",
@@ -453,3 +491,8 @@ rule(
     view_func=run_entity_view,
     methods=["GET"],
 )
+rule(
+    "/runs/<run_id>/finish/",
+    view_func=run_finish_view,
+    methods=["POST"],
+)
@@ -1,21 +1,24 @@
 import collections
 import functools
+import hashlib
 import logging
 import math
 import time
-from typing import Dict, List, Tuple, TypedDict, TypeVar
+from typing import Dict, List, Sequence, Tuple, TypedDict, TypeVar
 
 import flask
+import flask_login
 import numpy as np
 import numpy.polynomial
 import orjson
 import pandas as pd
 
+import conbench.bmrt
 import conbench.numstr
 import conbench.units
 from conbench.app import app
 from conbench.app._endpoint import authorize_or_terminate
-from conbench.bmrt import BMRTBenchmarkResult, TBenchmarkName, bmrt_cache
+from conbench.bmrt import BMRTBenchmarkResult, CacheSnapshot, TBenchmarkName
 from conbench.config import Config
 from conbench.outlier import remove_outliers_by_iqrdist
 
@@ -33,11 +36,13 @@ numstr8 = functools.partial(conbench.numstr.numstr, sigfigs=8)
 log = logging.getLogger(__name__)
 
 
-def newest_of_many_results(results: List[BMRTBenchmarkResult]) -> BMRTBenchmarkResult:
+def newest_of_many_results(
+    results: Sequence[BMRTBenchmarkResult],
+) -> BMRTBenchmarkResult:
     return max(results, key=lambda r: r.started_at)
 
 
-def time_of_newest_of_many_results(results: List[BMRTBenchmarkResult]) -> float:
+def time_of_newest_of_many_results(results: Sequence[BMRTBenchmarkResult]) -> float:
     return max(r.started_at for r in results)
 
 
@@ -53,19 +58,54 @@ def get_first_n_dict_subset(d: GenDict, n: int) -> GenDict:
     return {k: d[k] for k in list(d)[:n]}  # type: ignore
 
 
+def conditional_on_bmrt_snapshot(func):
+    """
+    For views that render (only) data from the BMRT cache: pass the current
+    cache snapshot to the view (one consistent generation for the entire
+    request), and support HTTP conditional requests based on it.
+
+    The ETag is derived from the snapshot version, and from what else affects
+    the rendered page (URL path and query, user identity). If the client has
+    the page for this cache generation already then respond with 304 without
+    rendering anything.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        snapshot = conbench.bmrt.get_snapshot()
+        user = flask_login.current_user
+        userid = user.get_id() if user.is_authenticated else "anonymous"
+        etag = hashlib.md5(
+            f"{snapshot.version}|{userid}|{flask.request.full_path}".encode("utf-8")
+        ).hexdigest()
+
+        # Use a weak ETag: flask-compress modifies strong ones (":gzip"
+        # suffix), and the page is semantically (not byte-wise) equivalent.
+        if flask.request.if_none_match.contains_weak(etag):
+            resp = flask.Response(status=304)
+        else:
+            resp = flask.make_response(func(snapshot, *args, **kwargs))
+        resp.set_etag(etag, weak=True)
+        # Clients must revalidate before each re-use. `private`: the page may
+        # contain user-specific content.
+        resp.headers["Cache-Control"] = "private, no-cache"
+        return resp
+
+    return wrapper
+
+
 @app.route("/c-benchmarks/", methods=["GET"])  # type: ignore
 @authorize_or_terminate
-def list_benchmarks() -> str:
+@conditional_on_bmrt_snapshot
+def list_benchmarks(bmrt: CacheSnapshot) -> str:
     # Sort alphabetically by string key
     benchmarks_by_name_sorted_alphabetically = dict(
-        sorted(
-            bmrt_cache["by_benchmark_name"].items(), key=lambda item: item[0].lower()
-        )
+        sorted(bmrt.by_benchmark_name.items(), key=lambda item: item[0].lower())
     )
 
     newest_result_by_bname: Dict[str, BMRTBenchmarkResult] = {
         bname: newest_of_many_results(bmrlist)
-        for bname, bmrlist in bmrt_cache["by_benchmark_name"].items()
+        for bname, bmrlist in bmrt.by_benchmark_name.items()
     }
 
     newest_result_for_each_benchmark_name_sorted = [
@@ -79,7 +119,7 @@ def list_benchmarks() -> str:
 
     benchmarks_by_name_sorted_by_resultcount = dict(
         sorted(
-            bmrt_cache["by_benchmark_name"].items(),
+            bmrt.by_benchmark_name.items(),
             key=lambda item: len(item[1]),
             reverse=True,
         ),
@@ -94,7 +134,7 @@ def list_benchmarks() -> str:
     # rpcr.
     now = time.time()
     benchmark_names_by_rpcr: Dict[str, str] = {}
-    for bname, results in bmrt_cache["by_benchmark_name"].items():
+    for bname, results in bmrt.by_benchmark_name.items():
         # Generally, there are C case permutations for this benchmark. Group
         # the results by case permutation.
         results_per_case: Dict[str, List[BMRTBenchmarkResult]] = (
@@ -128,15 +168,15 @@ def list_benchmarks() -> str:
 
     return flask.render_template(
         "c-benchmarks.html",
-        benchmarks_by_name=bmrt_cache["by_benchmark_name"],
-        benchmark_result_count=len(bmrt_cache["by_id"]),
+        benchmarks_by_name=bmrt.by_benchmark_name,
+        benchmark_result_count=len(bmrt.by_id),
         benchmarks_by_name_sorted_alphabetically=benchmarks_by_name_sorted_alphabetically,
         benchmarks_by_name_sorted_by_resultcount=benchmarks_by_name_sorted_by_resultcount,
         benchmark_names_by_rpcr_sorted=benchmark_names_by_rpcr_sorted,
         newest_result_for_each_benchmark_name_topN=newest_result_for_each_benchmark_name_sorted[
             :20
         ],
-        bmr_cache_meta=bmrt_cache["meta"],
+        bmr_cache_meta=bmrt.meta,
         application=Config.APPLICATION_NAME,
         title=Config.APPLICATION_NAME,  # type: ignore
     )
@@ -144,12 +184,11 @@ def list_benchmarks() -> str:
 
 @app.route("/c-benchmarks/<bname>/trends", methods=["GET"])  # type: ignore
 @authorize_or_terminate
-def show_trends_for_benchmark(bname: TBenchmarkName) -> str:
+@conditional_on_bmrt_snapshot
+def show_trends_for_benchmark(bmrt: CacheSnapshot, bname: TBenchmarkName) -> str:
     # Narrow down relevant dataframes.
     dfs_by_t3: Dict[Tuple[str, str, str], pd.DataFrame] = {}
-    for (ibname, case_id, context_id, hardware_checksum), df in bmrt_cache[
-        "by_4t_df"
-    ].items():
+    for (ibname, case_id, context_id, hardware_checksum), df in bmrt.by_4t_df.items():
         if ibname == bname:
             dfs_by_t3[(case_id, context_id, hardware_checksum)] = df
 
@@ -157,7 +196,7 @@ def show_trends_for_benchmark(bname: TBenchmarkName) -> str:
 
     # This might be one of the most inefficient methods to get the point of
     # time of the newest result, but shrug for now.
-    t_newest = time_of_newest_of_many_results(bmrt_cache["by_benchmark_name"][bname])
+    t_newest = time_of_newest_of_many_results(bmrt.by_benchmark_name[bname])
 
     # Do this trend analysis only for those timeseries that are recent.
     # Criterion here for now: simple cutoff relative to the time of the newest
@@ -285,13 +324,13 @@ def show_trends_for_benchmark(bname: TBenchmarkName) -> str:
     # log.info("topn for plot: %s", topn_t3_dict_incr)
 
     infos_for_uplots_incrtrend, ctd, cased = _build_plotinfo_from_topnt3_dict(
-        bname, topn_t3_dict_incr
+        bmrt, bname, topn_t3_dict_incr
     )
     context_json_by_context_id |= ctd
     case_json_by_case_id |= cased
 
     infos_for_uplots_decrtrend, ctd, cased = _build_plotinfo_from_topnt3_dict(
-        bname, topn_t3_dict_decr
+        bmrt, bname, topn_t3_dict_decr
     )
     context_json_by_context_id |= ctd
     case_json_by_case_id |= cased
@@ -312,7 +351,7 @@ def show_trends_for_benchmark(bname: TBenchmarkName) -> str:
     return flask.render_template(
         "c-benchmark-trends.html",
         benchmark_name=bname,
-        bmr_cache_meta=bmrt_cache["meta"],
+        bmr_cache_meta=bmrt.meta,
         context_json_by_context_id=context_json_by_context_id,
         case_json_by_case_id=case_json_by_case_id,
         # y_unit_for_all_plots="foo",
@@ -326,7 +365,9 @@ def show_trends_for_benchmark(bname: TBenchmarkName) -> str:
 
 
 def _build_plotinfo_from_topnt3_dict(
-    bname: TBenchmarkName, topn_t3_dict: Dict[Tuple[str, str, str], float]
+    bmrt: CacheSnapshot,
+    bname: TBenchmarkName,
+    topn_t3_dict: Dict[Tuple[str, str, str], float],
 ) -> Tuple[Dict[str, "TypeUIPlotInfo"], Dict[str, str], Dict[str, str]]:
     context_json_by_context_id: Dict[str, str] = {}
     case_json_by_case_id: Dict[str, str] = {}
@@ -337,9 +378,9 @@ def _build_plotinfo_from_topnt3_dict(
         # Only include those cases where there are at least three results.
         # (this structure is used for plotting only).
         caseid, ctxid, hwchecksum = t3
-        results = bmrt_cache["by_4t_list"][(bname, caseid, ctxid, hwchecksum)]
+        results = bmrt.by_4t_list[(bname, caseid, ctxid, hwchecksum)]
 
-        # dfts = bmrt_cache["by_4t_df"][(bname, caseid, ctxid, hwchecksum)]
+        # dfts = bmrt.by_4t_df[(bname, caseid, ctxid, hwchecksum)]
         # print()
         # print()
         # print((bname, caseid, ctxid, hwchecksum))
@@ -395,13 +436,12 @@ def _build_plotinfo_from_topnt3_dict(
 
 @app.route("/c-benchmarks/<bname>", methods=["GET"])  # type: ignore
 @authorize_or_terminate
-def show_benchmark_cases(bname: TBenchmarkName) -> str:
-    # Do not catch KeyError upon lookup for checking for key, because this
-    # would insert the key into the defaultdict(list) (as an empty list).
-    if bname not in bmrt_cache["by_benchmark_name"]:
+@conditional_on_bmrt_snapshot
+def show_benchmark_cases(bmrt: CacheSnapshot, bname: TBenchmarkName) -> str:
+    if bname not in bmrt.by_benchmark_name:
         return f"benchmark name not known: `{bname}`"
 
-    matching_results = bmrt_cache["by_benchmark_name"][bname]
+    matching_results = bmrt.by_benchmark_name[bname]
     results_by_case_id: Dict[str, List[BMRTBenchmarkResult]] = collections.defaultdict(
         list
     )
@@ -506,7 +546,7 @@ def show_benchmark_cases(bname: TBenchmarkName) -> str:
     return flask.render_template(
         "c-benchmark-cases.html",
         benchmark_name=bname,
-        bmr_cache_meta=bmrt_cache["meta"],
+        bmr_cache_meta=bmrt.meta,
         results_by_case_id=results_by_case_id,
         hardware_count_per_case_id=hardware_count_per_case_id,
         last_result_per_case_id=last_result_per_case_id,
@@ -533,10 +573,13 @@ class TypeUIPlotInfo(TypedDict):
 
 @app.route("/c-benchmarks/<bname>/<caseid>", methods=["GET"])  # type: ignore
 @authorize_or_terminate
-def show_benchmark_results(bname: TBenchmarkName, caseid: str) -> str:
+@conditional_on_bmrt_snapshot
+def show_benchmark_results(
+    bmrt: CacheSnapshot, bname: TBenchmarkName, caseid: str
+) -> str:
     # First, filter by benchmark name.
     try:
-        results_all_with_bname = bmrt_cache["by_benchmark_name"][bname]
+        results_all_with_bname = bmrt.by_benchmark_name[bname]
     except KeyError:
         return f"benchmark name not known: `{bname}`"
 
@@ -681,7 +724,7 @@ def show_benchmark_results(bname: TBenchmarkName, caseid: str) -> str:
         benchmark_results_for_table=results_for_table,
         y_unit_for_all_plots=y_unit_for_all_plots,
         benchmark_name=bname,
-        bmr_cache_meta=bmrt_cache["meta"],
+        bmr_cache_meta=bmrt.meta,
         infos_for_uplots=infos_for_uplots,
         infos_for_uplots_json=infos_for_uplots_json,
         this_case_id=matching_results[0].case_id,
@@ -711,7 +754,7 @@ def maybe_longer_unit(unit: str) -> str:
 
 
 def avg_starttime_of_newest_n_percent_of_results(
-    results: List[BMRTBenchmarkResult], npc: int
+    results: Sequence[BMRTBenchmarkResult], npc: int
 ) -> float:
     """
     Return average start time of the newest N percent of those results in the
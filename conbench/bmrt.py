@@ -14,43 +14,71 @@ deployments we run).
 
 Current implementation properties:
 
-- Central cache data structure are CPython dictionaries (with thread-safe
-  atomic set/get operations). Shared across threads: one populating thread
-  (write), multiple HTTP-handling threads (read; 'should not' mutate). The
-  HTTP-handling threads can accidentally mutate the cache (no protection; watch
-  out)
-- Periodic full fetch / population: this can take minutes of time as of today
-  and defines the delay between incoming data and them being represented in the
-  UI
-- This dominates web application process memory consumption; the individual
-  Python objects stored in the cache should be kept as small as possible;
-  potentially using advanced techniques (already using dataclass+slots)
+- Central cache data structure is an immutable `CacheSnapshot` object (lookup
+  dictionaries exposed as read-only mapping proxies). Shared across threads:
+  one populating thread builds a new snapshot and swaps it in with a single
+  reference assignment (atomic); multiple HTTP-handling threads read. A
+  request handler should call `get_snapshot()` once and work with that object:
+  it sees one consistent generation of the cache.
+- Periodic incremental refresh: fetch only those results that were inserted
+  into the database after the last refresh (high-water mark: UUID7 primary key
+  which encodes insertion time), merge them into the existing cache and evict
+  what fell off the time/size window. Freshly submitted results are also
+  pushed to the cache from the ingestion path (enqueue_new_result()), and
+  applied in micro-batches within seconds. A full fetch / population (which can
+  take minutes of time as of today) still happens upon startup and then every
+  now and then (BMRT_FULL_REFRESH_INTERVAL_SECONDS), for consistency (think:
+  deleted results).
+- This dominates web application process memory consumption. Results are
+  stored in columnar fashion (NumPy arrays, dictionary-encoded strings, one
+  flat buffer for all per-iteration data), see conbench.bmrt_columnar. The
+  objects handed out to consumers are thin views.
+- Optionally (Config.BMRT_CACHE_BUILDER_PROCESS), the fetch/refresh work is
+  done in a separate builder process which publishes snapshots of the columnar
+  store to a tmpfs directory. Each web application process then only attaches
+  to the newest snapshot (memory-mapped, shared across processes), and builds
+  its lookup dictionaries. See conbench.bmrt_snapshot.
+- Warm start: the snapshots are also used to start up with data right away
+  (builder process mode: from the snapshot directory; otherwise, if
+  Config.BMRT_CACHE_PERSIST_DIR is set, the cache is persisted there). Upon
+  startup, attach to the last snapshot, then catch up incrementally from its
+  high-water mark.
 
 """
 
 import dataclasses
 import hashlib
+import itertools
 import logging
+import multiprocessing
+import os
+import queue
 import threading
 import time
-from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, TypedDict, cast
+from collections.abc import Mapping
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, cast
 
-import pandas as pd
+import numpy as np
+import psycopg2
 import sqlalchemy
 import sqlalchemy.orm
 
+import conbench.bmrt_snapshot
 import conbench.job
 import conbench.metrics
-import conbench.util
-from conbench.config import Config
-from conbench.db import session_maker
-from conbench.entities.benchmark_result import (
-    BenchmarkResult,
-    ui_mean_and_uncertainty,
-    ui_rel_sem,
+from conbench.bmrt_columnar import (  # noqa: F401 (re-export)
+    BMRTBenchmarkResult,
+    BMRTResultList,
+    BMRTResultsById,
+    BMRTRow,
+    ColumnarResults,
+    TimeseriesFrame,
 )
+from conbench.config import Config
+from conbench.db import configure_engine, session_maker
+from conbench.entities.benchmark_result import BenchmarkResult
 from conbench.types import TBenchmarkName
 
 # A memory profiler, and a CPU profiler that are both tested to work well
@@ -62,68 +90,44 @@ from conbench.types import TBenchmarkName
 log = logging.getLogger(__name__)
 
 BMRT_CACHE_SIZE = 0.8 * 10**6
+# Results with a start time older than this are not considered for the cache.
+BMRT_CACHE_MAX_AGE_DAYS = 14
+# Do a full (re-)population every now and then; do cheap incremental updates
+# in between.
+BMRT_FULL_REFRESH_INTERVAL_SECONDS = 3600
+# When looking for newly inserted results, start a little before the
+# high-water mark: UUID7 primary keys are generated by multiple web
+# application processes (potentially on different machines); tolerate minor
+# clock skew between them, and transactions committing slightly out of order.
+# Results already in the cache are not processed twice.
+BMRT_INCREMENTAL_OVERLAP_SECONDS = 60
 if Config.TESTING:
     # quicker update in testing
     BMRT_CACHE_SIZE = 0.05 * 10**6
+    BMRT_FULL_REFRESH_INTERVAL_SECONDS = 120
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class CacheUpdateMetaInfo:
     newest_result_time_str: str
     oldest_result_time_str: str
     covered_timeframe_days_approx: str  # stringified integer, for UI
     n_results: int
-
-
-# CPython 3.10/3.11 feature:  dataclass nicely integrated with slots. __slots__
-# saves memory: prevents the automatic creation of __dict__ and __weakref__ for
-# each instance. See
-# https://docs.python.org/3/reference/datamodel.html#object.__slots__
-# https://www.trueblade.com/blogs/news/python-3-10-new-dataclass-features
-@dataclasses.dataclass(slots=True)
-class BMRTBenchmarkResult:
-    id: str
-    case_id: str
-    context_id: str
-    run_id: str
-    data: List[float]
-    svs: float
-    svs_type: str
-    unit: str
-    benchmark_name: str
-    # POSIX timestamp
-    started_at: float
-    hardware_checksum: str
-    hardware_name: str
-    case_text_id: str
-    case_dict: Dict[str, str]
-    context_dict: Dict
-    ui_time_started_at: str
-    ui_hardware_short: str
-    ui_non_null_sample_count: str
-    run_reason: str
-
-    # There is conceptual duplication between the class BenchmarkResult
-    # and this class BMRTBenchmarkResult. Fundamentally, it might make sense
-    # that we have two types of classes, with distinct values:
-    # - one for database abstraction (the 'big instances', mutable, ...)
-    # - one for data mangling (small mem footprint, immutable, ...)
-    @property
-    def ui_mean_and_uncertainty(self) -> str:
-        return ui_mean_and_uncertainty(self.data, self.unit)
-
-    @property
-    def ui_rel_sem(self) -> Tuple[str, str]:
-        return ui_rel_sem(self.data)
+    # Incremented with each published snapshot (0: initial, empty cache).
+    generation: int = 0
+    # POSIX timestamp: time of snapshot construction. Together with
+    # `generation` this identifies a snapshot across processes.
+    built_at: float = 0.0
 
     @property
-    def started_at_iso(self) -> str:
-        """
-        Add an ISO timestring on the object so that JavaScript's `new
-        Date(input)` can parse this into a tz-aware object.
-        """
-        return conbench.util.tznaive_dt_to_aware_iso8601_for_api(
-            datetime.fromtimestamp(self.started_at)
+    def built_at_str(self) -> str:
+        if not self.built_at:
+            return "n/a"
+        return (
+            datetime.fromtimestamp(self.built_at, tz=timezone.utc).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
+            + " UTC"
         )
 
 
@@ -134,66 +138,120 @@ class BMRTBenchmarkResult:
 Tt4 = Tuple[TBenchmarkName, str, str, str]
 
 
-@dataclasses.dataclass(slots=True)
-class ResultTimeseries:
-    t4: Tt4
-    benchmark_name: str
-    df: pd.DataFrame
-    bmrlist: List[BMRTBenchmarkResult]
+# The columns defining a time series (the 4-tuple above).
+T4_COLUMNS = ("benchmark_name", "case_id", "context_id", "hardware_checksum")
 
+TDict4tlist = Dict[Tt4, BMRTResultList]
 
-# A type for a dictionary: key is 4-tuple defining a time series, and value is
-# a pandas dataframe containing the time series (index: pd.DateTimeIndex
-# tz-aware, one column: single value summary).
-TDict4tdf = Dict[Tt4, pd.DataFrame]
-TDict4tlist = Dict[Tt4, List[BMRTBenchmarkResult]]
 
+# The lists of results (values in the by_* mappings) are sorted by time, newest
+# first.
+@dataclasses.dataclass(frozen=True, slots=True)
+class CacheSnapshot:
+    """
+    One immutable generation of the cache. All lookup structures are read-only
+    (mapping proxies, read-only sequences and arrays).
+    """
 
-class CacheDict(TypedDict):
-    by_id: Dict[str, BMRTBenchmarkResult]
-    by_benchmark_name: Dict[TBenchmarkName, List[BMRTBenchmarkResult]]
-    by_case_id: Dict[str, List[BMRTBenchmarkResult]]
-    by_run_id: Dict[str, List[BMRTBenchmarkResult]]
-    by_4t_df: TDict4tdf
-    by_4t_list: TDict4tlist
+    results: ColumnarResults
+    by_id: BMRTResultsById
+    by_benchmark_name: Mapping[TBenchmarkName, BMRTResultList]
+    by_case_id: Mapping[str, BMRTResultList]
+    by_run_id: Mapping[str, BMRTResultList]
+    # Mapping: 4-tuple -> pandas dataframe containing the time series (index:
+    # pd.DateTimeIndex tz-aware, one column: single value summary). Backed by
+    # one frame containing all time series, see TimeseriesFrame.
+    by_4t_df: TimeseriesFrame
+    by_4t_list: Mapping[Tt4, BMRTResultList]
     meta: CacheUpdateMetaInfo
 
+    @property
+    def version(self) -> str:
+        """
+        Short string identifying this generation (for e.g. HTTP ETags).
+        """
+        return f"{self.meta.generation}-{self.meta.built_at:.6f}"
+
+
+def _empty_snapshot() -> CacheSnapshot:
+    store = ColumnarResults.empty()
+    return CacheSnapshot(
+        results=store,
+        by_id=BMRTResultsById(store),
+        by_benchmark_name=MappingProxyType({}),
+        by_case_id=MappingProxyType({}),
+        by_run_id=MappingProxyType({}),
+        by_4t_df=TimeseriesFrame(store, T4_COLUMNS),
+        by_4t_list=MappingProxyType({}),
+        meta=CacheUpdateMetaInfo(
+            newest_result_time_str="n/a",
+            oldest_result_time_str="n/a",
+            n_results=0,
+            covered_timeframe_days_approx="n/a",
+        ),
+    )
 
-_init_metainfo = CacheUpdateMetaInfo(
-    newest_result_time_str="n/a",
-    oldest_result_time_str="n/a",
-    n_results=0,
-    covered_timeframe_days_approx="n/a",
-)
 
 _FIRST_REFRESH_DONE_EVENT = threading.Event()
 
-# Think: future: do work in a child process, provide dictionary via shared
-# memory to parent, maybe via https://pypi.org/project/shared-memory-dict/ this
-# is _not_ as stdlib pickling dict
-# https://github.com/luizalabs/shared-memory-dict/issues/10 This initial state
-# might result in exceptions raised in certain request handlers; healing after
-# first update.
-
-# For now the idea is not re-create the wrapping dict during lifetime of the
-# cache.
-bmrt_cache: CacheDict = {
-    "by_id": {},
-    "by_benchmark_name": {},
-    "by_case_id": {},
-    "by_4t_list": {},
-    "by_4t_df": {},
-    "by_run_id": {},
-    "meta": _init_metainfo,
+# The initial state might result in exceptions raised in certain request
+# handlers; healing after first update. Only ever re-bound as a whole (atomic).
+_snapshot: CacheSnapshot = _empty_snapshot()
+
+# Generation counter for snapshots built in this process.
+_generation_counter = itertools.count(1)
+
+
+def get_snapshot() -> CacheSnapshot:
+    """
+    Return the current cache generation. Call this once per unit of work (e.g.
+    per HTTP request) and keep using the returned object.
+    """
+    return _snapshot
+
+
+# State that the refreshing thread keeps across refresh iterations. Only ever
+# accessed by the (single) refreshing thread (and by reinit()).
+# `hwm_id`: high-water mark, the largest (newest) benchmark result primary key
+# seen in the last fetch. `None` means: next refresh must be a full one.
+# `duration_seconds`: duration of the last update that changed the cache.
+# `full_refresh_at`: wall-clock time of the last full population (which the
+# current cache content is based on).
+_refresh_state: Dict[str, Any] = {
+    "hwm_id": None,
+    "duration_seconds": 0.0,
+    "full_refresh_at": None,
 }
 
+# Set to False in the builder process: there, nobody consumes the lookup
+# dictionaries; only the columnar store is needed (for writing snapshots).
+_PUBLISH_LOOKUP_DICTS = True
+
+# Push-based updates, see enqueue_new_result(). IDs of freshly inserted
+# results, consumed by the refreshing thread in micro-batches. Only fed while
+# a consumer is active in this process (otherwise this would grow without
+# bound, e.g. in the test suite or in CLI contexts).
+_push_queue: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+_push_consumer_active = threading.Event()
+
+# Collect pushed result IDs for at least this long before applying them as
+# one batch (one query, one new snapshot). Results tend to come in bursts.
+BMRT_PUSH_BATCH_SECONDS = 1.0
+BMRT_PUSH_BATCH_MAX = 1000
+
+# Config.BMRT_CACHE_PERSIST_DIR: write a snapshot at most this often (each
+# write serializes the complete cache).
+BMRT_PERSIST_MIN_INTERVAL_SECONDS = 120
+
+# Builder process mode: web application processes report new results to the
+# builder via PostgreSQL NOTIFY on this channel.
+_PG_NOTIFY_CHANNEL = "conbench_bmrt_new_result"
+
 
 def reinit():
-    for k in bmrt_cache:
-        if k == "meta":
-            bmrt_cache[k] = _init_metainfo
-        else:
-            bmrt_cache[k] = {}
+    global _snapshot
+    _snapshot = _empty_snapshot()
+    _refresh_state["hwm_id"] = None
 
 
 # Set initial state during import of this module. Rely on this happening once
@@ -217,7 +275,12 @@ def wait_for_first_bmrt_cache_population(timeout=20):
 
 # Fetching one million items from a sample DB takes ~1 minute on my machine
 # (the `results = Session.scalars(....all())` call takes that long.
-def _fetch_and_cache_most_recent_results() -> None:
+def _fetch_and_cache_most_recent_results(incremental: bool = False) -> None:
+    """
+    Populate the cache from scratch, or -- if `incremental` is set and if
+    there was a previous population -- fetch only those results that were
+    inserted since the last refresh and merge them into the cache.
+    """
     # https://docs.sqlalchemy.org/en/20/orm/session_api.html#sqlalchemy.orm.sessionmaker.begin
 
     # This pattern is weird, see https://github.com/sqlalchemy/sqlalchemy/issues/6519
@@ -225,16 +288,95 @@ def _fetch_and_cache_most_recent_results() -> None:
     dbsession = session_maker()
     with dbsession:
         with dbsession.begin():
-            _fetch_and_cache_most_recent_results_guts(dbsession)
+            if incremental and _refresh_state["hwm_id"] is not None:
+                _fetch_and_merge_new_results(dbsession, _refresh_state["hwm_id"])
+            else:
+                _fetch_and_cache_most_recent_results_guts(dbsession)
             # commits transaction, closes session
 
 
+def _bmrt_row_from_db_result(result: BenchmarkResult) -> Optional[BMRTRow]:
+    """
+    Build the (transient) row record for a benchmark result fetched from the
+    database, to be added to the columnar cache storage.
+
+    Return `None` if the result is not supposed to enter the cache.
+    """
+    # For now: put both, failed and non-failed results into the cache.
+    # It would be a nice code simplification to only consider succeeded
+    # ones, but then we miss out on reporting about the failed ones.
+
+    # Important decision for now: skip results that have not been obtained
+    # for the default code branch.
+    bmrcommit = result.commit
+
+    if bmrcommit is None:
+        return None
+
+    if not bmrcommit.on_default_branch:
+        return None
+
+    # The str() indirections below are here to quickly make sure that there
+    # is no more SQLAlchemy magic associated to objects we store here.
+    # Maybe that is not needed but instead of making that experiment I took
+    # the quick way.
+
+    # Note: with named types it's here not enough to to # type: ...
+    # but an explicit cast is required? perf impact? dunno.
+    # Related: https://github.com/python/typing/discussions/1146
+    benchmark_name = cast(TBenchmarkName, str(result.case.name))
+
+    # A textual representation of the case permutation. As it is 'complete'
+    # it should also work as a proper identifier (like primary key).
+    casedict = result.case.to_dict()
+    case_text_id = result.case.text_id
+
+    return BMRTRow(
+        id=str(result.id),
+        benchmark_name=benchmark_name,
+        started_at=result.timestamp.timestamp(),
+        data=result.measurements,
+        svs=result.svs,
+        svs_type=result.svs_type,
+        unit=str(result.unit) if result.unit else "n/a",
+        # Current `hardware.hash` is a string (not byte sequence), and does
+        # not have a predictable charset. I hoped it would be just the
+        # hexdigest of a popular hash function. What we have contains
+        # user-given data, i.e. the string is brittle to work with in code
+        # and generated documents. E.g. may not work in JavaScript var
+        # declaration statements). Translate this Conbench business logic
+        # "hardware hash" into one with predictable charset. This is for
+        # grouping/sorting purposes, and for building UI. Use MD5 (fast,
+        # unlikely collision, good enough). Can clean up when reworking
+        # hardware/platform/env:
+        # https://github.com/conbench/conbench/issues/1340
+        hardware_checksum=hashlib.md5(result.hardware.hash.encode("utf-8")).hexdigest(),
+        hardware_name=str(result.hardware.name),
+        case_id=str(result.case_id),
+        context_id=str(result.context_id),
+        run_id=str(result.run_id),
+        # These context dictionaries are often the largest part of a
+        # cached result (in terms of memory usage) -- they can be a rather
+        # big collection of strings. However, by the nature of the processed
+        # data there can be a high degree of duplication across benchmark
+        # results. The data source uses a unique constraint (enforced in DB)
+        # with an index on the entire dictionary; the columnar storage keeps
+        # one dictionary per context ID.
+        context_dict=result.context.to_dict(),
+        case_text_id=case_text_id,
+        case_dict=casedict,
+        ui_hardware_short=str(result.ui_hardware_short),
+        ui_non_null_sample_count=result.ui_non_null_sample_count,
+        run_reason=result.run_reason if result.run_reason else "n/a",
+    )
+
+
 def _fetch_and_cache_most_recent_results_guts(
     dbsession: sqlalchemy.orm.session.Session,
 ):
     log.debug(
         "BMRT cache: keys in cache: %s",
-        len(bmrt_cache["by_id"]),
+        len(_snapshot.by_id),
     )
     t0 = time.monotonic()
 
@@ -245,7 +387,10 @@ def _fetch_and_cache_most_recent_results_guts(
     query_statement = (
         sqlalchemy.select(BenchmarkResult)
         .order_by(BenchmarkResult.timestamp.desc())
-        .where(BenchmarkResult.timestamp > datetime.now() - timedelta(days=14))
+        .where(
+            BenchmarkResult.timestamp
+            > datetime.now() - timedelta(days=BMRT_CACHE_MAX_AGE_DAYS)
+        )
         .limit(int(BMRT_CACHE_SIZE))
     ).execution_options(yield_per=2000)
 
@@ -256,13 +401,10 @@ def _fetch_and_cache_most_recent_results_guts(
     # fetches the first chunk?).
     result_rows_iterator = dbsession.scalars(query_statement)
 
-    by_id_dict: Dict[str, BMRTBenchmarkResult] = {}
-    by_name_dict: Dict[TBenchmarkName, List[BMRTBenchmarkResult]] = defaultdict(list)
-    by_case_id_dict: Dict[str, List[BMRTBenchmarkResult]] = defaultdict(list)
-    by_run_id_dict: Dict[str, List[BMRTBenchmarkResult]] = defaultdict(list)
+    # Start with fresh string tables: a full population also compacts these.
+    builder = ColumnarResults.empty().builder()
 
-    first_result = None
-    last_result = None
+    hwm_id = ""
     for result in result_rows_iterator:  # pylint: disable=E1133
         # Note that the DB might feed us so quickly that this loop body becomes
         # CPU-bound. In that case, given the current deployment model, we
@@ -274,183 +416,396 @@ def _fetch_and_cache_most_recent_results_guts(
         # Update: Spread out the CPU work a little more.
         time.sleep(0.0001)
 
-        # Keep track of the first (newest) and last (oldest) result
-        # while consuming the iterator. If n=1 they are the same.
-        last_result = result
-        if first_result is None:
-            first_result = result
-
-        # For now: put both, failed and non-failed results into the cache.
-        # It would be a nice code simplification to only consider succeeded
-        # ones, but then we miss out on reporting about the failed ones.
+        # Keep track of the newest inserted result (also if it does not enter
+        # the cache), as the starting point for the next incremental update.
+        hwm_id = max(hwm_id, str(result.id))
 
-        # Important decision for now: skip results that have not been obtained
-        # for the default code branch.
-        bmrcommit = result.commit
+        row = _bmrt_row_from_db_result(result)
+        if row is not None:
+            builder.add(row)
 
-        if bmrcommit is None:
-            continue
+    t1 = time.monotonic()
 
-        if not bmrcommit.on_default_branch:
-            continue
+    if len(builder) == 0:
+        log.info("BMRT cache: no results")
+        # Do not set a high-water mark: keep doing full refreshes until
+        # there is something in the cache.
+        return
 
-        # The str() indirections below are here to quickly make sure that there
-        # is no more SQLAlchemy magic associated to objects we store here.
-        # Maybe that is not needed but instead of making that experiment I took
-        # the quick way.
-
-        # Note: with named types it's here not enough to to # type: ...
-        # but an explicit cast is required? perf impact? dunno.
-        # Related: https://github.com/python/typing/discussions/1146
-        benchmark_name = cast(TBenchmarkName, str(result.case.name))
-
-        # A textual representation of the case permutation. As it is 'complete'
-        # it should also work as a proper identifier (like primary key).
-        casedict = result.case.to_dict()
-        case_text_id = result.case.text_id
-
-        bmr = BMRTBenchmarkResult(
-            id=str(result.id),
-            benchmark_name=benchmark_name,
-            started_at=result.timestamp.timestamp(),
-            data=result.measurements,
-            svs=result.svs,
-            svs_type=result.svs_type,
-            unit=str(result.unit) if result.unit else "n/a",
-            # Current `hardware.hash` is a string (not byte sequence), and does
-            # not have a predictable charset. I hoped it would be just the
-            # hexdigest of a popular hash function. What we have contains
-            # user-given data, i.e. the string is brittle to work with in code
-            # and generated documents. E.g. may not work in JavaScript var
-            # declaration statements). Translate this Conbench business logic
-            # "hardware hash" into one with predictable charset. This is for
-            # grouping/sorting purposes, and for building UI. Use MD5 (fast,
-            # unlikely collision, good enough). Can clean up when reworking
-            # hardware/platform/env:
-            # https://github.com/conbench/conbench/issues/1340
-            hardware_checksum=hashlib.md5(
-                result.hardware.hash.encode("utf-8")
-            ).hexdigest(),
-            hardware_name=str(result.hardware.name),
-            case_id=str(result.case_id),
-            context_id=str(result.context_id),
-            run_id=str(result.run_id),
-            # These context dictionaries are often the largest part of these
-            # BMRTBenchmarkResult object (in terms of memory usage) -- they can
-            # be a rather big collection of strings. However, by the nature of
-            # the processed data there can be a high degree of duplication
-            # across benchmark results. The data source uses a unique
-            # constraint (enforced in DB) with an index on the entire
-            # dictionary, i.e. use the _same_ object here and assume it may be
-            # shared across potentially many BMRTBenchmarkResult objects.
-            context_dict=result.context.to_dict(),
-            case_text_id=case_text_id,
-            case_dict=casedict,
-            ui_hardware_short=str(result.ui_hardware_short),
-            ui_time_started_at=str(result.ui_time_started_at),
-            ui_non_null_sample_count=result.ui_non_null_sample_count,
-            run_reason=result.run_reason if result.run_reason else "n/a",
-        )
+    _publish(builder.finish())
+    _refresh_state["hwm_id"] = hwm_id
+    _refresh_state["full_refresh_at"] = time.time()
 
-        by_id_dict[str(result.id)] = bmr
-        by_name_dict[benchmark_name].append(bmr)
-        by_run_id_dict[str(result.run_id)].append(bmr)
+    conbench.metrics.GAUGE_BMRT_CACHE_LAST_UPDATE_SECONDS.set(t1 - t0)
+    _refresh_state["duration_seconds"] = t1 - t0
 
-        # Add a property on the Case object, on the fly.
-        # Build the textual representation of this case which should also
-        # uniquely / unambiguously define/identify this specific case.
-        by_case_id_dict[str(result.case_id)].append(bmr)
+    log.info(
+        ("BMRT cache population done (%s results, took %.3f s)"),
+        len(_snapshot.by_id),
+        t1 - t0,
+    )
 
-    t1 = time.monotonic()
 
-    if len(by_name_dict) == 0:
-        log.info("BMRT cache: no results")
-        return
+def _publish(
+    store: ColumnarResults,
+    generation: Optional[int] = None,
+    built_at: Optional[float] = None,
+) -> None:
+    """
+    Build a new cache snapshot for `store` (including the lookup structures)
+    and make it the current one.
 
-    # This helps mypy, too.
-    assert first_result
-    assert last_result
+    `generation` and `built_at` can be passed in when this snapshot represents
+    one built elsewhere (see conbench.bmrt_snapshot).
+    """
+    global _snapshot
+    assert len(store)
 
-    # Group all benchmark results into timeseries
-    dict4tdf, bmrlist_by_4tuple = _generate_tsdf_per_4tuple(by_name_dict)
-
-    # Mutate the dictionary which is accessed by other threads, do this in a
-    # quick fashion -- each of this assignments is atomic (thread-safe), but
-    # between those two assignments a thread might perform read access. (minor
-    # inconsistency is possible). Of course we can add another lookup
-    # indirection layer by assembling a completely new dictionary here and then
-    # re-defining the name bmrt_cache.
-    bmrt_cache["by_id"] = by_id_dict
-    bmrt_cache["by_benchmark_name"] = by_name_dict
-    bmrt_cache["by_case_id"] = by_case_id_dict
-    bmrt_cache["by_4t_df"] = dict4tdf
-    bmrt_cache["by_4t_list"] = bmrlist_by_4tuple
-    bmrt_cache["by_run_id"] = by_run_id_dict
-    bmrt_cache["meta"] = CacheUpdateMetaInfo(
-        newest_result_time_str=first_result.ui_time_started_at,
+    newest = store[int(np.argmax(store.started_at))]
+    oldest = store[int(np.argmin(store.started_at))]
+    meta = CacheUpdateMetaInfo(
+        newest_result_time_str=newest.ui_time_started_at,
         covered_timeframe_days_approx=str(
-            (first_result.timestamp - last_result.timestamp).days
+            int((newest.started_at - oldest.started_at) / 86400)
         ),
-        oldest_result_time_str=last_result.ui_time_started_at,
-        n_results=len(by_id_dict),
+        oldest_result_time_str=oldest.ui_time_started_at,
+        n_results=len(store),
+        generation=(
+            generation if generation is not None else next(_generation_counter)
+        ),
+        built_at=built_at if built_at is not None else time.time(),
     )
 
+    if not _PUBLISH_LOOKUP_DICTS:
+        _snapshot = dataclasses.replace(
+            _empty_snapshot(), results=store, by_id=BMRTResultsById(store), meta=meta
+        )
+        return
+
+    # Group all benchmark results into timeseries
+    dict4tdf, bmrlist_by_4tuple = _generate_tsdf_per_4tuple(store)
+
+    by_name_dict: Dict[TBenchmarkName, BMRTResultList] = {
+        k[0]: BMRTResultList(store, rows)
+        for k, rows in store.group_rows(("benchmark_name",)).items()
+    }
+    by_case_id_dict: Dict[str, BMRTResultList] = {
+        k[0]: BMRTResultList(store, rows)
+        for k, rows in store.group_rows(("case_id",)).items()
+    }
+    by_run_id_dict: Dict[str, BMRTResultList] = {
+        k[0]: BMRTResultList(store, rows)
+        for k, rows in store.group_rows(("run_id",)).items()
+    }
+
+    # Swap in the new generation with a single reference assignment (atomic):
+    # readers either see the previous or the new snapshot, never a mix.
+    _snapshot = CacheSnapshot(
+        results=store,
+        by_id=BMRTResultsById(store),
+        by_benchmark_name=MappingProxyType(by_name_dict),
+        by_case_id=MappingProxyType(by_case_id_dict),
+        by_run_id=MappingProxyType(by_run_id_dict),
+        by_4t_df=dict4tdf,
+        by_4t_list=MappingProxyType(bmrlist_by_4tuple),
+        meta=meta,
+    )
+
+
+def _uuid7_hex_lower_bound(hwm_id: str, overlap_seconds: float) -> str:
+    """
+    Return the smallest 32-char UUID7 hex string that may have been generated
+    `overlap_seconds` before the UUID7 `hwm_id`.
+
+    The first 48 bits of a UUID7 are the milliseconds since the Unix epoch.
+    """
+    try:
+        ms = int(hwm_id[:12], 16)
+    except ValueError:
+        # Not a UUID7-like primary key (there may be legacy / user-given IDs).
+        # Then fall back to not using an overlap.
+        return hwm_id
+
+    ms = max(0, ms - int(overlap_seconds * 1000))
+    return f"{ms:012x}" + "0" * 20
+
+
+def _fetch_and_merge_new_results(
+    dbsession: sqlalchemy.orm.session.Session, hwm_id: str
+):
+    """
+    Incremental update: fetch results inserted after (around) the high-water
+    mark, merge them into the cache, evict what fell off the time window or
+    exceeds the size limit.
+    """
+    query_statement = (
+        sqlalchemy.select(BenchmarkResult)
+        .where(
+            BenchmarkResult.id
+            > _uuid7_hex_lower_bound(hwm_id, BMRT_INCREMENTAL_OVERLAP_SECONDS)
+        )
+        .where(
+            BenchmarkResult.timestamp
+            > datetime.now() - timedelta(days=BMRT_CACHE_MAX_AGE_DAYS)
+        )
+        .order_by(BenchmarkResult.id)
+    ).execution_options(yield_per=2000)
+
+    max_id = _merge_results(dbsession.scalars(query_statement), "incremental update")
+    if max_id is not None:
+        hwm_id = max(hwm_id, max_id)
+    _refresh_state["hwm_id"] = hwm_id
+
+
+def _fetch_and_merge_results_by_id(result_ids: List[str]) -> None:
+    """
+    Push-based update: fetch the results with the given IDs (which were
+    reported as freshly inserted, see `enqueue_new_result()`) in one query,
+    and merge them into the cache.
+
+    The high-water mark is not advanced here: results inserted by other
+    processes may have smaller IDs and must still be picked up by the next
+    incremental scan (which skips what is already cached).
+    """
+    dbsession = session_maker()
+    with dbsession:
+        with dbsession.begin():
+            query_statement = (
+                sqlalchemy.select(BenchmarkResult)
+                .where(BenchmarkResult.id.in_(result_ids))
+                .where(
+                    BenchmarkResult.timestamp
+                    > datetime.now() - timedelta(days=BMRT_CACHE_MAX_AGE_DAYS)
+                )
+                .order_by(BenchmarkResult.id)
+            )
+            _merge_results(dbsession.scalars(query_statement), "push update")
+
+
+def _merge_results(results: Iterable[BenchmarkResult], what: str) -> Optional[str]:
+    """
+    Merge `results` into the cache (skipping those that are cached already),
+    evict what fell off the time window or exceeds the size limit, publish.
+    Return the largest result ID seen (`None` if `results` was empty).
+
+    The currently exposed columnar store is immutable; build a new one (the
+    string tables are shared across both, and only ever get appended to).
+    """
+    t0 = time.monotonic()
+
+    old = _snapshot.results
+    builder = old.builder()
+    max_id: Optional[str] = None
+
+    for result in results:
+        # See comment in _fetch_and_cache_most_recent_results_guts().
+        time.sleep(0.0001)
+        rid = str(result.id)
+        if max_id is None or rid > max_id:
+            max_id = rid
+
+        if old.row_for_id(rid) is not None:
+            # Seen before (overlap window, or pushed already).
+            continue
+
+        row = _bmrt_row_from_db_result(result)
+        if row is not None:
+            builder.add(row)
+
+    keep_rows = _rows_to_keep(old, len(builder))
+    n_evicted = len(old) - len(keep_rows)
+
+    if len(builder) == 0 and n_evicted == 0:
+        log.info("BMRT cache: %s: no change (took %.3f s)", what, time.monotonic() - t0)
+        return max_id
+
+    if len(builder) == 0 and len(keep_rows) == 0:
+        hwm_id = _refresh_state["hwm_id"]
+        reinit()
+        _refresh_state["hwm_id"] = hwm_id
+        return max_id
+
+    store = old.take(keep_rows).concat(builder)
+    _publish(store)
+
+    t1 = time.monotonic()
     conbench.metrics.GAUGE_BMRT_CACHE_LAST_UPDATE_SECONDS.set(t1 - t0)
+    _refresh_state["duration_seconds"] = t1 - t0
 
     log.info(
-        ("BMRT cache population done (%s results, took %.3f s)"),
-        len(bmrt_cache["by_id"]),
+        "BMRT cache: %s done (%s new, %s evicted, %s results, took %.3f s)",
+        what,
+        len(builder),
+        n_evicted,
+        len(store),
         t1 - t0,
     )
+    return max_id
 
 
-def periodically_fetch_last_n_benchmark_results() -> threading.Thread:
+def _rows_to_keep(old: ColumnarResults, n_new: int) -> np.ndarray:
     """
-    Return right after having spawned a thread that triggers periodic action.
+    Return (sorted) indices of those cached results that did not fall off the
+    time window, and that can stay while respecting the cache size limit (the
+    oldest results go first).
     """
-    first_sleep_seconds = 3
-    min_delay_between_runs_seconds = 120
+    cutoff = (datetime.now() - timedelta(days=BMRT_CACHE_MAX_AGE_DAYS)).timestamp()
+    keep = np.flatnonzero(old.started_at > cutoff)
 
-    if Config.TESTING:
-        first_sleep_seconds = 0
-        min_delay_between_runs_seconds = 20
+    excess = len(keep) + n_new - int(BMRT_CACHE_SIZE)
+    if excess > 0:
+        by_age = keep[np.argsort(old.started_at[keep], kind="stable")]
+        keep = np.sort(by_age[excess:])
 
-    def _run_forever():
-        delay_s = first_sleep_seconds
+    return keep
+
+
+def enqueue_new_result(
+    result_id: str,
+    dbsession: sqlalchemy.orm.session.Session | sqlalchemy.orm.scoped_session,
+) -> None:
+    """
+    Report a freshly inserted (committed) benchmark result to the BMRT cache,
+    so that it shows up within seconds instead of after the next periodic
+    incremental scan. Called from the result ingestion path; cheap.
 
-        while True:
-            # Build responsive sleep loop that inspects SHUTDOWN often.
-            deadline = time.monotonic() + delay_s
-            while time.monotonic() < deadline:
-                if conbench.job.SHUTDOWN:
-                    log.debug("_run_forever: shut down")
-                    return
+    In builder process mode, the cache is maintained by another process: send
+    the ID via PostgreSQL NOTIFY (delivered upon commit, to the builder process
+    which LISTENs; this also covers results submitted to any of N web
+    application processes). Otherwise, put it into the in-process queue.
 
-                time.sleep(0.01)
+    Never raise: the result was stored already, and the periodic scan is the
+    fallback.
+    """
+    enqueue_new_results([result_id], dbsession)
 
-            t0 = time.monotonic()
 
-            # yappi.start()
+def enqueue_new_results(
+    result_ids: List[str],
+    dbsession: sqlalchemy.orm.session.Session | sqlalchemy.orm.scoped_session,
+) -> None:
+    """
+    Like enqueue_new_result(), for a batch of results (one commit for all
+    NOTIFYs).
+    """
+    conbench.metrics.COUNTER_BMRT_CACHE_PUSHED_RESULTS.inc(len(result_ids))
 
+    if not Config.BMRT_CACHE_BUILDER_PROCESS:
+        if _push_consumer_active.is_set():
+            for result_id in result_ids:
+                _push_queue.put(result_id)
+        return
+
+    try:
+        dbsession.execute(
+            sqlalchemy.text(
+                "SELECT pg_notify(:channel, payload) "
+                "FROM unnest(CAST(:payloads AS text[])) AS payload"
+            ),
+            {"channel": _PG_NOTIFY_CHANNEL, "payloads": result_ids},
+        )
+        dbsession.commit()
+    except Exception as exc:
+        log.warning(
+            "BMRT cache: NOTIFY failed for %s result(s): %s", len(result_ids), exc
+        )
+        dbsession.rollback()
+
+
+def _drain_push_queue() -> List[str]:
+    ids: List[str] = []
+    while True:
+        try:
+            ids.append(_push_queue.get_nowait())
+        except queue.Empty:
+            return ids
+
+
+class _PgNotifyListener:
+    """
+    Receive the result IDs sent by enqueue_new_result() in builder process
+    mode. Uses a dedicated connection (not from the SQLAlchemy pool) in
+    autocommit mode; `drain()` does not block. Notifications sent while not
+    connected are lost; those results are picked up by the next periodic
+    incremental scan.
+    """
+
+    reconnect_interval_seconds = 10.0
+
+    def __init__(self, dsn: str):
+        self._dsn = dsn
+        self._conn: Any = None
+        self._next_connect_attempt = 0.0
+
+    def drain(self) -> List[str]:
+        try:
+            if self._conn is None:
+                if time.monotonic() < self._next_connect_attempt:
+                    return []
+                self._next_connect_attempt = (
+                    time.monotonic() + self.reconnect_interval_seconds
+                )
+                self._conn = psycopg2.connect(self._dsn)
+                self._conn.autocommit = True
+                with self._conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {_PG_NOTIFY_CHANNEL}")
+                log.info("BMRT cache: listening on %s", _PG_NOTIFY_CHANNEL)
+
+            self._conn.poll()
+            ids = [n.payload for n in self._conn.notifies]
+            self._conn.notifies.clear()
+            return ids
+        except psycopg2.Error as exc:
+            log.warning("BMRT cache: LISTEN connection error: %s", exc)
+            self.close()
+            return []
+
+    def close(self) -> None:
+        if self._conn is not None:
             try:
-                # filprofile(lambda: _fetch_and_cache_most_recent_results(), "fil-result")
-                _fetch_and_cache_most_recent_results()
-            except Exception as exc:
-                # For now, log all error detail. (but handle all exceptions; do
-                # some careful log-reading after rolling this out).
-                log.exception("BMRT cache: exception during update: %s", exc)
+                self._conn.close()
+            except psycopg2.Error:
+                pass
+            self._conn = None
+
 
-            # yappi.stop()
-            # yappi_print_threads_stats()
+def periodically_fetch_last_n_benchmark_results() -> threading.Thread:
+    """
+    Return right after having spawned a thread that triggers periodic action.
 
-            _FIRST_REFRESH_DONE_EVENT.set()
-            last_call_duration_s = time.monotonic() - t0
+    If Config.BMRT_CACHE_BUILDER_PROCESS is set, the thread does not fetch from
+    the database itself: it makes sure that a builder process is running, and
+    it periodically attaches to the newest snapshot published by that.
+    """
+    if Config.BMRT_CACHE_BUILDER_PROCESS:
+        t = threading.Thread(
+            target=_attach_to_snapshots_forever,
+            args=(Config.BMRT_CACHE_SNAPSHOT_DIR,),
+            name="bmrt-cache-attach",
+        )
+        t.start()
+        return t
+
+    first_sleep_seconds = 3
+    if Config.TESTING:
+        first_sleep_seconds = 0
 
-            # Goal: spend the majority of the time _not_ doing this thing here.
-            # So, if the last iteration lasted for e.g. ~60 seconds, then keep
-            # waiting for ~five minutes until triggering the next run.
-            delay_s = max(min_delay_between_runs_seconds, 5 * last_call_duration_s)
-            log.info("BMRT cache: trigger next fetch in %.3f s", delay_s)
+    persist_dir = Config.BMRT_CACHE_PERSIST_DIR
+    after_refresh = None
+    if persist_dir is not None:
+        after_refresh = _snapshot_writer(persist_dir, BMRT_PERSIST_MIN_INTERVAL_SECONDS)
+
+    def _run_forever():
+        _push_consumer_active.set()
+        try:
+            _refresh_forever(
+                first_sleep_seconds,
+                should_stop=lambda: conbench.job.SHUTDOWN,
+                after_refresh=after_refresh,
+                warm_start_dir=persist_dir,
+            )
+        finally:
+            _push_consumer_active.clear()
 
     t = threading.Thread(target=_run_forever, name="bmrt-cache-refresh")
     t.start()
@@ -462,75 +817,375 @@ def periodically_fetch_last_n_benchmark_results() -> threading.Thread:
     # join the thread.
 
 
+def _refresh_forever(
+    first_sleep_seconds: float,
+    should_stop: Callable[[], bool],
+    after_refresh: Optional[Callable[[], None]] = None,
+    drain_pushed: Callable[[], List[str]] = _drain_push_queue,
+    warm_start_dir: Optional[str] = None,
+) -> None:
+    """
+    The periodic refresh loop: full population first, incremental updates in
+    between, full population every BMRT_FULL_REFRESH_INTERVAL_SECONDS. Call
+    `after_refresh()` (if given) after each successful iteration. Return when
+    `should_stop()`.
+
+    In between, apply pushed updates (result IDs returned by `drain_pushed()`)
+    in micro-batches.
+
+    If `warm_start_dir` contains a snapshot (written by a previous process),
+    start with that, and catch up incrementally instead of doing a full
+    population first.
+    """
+    min_delay_between_runs_seconds = 30
+    if Config.TESTING:
+        min_delay_between_runs_seconds = 20
+
+    delay_s = first_sleep_seconds
+    last_full_refresh = None
+
+    if warm_start_dir is not None:
+        full_refresh_at = _warm_start(warm_start_dir)
+        if full_refresh_at is not None:
+            # Translate to the monotonic clock (can be in the past; then the
+            # next iteration is a full one).
+            last_full_refresh = time.monotonic() - (time.time() - full_refresh_at)
+            delay_s = 0
+
+    pending: List[str] = []
+    pending_since = 0.0
+    push_batch_delay_s = BMRT_PUSH_BATCH_SECONDS
+
+    while True:
+        # Build responsive sleep loop that inspects SHUTDOWN often.
+        deadline = time.monotonic() + delay_s
+        while time.monotonic() < deadline:
+            if should_stop():
+                log.debug("_run_forever: shut down")
+                return
+
+            pushed = drain_pushed()
+            if pushed:
+                if not pending:
+                    pending_since = time.monotonic()
+                pending.extend(pushed)
+
+            if pending and (
+                len(pending) >= BMRT_PUSH_BATCH_MAX
+                or time.monotonic() - pending_since >= push_batch_delay_s
+            ):
+                # Each batch builds a new snapshot (cost grows with the cache
+                # size): under steady ingestion, do not spend more than ~20 %
+                # of the time doing that.
+                t0 = time.monotonic()
+                _apply_pushed(pending, after_refresh)
+                pending = []
+                push_batch_delay_s = max(
+                    BMRT_PUSH_BATCH_SECONDS, 5 * (time.monotonic() - t0)
+                )
+
+            time.sleep(0.01)
+
+        t0 = time.monotonic()
+
+        incremental = (
+            last_full_refresh is not None
+            and t0 - last_full_refresh < BMRT_FULL_REFRESH_INTERVAL_SECONDS
+        )
+        if not incremental:
+            last_full_refresh = t0
+
+        # yappi.start()
+
+        try:
+            # filprofile(lambda: _fetch_and_cache_most_recent_results(), "fil-result")
+            _fetch_and_cache_most_recent_results(incremental=incremental)
+            if after_refresh is not None:
+                after_refresh()
+        except Exception as exc:
+            # For now, log all error detail. (but handle all exceptions; do
+            # some careful log-reading after rolling this out).
+            log.exception("BMRT cache: exception during update: %s", exc)
+
+        # yappi.stop()
+        # yappi_print_threads_stats()
+
+        _FIRST_REFRESH_DONE_EVENT.set()
+        last_call_duration_s = time.monotonic() - t0
+
+        # Goal: spend the majority of the time _not_ doing this thing here.
+        # So, if the last iteration lasted for e.g. ~60 seconds, then keep
+        # waiting for ~five minutes until triggering the next run. Full
+        # refreshes are rare; do not let their duration delay the next
+        # (incremental) update.
+        delay_s = min_delay_between_runs_seconds
+        if incremental:
+            delay_s = max(delay_s, 5 * last_call_duration_s)
+        log.info("BMRT cache: trigger next fetch in %.3f s", delay_s)
+
+
+def _apply_pushed(
+    result_ids: List[str], after_refresh: Optional[Callable[[], None]]
+) -> None:
+    if _refresh_state["hwm_id"] is None:
+        # Not populated yet: the upcoming full population covers these.
+        return
+
+    try:
+        _fetch_and_merge_results_by_id(result_ids)
+        if after_refresh is not None:
+            after_refresh()
+    except Exception as exc:
+        # The next periodic incremental scan picks these up.
+        log.exception("BMRT cache: exception during push update: %s", exc)
+
+
+def _snapshot_writer(
+    snapshot_dir: str, min_interval_seconds: float = 0.0
+) -> Callable[[], None]:
+    """
+    Return a function that writes the current cache content to `snapshot_dir`
+    if it changed since the last write (and if the last write was at least
+    `min_interval_seconds` ago).
+    """
+    written: Dict[str, Any] = {"store": None, "at": 0.0}
+
+    def _write_snapshot():
+        snapshot = _snapshot
+        store = snapshot.results
+        if store is written["store"] or len(store) == 0:
+            return
+        if isinstance(store.ids, np.memmap):
+            # Attached to a snapshot (warm start): on disk already.
+            return
+        if time.monotonic() - written["at"] < min_interval_seconds:
+            return
+
+        meta = {
+            # The high-water mark that this content corresponds to: starting
+            # point for catching up after a warm start.
+            "hwm_id": _refresh_state["hwm_id"],
+            "full_refresh_at": _refresh_state["full_refresh_at"],
+            # Readers take these over, so that the generation identifies the
+            # same content in all processes.
+            "generation": snapshot.meta.generation,
+            "built_at": snapshot.meta.built_at,
+            "update_duration_seconds": _refresh_state["duration_seconds"],
+        }
+        conbench.bmrt_snapshot.write_snapshot(snapshot_dir, store, meta)
+        written["store"] = store
+        written["at"] = time.monotonic()
+
+    return _write_snapshot
+
+
+def _warm_start(snapshot_dir: str) -> Optional[float]:
+    """
+    Populate the cache from the snapshot in `snapshot_dir` (written by a
+    previous process), if there is a usable one. Return the time of the full
+    population that the snapshot content is based on, or `None` if there was
+    nothing to start from.
+
+    Attaching is cheap (memory maps), so that the UI has data right after
+    startup. The caller is expected to catch up from the high-water mark.
+    """
+    global _generation_counter
+
+    t0 = time.monotonic()
+    try:
+        snap = conbench.bmrt_snapshot.load_snapshot(snapshot_dir)
+    except Exception as exc:
+        log.warning("BMRT cache: cannot warm start from %s: %s", snapshot_dir, exc)
+        return None
+
+    if snap is None or not len(snap.store) or not snap.meta.get("hwm_id"):
+        log.info("BMRT cache: no snapshot to warm start from in %s", snapshot_dir)
+        return None
+
+    _publish(snap.store, snap.meta["generation"], snap.meta["built_at"])
+    _refresh_state["hwm_id"] = snap.meta["hwm_id"]
+    _refresh_state["full_refresh_at"] = snap.meta["full_refresh_at"]
+    # Keep counting from there (monotonic generation, also across restarts).
+    _generation_counter = itertools.count(snap.meta["generation"] + 1)
+    _FIRST_REFRESH_DONE_EVENT.set()
+
+    log.info(
+        "BMRT cache: warm start from snapshot %s (%s results, built %.0f s ago, "
+        "took %.3f s)",
+        snap.name,
+        len(snap.store),
+        time.time() - snap.meta["built_at"],
+        time.monotonic() - t0,
+    )
+    return snap.meta["full_refresh_at"]
+
+
+def run_builder_process(snapshot_dir: str, parent_pid: int) -> None:
+    """
+    Entry point of the builder process (started via the multiprocessing
+    'spawn' method, i.e. this is a fresh interpreter).
+
+    Run the refresh loop, and publish a snapshot after each iteration that
+    changed the cache. Only one builder is active per snapshot directory
+    (file lock); exit right away if another one is active already. Exit when
+    the parent process goes away, or upon SIGTERM/SIGINT (conbench.job
+    installs the handlers setting the SHUTDOWN flag).
+    """
+    lockfile = conbench.bmrt_snapshot.try_lock_builder(snapshot_dir)
+    if lockfile is None:
+        log.info("BMRT builder: another process is the builder, exit")
+        return
+
+    log.info("BMRT builder: started (pid %s), dir: %s", os.getpid(), snapshot_dir)
+
+    global _PUBLISH_LOOKUP_DICTS
+    _PUBLISH_LOOKUP_DICTS = False
+    configure_engine(Config.SQLALCHEMY_DATABASE_URI)
+
+    def _should_stop():
+        return conbench.job.SHUTDOWN or os.getppid() != parent_pid
+
+    listener = _PgNotifyListener(Config.SQLALCHEMY_DATABASE_URI)
+
+    try:
+        _refresh_forever(
+            0,
+            should_stop=_should_stop,
+            after_refresh=_snapshot_writer(snapshot_dir),
+            drain_pushed=listener.drain,
+            # The snapshot directory survives restarts of the web application
+            # processes (tmpfs), or also restarts of the machine (if
+            # configured to be on persistent storage).
+            warm_start_dir=snapshot_dir,
+        )
+    finally:
+        listener.close()
+        lockfile.close()
+        log.info("BMRT builder: exit")
+
+
+def _start_builder_process(snapshot_dir: str) -> multiprocessing.process.BaseProcess:
+    # Use 'spawn', not 'fork': this is called from a multi-threaded process
+    # (fork would copy held locks, the DB connection pool, ...). Daemonic:
+    # terminated (SIGTERM) when this process exits.
+    proc = multiprocessing.get_context("spawn").Process(
+        target=run_builder_process,
+        args=(snapshot_dir, os.getpid()),
+        name="bmrt-cache-builder",
+        daemon=True,
+    )
+    proc.start()
+    log.info("BMRT cache: started builder process (pid %s)", proc.pid)
+    return proc
+
+
+def _attach_to_current_snapshot(
+    snapshot_dir: str, attached: Optional[str]
+) -> Optional[str]:
+    """
+    Attach to the current snapshot if that is not `attached` already, and
+    publish it. Return the name of the attached snapshot.
+    """
+    name = conbench.bmrt_snapshot.current_name(snapshot_dir)
+    if name is None or name == attached:
+        return attached
+
+    t0 = time.monotonic()
+    snap = conbench.bmrt_snapshot.load_snapshot(snapshot_dir, name)
+    assert snap is not None
+
+    _publish(snap.store, snap.meta["generation"], snap.meta["built_at"])
+    _FIRST_REFRESH_DONE_EVENT.set()
+    conbench.metrics.GAUGE_BMRT_CACHE_LAST_UPDATE_SECONDS.set(
+        snap.meta["update_duration_seconds"]
+    )
+    log.info(
+        "BMRT cache: attached to snapshot %s (%s results, took %.3f s)",
+        name,
+        len(snap.store),
+        time.monotonic() - t0,
+    )
+    return name
+
+
+def _attach_to_snapshots_forever(snapshot_dir: str) -> None:
+    poll_interval_seconds = 1.0
+    builder_check_interval_seconds = 10.0
+
+    proc: Optional[multiprocessing.process.BaseProcess] = None
+    attached: Optional[str] = None
+    next_builder_check = 0.0
+
+    while not conbench.job.SHUTDOWN:
+        if time.monotonic() >= next_builder_check:
+            next_builder_check = time.monotonic() + builder_check_interval_seconds
+            # With N web application processes, each has this thread; only one
+            # of the builder processes started by them keeps running (lock).
+            # If the process hosting the builder goes away, another one takes
+            # over.
+            try:
+                if (
+                    proc is None or not proc.is_alive()
+                ) and not conbench.bmrt_snapshot.builder_lock_held(snapshot_dir):
+                    proc = _start_builder_process(snapshot_dir)
+            except Exception as exc:
+                log.exception("BMRT cache: cannot start builder process: %s", exc)
+
+        try:
+            attached = _attach_to_current_snapshot(snapshot_dir, attached)
+        except FileNotFoundError:
+            # Snapshot was replaced (and removed) in the meantime.
+            pass
+        except Exception as exc:
+            log.exception("BMRT cache: exception while attaching: %s", exc)
+
+        deadline = time.monotonic() + poll_interval_seconds
+        while time.monotonic() < deadline and not conbench.job.SHUTDOWN:
+            time.sleep(0.01)
+
+    if proc is not None and proc.is_alive():
+        log.info("BMRT cache: terminate builder process")
+        proc.terminate()
+        proc.join(10)
+
+
 def _generate_tsdf_per_4tuple(
-    by_name_dict: Dict[TBenchmarkName, List[BMRTBenchmarkResult]]
-) -> Tuple[TDict4tdf, TDict4tlist]:
+    store: ColumnarResults,
+) -> Tuple[TimeseriesFrame, TDict4tlist]:
     t2 = time.monotonic()
-    by_name_dict_with_timeseries_tuplekeys: Dict[
-        TBenchmarkName, Dict[Tuple, List[BMRTBenchmarkResult]]
-    ] = {}
-
-    for bname, results in by_name_dict.items():
-        # The magic time series 4-tuple is
-        # bname, caseid, hwchecksum, ctxid (plus repo, i.e. 5 tuple)
-        by_ts_tuple: Dict[Tuple, List[BMRTBenchmarkResult]] = defaultdict(list)
-        for r in results:
-            by_ts_tuple[(r.case_id, r.context_id, r.hardware_checksum)].append(r)
-        by_name_dict_with_timeseries_tuplekeys[bname] = by_ts_tuple
+
+    # The magic time series 4-tuple is
+    # bname, caseid, hwchecksum, ctxid (plus repo, i.e. 5 tuple)
+    #
+    # All time series in a single frame, sorted by (series, time), with group
+    # boundaries as offsets. Previously, this built one dataframe per 4-tuple
+    # in a Python loop; which took seconds for 2*10^5 results.
+    tsframe = TimeseriesFrame(store, T4_COLUMNS)
 
     t3 = time.monotonic()
 
-    tsdf_by_4tuple: TDict4tdf = {}
+    # The result lists are sorted by time, newest first (reversed view on the
+    # frame's row order).
     bmrlist_by_4tuple: TDict4tlist = {}
+    rows = tsframe.rows
+    offsets = tsframe.offsets.tolist()
+    for j, key in enumerate(tsframe.series_keys):
+        start, end = offsets[j], offsets[j + 1]
+        bmrlist_by_4tuple[cast(Tt4, key)] = BMRTResultList(store, rows[start:end][::-1])
 
-    # Brutal, slow, approach: (ideally we find a way to represent all data in a
-    # single dataframe with decent multi-index -- that could be a major speedup
-    # for timeseries analysis on all of these series in a bulk.) one dataframe
-    # per 4-tuple: (bname, case_id, context_id, hardware_checksum).
-    # I have seen this below DF construction loop to take 3 seconds for 2*10^5
-    # results.
-    for bname, unsorted_timeseries in by_name_dict_with_timeseries_tuplekeys.items():
-        for (
-            case_id,
-            context_id,
-            hardware_checksum,
-        ), usresults in unsorted_timeseries.items():
-            # Think: `usresults` is a list not yet sorted by time.
-
-            df = pd.DataFrame(
-                # Note(jp:): cannot use a generator expression here, len needs
-                # to be known.
-                {"svs": [r.svs for r in usresults]},
-                # Note(jp): also no generator expression possible. The
-                # `unit="s"` is the critical ingredient to convert this list of
-                # floaty unix timestamps to datetime representation. `utc=True`
-                # is required to localize the pandas DateTimeIndex to UTC
-                # (input is tz-naive).
-                index=pd.to_datetime(
-                    [r.started_at for r in usresults], unit="s", utc=True
-                ),
-            )
-            # Sort by time.
-            df = df.sort_index()
-            df.index.rename("time", inplace=True)
-            tsdf_by_4tuple[(bname, case_id, context_id, hardware_checksum)] = df
-            bmrlist_by_4tuple[(bname, case_id, context_id, hardware_checksum)] = (
-                usresults
-            )
-
-    t4 = time.monotonic()
-    log.info("BMRT cache pop: quadratic sort loop took %.3f s", t3 - t2)
+    t5 = time.monotonic()
     log.info(
-        "BMRT cache pop: df constr took %.3f s (%s time series)",
-        t4 - t3,
-        len(tsdf_by_4tuple),
+        "BMRT cache pop: time series frame constr took %.3f s (%s time series)",
+        t3 - t2,
+        len(tsframe),
     )
+    log.info("BMRT cache pop: result lists took %.3f s", t5 - t3)
 
     # The following comment is provides insight into the structure of the
     # return value. It shows one example for the key (4-tuple) and
     # corresponding value (and its properties; Index, h)
 
-    # for i, (t4, dffff) in enumerate(tsdf_per_4tuple.items()):
+    # for i, (t4, dffff) in enumerate(tsframe.items()):
     #     if i % 1000 == 0:
     #         print(t4)
     #         print(dffff)
@@ -550,7 +1205,7 @@ def _generate_tsdf_per_4tuple(
     # 2022-09-29 03:18:40.925746918+00:00         NaN
     # 2022-09-29 03:52:28.406414986+00:00         NaN
 
-    return tsdf_by_4tuple, bmrlist_by_4tuple
+    return tsframe, bmrlist_by_4tuple
 
 
 # def yappi_print_threads_stats():
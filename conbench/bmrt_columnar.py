@@ -0,0 +1,736 @@
+"""
+Columnar (array-backed) storage for the BMRT cache.
+
+Instead of keeping one Python object (with a handful of Python strings, a list
+of Python floats, etc) per cached benchmark result, keep one NumPy array per
+attribute ('column'):
+
+- numeric attributes (single value summary, start time, sample count) are
+  stored in float64/int32 arrays.
+- string-like attributes with a high degree of duplication across results
+  (benchmark name, case ID, context ID, hardware checksum, run ID, unit, ...)
+  are dictionary-encoded: each distinct value is stored once (interned) in a
+  `StringTable`, and each result refers to it via an int32 code.
+- the per-iteration data of all results lives in one flat float64 buffer; each
+  result refers to its slice via offsets.
+- result IDs are stored in a fixed-width bytes array, sorted lookup is done via
+  binary search (no per-result dictionary entry).
+
+Consumers do not need to know about that: `BMRTBenchmarkResult` is a thin view
+(two slots: store reference, row index) exposing the attributes that the
+previous dataclass-based implementation exposed. `BMRTResultList` is a
+sequence of such views, backed by an index array.
+
+A `ColumnarResults` object is immutable after construction: updates build a
+new object (see `concat()` and `take()`).
+
+`TimeseriesFrame` holds all time series of a store in one sorted frame (one
+row per result, group boundaries as offsets), for O(1) per-series lookup and
+for vectorized analysis across all series.
+"""
+
+import dataclasses
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple, overload
+
+import numpy as np
+import pandas as pd
+
+import conbench.util
+from conbench.entities.benchmark_result import (
+    ui_mean_and_uncertainty,
+    ui_rel_sem,
+)
+from conbench.types import TBenchmarkName
+
+
+@dataclasses.dataclass(slots=True)
+class BMRTRow:
+    """
+    Transient row record: one benchmark result as read from the database,
+    before it is added to a `ColumnarBuilder`. Not meant to be kept around (this
+    is the per-result object layout that the columnar storage replaces).
+    """
+
+    id: str
+    case_id: str
+    context_id: str
+    run_id: str
+    data: List[float]
+    svs: float
+    svs_type: str
+    unit: str
+    benchmark_name: TBenchmarkName
+    # POSIX timestamp
+    started_at: float
+    hardware_checksum: str
+    hardware_name: str
+    ui_hardware_short: str
+    case_text_id: str
+    case_dict: Dict[str, str]
+    context_dict: Dict
+    ui_non_null_sample_count: str
+    run_reason: str
+
+
+class StringTable:
+    """
+    Dictionary encoding: map each distinct (hashable) value to a small integer
+    code, store each distinct value once.
+    """
+
+    __slots__ = ("values", "_codes")
+
+    def __init__(self) -> None:
+        self.values: List[Any] = []
+        self._codes: Dict[Hashable, int] = {}
+
+    @classmethod
+    def from_values(cls, values: List[Any]) -> "StringTable":
+        t = cls()
+        t.values = list(values)
+        t._codes = {v: i for i, v in enumerate(t.values)}
+        return t
+
+    def code(self, value: Hashable) -> int:
+        c = self._codes.get(value)
+        if c is None:
+            c = len(self.values)
+            self._codes[value] = c
+            self.values.append(value)
+        return c
+
+    def get_code(self, value: Hashable) -> Optional[int]:
+        return self._codes.get(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+# Columns that are dictionary-encoded. The values in the corresponding
+# StringTable are strings, except for the `case` and `context` tables: there,
+# the payload (case dict, case text ID, context dict) is stored in a separate
+# list indexed by the same code.
+_CODED_COLUMNS = (
+    "benchmark_name",
+    "case_id",
+    "context_id",
+    "hardware_checksum",
+    "hardware_name",
+    "ui_hardware_short",
+    "run_id",
+    "unit",
+    "svs_type",
+    "run_reason",
+)
+
+
+class ColumnarBuilder:
+    """
+    Accumulate rows (append-only), then call `finish()` to obtain an immutable
+    `ColumnarResults` object.
+
+    A builder may be seeded with the string tables of an existing
+    `ColumnarResults` object, so that codes stay compatible (required for
+    `ColumnarResults.concat()`).
+    """
+
+    def __init__(self, tables: Optional[Dict[str, StringTable]] = None) -> None:
+        self.tables: Dict[str, StringTable] = (
+            tables if tables is not None else {c: StringTable() for c in _CODED_COLUMNS}
+        )
+        self._codes: Dict[str, List[int]] = {c: [] for c in _CODED_COLUMNS}
+        self._ids: List[str] = []
+        self._svs: List[float] = []
+        self._started_at: List[float] = []
+        self._n_samples: List[int] = []
+        self._values: List[float] = []
+        self._offsets: List[int] = [0]
+        # Payload for case/context codes. Shared objects (same dict object
+        # for many results), indexed by code.
+        self._case_dicts: Dict[int, Dict] = {}
+        self._case_text_ids: Dict[int, str] = {}
+        self._context_dicts: Dict[int, Dict] = {}
+
+    def add(self, row: BMRTRow) -> None:
+        for c in _CODED_COLUMNS:
+            self._codes[c].append(self.tables[c].code(getattr(row, c)))
+
+        case_code = self._codes["case_id"][-1]
+        if case_code not in self._case_dicts:
+            self._case_dicts[case_code] = row.case_dict
+            self._case_text_ids[case_code] = row.case_text_id
+
+        ctx_code = self._codes["context_id"][-1]
+        if ctx_code not in self._context_dicts:
+            self._context_dicts[ctx_code] = row.context_dict
+
+        self._ids.append(row.id)
+        self._svs.append(row.svs)
+        self._started_at.append(row.started_at)
+        self._n_samples.append(int(row.ui_non_null_sample_count))
+        self._values.extend(row.data)
+        self._offsets.append(len(self._values))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def finish(
+        self,
+        case_payload: Optional[Tuple[List, List]] = None,
+        context_payload: Optional[List] = None,
+    ) -> "ColumnarResults":
+        # Payload lists indexed by code. Take the payload of a previous store
+        # (if any) into account: its codes are shared with this builder.
+        ncase = len(self.tables["case_id"])
+        nctx = len(self.tables["context_id"])
+        case_dicts = list(case_payload[0]) if case_payload else []
+        case_text_ids = list(case_payload[1]) if case_payload else []
+        context_dicts = list(context_payload) if context_payload else []
+        case_dicts.extend([None] * (ncase - len(case_dicts)))
+        case_text_ids.extend([None] * (ncase - len(case_text_ids)))
+        context_dicts.extend([None] * (nctx - len(context_dicts)))
+        for code, d in self._case_dicts.items():
+            case_dicts[code] = d
+            case_text_ids[code] = self._case_text_ids[code]
+        for code, d in self._context_dicts.items():
+            context_dicts[code] = d
+
+        return ColumnarResults(
+            tables=self.tables,
+            codes={c: np.array(self._codes[c], dtype=np.int32) for c in _CODED_COLUMNS},
+            ids=np.array(self._ids, dtype=np.bytes_),
+            svs=np.array(self._svs, dtype=np.float64),
+            started_at=np.array(self._started_at, dtype=np.float64),
+            n_samples=np.array(self._n_samples, dtype=np.int32),
+            values=np.array(self._values, dtype=np.float64),
+            offsets=np.array(self._offsets, dtype=np.int64),
+            case_dicts=case_dicts,
+            case_text_ids=case_text_ids,
+            context_dicts=context_dicts,
+        )
+
+
+class ColumnarResults:
+    """
+    Immutable columnar representation of N benchmark results. Row `i`
+    represents one result; access it via `self[i]` (a `BMRTBenchmarkResult`
+    view).
+    """
+
+    def __init__(
+        self,
+        tables: Dict[str, StringTable],
+        codes: Dict[str, np.ndarray],
+        ids: np.ndarray,
+        svs: np.ndarray,
+        started_at: np.ndarray,
+        n_samples: np.ndarray,
+        values: np.ndarray,
+        offsets: np.ndarray,
+        case_dicts: List,
+        case_text_ids: List,
+        context_dicts: List,
+        id_order: Optional[np.ndarray] = None,
+        ids_sorted: Optional[np.ndarray] = None,
+    ) -> None:
+        self.tables = tables
+        self.codes = codes
+        self.ids = ids
+        self.svs = svs
+        self.started_at = started_at
+        self.n_samples = n_samples
+        self.values = values
+        self.offsets = offsets
+        self.case_dicts = case_dicts
+        self.case_text_ids = case_text_ids
+        self.context_dicts = context_dicts
+        # For ID lookup via binary search. Can be passed in when known already
+        # (e.g. when attaching to a snapshot, see conbench.bmrt_snapshot).
+        if id_order is None or ids_sorted is None:
+            id_order = np.argsort(ids, kind="stable").astype(np.int32)
+            ids_sorted = ids[id_order]
+        self._id_order = id_order
+        self._ids_sorted = ids_sorted
+        # Row order by start time, per direction (see group_order()); computed
+        # lazily, shared by all groupings of this store.
+        self._time_order: Dict[bool, np.ndarray] = {}
+
+        for a in (ids, svs, started_at, n_samples, values, offsets, id_order):
+            a.flags.writeable = False
+        for a in codes.values():
+            a.flags.writeable = False
+
+    @classmethod
+    def empty(cls) -> "ColumnarResults":
+        return ColumnarBuilder().finish()
+
+    def __len__(self) -> int:
+        return len(self.svs)
+
+    def __getitem__(self, i: int) -> "BMRTBenchmarkResult":
+        return BMRTBenchmarkResult(self, int(i))
+
+    def id_at(self, i: int) -> str:
+        return self.ids[i].decode("ascii")
+
+    def row_for_id(self, result_id: str) -> Optional[int]:
+        """
+        Return row index for result ID, or None if not in this store.
+        """
+        try:
+            needle = result_id.encode("ascii")
+        except UnicodeEncodeError:
+            return None
+        pos = int(np.searchsorted(self._ids_sorted, needle))
+        if pos < len(self._ids_sorted) and self._ids_sorted[pos] == needle:
+            return int(self._id_order[pos])
+        return None
+
+    def contains_ids(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Vectorized membership test: return boolean array, one item per
+        item in `ids` (bytes array).
+        """
+        if len(self) == 0:
+            return np.zeros(len(ids), dtype=bool)
+        pos = np.searchsorted(self._ids_sorted, ids)
+        pos = np.minimum(pos, len(self._ids_sorted) - 1)
+        return self._ids_sorted[pos] == ids
+
+    def value(self, column: str, i: int) -> Any:
+        return self.tables[column].values[self.codes[column][i]]
+
+    def data_at(self, i: int) -> List[float]:
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.values[start:end].tolist()
+
+    def take(self, rows: np.ndarray) -> "ColumnarResults":
+        """
+        Return a new store containing only the rows with the given indices (in
+        that order). Codes (string tables) are shared with this store.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=new_offsets[1:])
+        # Gather the data slices of the selected rows in one go: for each
+        # output position compute the corresponding input position.
+        value_idx = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(
+            new_offsets[-1]
+        )
+        return ColumnarResults(
+            tables=self.tables,
+            codes={c: a[rows] for c, a in self.codes.items()},
+            ids=self.ids[rows],
+            svs=self.svs[rows],
+            started_at=self.started_at[rows],
+            n_samples=self.n_samples[rows],
+            values=self.values[value_idx],
+            offsets=new_offsets,
+            case_dicts=self.case_dicts,
+            case_text_ids=self.case_text_ids,
+            context_dicts=self.context_dicts,
+        )
+
+    def builder(self) -> ColumnarBuilder:
+        """
+        Return a builder for new rows whose codes are compatible with this
+        store (shared string tables).
+        """
+        return ColumnarBuilder(tables=self.tables)
+
+    def concat(self, builder: ColumnarBuilder) -> "ColumnarResults":
+        """
+        Return a new store: rows of this store, followed by the rows in
+        `builder` (which must have been obtained via `self.builder()`).
+        """
+        assert builder.tables is self.tables
+        new = builder.finish(
+            case_payload=(self.case_dicts, self.case_text_ids),
+            context_payload=self.context_dicts,
+        )
+        return ColumnarResults(
+            tables=self.tables,
+            codes={
+                c: np.concatenate([self.codes[c], new.codes[c]]) for c in _CODED_COLUMNS
+            },
+            ids=np.concatenate([self.ids, new.ids]),
+            svs=np.concatenate([self.svs, new.svs]),
+            started_at=np.concatenate([self.started_at, new.started_at]),
+            n_samples=np.concatenate([self.n_samples, new.n_samples]),
+            values=np.concatenate([self.values, new.values]),
+            offsets=np.concatenate([self.offsets, new.offsets[1:] + self.offsets[-1]]),
+            case_dicts=new.case_dicts,
+            case_text_ids=new.case_text_ids,
+            context_dicts=new.context_dicts,
+        )
+
+    def group_order(
+        self, columns: Tuple[str, ...], newest_first: bool = True
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sort rows by the given coded columns, and within each group by start
+        time. Return the sort order (array of row indices) and the group
+        boundaries (offsets into the order array; the rows of group `j` are
+        `order[bounds[j]:bounds[j+1]]`).
+        """
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+
+        # Sort by time first, then (stable) by the group key(s): the same
+        # order as a lexsort with time as the last key, but the time sort can
+        # be reused across groupings.
+        t_order = self._time_order.get(newest_first)
+        if t_order is None:
+            t = -self.started_at if newest_first else self.started_at
+            t_order = np.argsort(t, kind="stable")
+            self._time_order[newest_first] = t_order
+
+        keys = [k[t_order] for k in self._packed_group_keys(columns)]
+        # np.lexsort: last key is the primary sort key. Stable.
+        key_order = np.lexsort(keys[::-1])
+        order = t_order[key_order]
+        changed = np.zeros(len(order), dtype=bool)
+        changed[0] = True
+        for k in keys:
+            ks = k[key_order]
+            changed[1:] |= ks[1:] != ks[:-1]
+        bounds = np.append(np.flatnonzero(changed), len(order))
+        return order, bounds
+
+    def _packed_group_keys(self, columns: Tuple[str, ...]) -> List[np.ndarray]:
+        """
+        Return the code arrays for the given columns; combined into a single
+        int64 array (same sort order) if the code ranges allow for that. Each
+        additional lexsort key is costly (about 0.4 s per key for 10^6 rows).
+        """
+        keys = [np.asarray(self.codes[c]) for c in columns]
+        widths = [max(len(self.tables[c]), 1) for c in columns]
+        if float(np.prod(np.array(widths, dtype=np.float64))) >= 2**62:
+            return keys
+
+        packed = np.zeros(len(self), dtype=np.int64)
+        for k, w in zip(keys, widths):
+            packed *= w
+            packed += k
+        return [packed]
+
+    def group_key(self, columns: Tuple[str, ...], i: int) -> Tuple:
+        """
+        Return the tuple of (decoded) values of the given columns for row `i`.
+        """
+        return tuple(self.tables[c].values[self.codes[c][i]] for c in columns)
+
+    def group_rows(self, columns: Tuple[str, ...]) -> Dict[Tuple, np.ndarray]:
+        """
+        Group rows by the given coded columns. Return dictionary: key is the
+        tuple of (decoded) values, value is the array of row indices in that
+        group, sorted by start time (newest first).
+        """
+        order, bounds = self.group_order(columns)
+        starts = bounds[:-1].tolist()
+        ends = bounds[1:].tolist()
+        return {
+            self.group_key(columns, order[start]): order[start:end]
+            for start, end in zip(starts, ends)
+        }
+
+    def nbytes(self) -> int:
+        """
+        Return (approximate) number of bytes used by the array columns,
+        excluding the (shared) string tables and case/context payload.
+        """
+        arrays = [
+            self.ids,
+            self.svs,
+            self.started_at,
+            self.n_samples,
+            self.values,
+            self.offsets,
+            self._id_order,
+            self._ids_sorted,
+        ] + list(self.codes.values())
+        return sum(a.nbytes for a in arrays)
+
+
+class BMRTBenchmarkResult:
+    """
+    Thin read-only view on one row of a `ColumnarResults` store. Exposes the
+    same attributes as the previous dataclass-based cache entry.
+    """
+
+    __slots__ = ("_s", "_i")
+
+    def __init__(self, store: ColumnarResults, i: int) -> None:
+        self._s = store
+        self._i = i
+
+    def __repr__(self) -> str:
+        return f"<BMRTBenchmarkResult {self.id}>"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BMRTBenchmarkResult):
+            return NotImplemented
+        return self.id == other.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    @property
+    def id(self) -> str:
+        return self._s.id_at(self._i)
+
+    @property
+    def benchmark_name(self) -> TBenchmarkName:
+        return self._s.value("benchmark_name", self._i)
+
+    @property
+    def case_id(self) -> str:
+        return self._s.value("case_id", self._i)
+
+    @property
+    def context_id(self) -> str:
+        return self._s.value("context_id", self._i)
+
+    @property
+    def run_id(self) -> str:
+        return self._s.value("run_id", self._i)
+
+    @property
+    def hardware_checksum(self) -> str:
+        return self._s.value("hardware_checksum", self._i)
+
+    @property
+    def hardware_name(self) -> str:
+        return self._s.value("hardware_name", self._i)
+
+    @property
+    def ui_hardware_short(self) -> str:
+        return self._s.value("ui_hardware_short", self._i)
+
+    @property
+    def unit(self) -> str:
+        return self._s.value("unit", self._i)
+
+    @property
+    def svs_type(self) -> str:
+        return self._s.value("svs_type", self._i)
+
+    @property
+    def run_reason(self) -> str:
+        return self._s.value("run_reason", self._i)
+
+    @property
+    def case_dict(self) -> Dict[str, str]:
+        return self._s.case_dicts[self._s.codes["case_id"][self._i]]
+
+    @property
+    def case_text_id(self) -> str:
+        return self._s.case_text_ids[self._s.codes["case_id"][self._i]]
+
+    @property
+    def context_dict(self) -> Dict:
+        return self._s.context_dicts[self._s.codes["context_id"][self._i]]
+
+    @property
+    def data(self) -> List[float]:
+        return self._s.data_at(self._i)
+
+    @property
+    def svs(self) -> float:
+        return float(self._s.svs[self._i])
+
+    @property
+    def started_at(self) -> float:
+        """
+        POSIX timestamp
+        """
+        return float(self._s.started_at[self._i])
+
+    @property
+    def ui_non_null_sample_count(self) -> str:
+        return str(self._s.n_samples[self._i])
+
+    @property
+    def ui_time_started_at(self) -> str:
+        # Inverse of how `started_at` was derived from the tz-naive
+        # BenchmarkResult.timestamp (via datetime.timestamp()).
+        return (
+            datetime.fromtimestamp(self.started_at).strftime("%Y-%m-%d %H:%M:%S")
+            + " UTC"
+        )
+
+    # There is conceptual duplication between the class BenchmarkResult
+    # and this class BMRTBenchmarkResult. Fundamentally, it might make sense
+    # that we have two types of classes, with distinct values:
+    # - one for database abstraction (the 'big instances', mutable, ...)
+    # - one for data mangling (small mem footprint, immutable, ...)
+    @property
+    def ui_mean_and_uncertainty(self) -> str:
+        return ui_mean_and_uncertainty(self.data, self.unit)
+
+    @property
+    def ui_rel_sem(self) -> Tuple[str, str]:
+        return ui_rel_sem(self.data)
+
+    @property
+    def started_at_iso(self) -> str:
+        """
+        Add an ISO timestring on the object so that JavaScript's `new
+        Date(input)` can parse this into a tz-aware object.
+        """
+        return conbench.util.tznaive_dt_to_aware_iso8601_for_api(
+            datetime.fromtimestamp(self.started_at)
+        )
+
+
+class BMRTResultList(Sequence):
+    """
+    Read-only sequence of `BMRTBenchmarkResult` views, backed by an array of
+    row indices into a `ColumnarResults` store.
+    """
+
+    __slots__ = ("store", "rows")
+
+    def __init__(self, store: ColumnarResults, rows: np.ndarray) -> None:
+        self.store = store
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @overload
+    def __getitem__(self, i: int) -> BMRTBenchmarkResult: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> "BMRTResultList": ...
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return BMRTResultList(self.store, self.rows[i])
+        return BMRTBenchmarkResult(self.store, int(self.rows[i]))
+
+    def __iter__(self) -> Iterator[BMRTBenchmarkResult]:
+        s = self.store
+        for i in self.rows.tolist():
+            yield BMRTBenchmarkResult(s, i)
+
+    def started_at(self) -> np.ndarray:
+        """
+        Return start times (POSIX timestamps) of the results in this list,
+        in list order.
+        """
+        return self.store.started_at[self.rows]
+
+    def svs(self) -> np.ndarray:
+        return self.store.svs[self.rows]
+
+
+class BMRTResultsById(Mapping):
+    """
+    Read-only mapping: result ID -> `BMRTBenchmarkResult` view. Lookup via
+    binary search in the store's sorted ID column.
+    """
+
+    __slots__ = ("store",)
+
+    def __init__(self, store: ColumnarResults) -> None:
+        self.store = store
+
+    def __getitem__(self, result_id: str) -> BMRTBenchmarkResult:
+        i = self.store.row_for_id(result_id)
+        if i is None:
+            raise KeyError(result_id)
+        return BMRTBenchmarkResult(self.store, i)
+
+    def __contains__(self, result_id: object) -> bool:
+        return (
+            isinstance(result_id, str) and self.store.row_for_id(result_id) is not None
+        )
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self.store)):
+            yield self.store.id_at(i)
+
+
+class TimeseriesFrame(Mapping):
+    """
+    All time series contained in a `ColumnarResults` store in one frame. A time
+    series is the set of results sharing the same values in the grouping
+    columns (e.g. the benchmark name / case / context / hardware 4-tuple).
+
+    `df`: one row per result, sorted by series, and within each series by time.
+    Index: pd.DatetimeIndex (tz-aware, UTC) named `time`. Columns: `svs`
+    (single value summary), `series_id` (int32; position in `series_keys`).
+
+    `offsets`: series `j` occupies the rows `offsets[j]:offsets[j+1]` of `df`.
+    That allows for vectorized analysis across all series at once (e.g. via
+    np.add.reduceat(..., offsets[:-1]) or a groupby on `series_id`).
+
+    `rows`: for each row in `df`, the corresponding row index in the store.
+
+    As a read-only mapping (key tuple -> dataframe) this is a drop-in for the
+    previous dictionary of per-series dataframes: lookup returns a slice of
+    `df` (index: time; one column: `svs`), without copying. Do not modify
+    these slices.
+    """
+
+    __slots__ = ("df", "series_keys", "offsets", "rows", "_series_id")
+
+    def __init__(self, store: ColumnarResults, columns: Tuple[str, ...]) -> None:
+        order, bounds = store.group_order(columns, newest_first=False)
+        self.rows = order
+        self.offsets = bounds
+        self.series_keys: List[Tuple] = [
+            store.group_key(columns, int(order[b])) for b in bounds[:-1].tolist()
+        ]
+        self._series_id: Dict[Tuple, int] = {
+            k: j for j, k in enumerate(self.series_keys)
+        }
+        self.df = pd.DataFrame(
+            {
+                # The slices handed out rely on `svs` being the first column.
+                "svs": store.svs[order],
+                "series_id": np.repeat(
+                    np.arange(len(self.series_keys), dtype=np.int32), np.diff(bounds)
+                ),
+            },
+            # `unit="s"` is the critical ingredient to convert this array of
+            # floaty unix timestamps to datetime representation. `utc=True` is
+            # required to localize the pandas DateTimeIndex to UTC (input is
+            # tz-naive).
+            index=pd.DatetimeIndex(
+                pd.to_datetime(store.started_at[order], unit="s", utc=True),
+                name="time",
+            ),
+        )
+
+    def series_id(self, key: Tuple) -> int:
+        return self._series_id[key]
+
+    def __getitem__(self, key: Tuple) -> pd.DataFrame:
+        j = self._series_id[key]
+        start, end = self.offsets[j], self.offsets[j + 1]
+        return self.df.iloc[start:end, :1]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._series_id
+
+    def __len__(self) -> int:
+        return len(self.series_keys)
+
+    def __iter__(self) -> Iterator[Tuple]:
+        return iter(self.series_keys)
+
+    def nbytes(self) -> int:
+        return int(
+            self.df.memory_usage(index=True).sum()
+            + self.rows.nbytes
+            + self.offsets.nbytes
+        )
@@ -0,0 +1,240 @@
+"""
+File-based, memory-mappable snapshots of the columnar BMRT cache storage.
+
+This allows for building the BMRT cache in one process (the builder) and
+consuming it from N other processes (gunicorn workers) without each of them
+fetching from the database, and without each of them holding a private copy
+of the data.
+
+Layout of the snapshot directory (typically on a tmpfs such as /dev/shm):
+
+    builder.lock          flock()ed by the (single) builder process
+    CURRENT               name of the most recent complete generation
+    gen-<N>/              one directory per generation
+        <array>.npy       one file per array column (NumPy format)
+        objects.pickle    string tables, case/context payload, metadata
+
+The snapshot directory can also be on persistent storage: then snapshots
+outlive the processes (warm start after restart, see conbench.bmrt).
+
+A generation directory is written under a temporary name and then renamed;
+`CURRENT` is updated via atomic `os.replace()`. That is, readers never see a
+partially written generation. Readers attach to the array files via
+`np.load(..., mmap_mode="r")`: the data lives in the page cache once, shared by
+all processes (no copy, no deserialization). Older generations can be removed
+by the writer at any time: on Linux, a file that is mapped into a process
+stays valid until unmapped, even if it was unlinked.
+
+The (comparatively small) Python object part of the store (string tables, case
+and context dictionaries) is pickled, and each reader holds its own copy of
+that. Only ever load snapshots written by this application (pickle).
+"""
+
+import fcntl
+import logging
+import os
+import pickle
+import shutil
+import time
+from typing import IO, Any, Dict, NamedTuple, Optional
+
+import numpy as np
+
+from conbench.bmrt_columnar import ColumnarResults, StringTable
+
+log = logging.getLogger(__name__)
+
+_CURRENT = "CURRENT"
+_LOCKFILE = "builder.lock"
+_OBJECTS = "objects.pickle"
+_GEN_PREFIX = "gen-"
+# Bump when the layout changes (snapshots may outlive the code version that
+# wrote them, see Config.BMRT_CACHE_PERSIST_DIR). Snapshots in a different
+# format are ignored.
+FORMAT_VERSION = 1
+# Keep the previous generation around for a bit: a reader may have read
+# CURRENT right before it was updated.
+_KEEP_GENERATIONS = 2
+
+
+class Snapshot(NamedTuple):
+    name: str
+    store: ColumnarResults
+    meta: Dict[str, Any]
+
+
+def _arrays(store: ColumnarResults) -> Dict[str, np.ndarray]:
+    arrays = {
+        "ids": store.ids,
+        "svs": store.svs,
+        "started_at": store.started_at,
+        "n_samples": store.n_samples,
+        "values": store.values,
+        "offsets": store.offsets,
+        "id_order": store._id_order,
+        "ids_sorted": store._ids_sorted,
+    }
+    for c, a in store.codes.items():
+        arrays[f"codes.{c}"] = a
+    return arrays
+
+
+def _generation_number(name: str) -> int:
+    return int(name.split("-", 1)[1])
+
+
+def _generation_names(directory: str) -> list:
+    return sorted(
+        (n for n in os.listdir(directory) if n.startswith(_GEN_PREFIX)),
+        key=_generation_number,
+    )
+
+
+def current_name(directory: str) -> Optional[str]:
+    """
+    Return the name of the current generation, or `None` if there is no
+    snapshot (yet).
+    """
+    try:
+        with open(os.path.join(directory, _CURRENT), "rb") as f:
+            return f.read().decode("ascii").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_snapshot(directory: str, store: ColumnarResults, meta: Dict[str, Any]) -> str:
+    """
+    Write `store` as a new generation to `directory`, make it the current one,
+    and remove outdated generations. Return the name of the new generation.
+
+    `meta` must be picklable; it is handed out to readers as-is.
+
+    Expected to be called from a single writer (the builder process).
+    """
+    t0 = time.monotonic()
+    os.makedirs(directory, exist_ok=True)
+
+    existing = _generation_names(directory)
+    gen = _generation_number(existing[-1]) + 1 if existing else 1
+    name = f"{_GEN_PREFIX}{gen}"
+    tmpdir = os.path.join(directory, f".tmp-{name}")
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    os.mkdir(tmpdir)
+
+    for aname, a in _arrays(store).items():
+        # `np.save()` appends `.npy` to the file name.
+        np.save(os.path.join(tmpdir, aname), np.ascontiguousarray(a))
+
+    objects = {
+        "tables": {c: t.values for c, t in store.tables.items()},
+        "case_dicts": store.case_dicts,
+        "case_text_ids": store.case_text_ids,
+        "context_dicts": store.context_dicts,
+        "meta": meta,
+        "format_version": FORMAT_VERSION,
+    }
+    with open(os.path.join(tmpdir, _OBJECTS), "wb") as f:
+        pickle.dump(objects, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.rename(tmpdir, os.path.join(directory, name))
+
+    ptr_tmp = os.path.join(directory, f".{_CURRENT}.tmp")
+    with open(ptr_tmp, "wb") as f:
+        f.write(name.encode("ascii"))
+    os.replace(ptr_tmp, os.path.join(directory, _CURRENT))
+
+    for old in _generation_names(directory)[:-_KEEP_GENERATIONS]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+
+    log.info(
+        "BMRT snapshot: wrote %s (%s results, %.1f MB) in %.3f s",
+        name,
+        len(store),
+        store.nbytes() / 10**6,
+        time.monotonic() - t0,
+    )
+    return name
+
+
+def load_snapshot(directory: str, name: Optional[str] = None) -> Optional[Snapshot]:
+    """
+    Attach to the generation `name` (default: the current one). The array
+    columns of the returned store are read-only memory maps.
+
+    Return `None` if there is no snapshot (or if it was written in a different
+    format). Raise `FileNotFoundError` if the generation was removed in the
+    meantime (retry later, with the new current name).
+    """
+    if name is None:
+        name = current_name(directory)
+        if name is None:
+            return None
+
+    gendir = os.path.join(directory, name)
+    with open(os.path.join(gendir, _OBJECTS), "rb") as f:
+        objects = pickle.load(f)
+
+    if objects.get("format_version") != FORMAT_VERSION:
+        log.info(
+            "BMRT snapshot: ignore %s (format %s, expected %s)",
+            name,
+            objects.get("format_version"),
+            FORMAT_VERSION,
+        )
+        return None
+
+    arrays: Dict[str, np.ndarray] = {}
+    for fname in os.listdir(gendir):
+        aname, ext = os.path.splitext(fname)
+        if ext == ".npy":
+            arrays[aname] = np.load(os.path.join(gendir, fname), mmap_mode="r")
+
+    store = ColumnarResults(
+        tables={
+            c: StringTable.from_values(values)
+            for c, values in objects["tables"].items()
+        },
+        codes={
+            k.split(".", 1)[1]: a for k, a in arrays.items() if k.startswith("codes.")
+        },
+        ids=arrays["ids"],
+        svs=arrays["svs"],
+        started_at=arrays["started_at"],
+        n_samples=arrays["n_samples"],
+        values=arrays["values"],
+        offsets=arrays["offsets"],
+        case_dicts=objects["case_dicts"],
+        case_text_ids=objects["case_text_ids"],
+        context_dicts=objects["context_dicts"],
+        id_order=arrays["id_order"],
+        ids_sorted=arrays["ids_sorted"],
+    )
+    return Snapshot(name=name, store=store, meta=objects["meta"])
+
+
+def try_lock_builder(directory: str) -> Optional[IO]:
+    """
+    Try to become the (single) builder for snapshots in `directory`. Return the
+    open lock file object on success (keep it referenced: the lock is released
+    when it is closed, or when the process terminates). Return `None` if
+    another process holds the lock.
+    """
+    os.makedirs(directory, exist_ok=True)
+    f = open(os.path.join(directory, _LOCKFILE), "ab")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return None
+    return f
+
+
+def builder_lock_held(directory: str) -> bool:
+    """
+    Return True if some process currently is the builder for `directory`.
+    """
+    f = try_lock_builder(directory)
+    if f is None:
+        return True
+    f.close()
+    return False
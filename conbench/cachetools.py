@@ -1,5 +1,8 @@
+import threading
 import time
+from collections import OrderedDict
 from functools import lru_cache, wraps
+from typing import Any, Callable, Hashable, Optional, Tuple
 
 
 def lru_cache_with_ttl(maxsize=None, typed=False, ttl=60):
@@ -37,3 +40,75 @@ def lru_cache_with_ttl(maxsize=None, typed=False, ttl=60):
         return wrapper
 
     return decorator
+
+
+class SizedLRUCacheWithTTL:
+    """
+    Thread-safe LRU cache with a notion of expiration time, bounded by the
+    total (estimated) size of the cached values rather than by the number of
+    items.
+
+    `sizeof`: callable returning the (estimated) size of a value in bytes.
+    `on_evict`: optional callable, called with a reason ("size", "ttl",
+    "invalidated") for each item removed before it was replaced.
+
+    Values larger than `max_bytes` are not cached.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        sizeof: Callable[[Any], int],
+        on_evict: Optional[Callable[[str], None]] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof
+        self._on_evict = on_evict
+        self._lock = threading.Lock()
+        # key -> (value, size, deadline). Order: least recently used first.
+        self._items: OrderedDict[Hashable, Tuple[Any, int, float]] = OrderedDict()
+        self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return cached value, or None if not cached (or expired)."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[2] < time.monotonic():
+                self._remove(key, "ttl")
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._items:
+                self.total_bytes -= self._items.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._items[key] = (value, size, time.monotonic() + self.ttl)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self._items)), "size")
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._items:
+                self._remove(key, "invalidated")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.total_bytes = 0
+
+    def _remove(self, key: Hashable, reason: str) -> None:
+        self.total_bytes -= self._items.pop(key)[1]
+        if self._on_evict is not None:
+            self._on_evict(reason)
@@ -0,0 +1,202 @@
+"""
+Asynchronous commit metadata resolution (Config.COMMIT_ENRICHMENT_ASYNC).
+
+When a benchmark result refers to a commit that is not yet in the database,
+the synchronous code path fetches metadata for that commit from the GitHub
+HTTP API and backfills the default-branch commits (potentially many
+paginated requests) while the client waits for the HTTP response.
+
+With Config.COMMIT_ENRICHMENT_ASYNC the result is instead stored right away,
+referring to a placeholder commit row ("unknown context"), and the commit is
+enqueued (see entities/commit_enrichment.py; deduplicated per repository and
+commit hash). The job here (a thread per process, see conbench/job.py) then
+processes the queue:
+
+- fetch the commit metadata (incl. branch and fork point commit) and update
+  the commit row in place (the results refer to it by primary key),
+- invalidate what was derived from the results for that commit while it was
+  not part of the git graph (materialized distribution stats, precomputed
+  run comparisons, history cache),
+- backfill the default-branch commits.
+
+The job pauses while the remaining GitHub HTTP API quota is below
+Config.COMMIT_ENRICHMENT_QUOTA_RESERVE. Failed jobs are retried with
+exponential backoff, up to MAX_ATTEMPTS times; after that the commit stays
+unknown context.
+
+Multiple processes may run this job concurrently: a queued commit is claimed
+by exactly one of them (row lock with SKIP LOCKED).
+"""
+
+import logging
+import threading
+import time
+
+import flask
+import sqlalchemy as s
+
+import conbench.job
+from conbench.config import Config
+from conbench.dbsession import current_session
+
+from .entities import _history_cache
+from .entities.benchmark_result import BenchmarkResult
+from .entities.commit import (
+    Commit,
+    _github,
+    backfill_default_branch_commits,
+    get_github_commit_metadata,
+)
+from .entities.commit_enrichment import (
+    PendingCommitEnrichment,
+    claim_commit_enrichment,
+    complete_commit_enrichment,
+    release_commit_enrichment,
+)
+from .entities.distribution_stats import invalidate_distribution_stats
+from .entities.history_version import bump_history_version
+from .entities.run_comparison import invalidate_run_comparisons
+
+log = logging.getLogger(__name__)
+
+# How often to look for queued commits.
+POLL_INTERVAL_SECONDS = 5
+
+# Give up on a commit after that many failed attempts.
+MAX_ATTEMPTS = 8
+
+# Retry delay after the first failed attempt; doubled for every further one.
+RETRY_DELAY_SECONDS = 30
+
+# Retry delay for when the job is paused because of low API quota.
+QUOTA_WAIT_SECONDS = 60
+
+
+def enrich_commit(job: PendingCommitEnrichment) -> None:
+    """
+    Fetch metadata for the commit, update the commit row, backfill the
+    default-branch commits. Raise an exception if that fails (as of GitHub
+    HTTP API interaction errors). Commit the session.
+
+    Idempotent: the metadata is only fetched if it is not there yet.
+    """
+    commit = Commit.first(sha=job.sha, repository=job.repository)
+    if commit is None:
+        # Removed in the meantime.
+        return
+
+    if commit.timestamp is None:
+        # May raise exceptions as of HTTP request/response cycle errors.
+        metadata = get_github_commit_metadata(job.cinfo())
+        commit.update_github_context(metadata)
+
+        affected = current_session.execute(
+            s.select(BenchmarkResult.run_id, BenchmarkResult.history_fingerprint)
+            .filter(BenchmarkResult.commit_id == commit.id)
+            .distinct()
+        ).all()
+        for run_id in {run_id for run_id, _ in affected}:
+            invalidate_run_comparisons(run_id, commit)
+        history_fingerprints = {fp for _, fp in affected}
+        for history_fingerprint in history_fingerprints:
+            invalidate_distribution_stats(commit, history_fingerprint)
+            bump_history_version(history_fingerprint)
+        current_session.commit()
+        for history_fingerprint in history_fingerprints:
+            _history_cache.invalidate(history_fingerprint)
+
+    # This triggers potentially many HTTP requests to the GitHub HTTP API.
+    backfill_default_branch_commits(commit.repository, commit)
+
+
+def enrich_once(should_stop=lambda: False) -> int:
+    """
+    Process due queued commits until there are none left (or until
+    `should_stop()`, or until the API quota is low). Return the number of
+    commits processed successfully.
+    """
+    n_enriched = 0
+    while not should_stop():
+        if _github.quota_below(Config.COMMIT_ENRICHMENT_QUOTA_RESERVE):
+            log.info(
+                "commit enrichment: GitHub HTTP API quota below %s, pause",
+                Config.COMMIT_ENRICHMENT_QUOTA_RESERVE,
+            )
+            return n_enriched
+
+        job = claim_commit_enrichment()
+        if job is None:
+            return n_enriched
+
+        t0 = time.monotonic()
+        try:
+            enrich_commit(job)
+        except Exception as exc:
+            current_session.rollback()
+            if _github.quota_below(Config.COMMIT_ENRICHMENT_QUOTA_RESERVE):
+                # Probably failed as of that: do not count the attempt.
+                log.info(
+                    "commit enrichment for %s@%s: quota low", job.sha, job.repository
+                )
+                release_commit_enrichment(job, QUOTA_WAIT_SECONDS, count_attempt=False)
+                continue
+
+            if job.attempts >= MAX_ATTEMPTS:
+                log.warning(
+                    "commit enrichment for %s@%s failed %s times, give up: %s",
+                    job.sha,
+                    job.repository,
+                    job.attempts,
+                    exc,
+                )
+                complete_commit_enrichment(job)
+            else:
+                delay = RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1)
+                log.info(
+                    "commit enrichment for %s@%s failed, retry in %s s: %s",
+                    job.sha,
+                    job.repository,
+                    delay,
+                    exc,
+                )
+                release_commit_enrichment(job, delay)
+            continue
+
+        complete_commit_enrichment(job)
+        n_enriched += 1
+        log.info(
+            "commit enrichment for %s@%s took %.3f s",
+            job.sha,
+            job.repository,
+            time.monotonic() - t0,
+        )
+
+    return n_enriched
+
+
+def periodically_enrich_commits(app: flask.Flask) -> threading.Thread:
+    """
+    Return right after having spawned a thread that triggers periodic action.
+    """
+
+    def _run_forever():
+        while True:
+            # Build responsive sleep loop that inspects SHUTDOWN often.
+            deadline = time.monotonic() + POLL_INTERVAL_SECONDS
+            while time.monotonic() < deadline:
+                if conbench.job.SHUTDOWN:
+                    log.debug("commit enrichment: shut down")
+                    return
+                time.sleep(0.1)
+
+            try:
+                # Fresh DB session per iteration (removed upon leaving the
+                # app context).
+                with app.app_context():
+                    enrich_once(should_stop=lambda: conbench.job.SHUTDOWN)
+            except Exception as exc:
+                log.exception("commit enrichment: exception: %s", exc)
+
+    t = threading.Thread(target=_run_forever, name="commit-enrichment")
+    t.start()
+    return t
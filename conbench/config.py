@@ -44,6 +44,126 @@ class ConfigClass:
     # - "mean": Use the mean.
     SVS_TYPE = os.environ.get("SVS_TYPE") or "best"
 
+    # When `true`: populate/refresh the BMRT cache in a separate (child)
+    # process which publishes memory-mappable snapshots to
+    # BMRT_CACHE_SNAPSHOT_DIR; web application processes attach to those
+    # instead of each querying the database. This takes the CPU-heavy cache
+    # population off the HTTP-handling processes (GIL), and allows for running
+    # more than one gunicorn worker process per container (they all share one
+    # builder, and one copy of the data). The snapshot directory should be on
+    # a tmpfs (the default: /dev/shm), which must be large enough to hold two
+    # generations of the cache (order of magnitude: 200 bytes per result,
+    # plus per-iteration data). Note that container runtimes often default to
+    # a small /dev/shm (Docker: 64 MB).
+    BMRT_CACHE_BUILDER_PROCESS = (
+        os.environ.get("CONBENCH_BMRT_CACHE_BUILDER_PROCESS", "false") == "true"
+    )
+    BMRT_CACHE_SNAPSHOT_DIR = os.environ.get(
+        "CONBENCH_BMRT_CACHE_SNAPSHOT_DIR", "/dev/shm/conbench-bmrt"
+    )
+
+    # Directory (on persistent storage) for persisting the BMRT cache across
+    # restarts: after a restart, the cache is populated from the last
+    # snapshot within a second or so, and then caught up with the database
+    # incrementally (instead of a full population which can take minutes).
+    # Not set (default): no persistence. Only relevant if the builder process
+    # is not used (that one persists to BMRT_CACHE_SNAPSHOT_DIR).
+    BMRT_CACHE_PERSIST_DIR = os.environ.get("CONBENCH_BMRT_CACHE_PERSIST_DIR") or None
+
+    # Per-process cache for benchmark result histories (history API, history
+    # plots in the UI): upper bound for the (estimated) memory consumption of
+    # the cached data in MB (0: disable the cache), and the maximum age of a
+    # cached history in seconds. Each history is additionally validated
+    # against the database (number of results, most recent result) before
+    # being served from the cache; the expiration time bounds the staleness
+    # for changes that this process is not told about otherwise (edits of
+    # change annotations via other processes).
+    HISTORY_CACHE_MAX_MB = int(os.environ.get("CONBENCH_HISTORY_CACHE_MAX_MB", 200))
+    HISTORY_CACHE_TTL_SECONDS = int(
+        os.environ.get("CONBENCH_HISTORY_CACHE_TTL_SECONDS", 300)
+    )
+
+    # Per-process cache mapping the properties of Case, Context, Info and
+    # Hardware entities (as submitted with benchmark results) to their
+    # primary keys, so that ingesting a result does not require looking each
+    # of them up in the database. Maximum number of cached entities (0:
+    # disable the cache), and the maximum age of a cached entity in seconds.
+    ENTITY_CACHE_MAX_ITEMS = int(
+        os.environ.get("CONBENCH_ENTITY_CACHE_MAX_ITEMS", 10000)
+    )
+    ENTITY_CACHE_TTL_SECONDS = int(
+        os.environ.get("CONBENCH_ENTITY_CACHE_TTL_SECONDS", 3600)
+    )
+
+    # Admission control for /api/compare/... requests (per process, see
+    # conbench/api/_scheduler.py). The cost of a compare request is estimated
+    # as number of history fingerprints times DISTRIBUTION_COMMITS. Up to
+    # COMPARE_MAX_RUNNING requests are processed concurrently as long as the
+    # sum of their costs does not exceed COMPARE_COST_BUDGET (the default
+    # corresponds to two pages of the runs comparison with default page size).
+    # Requests beyond that wait in a queue (of size COMPARE_MAX_QUEUED), for at
+    # most COMPARE_MAX_WAIT_SECONDS; otherwise they are responded to with 429
+    # (with a Retry-After header).
+    COMPARE_MAX_RUNNING = int(os.environ.get("CONBENCH_COMPARE_MAX_RUNNING", 4))
+    COMPARE_COST_BUDGET = int(
+        os.environ.get("CONBENCH_COMPARE_COST_BUDGET", 200 * DISTRIBUTION_COMMITS)
+    )
+    COMPARE_MAX_QUEUED = int(os.environ.get("CONBENCH_COMPARE_MAX_QUEUED", 32))
+    COMPARE_MAX_WAIT_SECONDS = float(
+        os.environ.get("CONBENCH_COMPARE_MAX_WAIT_SECONDS", 20)
+    )
+
+    # Precompute run comparisons (see conbench/runcompare.py): once a run is
+    # complete (explicitly finished via POST /api/runs/<run_id>/finish/, or
+    # when no result was submitted for it for RUN_COMPARE_IDLE_SECONDS), a
+    # background job compares it against its candidate baseline runs and
+    # stores the comparisons, which GET /api/compare/runs/... then serves
+    # from the database.
+    RUN_COMPARE_PRECOMPUTE = (
+        os.environ.get("CONBENCH_RUN_COMPARE_PRECOMPUTE", "false") == "true"
+    )
+    RUN_COMPARE_IDLE_SECONDS = int(
+        os.environ.get("CONBENCH_RUN_COMPARE_IDLE_SECONDS", 600)
+    )
+
+    # Resolve commit metadata asynchronously (see conbench/commitenrich.py):
+    # when a result refers to a commit that is not yet in the database, store
+    # the result right away with a placeholder commit row ("unknown context")
+    # instead of interacting with the GitHub HTTP API while the client waits.
+    # A background job then fetches the commit metadata, backfills the
+    # default-branch commits and updates the commit row. The job pauses while
+    # the remaining GitHub HTTP API quota is below
+    # COMMIT_ENRICHMENT_QUOTA_RESERVE (leaves room for other API usage); a
+    # backfill of default-branch commits is interrupted then (and resumed
+    # later).
+    COMMIT_ENRICHMENT_ASYNC = (
+        os.environ.get("CONBENCH_COMMIT_ENRICHMENT_ASYNC", "false") == "true"
+    )
+    COMMIT_ENRICHMENT_QUOTA_RESERVE = int(
+        os.environ.get("CONBENCH_COMMIT_ENRICHMENT_QUOTA_RESERVE", 100)
+    )
+
+    # Path to an SQLite database file (created if it does not exist) for
+    # caching GitHub HTTP API responses, see conbench/githubcache.py. Cached
+    # responses are revalidated with conditional requests (which do not count
+    # against the API quota when answered with 304), except for immutable
+    # resources (commits addressed by hash). Default branch and pull request
+    # branch answers are served without revalidation for
+    # GITHUB_API_CACHE_TTL_SECONDS. Not set (default): no caching.
+    GITHUB_API_CACHE_PATH = os.environ.get("CONBENCH_GITHUB_API_CACHE_PATH") or None
+    GITHUB_API_CACHE_TTL_SECONDS = int(
+        os.environ.get("CONBENCH_GITHUB_API_CACHE_TTL_SECONDS", 300)
+    )
+    # Cached responses for mutable resources (e.g. a repository's default
+    # branch) that are older than that are deleted from the cache.
+    GITHUB_API_CACHE_MAX_AGE_SECONDS = int(
+        os.environ.get("CONBENCH_GITHUB_API_CACHE_MAX_AGE_SECONDS", 7 * 24 * 3600)
+    )
+
+    # Maximum number of concurrent GitHub HTTP API requests when fetching the
+    # result pages for backfilling default-branch commits.
+    GITHUB_API_CONCURRENCY = int(os.environ.get("CONBENCH_GITHUB_API_CONCURRENCY", 4))
+
     LOG_LEVEL_STDERR = os.environ.get("CONBENCH_LOG_LEVEL_STDERR", "INFO")
     LOG_LEVEL_FILE = None
     LOG_LEVEL_SQLALCHEMY = "WARNING"
@@ -1,11 +1,12 @@
 import functools
-from typing import Dict, Generic, List, Type, TypeVar
+import json
+from typing import Dict, Generic, List, Optional, Type, TypeVar
 
 import flask as f
 import sqlalchemy
 from sqlalchemy import distinct, select
 from sqlalchemy.dialects.postgresql import insert as postgresql_insert
-from sqlalchemy.orm import declarative_base, mapped_column
+from sqlalchemy.orm import declarative_base, make_transient_to_detached, mapped_column
 from sqlalchemy.orm.exc import NoResultFound
 
 # Use stdlib once that's there:
@@ -13,6 +14,7 @@ from sqlalchemy.orm.exc import NoResultFound
 from uuid_extensions import uuid7
 
 from conbench.dbsession import current_session
+from conbench.entities import _entity_cache
 
 Base = declarative_base()
 NotNull = functools.partial(mapped_column, nullable=False)
@@ -177,6 +179,23 @@ class EntityMixin(Generic[T]):
         current_session.delete(self)
         current_session.commit()
 
+    @classmethod
+    def _get_cached(cls: Type[T], props: Dict) -> Optional[T]:
+        """
+        Return the object for `props` if its primary key is in the entity
+        cache (see conbench.entities._entity_cache), without a database query:
+        attributes not given by `props` are loaded (lazily) only when
+        accessed.
+        """
+        primary_key = _entity_cache.get(cls.__name__, props)
+        if primary_key is None:
+            return None
+
+        obj = cls(**props)
+        obj.id = primary_key  # type: ignore[attr-defined]
+        make_transient_to_detached(obj)
+        return current_session.merge(obj, load=False)
+
     @classmethod
     def get_or_create(cls: Type[T], props: Dict) -> T:
         """
@@ -187,7 +206,16 @@ class EntityMixin(Generic[T]):
         If there is no unique constraint on the keys of props, race conditions will
         result in duplicated rows, but should not fail. This should be rare.
         """
+        result = cls._get_cached(props)
+        if result is not None:
+            return result
 
+        result = cls._get_or_create_uncached(props)
+        _entity_cache.set(cls.__name__, props, result.id)  # type: ignore[attr-defined]
+        return result
+
+    @classmethod
+    def _get_or_create_uncached(cls: Type[T], props: Dict) -> T:
         def _fetch_first():
             return current_session.scalars(select(cls).filter_by(**props)).first()
 
@@ -212,6 +240,71 @@ class EntityMixin(Generic[T]):
         assert result is not None
         return result
 
+    @classmethod
+    def get_or_create_many(cls: Type[T], props_list: List[Dict]) -> List[T]:
+        """
+        Like get_or_create(), for many objects at once (e.g. for a batch of
+        benchmark results): look up the existing objects for all distinct props
+        with few queries, and insert the missing ones in one transaction
+        (multi-row INSERT).
+
+        Return one object per item in `props_list` (same order).
+        """
+
+        def _key(props: Dict) -> str:
+            return json.dumps(props, sort_keys=True, default=str)
+
+        distinct_props = {_key(props): props for props in props_list}
+        resolved: Dict[str, T] = {}
+
+        for key, props in distinct_props.items():
+            cached = cls._get_cached(props)
+            if cached is not None:
+                resolved[key] = cached
+
+        # Look up existing objects, in chunks of (up to) 100 distinct props.
+        keys = [key for key in distinct_props if key not in resolved]
+        for start in range(0, len(keys), 100):
+            end = start + 100
+            chunk = keys[start:end]
+            condition = sqlalchemy.or_(
+                *[
+                    sqlalchemy.and_(
+                        *[getattr(cls, k) == v for k, v in distinct_props[key].items()]
+                    )
+                    for key in chunk
+                ]
+            )
+            for obj in current_session.scalars(select(cls).filter(condition)):
+                for key in chunk:
+                    if key not in resolved and all(
+                        getattr(obj, k) == v for k, v in distinct_props[key].items()
+                    ):
+                        resolved[key] = obj
+
+        missing = [key for key in keys if key not in resolved]
+        if missing:
+            objs = [cls(**distinct_props[key]) for key in missing]
+            current_session.add_all(objs)
+            try:
+                current_session.commit()
+                resolved.update(zip(missing, objs))
+            except sqlalchemy.exc.IntegrityError as exc:
+                if "violates unique constraint" not in str(exc):
+                    raise
+                # A concurrent racer inserted (some of) these in the meantime,
+                # see get_or_create().
+                current_session.rollback()
+                for key in missing:
+                    resolved[key] = cls._get_or_create_uncached(distinct_props[key])
+
+        for key in keys:
+            _entity_cache.set(
+                cls.__name__, distinct_props[key], resolved[key].id  # type: ignore[attr-defined]
+            )
+
+        return [resolved[_key(props)] for props in props_list]
+
 
 class EntitySerializer:
     def __init__(self, many=None):
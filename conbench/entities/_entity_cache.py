@@ -0,0 +1,80 @@
+"""
+Per-process cache for the primary keys of Case, Context, Info and Hardware
+entities, as used by EntityMixin.get_or_create() and get_or_create_many().
+
+Each submitted benchmark result refers to a case, a context, an info and a
+hardware entity. Typically, the same handful of these appear in nearly every
+result of a run; without this cache each of them is looked up with a query
+filtering on (JSONB) columns, for every result.
+
+Cache key: a canonical hash of the entity type and the props (the exact
+column values the entity was created with or looked up by). Cached value:
+the primary key. These entities are never mutated or deleted by the
+application (other than in the test suite, see `clear()`), so the mapping
+does not go stale.
+"""
+
+import hashlib
+import json
+from typing import Dict, Optional
+
+import prometheus_client
+
+from conbench.cachetools import SizedLRUCacheWithTTL
+from conbench.config import Config
+
+# Note: defined here rather than in conbench.metrics, which (indirectly)
+# imports the entity modules.
+COUNTER_ENTITY_CACHE_HITS = prometheus_client.Counter(
+    "conbench_entity_cache_hits_total",
+    "The total number of Case/Context/Info/Hardware entities resolved via the "
+    "(per-process) entity cache, i.e. without a database query.",
+    labelnames=["entity"],
+)
+
+COUNTER_ENTITY_CACHE_MISSES = prometheus_client.Counter(
+    "conbench_entity_cache_misses_total",
+    "The total number of Case/Context/Info/Hardware entities that had to be "
+    "looked up in (or inserted into) the database.",
+    labelnames=["entity"],
+)
+
+
+cache = SizedLRUCacheWithTTL(
+    max_bytes=Config.ENTITY_CACHE_MAX_ITEMS,
+    ttl=Config.ENTITY_CACHE_TTL_SECONDS,
+    # Bound the number of items, not their size: each is a short string.
+    sizeof=lambda _: 1,
+)
+
+
+def enabled() -> bool:
+    return cache.max_bytes > 0
+
+
+def key(entity_name: str, props: Dict) -> str:
+    return hashlib.sha256(
+        json.dumps([entity_name, props], sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def get(entity_name: str, props: Dict) -> Optional[str]:
+    """Return cached primary key, or None (and count hit/miss)."""
+    if not enabled():
+        return None
+
+    primary_key = cache.get(key(entity_name, props))
+    if primary_key is None:
+        COUNTER_ENTITY_CACHE_MISSES.labels(entity=entity_name).inc()
+    else:
+        COUNTER_ENTITY_CACHE_HITS.labels(entity=entity_name).inc()
+    return primary_key
+
+
+def set(entity_name: str, props: Dict, primary_key: str) -> None:
+    if enabled():
+        cache.set(key(entity_name, props), primary_key)
+
+
+def clear() -> None:
+    cache.clear()
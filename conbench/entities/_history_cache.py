@@ -0,0 +1,61 @@
+"""
+Per-process cache for benchmark result histories, as computed by
+conbench.entities.history.get_history_for_fingerprint() (all default-branch
+results for a history fingerprint, plus rolling statistics).
+
+Popular histories are requested over and over again (history API, history
+plots in the UI); computing one requires a database query over all results
+in that history plus a rolling window analysis.
+
+Cache key: history fingerprint. Each cached item carries the data version
+it was computed for (see history._history_data_version()); a cached history
+is only served if the current data version matches. Separate from that,
+`invalidate()` is called when a result with that fingerprint is inserted,
+changed (e.g. change annotations), or deleted by this process.
+
+This module does not import conbench.entities.history so that it can be used
+from conbench.entities.benchmark_result.
+"""
+
+from typing import Any, Tuple
+
+import conbench.metrics
+from conbench.cachetools import SizedLRUCacheWithTTL
+from conbench.config import Config
+from conbench.types import THistFingerprint
+
+
+def _on_evict(reason: str) -> None:
+    conbench.metrics.COUNTER_HISTORY_CACHE_EVICTIONS.labels(reason=reason).inc()
+
+
+def _estimate_size(item: Tuple[Any, list]) -> int:
+    """
+    Rough estimate for the memory consumption of a cached history (a list of
+    HistorySample objects) in bytes: ~2 kB per sample for the object, its
+    dict, the many small objects referenced (timestamps, strings, the
+    zscorestats object), plus the per-iteration data.
+    """
+    _, samples = item
+    size = 0
+    for sample in samples:
+        size += 2000 + 32 * (len(sample.data) + len(sample.times))
+        size += len(sample.commit_msg)
+    return size
+
+
+cache = SizedLRUCacheWithTTL(
+    max_bytes=Config.HISTORY_CACHE_MAX_MB * 1024 * 1024,
+    ttl=Config.HISTORY_CACHE_TTL_SECONDS,
+    sizeof=_estimate_size,
+    on_evict=_on_evict,
+)
+
+
+def enabled() -> bool:
+    return cache.max_bytes > 0
+
+
+def invalidate(history_fingerprint: THistFingerprint) -> None:
+    cache.invalidate(history_fingerprint)
+    conbench.metrics.GAUGE_HISTORY_CACHE_BYTES.set(cache.total_bytes)
@@ -0,0 +1,211 @@
+"""
+NumPy-based rolling statistics for benchmark result histories, see
+conbench.entities.history.
+
+The functions here operate on flat arrays sorted by (group, time), where each
+group (e.g. a history fingerprint, or a fingerprint/segment pair) occupies a
+contiguous slice, marked by `new_group` (boolean array: True where a group
+begins). Windows never cross group boundaries. All groups are processed at
+once, in a constant number of vectorized passes (previously: per-group
+pandas rolling aggregations, partially in a Python loop).
+
+The semantics mirror those of pandas' rolling aggregations with
+`min_periods=1`: NaN values are skipped and do not count as observations, the
+standard deviation uses ddof=1 (NaN for fewer than two observations), and a
+window in which all observations are equal yields exactly that value as mean
+and exactly 0 as standard deviation (pandas special-cases that, too).
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+def new_group_mask(*keys: np.ndarray) -> np.ndarray:
+    """
+    Return boolean array: True for each row where any of `keys` differs from
+    the previous row (and for the first row).
+    """
+    n = len(keys[0])
+    mask = np.zeros(n, dtype=bool)
+    if n:
+        mask[0] = True
+    for k in keys:
+        mask[1:] |= k[1:] != k[:-1]
+    return mask
+
+
+def _group_start_index(new_group: np.ndarray) -> np.ndarray:
+    """
+    For each row, return the index of the first row of its group.
+    """
+    idx = np.arange(len(new_group))
+    return np.maximum.accumulate(np.where(new_group, idx, 0))
+
+
+def row_windows(new_group: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trailing windows of (at most) `window` rows, including the current row.
+    Return (start, end) arrays; the window of row i is `start[i]:end[i]`.
+    """
+    idx = np.arange(len(new_group))
+    start = np.maximum(_group_start_index(new_group), idx + 1 - window)
+    return start, idx + 1
+
+
+def commit_windows(
+    new_group: np.ndarray, new_commit: np.ndarray, window: int, closed: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trailing windows covering the (at most) `window` most recent distinct
+    commits of the group, regardless of how many rows each commit has, and
+    regardless of the time between commits.
+
+    `new_commit`: True where the commit (timestamp) differs from the previous
+    row's, or where a group begins.
+
+    `closed="right"`: include the current commit (and all of its rows).
+    `closed="left"`: the `window` commits before the current one.
+    """
+    # Dense commit rank, increasing across groups.
+    rank = np.cumsum(new_commit | new_group)
+    first_rank_of_group = rank[_group_start_index(new_group)]
+
+    if closed == "right":
+        end = np.searchsorted(rank, rank, side="right")
+        lowest = rank - window + 1
+    elif closed == "left":
+        end = np.searchsorted(rank, rank, side="left")
+        lowest = rank - window
+    else:
+        raise ValueError(f"unexpected closed: {closed}")
+
+    start = np.searchsorted(rank, np.maximum(lowest, first_rank_of_group), "left")
+    return start, end
+
+
+def window_count(flags: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """
+    Number of True values in each window (as float64).
+    """
+    csum = np.zeros(len(flags) + 1, dtype=np.int64)
+    np.cumsum(flags, out=csum[1:])
+    return (csum[end] - csum[start]).astype(np.float64)
+
+
+def _window_sums(x: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """
+    Sum of `x` in each window, via prefix sums. A plain prefix sum would
+    carry a rounding error proportional to the magnitude of all previous
+    values (which can be large compared to the sum of a window, think: steps
+    in a time series). Compensate: recover the rounding error of each
+    addition step exactly (TwoSum; relies on np.cumsum() adding sequentially),
+    and carry the accumulated error in a second prefix sum.
+    """
+    n = len(x)
+    hi = np.zeros(n + 1, dtype=np.float64)
+    np.cumsum(x, out=hi[1:])
+    prev, cur = hi[:-1], hi[1:]
+    x_part = cur - prev
+    err = (prev - (cur - x_part)) + (x - x_part)
+    lo = np.zeros(n + 1, dtype=np.float64)
+    np.cumsum(err, out=lo[1:])
+    return (hi[end] - hi[start]) + (lo[end] - lo[start])
+
+
+def rolling_mean_std(
+    x: np.ndarray, new_group: np.ndarray, start: np.ndarray, end: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean and standard deviation (ddof=1) of the non-NaN values of `x` in each
+    window. Each row's window must be within that row's group.
+    """
+    n = len(x)
+    if n == 0:
+        return np.zeros(0), np.zeros(0)
+
+    valid = ~np.isnan(x)
+    nvalid = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(valid, out=nvalid[1:])
+    nobs = nvalid[end] - nvalid[start]
+
+    # Center values on their group's mean: reduces cancellation in the
+    # sum-of-squares formula below.
+    group_starts = np.flatnonzero(new_group)
+    group_sizes = np.diff(np.append(group_starts, n))
+    xz = np.where(valid, x, 0.0)
+    gsum = np.add.reduceat(xz, group_starts)
+    gcount = np.add.reduceat(valid.astype(np.int64), group_starts)
+    ref = np.repeat(
+        np.divide(gsum, gcount, out=np.zeros_like(gsum), where=gcount > 0), group_sizes
+    )
+    y = np.where(valid, x - ref, 0.0)
+
+    s1 = _window_sums(y, start, end)
+    s2 = _window_sums(y * y, start, end)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(nobs > 0, ref + s1 / nobs, np.nan)
+        var = np.where(nobs > 1, (s2 - s1 * s1 / nobs) / (nobs - 1), np.nan)
+    var = np.maximum(var, 0.0)
+
+    # Windows with all observations being equal: exact results (no rounding
+    # errors). `run_start[j]`: (compressed) index where the run of equal
+    # values containing the j-th valid value begins.
+    xv = x[valid]
+    if len(xv):
+        idx = np.arange(len(xv))
+        changed = np.ones(len(xv), dtype=bool)
+        changed[1:] = xv[1:] != xv[:-1]
+        run_start = np.maximum.accumulate(np.where(changed, idx, 0))
+        last = np.maximum(nvalid[end] - 1, 0)
+        constant = (nobs > 0) & (run_start[last] <= nvalid[start])
+        mean[constant] = xv[last[constant]]
+        var[constant & (nobs > 1)] = 0.0
+
+    return mean, np.sqrt(var)
+
+
+def grouped_quantile(x: np.ndarray, new_group: np.ndarray, q: float) -> np.ndarray:
+    """
+    For each row, the `q` quantile of the non-NaN values of `x` in its group
+    (NaN if there are none). Linear interpolation, computed the same way as
+    `pd.Series.quantile()` does it (via np.percentile()), so that comparisons
+    with the quantile behave identically.
+    """
+    n = len(x)
+    if n == 0:
+        return np.zeros(0)
+
+    # pandas passes the quantile as percentage to np.percentile(), which
+    # divides by 100 again.
+    q = (q * 100.0) / 100.0
+
+    group_id = np.cumsum(new_group) - 1
+    group_starts = np.flatnonzero(new_group)
+    group_sizes = np.diff(np.append(group_starts, n))
+
+    # Sort within groups; NaNs go last.
+    xs = x[np.lexsort((x, group_id))]
+    nvalid = np.add.reduceat((~np.isnan(x)).astype(np.int64), group_starts)
+
+    virtual = (nvalid - 1) * q
+    previous = np.floor(virtual)
+    above = virtual >= nvalid - 1
+    prev_idx = np.where(above, nvalid - 1, previous).astype(np.int64)
+    next_idx = np.where(above, nvalid - 1, previous + 1).astype(np.int64)
+    gamma = virtual - np.where(above, -1, previous)
+
+    has_values = nvalid > 0
+    a = np.full(len(group_starts), np.nan)
+    b = np.full(len(group_starts), np.nan)
+    a[has_values] = xs[group_starts[has_values] + prev_idx[has_values]]
+    b[has_values] = xs[group_starts[has_values] + next_idx[has_values]]
+
+    # Same as numpy's _lerp().
+    diff_b_a = b - a
+    result = a + diff_b_a * gamma
+    upper = gamma >= 0.5
+    result[upper] = (b - diff_b_a * (1 - gamma))[upper]
+
+    return np.repeat(result, group_sizes)
@@ -6,7 +6,7 @@ import statistics
 import time
 from datetime import datetime, timezone
 from decimal import Decimal
-from typing import Any, Dict, List, Optional, Tuple, Union, cast
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union, cast
 from urllib.parse import urlparse
 
 import flask as f
@@ -26,6 +26,7 @@ from conbench.numstr import numstr, numstr_dyn
 from conbench.types import THistFingerprint
 from conbench.units import KNOWN_UNIT_SYMBOLS_STR, TUnit, less_is_better
 
+from ..entities import _history_cache
 from ..entities._entity import (
     Base,
     EntityMixin,
@@ -43,7 +44,9 @@ from ..entities.commit import (
     backfill_default_branch_commits,
     get_github_commit_metadata,
 )
+from ..entities.commit_enrichment import enqueue_commit_enrichment
 from ..entities.context import Context
+from ..entities.distribution_stats import invalidate_distribution_stats
 from ..entities.hardware import (
     Cluster,
     ClusterSchema,
@@ -52,7 +55,9 @@ from ..entities.hardware import (
     Machine,
     MachineSchema,
 )
+from ..entities.history_version import bump_history_version
 from ..entities.info import Info
+from ..entities.run_comparison import invalidate_run_comparisons
 
 log = logging.getLogger(__name__)
 
@@ -61,6 +66,14 @@ class BenchmarkResultValidationError(Exception):
     pass
 
 
+class CreatedBenchmarkResult(NamedTuple):
+    """A benchmark result inserted by BenchmarkResult.create_many()."""
+
+    id: str
+    commit_repo_url: str
+    history_fingerprint: THistFingerprint
+
+
 class BenchmarkResult(Base, EntityMixin):
     __tablename__ = "benchmark_result"
     id: Mapped[str] = NotNull(s.String(50), primary_key=True, default=genprimkey)
@@ -190,66 +203,10 @@ class BenchmarkResult(Base, EntityMixin):
         emitted to the HTTP client in a Bad Request response.
         """
 
-        validate_and_augment_result_tags(userres)
-
-        # The dict that is used for DB insertion later, populated below.
-        result_data_for_db: Dict = {}
-
-        if "stats" in userres:
-            # First things first: use the complete user-given `stats` object
-            # for potential DB insertion down below. In `error` state, do not
-            # perform deeper validation of the user-given stats object (the
-            # benchmark result is not used for any kind of analysis, which is
-            # why it's probably ok to store the user-given 'stats' object w/o
-            # deeper validation, maybe the data is helpful for debugging). Note
-            # that what the user delivers under the `stats` key as a sub object
-            # (in the result JSON object) is mapped directly on top-level
-            # properties in the Python BenchmarkResult object. That is a bit of
-            # an annoying asymmetry between DB object and JSON representation.
-            result_data_for_db |= userres["stats"]  # PEP 584 update
-
-        # User indicated error with variant A: user-given error object set.
-        if "error" in userres:
-            # We have business logic elsewhere that checks only for presence of
-            # the `error` key (ignores its value, a value of `None` might
-            # elsewhere be interpreted as error -- this did cost me 30 minutes
-            # of debugging).
-            result_data_for_db["error"] = userres["error"]
-
-        # Check for a more subtle error condition based on the per-iteration
-        # samples. Invariant: if "error" is not present then "stats" is present
-        # as a key in this dictionary -- this is schema-enforced. he `stats`
-        # object is guaranteed to have a `data` key.
-        elif do_iteration_samples_look_like_error(userres["stats"]["data"]):
-            # User indicated error with variant B: missing or incomplete data.
-            # User unfortunately did not set `error` explicitly, but we err on
-            # the side auf caution here and treat the result as 'errored'. This
-            # is documented. Set generic error detail.
-            result_data_for_db["error"] = {
-                # Maybe tune this error message to be more generic.
-                "status": "Partial result: not all iterations completed"
-            }
-
-        else:
-            # process_samples_build_agg() must only be called if
-            # do_iteration_samples_look_like_error() returned False. That's
-            # the case here.
-            result_data_from_stats = validate_and_aggregate_samples(userres["stats"])
-
-            # Per-iteration samples looked good, and we did (potentially)
-            # rebuild aggregates. Merge dict `result_stats_data_for_db` on top
-            # of dict `benchmark_result_data`, overwriting upon conflict.
-            result_data_for_db |= result_data_from_stats  # PEP 584 update
-
-        # See https://github.com/conbench/conbench/issues/935,
-        # At this point, assume that data["tags"] is a flat dictionary with
-        # keys being non-empty strings, and values being non-empty strings.
-        tags = userres["tags"]
-
-        benchmark_name = tags.pop("name")
+        result_data_for_db = _validate_and_build_result_data(userres)
 
         # Create related DB entities if they do not exist yet.
-        case = Case.get_or_create({"name": benchmark_name, "tags": tags})
+        case = Case.get_or_create(_case_props(userres))
         context = Context.get_or_create({"tags": userres["context"]})
         info = Info.get_or_create({"tags": userres.get("info", {})})
         if "machine_info" in userres:
@@ -258,53 +215,139 @@ class BenchmarkResult(Base, EntityMixin):
             hardware = Cluster.get_or_create(userres["cluster_info"])
 
         user_given_commit_info: TypeCommitInfoGitHub = userres["github"]
-        repo_url = user_given_commit_info["repo_url"]
         commit = None
         if user_given_commit_info["commit_hash"] is not None:
             commit = commit_fetch_info_and_create_in_db_if_not_exists(
                 user_given_commit_info
             )
 
-        result_data_for_db["run_id"] = userres["run_id"]
-        result_data_for_db["run_tags"] = userres.get("run_tags") or {}
-        result_data_for_db["run_reason"] = userres.get("run_reason")
-
-        # Legacy behavior: divert run_name into run_tags, if name is not already present
-        # in run_tags.
-        if "run_name" in userres and "name" not in result_data_for_db["run_tags"]:
-            result_data_for_db["run_tags"]["name"] = userres["run_name"]
-
-        result_data_for_db["batch_id"] = userres["batch_id"]
-
-        # At this point `data["timestamp"]` is expected to be a tz-aware
-        # datetime object in UTC.
-        result_data_for_db["timestamp"] = userres["timestamp"]
-        result_data_for_db["validation"] = userres.get("validation")
-        result_data_for_db["change_annotations"] = {
-            key: value
-            for key, value in userres.get("change_annotations", {}).items()
-            if value is not None
-        }
-        result_data_for_db["case_id"] = case.id
-        result_data_for_db["optional_benchmark_info"] = userres.get(
-            "optional_benchmark_info"
-        )
-        result_data_for_db["info_id"] = info.id
-        result_data_for_db["context_id"] = context.id
-        result_data_for_db["hardware_id"] = hardware.id
-        result_data_for_db["commit_id"] = commit.id if commit else None
-        result_data_for_db["commit_repo_url"] = repo_url
-        result_data_for_db["history_fingerprint"] = generate_history_fingerprint(
-            case_id=case.id,
-            context_id=context.id,
-            hardware_hash=hardware.hash,
-            repo_url=repo_url,
+        _set_related_entity_ids(
+            result_data_for_db, userres, case, context, info, hardware, commit
         )
         benchmark_result = BenchmarkResult(**result_data_for_db)
+        # Same transaction: the materialized distribution stats for this
+        # commit (and later ones) and the precomputed run comparisons must not
+        # survive without this result.
+        invalidate_distribution_stats(commit, benchmark_result.history_fingerprint)
+        invalidate_run_comparisons(benchmark_result.run_id, commit)
         benchmark_result.save()
+        _history_cache.invalidate(benchmark_result.history_fingerprint)
 
         return benchmark_result
 
+    @staticmethod
+    def create_many(
+        userress: List[Dict],
+    ) -> List[Union[CreatedBenchmarkResult, BenchmarkResultValidationError]]:
+        """
+        Like create(), for a batch of user-given benchmark results (each of
+        them validated against the `BenchmarkResultCreate` schema already).
+
+        Each distinct related entity (case, context, info, hardware, commit) is
+        looked up (or created) once per batch, and the results are inserted in
+        one transaction (multi-row INSERT statements).
+
+        Return one item per user-given result (same order): a
+        CreatedBenchmarkResult (plain values, not an ORM object: there is no
+        lazy loading after the commit), or the BenchmarkResultValidationError
+        describing why this result was rejected (in that case it was not
+        inserted).
+        """
+        outcomes: List[
+            Union[CreatedBenchmarkResult, BenchmarkResultValidationError]
+        ] = []
+        # Tuples of (index in `userress`, result data for DB, user-given result).
+        valid: List[Tuple[int, Dict, Dict]] = []
+        for idx, userres in enumerate(userress):
+            try:
+                result_data_for_db = _validate_and_build_result_data(userres)
+            except BenchmarkResultValidationError as exc:
+                outcomes.append(exc)
+                continue
+            # Replaced with the BenchmarkResult object below.
+            outcomes.append(BenchmarkResultValidationError("not inserted"))
+            valid.append((idx, result_data_for_db, userres))
+
+        if not valid:
+            return outcomes
+
+        # Resolve the related entities, once per distinct entity.
+        userress_valid = [userres for _, _, userres in valid]
+        cases = Case.get_or_create_many([_case_props(u) for u in userress_valid])
+        contexts = Context.get_or_create_many(
+            [{"tags": u["context"]} for u in userress_valid]
+        )
+        infos = Info.get_or_create_many(
+            [{"tags": u.get("info", {})} for u in userress_valid]
+        )
+        hardwares: Dict[int, Hardware] = {}
+        for hwcls, key in ((Machine, "machine_info"), (Cluster, "cluster_info")):
+            positions = [i for i, u in enumerate(userress_valid) if key in u]
+            hardwares.update(
+                zip(
+                    positions,
+                    hwcls.get_or_create_many(
+                        [userress_valid[i][key] for i in positions]
+                    ),
+                )
+            )
+        commits = commits_fetch_info_and_create_in_db_if_not_exist(
+            [
+                u["github"]
+                for u in userress_valid
+                if u["github"]["commit_hash"] is not None
+            ]
+        )
+
+        benchmark_results: List[BenchmarkResult] = []
+        for i, (idx, result_data_for_db, userres) in enumerate(valid):
+            cinfo: TypeCommitInfoGitHub = userres["github"]
+            commit = None
+            if cinfo["commit_hash"] is not None:
+                commit = commits[(cinfo["commit_hash"], cinfo["repo_url"])]
+            _set_related_entity_ids(
+                result_data_for_db,
+                userres,
+                cases[i],
+                contexts[i],
+                infos[i],
+                hardwares[i],
+                commit,
+            )
+            benchmark_result = BenchmarkResult(
+                id=genprimkey(), commit=commit, **result_data_for_db
+            )
+            outcomes[idx] = CreatedBenchmarkResult(
+                id=benchmark_result.id,
+                commit_repo_url=benchmark_result.commit_repo_url,
+                history_fingerprint=benchmark_result.history_fingerprint,
+            )
+            benchmark_results.append(benchmark_result)
+
+        # Same transaction (see create()), once per distinct (commit, history
+        # fingerprint) and (run, commit).
+        for commit, history_fingerprint in {
+            (br.commit_id, br.history_fingerprint): (br.commit, br.history_fingerprint)
+            for br in benchmark_results
+        }.values():
+            invalidate_distribution_stats(commit, history_fingerprint)
+        for run_id, commit in {
+            (br.run_id, br.commit_id): (br.run_id, br.commit)
+            for br in benchmark_results
+        }.values():
+            invalidate_run_comparisons(run_id, commit)
+
+        history_fingerprints = {br.history_fingerprint for br in benchmark_results}
+        current_session.add_all(benchmark_results)
+        # Committing expires the attributes of the ORM objects; do not access
+        # them afterwards (that would trigger one refresh query per object).
+        current_session.commit()
+
+        for history_fingerprint in history_fingerprints:
+            _history_cache.invalidate(history_fingerprint)
+
+        return outcomes
+
     def update(self, data):
         old_change_annotations = self.change_annotations or {}
 
@@ -320,7 +363,18 @@ class BenchmarkResult(Base, EntityMixin):
             if value is not None
         }
 
+        # Change annotations affect the distribution (segments).
+        invalidate_distribution_stats(self.commit, self.history_fingerprint)
+        invalidate_run_comparisons(self.run_id, self.commit)
+        bump_history_version(self.history_fingerprint)
         super().update(data)
+        _history_cache.invalidate(self.history_fingerprint)
+
+    def delete(self):
+        invalidate_distribution_stats(self.commit, self.history_fingerprint)
+        invalidate_run_comparisons(self.run_id, self.commit)
+        super().delete()
+        _history_cache.invalidate(self.history_fingerprint)
 
     def to_dict_for_json_api(benchmark_result, include_joins=True):
         # `self` is just convention :-P
@@ -1016,6 +1070,129 @@ def fetch_one_result_per_each_of_n_recent_runs(n: int = 250) -> List[BenchmarkRe
     return bmrs
 
 
+def _validate_and_build_result_data(userres) -> Dict:
+    """
+    Validate user-given benchmark result (see BenchmarkResult.create()) and
+    build the dict that is used for DB insertion, except for the references to
+    related entities (see _set_related_entity_ids()).
+
+    Raises BenchmarkResultValidationError.
+    """
+    validate_and_augment_result_tags(userres)
+
+    # The dict that is used for DB insertion later, populated below.
+    result_data_for_db: Dict = {}
+
+    if "stats" in userres:
+        # First things first: use the complete user-given `stats` object
+        # for potential DB insertion down below. In `error` state, do not
+        # perform deeper validation of the user-given stats object (the
+        # benchmark result is not used for any kind of analysis, which is
+        # why it's probably ok to store the user-given 'stats' object w/o
+        # deeper validation, maybe the data is helpful for debugging). Note
+        # that what the user delivers under the `stats` key as a sub object
+        # (in the result JSON object) is mapped directly on top-level
+        # properties in the Python BenchmarkResult object. That is a bit of
+        # an annoying asymmetry between DB object and JSON representation.
+        result_data_for_db |= userres["stats"]  # PEP 584 update
+
+    # User indicated error with variant A: user-given error object set.
+    if "error" in userres:
+        # We have business logic elsewhere that checks only for presence of
+        # the `error` key (ignores its value, a value of `None` might
+        # elsewhere be interpreted as error -- this did cost me 30 minutes
+        # of debugging).
+        result_data_for_db["error"] = userres["error"]
+
+    # Check for a more subtle error condition based on the per-iteration
+    # samples. Invariant: if "error" is not present then "stats" is present
+    # as a key in this dictionary -- this is schema-enforced. he `stats`
+    # object is guaranteed to have a `data` key.
+    elif do_iteration_samples_look_like_error(userres["stats"]["data"]):
+        # User indicated error with variant B: missing or incomplete data.
+        # User unfortunately did not set `error` explicitly, but we err on
+        # the side auf caution here and treat the result as 'errored'. This
+        # is documented. Set generic error detail.
+        result_data_for_db["error"] = {
+            # Maybe tune this error message to be more generic.
+            "status": "Partial result: not all iterations completed"
+        }
+
+    else:
+        # process_samples_build_agg() must only be called if
+        # do_iteration_samples_look_like_error() returned False. That's
+        # the case here.
+        result_data_from_stats = validate_and_aggregate_samples(userres["stats"])
+
+        # Per-iteration samples looked good, and we did (potentially)
+        # rebuild aggregates. Merge dict `result_stats_data_for_db` on top
+        # of dict `benchmark_result_data`, overwriting upon conflict.
+        result_data_for_db |= result_data_from_stats  # PEP 584 update
+
+    result_data_for_db["run_id"] = userres["run_id"]
+    result_data_for_db["run_tags"] = userres.get("run_tags") or {}
+    result_data_for_db["run_reason"] = userres.get("run_reason")
+
+    # Legacy behavior: divert run_name into run_tags, if name is not already present
+    # in run_tags.
+    if "run_name" in userres and "name" not in result_data_for_db["run_tags"]:
+        result_data_for_db["run_tags"]["name"] = userres["run_name"]
+
+    result_data_for_db["batch_id"] = userres["batch_id"]
+
+    # At this point `data["timestamp"]` is expected to be a tz-aware
+    # datetime object in UTC.
+    result_data_for_db["timestamp"] = userres["timestamp"]
+    result_data_for_db["validation"] = userres.get("validation")
+    result_data_for_db["change_annotations"] = {
+        key: value
+        for key, value in userres.get("change_annotations", {}).items()
+        if value is not None
+    }
+    return result_data_for_db
+
+
+def _case_props(userres) -> Dict:
+    # See https://github.com/conbench/conbench/issues/935,
+    # At this point, assume that data["tags"] is a flat dictionary with
+    # keys being non-empty strings, and values being non-empty strings.
+    tags = userres["tags"]
+
+    benchmark_name = tags.pop("name")
+    return {"name": benchmark_name, "tags": tags}
+
+
+def _set_related_entity_ids(
+    result_data_for_db: Dict,
+    userres,
+    case: Case,
+    context: Context,
+    info: Info,
+    hardware: Hardware,
+    commit: Optional[Commit],
+) -> None:
+    """
+    Complete the dict built by _validate_and_build_result_data() with the
+    references to the related DB entities, and the history fingerprint.
+    """
+    repo_url = userres["github"]["repo_url"]
+    result_data_for_db["case_id"] = case.id
+    result_data_for_db["optional_benchmark_info"] = userres.get(
+        "optional_benchmark_info"
+    )
+    result_data_for_db["info_id"] = info.id
+    result_data_for_db["context_id"] = context.id
+    result_data_for_db["hardware_id"] = hardware.id
+    result_data_for_db["commit_id"] = commit.id if commit else None
+    result_data_for_db["commit_repo_url"] = repo_url
+    result_data_for_db["history_fingerprint"] = generate_history_fingerprint(
+        case_id=case.id,
+        context_id=context.id,
+        hardware_hash=hardware.hash,
+        repo_url=repo_url,
+    )
+
+
 def commit_fetch_info_and_create_in_db_if_not_exists(
     ghcommit: TypeCommitInfoGitHub,
 ) -> Commit:
@@ -1055,6 +1232,16 @@ def commit_fetch_info_and_create_in_db_if_not_exists(
         if dbcommit is not None:
             return dbcommit, False
 
+        if Config.COMMIT_ENRICHMENT_ASYNC:
+            # Do not interact with the GitHub HTTP API while the client
+            # waits: store placeholder, have conbench/commitenrich.py fill in
+            # the metadata later (same transaction).
+            enqueue_commit_enrichment(cinfo)
+            dbcommit = Commit.create_unknown_context(
+                commit_hash=cinfo["commit_hash"], repo_url=cinfo["repo_url"]
+            )
+            return dbcommit, True
+
         # Try to fetch metadata for commit via GitHub HTTP API. Fall back
         # gracefully if that does not work.
         gh_commit_metadata_dict = None
@@ -1135,6 +1322,41 @@ def commit_fetch_info_and_create_in_db_if_not_exists(
     return commit
 
 
+def commits_fetch_info_and_create_in_db_if_not_exist(
+    ghcommits: List[TypeCommitInfoGitHub],
+) -> Dict[Tuple[str, str], Commit]:
+    """
+    Like commit_fetch_info_and_create_in_db_if_not_exists(), for many commits
+    (e.g. those referred to by a batch of benchmark results): look up all
+    distinct commits with one query, and only fetch info for (and insert) the
+    missing ones.
+
+    Return a dict mapping (commit hash, repo URL) to the Commit object.
+    """
+    distinct: Dict[Tuple[str, str], TypeCommitInfoGitHub] = {}
+    for cinfo in ghcommits:
+        # Commit hash must be provided to use this function.
+        assert cinfo["commit_hash"]
+        distinct.setdefault((cinfo["commit_hash"], cinfo["repo_url"]), cinfo)
+
+    commits: Dict[Tuple[str, str], Commit] = {}
+    if not distinct:
+        return commits
+
+    for commit in current_session.scalars(
+        s.select(Commit).filter(
+            s.tuple_(Commit.sha, Commit.repository).in_(list(distinct))
+        )
+    ):
+        commits[(commit.sha, commit.repository)] = commit
+
+    for key, cinfo in distinct.items():
+        if key not in commits:
+            commits[key] = commit_fetch_info_and_create_in_db_if_not_exists(cinfo)
+
+    return commits
+
+
 def generate_history_fingerprint(
     case_id: str, context_id: str, hardware_hash: str, repo_url: str
 ) -> str:
@@ -1883,4 +2105,4 @@ delete an existing key, set the value to null.
 
 class BenchmarkResultFacadeSchema:
     create = _BenchmarkResultCreateSchema()
-    update = _BenchmarkResultUpdateSchema()
\ No newline at end of file
+    update = _BenchmarkResultUpdateSchema()
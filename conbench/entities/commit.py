@@ -1,20 +1,23 @@
+import concurrent.futures
 import itertools
 import json
 import logging
 import os
 import threading
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from functools import cached_property
-from typing import Dict, List, Optional, TypedDict
+from typing import Dict, Iterator, List, Optional, Tuple, TypedDict
 
 import flask as f
 import requests
 import sqlalchemy as s
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
 from sqlalchemy.orm import Mapped, Query
 
 from conbench import metrics, util
 from conbench.dbsession import current_session
+from conbench.githubcache import GitHubResponseCache
 
 from ..config import Config
 from ..entities._entity import (
@@ -25,6 +28,7 @@ from ..entities._entity import (
     Nullable,
     genprimkey,
 )
+from ..entities.commit_backfill import CommitBackfill
 
 log = logging.getLogger(__name__)
 
@@ -85,6 +89,22 @@ class Commit(Base, EntityMixin):
     # further down we use `.label()` which seems to be sqlalchemy-specific
     timestamp: Mapped[Optional[datetime]] = Nullable(s.DateTime(timezone=False))
 
+    # Ancestry index: for commits on the default branch, the 1-based position
+    # of this commit in the repository's default branch, ordered by
+    # (timestamp, id). Dense, and maintained upon commit insertion (see
+    # update_default_branch_seq()). With that, "the last N default-branch
+    # ancestors of commit X" is an index range scan over
+    # (repository, default_branch_seq) instead of a sort of the repository's
+    # default-branch history. NULL for all other commits.
+    default_branch_seq: Mapped[Optional[int]] = Nullable(s.Integer)
+
+    @classmethod
+    def create(cls, data) -> "Commit":
+        commit = super().create(data)
+        if commit.on_default_branch and commit.timestamp is not None:
+            update_default_branch_seq(commit.repository, commit.timestamp)
+        return commit
+
     def get_parent_commit(self):
         # Hm -- should this not be done with a foreign key relationship?
         return Commit.first(sha=self.parent, repository=self.repository)
@@ -220,6 +240,17 @@ class Commit(Base, EntityMixin):
         E2 :  E2, C2, F, D, B, A
         G  :  G, F, D, B, A
 
+        Might raise CantFindAncestorCommitsError.
+        """
+        return self.get_commit_ancestry_query()
+
+    def get_commit_ancestry_query(self, limit: Optional[int] = None) -> Query:
+        """Like `commit_ancestry_query`. If `limit` is given, only return the
+        `limit` most recent ancestors, ordered by commit_order (descending).
+
+        That uses the ancestry index (default_branch_seq): the default-branch
+        part of the ancestry is a range scan over the index.
+
         Might raise CantFindAncestorCommitsError.
         """
         if not self.branch:
@@ -235,6 +266,20 @@ class Commit(Base, EntityMixin):
         if not fork_point_commit.timestamp:
             raise CantFindAncestorCommitsError("fork_point_commit timestamp is null")
 
+        fork_point_seq = fork_point_commit.default_branch_seq
+        if fork_point_seq is not None:
+            default_branch_filters = [Commit.default_branch_seq <= fork_point_seq]
+            if limit is not None:
+                default_branch_filters.append(
+                    Commit.default_branch_seq > fork_point_seq - limit
+                )
+        else:
+            # Not (yet) indexed.
+            default_branch_filters = [
+                Commit.sha == Commit.fork_point_sha,  # aka: on default branch
+                Commit.timestamp <= fork_point_commit.timestamp,
+            ]
+
         # Get default branch commits before/including the fork point
         query = current_session.query(
             Commit.id.label("ancestor_id"),
@@ -242,11 +287,7 @@ class Commit(Base, EntityMixin):
             Commit.timestamp.label("ancestor_timestamp"),
             s.sql.expression.literal(True, s.Boolean).label("on_default_branch"),
             s.func.concat("1_", Commit.timestamp).label("commit_order"),
-        ).filter(
-            Commit.repository == self.repository,
-            Commit.sha == Commit.fork_point_sha,  # aka: on default branch
-            Commit.timestamp <= fork_point_commit.timestamp,
-        )
+        ).filter(Commit.repository == self.repository, *default_branch_filters)
 
         # If this commit is on a non-default branch, add all commits since the fork point
         if self != fork_point_commit:
@@ -264,6 +305,9 @@ class Commit(Base, EntityMixin):
             )
             query = query.union(branch_query)
 
+        if limit is not None:
+            query = query.order_by(s.desc("commit_order")).limit(limit)
+
         return query
 
     @staticmethod
@@ -292,18 +336,36 @@ class Commit(Base, EntityMixin):
         return Commit.create(
             {
                 "sha": sha,
-                "branch": github["branch"],
-                "fork_point_sha": github["fork_point_sha"],
                 "repository": repository,
-                "parent": github["parent"],
-                "timestamp": github["date"],
-                "message": github["message"],
-                "author_name": github["author_name"],
-                "author_login": github["author_login"],
-                "author_avatar": github["author_avatar"],
+                **_github_context_data(github),
             }
         )
 
+    def update_github_context(self, github: dict) -> None:
+        """
+        Fill in the metadata fetched from GitHub for a commit that was stored
+        as unknown context before (see conbench/commitenrich.py). Commit the
+        session.
+        """
+        self.update(_github_context_data(github))
+        # Depends on fork_point_sha which may just have changed.
+        self.__dict__.pop("on_default_branch", None)
+        if self.on_default_branch and self.timestamp is not None:
+            update_default_branch_seq(self.repository, self.timestamp)
+
+
+def _github_context_data(github: dict) -> dict:
+    return {
+        "branch": github["branch"],
+        "fork_point_sha": github["fork_point_sha"],
+        "parent": github["parent"],
+        "timestamp": github["date"],
+        "message": github["message"],
+        "author_name": github["author_name"],
+        "author_login": github["author_login"],
+        "author_avatar": github["author_avatar"],
+    }
+
 
 # NB: this assumes only one branch will be associated with a SHA when posting to
 # Conbench. Subsequent posts with the same SHA on a new branch will fail.
@@ -317,6 +379,71 @@ s.Index(
     Commit.repository,
     unique=True,
 )
+s.Index(
+    "commit_default_branch_seq_index",
+    Commit.repository,
+    Commit.default_branch_seq,
+)
+s.Index(
+    "commit_default_branch_timestamp_index",
+    Commit.repository,
+    Commit.timestamp,
+    postgresql_where=Commit.sha == Commit.fork_point_sha,
+)
+s.Index(
+    "commit_fork_point_index",
+    Commit.repository,
+    Commit.fork_point_sha,
+)
+
+
+def update_default_branch_seq(repository: str, since: datetime) -> None:
+    """
+    Maintain the ancestry index (Commit.default_branch_seq) after default-branch
+    commits with a timestamp of `since` or later were inserted for this
+    repository: renumber the default-branch commits from there on. Typically,
+    that is just the newly inserted commit. Commit the session.
+    """
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+
+    on_default_branch = s.and_(
+        Commit.repository == repository, Commit.sha == Commit.fork_point_sha
+    )
+
+    # Serialize renumbering per repository (released upon commit).
+    current_session.execute(
+        s.select(s.func.pg_advisory_xact_lock(s.func.hashtext(repository)))
+    )
+
+    preceding_seq = (
+        s.select(Commit.default_branch_seq)
+        .filter(on_default_branch, Commit.timestamp < since)
+        .order_by(Commit.timestamp.desc(), Commit.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    renumbered = (
+        s.select(
+            Commit.id,
+            (
+                s.func.coalesce(preceding_seq, 0)
+                + s.func.row_number().over(order_by=(Commit.timestamp, Commit.id))
+            ).label("seq"),
+        )
+        .filter(on_default_branch, Commit.timestamp >= since)
+        .subquery()
+    )
+    current_session.execute(
+        s.update(Commit)
+        .filter(
+            Commit.id == renumbered.c.id,
+            Commit.default_branch_seq.is_distinct_from(renumbered.c.seq),
+        )
+        .values(default_branch_seq=renumbered.c.seq)
+        .execution_options(synchronize_session=False)
+    )
+    current_session.commit()
 
 
 class _Serializer(EntitySerializer):
@@ -359,6 +486,12 @@ class CommitSerializer:
 
 
 GITHUB = "https://api.github.com"
+
+
+def _is_full_commit_hash(ref: str) -> bool:
+    return len(ref) == 40 and all(c in "0123456789abcdef" for c in ref.lower())
+
+
 this_dir = os.path.abspath(os.path.dirname(__file__))
 
 
@@ -485,6 +618,33 @@ def backfill_default_branch_commits(repo_url: str, new_commit: Commit) -> None:
     # This triggers one HTTP request.
     default_branch = _github.get_default_branch(repospec)
 
+    # Complete interrupted backfills first: the commits between the last
+    # tracked commit (as determined below) and their `since` may be missing.
+    interrupted = current_session.execute(
+        s.select(CommitBackfill.since, CommitBackfill.until, CommitBackfill.pages_done)
+        .filter(
+            CommitBackfill.repository == repo_url,
+            CommitBackfill.branch == default_branch,
+        )
+        .order_by(CommitBackfill.until.desc())
+    ).all()
+    for w_since, w_until, pages_done in interrupted:
+        log.info(
+            "resume backfill for %s (%s - %s) after %s page(s)",
+            repo_url,
+            w_since,
+            w_until,
+            pages_done,
+        )
+        _backfill_window(
+            repo_url,
+            repospec,
+            default_branch,
+            w_since,
+            w_until,
+            first_page=pages_done + 1,
+        )
+
     last_tracked_commit = Commit.all(
         filter_args=[
             Commit.timestamp < new_commit.timestamp,
@@ -515,35 +675,108 @@ def backfill_default_branch_commits(repo_url: str, new_commit: Commit) -> None:
         # Fetch commits since beginning of time
         since = datetime(1970, 1, 1)
 
-    # This triggers potentially many HTTP requests to the GitHub HTTP API.
-    # May raise exceptions as of HTTP request/response cycle errors.
-    commits = _github.get_commits_to_branch(
-        name=repospec,
-        branch=default_branch,
-        since=since,
-        until=new_commit.timestamp,
+    _backfill_window(repo_url, repospec, default_branch, since, new_commit.timestamp)
+
+
+def _naive_utc(dt: datetime) -> datetime:
+    if dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _backfill_window(
+    repo_url: str,
+    repospec: str,
+    branch: str,
+    since: datetime,
+    until: datetime,
+    first_page: int = 1,
+) -> None:
+    """
+    Insert the commits on `branch` between `since` and `until` (exclusive)
+    into the database, page by page as they come in (result pages are fetched
+    concurrently). Keep track of the progress in the database (CommitBackfill)
+    so that this can be resumed if interrupted.
+
+    This triggers potentially many HTTP requests to the GitHub HTTP API. May
+    raise exceptions as of HTTP request/response cycle errors.
+    """
+    since, until = _naive_utc(since), _naive_utc(until)
+    # Progress is written with plain statements, not via an ORM object: a
+    # concurrent backfill of the same window (in another process) may
+    # update or delete the same row.
+    window = s.and_(
+        CommitBackfill.repository == repo_url,
+        CommitBackfill.branch == branch,
+        CommitBackfill.since == since,
+        CommitBackfill.until == until,
     )
-    commits_to_try = commits[1:-1]  # since/until are inclusive; we want exclusive
-
-    log.info(f"Backfilling {len(commits_to_try)} commit(s)")
-    if commits_to_try:
-        Commit.upsert_do_nothing(
-            [
-                {
-                    "sha": commit_info["sha"],
-                    "branch": default_branch,
-                    "fork_point_sha": commit_info["sha"],
-                    "repository": commit_info["repository"],
-                    "parent": commit_info["github"]["parent"],
-                    "timestamp": commit_info["github"]["date"],
-                    "message": commit_info["github"]["message"],
-                    "author_name": commit_info["github"]["author_name"],
-                    "author_login": commit_info["github"]["author_login"],
-                    "author_avatar": commit_info["github"]["author_avatar"],
-                }
-                for commit_info in commits_to_try
-            ]
+    current_session.execute(
+        postgresql_insert(CommitBackfill)
+        .values(
+            repository=repo_url,
+            branch=branch,
+            since=since,
+            until=until,
+            pages_done=first_page - 1,
         )
+        .on_conflict_do_nothing()
+    )
+    current_session.commit()
+
+    n_inserted = 0
+    oldest: Optional[datetime] = None
+    for page, commits in _github.iter_commits_to_branch(
+        name=repospec, branch=branch, since=since, until=until, first_page=first_page
+    ):
+        # since/until are inclusive; we want exclusive.
+        rows = [
+            {
+                "sha": commit_info["sha"],
+                "branch": branch,
+                "fork_point_sha": commit_info["sha"],
+                "repository": commit_info["repository"],
+                "parent": commit_info["github"]["parent"],
+                "timestamp": commit_info["github"]["date"],
+                "message": commit_info["github"]["message"],
+                "author_name": commit_info["github"]["author_name"],
+                "author_login": commit_info["github"]["author_login"],
+                "author_avatar": commit_info["github"]["author_avatar"],
+            }
+            for commit_info in commits
+            if since < _naive_utc(commit_info["github"]["date"]) < until
+        ]
+        if rows:
+            Commit.upsert_do_nothing(rows)
+            n_inserted += len(rows)
+            page_oldest = min(_naive_utc(row["timestamp"]) for row in rows)
+            oldest = page_oldest if oldest is None else min(oldest, page_oldest)
+
+        current_session.execute(
+            s.update(CommitBackfill)
+            .filter(window)
+            .values(pages_done=s.func.greatest(CommitBackfill.pages_done, page))
+            .execution_options(synchronize_session=False)
+        )
+        current_session.commit()
+
+    log.info("Backfilled %s commit(s) for %s", n_inserted, repo_url)
+    current_session.execute(
+        s.delete(CommitBackfill)
+        .filter(window)
+        .execution_options(synchronize_session=False)
+    )
+    current_session.commit()
+
+    if oldest is not None:
+        # The inserted commits may be older than tracked ones (e.g. when the
+        # first tracked commit was a recent one): that shifts the ancestry
+        # windows of the later commits. Imported here: distribution_stats
+        # depends on this module.
+        from ..entities.distribution_stats import invalidate_distribution_stats_since
+
+        invalidate_distribution_stats_since(repo_url, oldest)
+        update_default_branch_seq(repo_url, oldest)
 
 
 class GitHubHTTPApiClient:
@@ -555,6 +788,20 @@ class GitHubHTTPApiClient:
     def __init__(self) -> None:
         self._read_auth_tokens_from_env()
 
+        # Last-observed x-ratelimit-remaining and x-ratelimit-reset response
+        # header values (also see GAUGE_GITHUB_HTTP_API_QUOTA_REMAINING).
+        # None: not yet observed.
+        self.quota_remaining: Optional[int] = None
+        self.quota_reset_at: Optional[float] = None
+
+        # Response cache for conditional requests, see conbench/githubcache.py.
+        self._cache: Optional[GitHubResponseCache] = None
+        if Config.GITHUB_API_CACHE_PATH:
+            self._cache = GitHubResponseCache(
+                Config.GITHUB_API_CACHE_PATH,
+                max_age=Config.GITHUB_API_CACHE_MAX_AGE_SECONDS,
+            )
+
         self.test_shas = {
             "02addad336ba19a654f9c857ede546331be7b631": "github_child.json",
             "4beb514d071c9beec69b8917b5265e77ade22fb3": "github_parent.json",
@@ -654,13 +901,24 @@ class GitHubHTTPApiClient:
         )
         return True
 
+    def quota_below(self, reserve: int) -> bool:
+        """
+        Return True if the last-observed remaining quota is below `reserve`
+        and the quota has not been reset since (as far as we know).
+        """
+        if self.quota_remaining is None or self.quota_remaining >= reserve:
+            return False
+        if self.quota_reset_at is not None and time.time() > self.quota_reset_at:
+            return False
+        return True
+
     def get_default_branch(self, name):
         if name == "org/repo":
             # test case
             return "org:default_branch"
 
         url = f"{GITHUB}/repos/{name}"
-        response = self._get_response(url)
+        response = self._get_response(url, ttl=Config.GITHUB_API_CACHE_TTL_SECONDS)
         if not response:
             return None
 
@@ -682,8 +940,10 @@ class GitHubHTTPApiClient:
 
         # _get_response() may raise an exception, for example if the GH
         # HTTP API returned a non-2xx HTTP response (e.g. in case of rate
-        # limiting).
-        return self._parse_commit(self._get_response(url))
+        # limiting). A commit addressed by its full hash never changes.
+        return self._parse_commit(
+            self._get_response(url, immutable=_is_full_commit_hash(sha))
+        )
 
     def get_commits_to_branch(
         self, name: str, branch: str, since: datetime, until: datetime
@@ -697,11 +957,33 @@ class GitHubHTTPApiClient:
         Expect tz-naive datetime objects, or expect tz-aware objects with UTC
         timezone.
         """
+        return [
+            commit
+            for _, commits in self.iter_commits_to_branch(name, branch, since, until)
+            for commit in commits
+        ]
+
+    def iter_commits_to_branch(
+        self,
+        name: str,
+        branch: str,
+        since: datetime,
+        until: datetime,
+        first_page: int = 1,
+    ) -> Iterator[Tuple[int, List[dict]]]:
+        """Like get_commits_to_branch(), but yield (page number, commits) for
+        each result page (newest commits first), starting at `first_page`.
+
+        After the first page, up to Config.GITHUB_API_CONCURRENCY pages are
+        requested concurrently (fewer if the remaining API quota is low).
+        Raise an exception if the remaining quota drops below
+        Config.COMMIT_ENRICHMENT_QUOTA_RESERVE.
+        """
         assert "/" in name
 
         if name == "org/repo":
             # test case
-            return []
+            return
 
         if ":" in branch:
             branch = branch.split(":")[1]
@@ -718,31 +1000,58 @@ class GitHubHTTPApiClient:
             f"{GITHUB}/repos/{name}/commits?per_page=100&sha={branch}"
             f"&since={since_iso_for_url}&until={until_iso_for_url}"
         )
-        commits: List[Dict] = []
-        page = 1
-
-        # This may raise exceptions as of HTTP request/response cycle errors.
-        this_page = self._get_response(url + f"&page={page}")
-
-        if len(this_page) == 0:
-            log.info("API returned no commits")
-            return []
-
-        commits += this_page
-
-        while len(this_page) == 100:
-            page += 1
-            this_page = self._get_response(url + f"&page={page}")
-            commits += this_page
-
-        return [
-            {
-                "sha": commit["sha"],
-                "repository": repository_to_url(name),
-                "github": self._parse_commit(commit),
-            }
-            for commit in commits
-        ]
+        reserve = Config.COMMIT_ENRICHMENT_QUOTA_RESERVE
+
+        page = first_page
+        n_concurrent = 1
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=Config.GITHUB_API_CONCURRENCY
+        ) as pool:
+            while True:
+                if self.quota_below(reserve):
+                    raise Exception(
+                        f"iter_commits_to_branch(): API quota below {reserve}"
+                    )
+                if self.quota_remaining is not None:
+                    n_concurrent = max(
+                        1, min(n_concurrent, self.quota_remaining - reserve)
+                    )
+
+                pages = list(range(page, page + n_concurrent))
+                # This may raise exceptions as of HTTP request/response cycle
+                # errors (upon result()).
+                # Not cached: these pages are requested once.
+                futures = [
+                    pool.submit(self._get_response, url + f"&page={p}", cache=False)
+                    for p in pages
+                ]
+                for p, future in zip(pages, futures):
+                    this_page = future.result()
+                    if len(this_page) == 0:
+                        if p == 1:
+                            log.info("API returned no commits")
+                        break
+
+                    yield p, [
+                        {
+                            "sha": commit["sha"],
+                            "repository": repository_to_url(name),
+                            "github": self._parse_commit(commit),
+                        }
+                        for commit in this_page
+                    ]
+
+                    if len(this_page) < 100:
+                        break
+                else:
+                    page += n_concurrent
+                    n_concurrent = Config.GITHUB_API_CONCURRENCY
+                    continue
+
+                # Last page seen. Do not wait for the remaining requests.
+                for future in futures:
+                    future.cancel()
+                return
 
     def get_fork_point_sha(self, name: str, sha: str) -> Optional[str]:
         """
@@ -762,7 +1071,12 @@ class GitHubHTTPApiClient:
 
         base = self.get_default_branch(name=name)
         url = f"{GITHUB}/repos/{name}/compare/{base}...{sha}"
-        response = self._get_response(url=url)
+        # The merge base changes when the default branch moves: this can only
+        # be served from the cache after revalidation (for a compare by
+        # commit hash pair, it would be immutable).
+        response = self._get_response(
+            url=url, immutable=_is_full_commit_hash(base) and _is_full_commit_hash(sha)
+        )
         if not response:
             return None
 
@@ -781,7 +1095,7 @@ class GitHubHTTPApiClient:
             return None
 
         url = f"{GITHUB}/repos/{name}/pulls/{pr_number}"
-        response = self._get_response(url=url)
+        response = self._get_response(url=url, ttl=Config.GITHUB_API_CACHE_TTL_SECONDS)
         if not response:
             return None
 
@@ -833,10 +1147,22 @@ class GitHubHTTPApiClient:
             "author_avatar": author["avatar_url"] if author else None,
         }
 
-    def _get_response(self, url) -> dict:
+    def _get_response(
+        self,
+        url,
+        ttl: Optional[float] = None,
+        immutable: bool = False,
+        cache: bool = True,
+    ) -> dict:
         """Attempt to get HTTP response with retrying behavior towards a
         best-effort approach in view of typical retryable errors.
 
+        With the response cache enabled: serve a cached response without
+        interacting with GitHub if `immutable` (was set when caching it), or
+        if it is younger than `ttl` seconds. Otherwise, send a conditional
+        request (304 responses do not count against quota). With `cache` set
+        to False, neither use nor populate the cache.
+
         Do not try for too long because there is an HTTP client waiting for
         _us_ to generate an HTTP response in a more or less timely fashion.
         Gunicorn has a worker timeout behavior (as of the time of writing: 120
@@ -845,6 +1171,17 @@ class GitHubHTTPApiClient:
 
         Return deserialized JSON-structure or raise an exception.
         """
+        cached = None
+        if self._cache is not None and cache:
+            cached = self._cache.get(url)
+        if cached is not None:
+            body, _, _, stored_at, cached_immutable = cached
+            if cached_immutable or (ttl is not None and time.time() - stored_at < ttl):
+                metrics.COUNTER_GITHUB_HTTP_API_CACHED_RESPONSES.labels(
+                    kind="fresh"
+                ).inc()
+                return body
+
         timeout_seconds = 20
 
         t0 = time.monotonic()
@@ -860,7 +1197,7 @@ class GitHubHTTPApiClient:
         while time.monotonic() < deadline:
             attempt += 1
 
-            result = self._get_response_retry_guts(url)
+            result = self._get_response_retry_guts(url, cached, immutable, cache)
 
             if result is not None:
                 return result
@@ -885,11 +1222,25 @@ class GitHubHTTPApiClient:
             f"_get_response(): deadline exceeded, giving up after {time.monotonic() - t0:.3f} s"
         )
 
-    def _get_response_retry_guts(self, url) -> Optional[dict]:
+    def _get_response_retry_guts(
+        self, url, cached=None, immutable: bool = False, cache: bool = True
+    ) -> Optional[dict]:
         """
         Return deserialized JSON-structure or raise an exception or return
         `None` which indicates a retryable error.
+
+        `cached`: cache entry for `url` (see GitHubResponseCache.get()), to
+        send a conditional request for.
         """
+        headers = {}
+        if self._current_auth_token:
+            headers["Authorization"] = f"Bearer {self._current_auth_token}"
+        if cached is not None:
+            _, etag, last_modified, _, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
 
         # This counter is meant to count _attempts_. Errors (failed attempts)
         # are counted separately
@@ -901,13 +1252,7 @@ class GitHubHTTPApiClient:
             # has a little bit of retrying built-in by default for some of
             # these errors, but it's not trying too hard. Add more retrying
             # on top of that.
-            if self._current_auth_token:
-                resp = requests.get(
-                    url,
-                    headers={"Authorization": f"Bearer {self._current_auth_token}"},
-                )
-            else:
-                resp = requests.get(url)
+            resp = requests.get(url, headers=headers)
 
         except requests.exceptions.RequestException as exc:
             metrics.COUNTER_GITHUB_HTTP_API_RETRYABLE_ERRORS.inc()
@@ -923,16 +1268,36 @@ class GitHubHTTPApiClient:
             # Expect the value to always be int-convertible.
             reqquota = int(resp.headers["x-ratelimit-remaining"])
             metrics.GAUGE_GITHUB_HTTP_API_QUOTA_REMAINING.set(reqquota)
+            self.quota_remaining = reqquota
+            if "x-ratelimit-reset" in resp.headers:
+                # Unix timestamp (seconds).
+                self.quota_reset_at = float(resp.headers["x-ratelimit-reset"])
             # Setting this to `True` stops a thread from periodically setting
             # this to -1, see metrics.periodically_set_q_rem()
             metrics.gauge_gh_api_rem_set["first_value_seen"] = True
 
         # In the code block below `resp` reflects an actual HTTP response.
+        if resp.status_code == 304 and cached is not None and self._cache:
+            metrics.COUNTER_GITHUB_HTTP_API_CACHED_RESPONSES.labels(
+                kind="not_modified"
+            ).inc()
+            self._cache.touch(url)
+            return cached[0]
+
         if resp.status_code == 200:
             # This may raise an exception if JSON-deserialization fails. If
             # JSON deser succeeds then this is known to be a dict at the outest
             # level.
-            return resp.json()
+            data = resp.json()
+            if self._cache is not None and cache:
+                self._cache.set(
+                    url,
+                    data,
+                    etag=resp.headers.get("ETag"),
+                    last_modified=resp.headers.get("Last-Modified"),
+                    immutable=immutable,
+                )
+            return data
 
         # Log code and body prefix: important for debuggability.
         log.info(
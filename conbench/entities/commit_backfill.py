@@ -0,0 +1,29 @@
+from datetime import datetime
+
+import sqlalchemy as s
+from sqlalchemy.orm import Mapped
+
+from ..entities._entity import Base, EntityMixin, NotNull
+
+
+class CommitBackfill(Base, EntityMixin["CommitBackfill"]):
+    """
+    Progress of an ongoing (or interrupted) backfill of default-branch
+    commits (see backfill_default_branch_commits()): the time window that is
+    being backfilled, and the number of result pages (newest commits first)
+    that have been inserted into the database so far.
+
+    An interrupted backfill (e.g. as of an HTTP request error or low API
+    quota, or because the process went away) is resumed from there by the
+    next backfill for this repository. The row is deleted when done.
+
+    One row per window: backfills of the same repository may run
+    concurrently (in different processes), each tracks its own progress.
+    """
+
+    __tablename__ = "commit_backfill"
+    repository: Mapped[str] = NotNull(s.String(300), primary_key=True)
+    branch: Mapped[str] = NotNull(s.String(510), primary_key=True)
+    since: Mapped[datetime] = NotNull(s.DateTime(timezone=False), primary_key=True)
+    until: Mapped[datetime] = NotNull(s.DateTime(timezone=False), primary_key=True)
+    pages_done: Mapped[int] = NotNull(s.Integer)
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import sqlalchemy as s
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.orm import Mapped
+
+from conbench.dbsession import current_session
+
+from ..entities._entity import Base, EntityMixin, NotNull, Nullable
+from ..entities.commit import TypeCommitInfoGitHub
+
+# A claimed job that was neither completed nor released within that time
+# (e.g. because the process went away) can be claimed again.
+CLAIM_TIMEOUT_SECONDS = 600
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class PendingCommitEnrichment(Base, EntityMixin["PendingCommitEnrichment"]):
+    """
+    A commit that was stored as unknown context (placeholder row, no metadata)
+    and for which metadata is yet to be fetched from the GitHub HTTP API (see
+    conbench/commitenrich.py). At most one row per commit: the commit-related
+    user-given data of the first result that referred to it is kept.
+
+    A job is claimed by pushing `not_before` into the future; it is deleted
+    when done.
+    """
+
+    __tablename__ = "pending_commit_enrichment"
+    repository: Mapped[str] = NotNull(s.String(300), primary_key=True)
+    sha: Mapped[str] = NotNull(s.String(50), primary_key=True)
+    branch: Mapped[Optional[str]] = Nullable(s.Text)
+    pr_number: Mapped[Optional[int]] = Nullable(s.Integer)
+    enqueued_at: Mapped[datetime] = NotNull(s.DateTime(timezone=False))
+    not_before: Mapped[datetime] = NotNull(s.DateTime(timezone=False))
+    attempts: Mapped[int] = NotNull(s.Integer, default=0)
+
+    def cinfo(self) -> TypeCommitInfoGitHub:
+        return {
+            "repo_url": self.repository,
+            "commit_hash": self.sha,
+            "branch": self.branch,
+            "pr_number": self.pr_number,
+        }
+
+
+s.Index(
+    "pending_commit_enrichment_not_before_index",
+    PendingCommitEnrichment.not_before,
+)
+
+
+def enqueue_commit_enrichment(cinfo: TypeCommitInfoGitHub) -> None:
+    """
+    Enqueue metadata resolution for this commit, unless enqueued already
+    (deduplicated per repository and commit hash).
+
+    Do not commit the session: this is meant to be part of the transaction
+    that inserts the placeholder commit row.
+    """
+    now = _utcnow()
+    current_session.execute(
+        postgresql_insert(PendingCommitEnrichment)
+        .values(
+            repository=cinfo["repo_url"],
+            sha=cinfo["commit_hash"],
+            branch=cinfo["branch"],
+            pr_number=cinfo["pr_number"],
+            enqueued_at=now,
+            not_before=now,
+            attempts=0,
+        )
+        .on_conflict_do_nothing()
+    )
+
+
+def claim_commit_enrichment() -> Optional[PendingCommitEnrichment]:
+    """
+    Claim the oldest due job (other processes skip it for
+    CLAIM_TIMEOUT_SECONDS), count the attempt. Return it, or None if there is
+    no due job. Commit the session.
+    """
+    now = _utcnow()
+    claimable = (
+        s.select(PendingCommitEnrichment.repository, PendingCommitEnrichment.sha)
+        .filter(PendingCommitEnrichment.not_before <= now)
+        .order_by(PendingCommitEnrichment.enqueued_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .subquery()
+    )
+    job = current_session.scalars(
+        s.update(PendingCommitEnrichment)
+        .filter(
+            PendingCommitEnrichment.repository == claimable.c.repository,
+            PendingCommitEnrichment.sha == claimable.c.sha,
+        )
+        .values(
+            not_before=now + timedelta(seconds=CLAIM_TIMEOUT_SECONDS),
+            attempts=PendingCommitEnrichment.attempts + 1,
+        )
+        .returning(PendingCommitEnrichment)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if job is not None:
+        # Detach: keep the attribute values, not affected by the commit below.
+        current_session.expunge(job)
+    current_session.commit()
+    return job
+
+
+def release_commit_enrichment(
+    job: PendingCommitEnrichment, delay: float, count_attempt: bool = True
+) -> None:
+    """
+    Make this job due again in `delay` seconds. `count_attempt=False`: the
+    attempt is not counted (e.g. it did not fail for a reason related to this
+    commit). Commit the session.
+    """
+    current_session.execute(
+        s.update(PendingCommitEnrichment)
+        .filter(
+            PendingCommitEnrichment.repository == job.repository,
+            PendingCommitEnrichment.sha == job.sha,
+        )
+        .values(
+            not_before=_utcnow() + timedelta(seconds=delay),
+            attempts=job.attempts if count_attempt else job.attempts - 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    current_session.commit()
+
+
+def complete_commit_enrichment(job: PendingCommitEnrichment) -> None:
+    """Remove this job from the queue. Commit the session."""
+    current_session.execute(
+        s.delete(PendingCommitEnrichment).filter(
+            PendingCommitEnrichment.repository == job.repository,
+            PendingCommitEnrichment.sha == job.sha,
+        )
+    )
+    current_session.commit()
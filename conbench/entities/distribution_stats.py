@@ -0,0 +1,173 @@
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+import sqlalchemy as s
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.orm import Mapped
+
+from conbench.config import Config
+from conbench.dbsession import current_session
+from conbench.types import THistFingerprint
+
+from ..entities._entity import Base, EntityMixin, NotNull, Nullable
+from ..entities.commit import Commit
+
+log = logging.getLogger(__name__)
+
+
+class DistributionStats(Base, EntityMixin["DistributionStats"]):
+    """
+    Materialized distribution statistics: for a history fingerprint and a
+    commit on the default branch, the rolling mean/stddev (and the segment ID)
+    of the distribution of results in that commit's ancestry (inclusive) --
+    that is, what `history._query_and_calculate_distribution_stats()` computes
+    when that commit is the baseline commit of a comparison.
+
+    A row with `rolling_mean` being NULL records that there is no
+    distribution for this fingerprint (so that lookups can still be
+    answered from this table).
+
+    Rows are only ever written for commits on the default branch: the
+    ancestry of a default branch commit is a linear sequence of default
+    branch commits (ordered by commit timestamp). A result (added, changed,
+    deleted) for commit C therefore only affects the rows for C and for the
+    default branch commits after C; see `invalidate_distribution_stats()`.
+    Result submission only invalidates rows; missing rows are calculated
+    (and stored) upon the first lookup, see
+    `history._query_and_calculate_distribution_stats()`.
+
+    Rows are only valid for the SVS type and the distribution size
+    (`Config.DISTRIBUTION_COMMITS`) that they were computed with.
+    """
+
+    __tablename__ = "distribution_stats"
+    history_fingerprint: Mapped[THistFingerprint] = NotNull(s.Text, primary_key=True)
+    commit_id: Mapped[str] = NotNull(
+        s.String(50), s.ForeignKey("commit.id", ondelete="CASCADE"), primary_key=True
+    )
+    svs_type: Mapped[str] = NotNull(s.String(10))
+    distribution_commits: Mapped[int] = NotNull(s.Integer)
+    rolling_mean: Mapped[Optional[float]] = Nullable(s.Float)
+    rolling_stddev: Mapped[Optional[float]] = Nullable(s.Float)
+    segment_id: Mapped[Optional[int]] = Nullable(s.Integer)
+    computed_at: Mapped[datetime] = NotNull(s.DateTime(timezone=False))
+
+
+def get_distribution_stats(
+    commit_id: str, history_fingerprints: Iterable[THistFingerprint]
+) -> List[DistributionStats]:
+    """
+    Return the (valid) materialized rows for this commit and these history
+    fingerprints. Fingerprints without a row are simply missing from the
+    returned list.
+    """
+    return list(
+        current_session.scalars(
+            s.select(DistributionStats).filter(
+                DistributionStats.commit_id == commit_id,
+                DistributionStats.history_fingerprint.in_(list(history_fingerprints)),
+                DistributionStats.svs_type == Config.SVS_TYPE,
+                DistributionStats.distribution_commits == Config.DISTRIBUTION_COMMITS,
+            )
+        )
+    )
+
+
+def store_distribution_stats(commit_id: str, rows: List[dict]) -> None:
+    """
+    Insert or overwrite rows for this commit. Each item in `rows` is a dict
+    with the keys history_fingerprint, rolling_mean, rolling_stddev,
+    segment_id. Commit the session.
+    """
+    if not rows:
+        return
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    statement = postgresql_insert(DistributionStats).values(
+        [
+            dict(
+                row,
+                commit_id=commit_id,
+                svs_type=Config.SVS_TYPE,
+                distribution_commits=Config.DISTRIBUTION_COMMITS,
+                computed_at=now,
+            )
+            for row in rows
+        ]
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[
+            DistributionStats.history_fingerprint,
+            DistributionStats.commit_id,
+        ],
+        set_={
+            c: statement.excluded[c]
+            for c in (
+                "svs_type",
+                "distribution_commits",
+                "rolling_mean",
+                "rolling_stddev",
+                "segment_id",
+                "computed_at",
+            )
+        },
+    )
+    current_session.execute(statement)
+    current_session.commit()
+
+
+def invalidate_distribution_stats(
+    commit: Optional[Commit], history_fingerprint: THistFingerprint
+) -> None:
+    """
+    A result with this history fingerprint was added to/changed for/removed
+    from `commit`: delete the rows that may be affected (for this
+    fingerprint, for `commit` and all later commits on the default branch).
+
+    Rows for non-default-branch commits are never written, i.e. a result for
+    such a commit does not affect any row.
+
+    Do not commit the session: this is meant to be part of the transaction
+    that changes the result.
+    """
+    if commit is None or not commit.on_default_branch or commit.timestamp is None:
+        return
+
+    affected_commits = s.select(Commit.id).filter(
+        Commit.repository == commit.repository,
+        Commit.sha == Commit.fork_point_sha,  # aka: on default branch
+        Commit.timestamp >= commit.timestamp,
+    )
+    current_session.execute(
+        s.delete(DistributionStats)
+        .filter(
+            DistributionStats.history_fingerprint == history_fingerprint,
+            DistributionStats.commit_id.in_(affected_commits),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def invalidate_distribution_stats_since(repository: str, since: datetime) -> None:
+    """
+    Default branch commits with a timestamp of `since` or later were inserted
+    for this repository (e.g. by backfilling commits older than the tracked
+    ones): the ancestry of every default branch commit from there on may have
+    changed. Delete the rows for those commits (for all fingerprints).
+
+    Do not commit the session.
+    """
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+
+    affected_commits = s.select(Commit.id).filter(
+        Commit.repository == repository,
+        Commit.sha == Commit.fork_point_sha,  # aka: on default branch
+        Commit.timestamp >= since,
+    )
+    current_session.execute(
+        s.delete(DistributionStats)
+        .filter(DistributionStats.commit_id.in_(affected_commits))
+        .execution_options(synchronize_session=False)
+    )
@@ -1,4 +1,3 @@
-import copy
 import dataclasses
 import datetime
 import decimal
@@ -11,14 +10,21 @@ import numpy as np
 import pandas as pd
 import sqlalchemy as s
 
+import conbench.metrics
 import conbench.units
 from conbench.dbsession import current_session
 from conbench.types import TBenchmarkName, THistFingerprint
 
 from ..config import Config
+from ..entities import _history_cache, _rolling_stats
 from ..entities.benchmark_result import BenchmarkResult
 from ..entities.commit import CantFindAncestorCommitsError, Commit
+from ..entities.distribution_stats import (
+    get_distribution_stats,
+    store_distribution_stats,
+)
 from ..entities.hardware import Hardware
+from ..entities.history_version import HistoryVersion
 
 log = logging.getLogger(__name__)
 
@@ -164,6 +170,56 @@ def get_history_for_fingerprint(
 
     For further detail on the stats columns, see the docs of
     ``_add_rolling_stats_columns_to_history_query()``.
+
+    Served from a per-process cache if possible (see
+    ``conbench.entities._history_cache``). The returned HistorySample objects may
+    be shared with other callers: do not mutate them.
+    """
+    if not _history_cache.enabled():
+        return _query_history_for_fingerprint(history_fingerprint, benchmark_name)
+
+    version = _history_data_version(history_fingerprint, benchmark_name)
+    cached = _history_cache.cache.get(history_fingerprint)
+    if cached is not None and cached[0] == version:
+        conbench.metrics.COUNTER_HISTORY_CACHE_HITS.inc()
+        return list(cached[1])
+
+    conbench.metrics.COUNTER_HISTORY_CACHE_MISSES.inc()
+    samples = _query_history_for_fingerprint(history_fingerprint, benchmark_name)
+    _history_cache.cache.set(history_fingerprint, (version, samples))
+    conbench.metrics.GAUGE_HISTORY_CACHE_BYTES.set(_history_cache.cache.total_bytes)
+    return list(samples)
+
+
+def _history_data_version(
+    history_fingerprint: THistFingerprint, benchmark_name: TBenchmarkName
+) -> tuple:
+    """
+    Return a value that changes when the history for this fingerprint changes
+    (by any process): number of results and the most recent result ID (for
+    inserted or deleted results), and the HistoryVersion counter (for updated
+    results and enriched commits). Cheap: served from the history fingerprint
+    index and the HistoryVersion primary key. Also cover the input parameters
+    that the history depends on.
+    """
+    version_subquery = (
+        s.select(HistoryVersion.version)
+        .filter(HistoryVersion.history_fingerprint == history_fingerprint)
+        .scalar_subquery()
+    )
+    count, max_id, version = current_session.execute(
+        s.select(
+            s.func.count(), s.func.max(BenchmarkResult.id), version_subquery
+        ).filter(BenchmarkResult.history_fingerprint == history_fingerprint)
+    ).one()
+    return (benchmark_name, Config.SVS_TYPE, count, max_id, version)
+
+
+def _query_history_for_fingerprint(
+    history_fingerprint: THistFingerprint, benchmark_name: TBenchmarkName
+) -> List[HistorySample]:
+    """
+    The uncached implementation of ``get_history_for_fingerprint()``.
     """
     history = (
         current_session.query(
@@ -326,16 +382,59 @@ def _query_and_calculate_distribution_stats(
 
     Only do the calculation for the given history_fingerprints.
 
+    If the baseline commit is on the default branch, read the stats from the
+    distribution_stats table (see ``DistributionStats``). Calculate them only for
+    the fingerprints that do not have a row there yet, and store the result.
+
     For further detail on the stats columns, see the docs of
     ``_add_rolling_stats_columns_to_df()``.
     """
+    if not baseline_commit.on_default_branch:
+        rows = _calculate_distribution_stats(baseline_commit, history_fingerprints)
+    else:
+        rows = [
+            {
+                "history_fingerprint": row.history_fingerprint,
+                "rolling_mean": row.rolling_mean,
+                "rolling_stddev": row.rolling_stddev,
+            }
+            for row in get_distribution_stats(baseline_commit.id, history_fingerprints)
+        ]
+        found = {row["history_fingerprint"] for row in rows}
+        missing = [fp for fp in set(history_fingerprints) if fp not in found]
+        if missing:
+            calculated = _calculate_distribution_stats(baseline_commit, missing)
+            if calculated is not None:
+                store_distribution_stats(baseline_commit.id, calculated)
+                rows.extend(calculated)
+
+    if rows is None:
+        return {}
+
+    return {
+        row["history_fingerprint"]: (row["rolling_mean"], row["rolling_stddev"])
+        for row in rows
+        if row["rolling_mean"] is not None
+    }
+
+
+def _calculate_distribution_stats(
+    baseline_commit: Commit, history_fingerprints: List[THistFingerprint]
+) -> Optional[List[dict]]:
+    """Do the calculation described in ``_query_and_calculate_distribution_stats()``.
+
+    Return a list with one dict per given history fingerprint, with the keys
+    history_fingerprint, rolling_mean, rolling_stddev, segment_id (values being
+    None if there is no distribution for that fingerprint). Return None if the
+    ancestry of the baseline commit cannot be determined.
+    """
     try:
-        commit_ancestry_query = baseline_commit.commit_ancestry_query.order_by(
-            s.desc("commit_order")
-        ).limit(Config.DISTRIBUTION_COMMITS)
+        commit_ancestry_query = baseline_commit.get_commit_ancestry_query(
+            limit=Config.DISTRIBUTION_COMMITS
+        )
     except CantFindAncestorCommitsError as e:
-        log.debug(f"Couldn't _query_and_calculate_distribution_stats() because {e}")
-        return {}
+        log.debug(f"Couldn't _calculate_distribution_stats() because {e}")
+        return None
 
     commit_ancestry_info = commit_ancestry_query.all()
     commit_timestamps_by_id = {
@@ -397,22 +496,30 @@ def _query_and_calculate_distribution_stats(
     history_df = pd.read_sql(history, current_session.connection())
     history_df["timestamp"] = history_df["commit_id"].map(commit_timestamps_by_id)
 
-    if len(history_df) == 0:
-        return {}
-
-    history_df = _add_rolling_stats_columns_to_df(
-        history_df, include_current_commit_in_rolling_stats=True
-    )
+    stats: Dict[THistFingerprint, dict] = {}
+    if len(history_df):
+        history_df = _add_rolling_stats_columns_to_df(
+            history_df, include_current_commit_in_rolling_stats=True
+        )
 
-    # Select the latest rolling_mean/rolling_stddev for each history_fingerprint
-    stats_df = history_df.sort_values("timestamp", ascending=False).drop_duplicates(
-        ["history_fingerprint"]
-    )
+        # Select the latest rolling_mean/rolling_stddev for each
+        # history_fingerprint
+        stats_df = history_df.sort_values("timestamp", ascending=False).drop_duplicates(
+            ["history_fingerprint"]
+        )
 
-    return {
-        row.history_fingerprint: (row.rolling_mean, row.rolling_stddev)
-        for row in stats_df.itertuples()
-    }
+        for row in stats_df.itertuples():
+            stats[row.history_fingerprint] = {
+                "rolling_mean": _to_float_or_none(row.rolling_mean),
+                "rolling_stddev": _to_float_or_none(row.rolling_stddev),
+                "segment_id": int(row.segment_id),
+            }
+
+    no_distribution = {"rolling_mean": None, "rolling_stddev": None, "segment_id": None}
+    return [
+        {"history_fingerprint": fp, **stats.get(fp, no_distribution)}
+        for fp in set(history_fingerprints)
+    ]
 
 
 def execute_history_query_get_dataframe(statement) -> Tuple[pd.DataFrame, Dict]:
@@ -514,36 +621,6 @@ def execute_history_query_get_dataframe(statement) -> Tuple[pd.DataFrame, Dict]:
     return history_df, bmrs_by_bmrid
 
 
-class _CommitIndexer(pd.api.indexers.BaseIndexer):
-    """pandas isn't great about rolling over ranges, so this class lets us roll over
-    the commit timestamp column correctly (not caring about time between commits)."""
-
-    def get_window_bounds(
-        self,
-        num_values: int = 0,
-        min_periods: Optional[int] = None,
-        center: Optional[bool] = None,
-        closed: Optional[str] = None,
-        step: Optional[int] = None,
-    ) -> Tuple[np.ndarray, np.ndarray]:
-        """Return numpy arrays of the respective start and end indexes of all rolling
-        windows for this slice of commit timestamps.
-        """
-        # self.index_array is the (sorted) current slice of the timestamp column,
-        # converted to an int64 np array. Find the dense rank of each timestamp.
-        commit_ranks = pd.Series(self.index_array).rank(method="dense").values
-
-        # np.searchsorted() finds the indices into which values would need to be
-        # inserted to maintain order. We can use that to find the indexes of the end of
-        # the window (same as the current commit) and start of the window (the current
-        # commit minus the window size).
-        end_ixs = np.searchsorted(commit_ranks, commit_ranks, side=closed)  # type: ignore[call-overload]
-        start_ixs = np.searchsorted(
-            commit_ranks, commit_ranks - self.window_size, side=closed
-        )  # type: ignore[call-overload]
-        return start_ixs, end_ixs
-
-
 def _add_rolling_stats_columns_to_df(
     df: pd.DataFrame, include_current_commit_in_rolling_stats: bool
 ) -> pd.DataFrame:
@@ -593,10 +670,11 @@ def _add_rolling_stats_columns_to_df(
     """
     df = _detect_shifts_with_trimmed_estimators(df=df)
 
-    # pandas likes the data to be sorted
-    df.sort_values(
-        ["history_fingerprint", "timestamp"], inplace=True, ignore_index=True
-    )
+    # Note: from here on, `df` is sorted by history_fingerprint, timestamp
+    # (and result_timestamp), with a default index. The computation below is
+    # vectorized across all fingerprints, see conbench.entities._rolling_stats.
+    n = len(df)
+    window = Config.DISTRIBUTION_COMMITS
 
     # Clean up begins_distribution_change so it's a non-null boolean column
     df["begins_distribution_change"] = [
@@ -611,52 +689,63 @@ def _add_rolling_stats_columns_to_df(
     # # Add in step changes automatically detected
     # df["begins_distribution_change"] = df["begins_distribution_change"] | df["is_step"]
 
-    # Add column with cumulative sum of distribution changes, to identify the segment
-    df["segment_id"] = (
-        df.groupby(["history_fingerprint"])
-        .rolling(
-            _CommitIndexer(window_size=len(df) + 1),
-            on="timestamp",
-            closed="right",
-            min_periods=1,
-        )["begins_distribution_change"]
-        .sum()
-        .values
+    fingerprint = df["history_fingerprint"].to_numpy()
+    timestamp = df["timestamp"].to_numpy()
+    svs = df["svs"].to_numpy(dtype=np.float64)
+    keep = ~df["is_outlier"].to_numpy(dtype=bool)
+
+    # Add column with cumulative sum of distribution changes, to identify the
+    # segment (counting all results of the current commit).
+    start, end = _rolling_stats.commit_windows(
+        _rolling_stats.new_group_mask(fingerprint),
+        _rolling_stats.new_group_mask(fingerprint, timestamp),
+        window=n + 1,
+        closed="right",
+    )
+    segment_id = _rolling_stats.window_count(
+        df["begins_distribution_change"].to_numpy(dtype=bool), start, end
     )
+    df["segment_id"] = segment_id
 
-    # Add column with rolling mean of the SVSs (only inside of the segment)
-    df.loc[~df.is_outlier, "rolling_mean_excluding_this_commit"] = (
-        df.loc[~df.is_outlier]
-        .groupby(["history_fingerprint", "segment_id"])
-        .rolling(
-            _CommitIndexer(window_size=Config.DISTRIBUTION_COMMITS),
-            on="timestamp",
-            # Exclude the current commit first...
-            closed="left",
-            min_periods=1,
-        )["svs"]
-        .mean()
-        .values
+    # Outliers do not contribute to (and do not get) rolling stats.
+    fingerprint, timestamp, segment_id = (
+        fingerprint[keep],
+        timestamp[keep],
+        segment_id[keep],
+    )
+    new_segment = _rolling_stats.new_group_mask(fingerprint, segment_id)
+    new_commit_in_segment = _rolling_stats.new_group_mask(
+        fingerprint, segment_id, timestamp
+    )
+
+    def _column(values_for_kept_rows: np.ndarray) -> np.ndarray:
+        column = np.full(n, np.nan)
+        column[keep] = values_for_kept_rows
+        return column
+
+    # Add column with rolling mean of the SVSs (only inside of the segment).
+    # Exclude the current commit first...
+    start, end = _rolling_stats.commit_windows(
+        new_segment, new_commit_in_segment, window, closed="left"
+    )
+    rolling_mean_excl, _ = _rolling_stats.rolling_mean_std(
+        svs[keep], new_segment, start, end
     )
     # (and fill NaNs at the beginning of segments with the first value)
-    df.loc[~df.is_outlier, "rolling_mean_excluding_this_commit"] = df.loc[
-        ~df.is_outlier, "rolling_mean_excluding_this_commit"
-    ].combine_first(df.loc[~df.is_outlier, "svs"])
+    rolling_mean_excl = np.where(
+        np.isnan(rolling_mean_excl), svs[keep], rolling_mean_excl
+    )
+    df["rolling_mean_excluding_this_commit"] = _column(rolling_mean_excl)
 
     # ...but if requested, include the current commit
     if include_current_commit_in_rolling_stats:
-        df.loc[~df.is_outlier, "rolling_mean"] = (
-            df.loc[~df.is_outlier]
-            .groupby(["history_fingerprint", "segment_id"])
-            .rolling(
-                _CommitIndexer(window_size=Config.DISTRIBUTION_COMMITS),
-                on="timestamp",
-                closed="right",
-                min_periods=1,
-            )["svs"]
-            .mean()
-            .values
+        start, end = _rolling_stats.commit_windows(
+            new_segment, new_commit_in_segment, window, closed="right"
+        )
+        rolling_mean, _ = _rolling_stats.rolling_mean_std(
+            svs[keep], new_segment, start, end
         )
+        df["rolling_mean"] = _column(rolling_mean)
     else:
         df["rolling_mean"] = df["rolling_mean_excluding_this_commit"]
 
@@ -666,18 +755,17 @@ def _add_rolling_stats_columns_to_df(
 
     # Add column with the rolling standard deviation of the residuals
     # (these can go outside the segment since we assume they don't change much)
-    df.loc[~df.is_outlier, "rolling_stddev"] = (
-        df.loc[~df.is_outlier]
-        .groupby(["history_fingerprint"])  # not segment
-        .rolling(
-            _CommitIndexer(window_size=Config.DISTRIBUTION_COMMITS),
-            on="timestamp",
-            closed="right" if include_current_commit_in_rolling_stats else "left",
-            min_periods=1,
-        )["residual"]
-        .std()
-        .values
+    new_fingerprint = _rolling_stats.new_group_mask(fingerprint)
+    start, end = _rolling_stats.commit_windows(
+        new_fingerprint,
+        _rolling_stats.new_group_mask(fingerprint, timestamp),
+        window,
+        closed="right" if include_current_commit_in_rolling_stats else "left",
+    )
+    _, rolling_stddev = _rolling_stats.rolling_mean_std(
+        df["residual"].to_numpy(dtype=np.float64)[keep], new_fingerprint, start, end
     )
+    df["rolling_stddev"] = _column(rolling_stddev)
 
     return df
 
@@ -722,55 +810,48 @@ def _detect_shifts_with_trimmed_estimators(
     - `is_step` (bool): Is this point the start of a new segment?
     - `is_outlier` (bool): Is this point an outlier that should be ignored?
     """
-    tmp_df = copy.deepcopy(df)
-
     # skip computation if no history
     if df.shape[0] == 0:
-        tmp_df["is_step"] = pd.Series([], dtype=bool)
-        tmp_df["is_outlier"] = pd.Series([], dtype=bool)
-        return tmp_df
-
-    # pandas likes the data to be sorted
-    tmp_df.sort_values(
-        ["history_fingerprint", "timestamp", "result_timestamp"],
-        inplace=True,
-        ignore_index=True,
+        out_df = df.copy()
+        out_df["is_step"] = pd.Series([], dtype=bool)
+        out_df["is_outlier"] = pd.Series([], dtype=bool)
+        return out_df
+
+    # Sorted by fingerprint (then time): each fingerprint's history is a
+    # contiguous slice. Computation is vectorized across all fingerprints, see
+    # conbench.entities._rolling_stats.
+    out_df = df.sort_values(
+        ["history_fingerprint", "timestamp", "result_timestamp"], ignore_index=True
     )
-
-    # split / apply
-    out_group_df_list = []
-    for _, group_df in tmp_df.groupby(["history_fingerprint"]):
-        # clean copy will only get result columns
-        out_group_df = copy.deepcopy(group_df)
-
-        group_df["svs_diff"] = group_df["svs"].diff()
-        svs_diff_clipped = copy.deepcopy(group_df.svs_diff)
-        svs_diff_clipped.loc[
-            (group_df.svs_diff < group_df.svs_diff.quantile(0.05))
-            | (group_df.svs_diff > group_df.svs_diff.quantile(0.95))
-        ] = np.nan
-        group_df["rolling_mean"] = svs_diff_clipped.rolling(
-            Config.DISTRIBUTION_COMMITS, min_periods=1
-        ).mean()
-        group_df["rolling_std"] = svs_diff_clipped.rolling(
-            Config.DISTRIBUTION_COMMITS, min_periods=1
-        ).std()
-        group_df["z_score"] = (
-            group_df.svs_diff - group_df.rolling_mean
-        ) / group_df.rolling_std
-
-        group_df["is_shift"] = group_df.z_score.abs() > z_score_threshold
-        group_df["reverts"] = group_df.is_shift & group_df.is_shift.shift(-1)
-        out_group_df["is_step"] = (
-            group_df.is_shift
-            & ~group_df.reverts
-            & ~group_df.reverts.shift(1, fill_value=False)
-        )
-        out_group_df["is_outlier"] = group_df.is_shift & group_df.reverts
-
-        out_group_df_list.append(out_group_df)
-
-    # combine
-    out_df = pd.concat(out_group_df_list)
+    new_group = _rolling_stats.new_group_mask(out_df["history_fingerprint"].to_numpy())
+    svs = out_df["svs"].to_numpy(dtype=np.float64)
+
+    svs_diff = np.full(len(svs), np.nan)
+    svs_diff[1:] = svs[1:] - svs[:-1]
+    svs_diff[new_group] = np.nan
+
+    svs_diff_clipped = np.where(
+        (svs_diff < _rolling_stats.grouped_quantile(svs_diff, new_group, 0.05))
+        | (svs_diff > _rolling_stats.grouped_quantile(svs_diff, new_group, 0.95)),
+        np.nan,
+        svs_diff,
+    )
+    start, end = _rolling_stats.row_windows(new_group, Config.DISTRIBUTION_COMMITS)
+    rolling_mean, rolling_std = _rolling_stats.rolling_mean_std(
+        svs_diff_clipped, new_group, start, end
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z_score = (svs_diff - rolling_mean) / rolling_std
+
+    is_shift = np.abs(z_score) > z_score_threshold
+    # A shift that is immediately followed by another shift (within the same
+    # fingerprint) reverts: outlier.
+    reverts = np.zeros(len(svs), dtype=bool)
+    reverts[:-1] = is_shift[:-1] & is_shift[1:] & ~new_group[1:]
+    reverted_before = np.zeros(len(svs), dtype=bool)
+    reverted_before[1:] = reverts[:-1] & ~new_group[1:]
+
+    out_df["is_step"] = is_shift & ~reverts & ~reverted_before
+    out_df["is_outlier"] = reverts
 
     return out_df
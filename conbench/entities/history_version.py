@@ -0,0 +1,43 @@
+import sqlalchemy as s
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.orm import Mapped
+
+from conbench.dbsession import current_session
+from conbench.types import THistFingerprint
+
+from ..entities._entity import Base, EntityMixin, NotNull
+
+
+class HistoryVersion(Base, EntityMixin["HistoryVersion"]):
+    """
+    Per-history-fingerprint counter that is incremented when the history for
+    that fingerprint changes in a way that the number of results and the most
+    recent result ID do not reflect: a result was updated (e.g. its change
+    annotations), or a commit referred to by results was enriched with
+    metadata. Part of the data version that cached histories are checked
+    against (see history._history_data_version()).
+
+    No row: version 0.
+    """
+
+    __tablename__ = "history_version"
+    history_fingerprint: Mapped[THistFingerprint] = NotNull(s.Text, primary_key=True)
+    version: Mapped[int] = NotNull(s.BigInteger)
+
+
+def bump_history_version(history_fingerprint: THistFingerprint) -> None:
+    """
+    Increment the version for this history fingerprint.
+
+    Do not commit the session: this is meant to be part of the transaction
+    that changes the history.
+    """
+    statement = postgresql_insert(HistoryVersion).values(
+        history_fingerprint=history_fingerprint, version=1
+    )
+    current_session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[HistoryVersion.history_fingerprint],
+            set_={"version": HistoryVersion.version + 1},
+        )
+    )
@@ -0,0 +1,310 @@
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import sqlalchemy as s
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.orm import Mapped
+
+from conbench.config import Config
+from conbench.dbsession import current_session
+from conbench.types import THistFingerprint
+
+from ..entities._entity import Base, EntityMixin, NotNull, Nullable
+from ..entities.commit import Commit
+
+log = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class CompletedRun(Base, EntityMixin["CompletedRun"]):
+    """
+    A run that is considered to be complete: it was explicitly finished by the
+    client, or no result was submitted for it for a while (see
+    conbench/runcompare.py). Its comparisons against its candidate baseline
+    runs are precomputed once (`comparisons_computed_at` is NULL until then).
+
+    The row is deleted when a result is submitted for the run (the run is
+    active again).
+    """
+
+    __tablename__ = "completed_run"
+    run_id: Mapped[str] = NotNull(s.Text, primary_key=True)
+    completed_at: Mapped[datetime] = NotNull(s.DateTime(timezone=False))
+    comparisons_computed_at: Mapped[Optional[datetime]] = Nullable(
+        s.DateTime(timezone=False)
+    )
+
+
+class RunComparison(Base, EntityMixin["RunComparison"]):
+    """
+    A precomputed comparison of two runs: what GET /api/compare/runs/ emits for
+    this pair of runs (with the default thresholds), across all pages. The
+    individual comparisons are the RunComparisonItem rows.
+
+    The z-scores depend on the distribution of results in the ancestry of the
+    baseline commit; `baseline_repository` and `baseline_ancestry_timestamp`
+    (the timestamp of the baseline commit's fork point commit) are used to
+    find the comparisons that may be affected by a result changing for an
+    older commit; see `invalidate_run_comparisons()`.
+
+    Rows are only valid for the SVS type and the distribution size
+    (`Config.DISTRIBUTION_COMMITS`) that they were computed with.
+    """
+
+    __tablename__ = "run_comparison"
+    baseline_run_id: Mapped[str] = NotNull(s.Text, primary_key=True)
+    contender_run_id: Mapped[str] = NotNull(s.Text, primary_key=True)
+    baseline_repository: Mapped[Optional[str]] = Nullable(s.String(300))
+    baseline_ancestry_timestamp: Mapped[Optional[datetime]] = Nullable(
+        s.DateTime(timezone=False)
+    )
+    svs_type: Mapped[str] = NotNull(s.String(10))
+    distribution_commits: Mapped[int] = NotNull(s.Integer)
+    computed_at: Mapped[datetime] = NotNull(s.DateTime(timezone=False))
+
+
+class RunComparisonItem(Base, EntityMixin["RunComparisonItem"]):
+    """
+    One item of a precomputed run comparison. `data` is the JSON object as
+    emitted by the API (computed with the default thresholds), the unrounded
+    percent change and z-score allow for applying other thresholds.
+    `position` is the position in the API response (ordered by history
+    fingerprint).
+    """
+
+    __tablename__ = "run_comparison_item"
+    baseline_run_id: Mapped[str] = NotNull(s.Text, primary_key=True)
+    contender_run_id: Mapped[str] = NotNull(s.Text, primary_key=True)
+    position: Mapped[int] = NotNull(s.Integer, primary_key=True)
+    history_fingerprint: Mapped[THistFingerprint] = NotNull(s.Text)
+    percent_change: Mapped[Optional[float]] = Nullable(s.Float)
+    z_score: Mapped[Optional[float]] = Nullable(s.Float)
+    data: Mapped[dict] = NotNull(postgresql.JSONB)
+
+    __table_args__ = (
+        s.ForeignKeyConstraint(
+            ["baseline_run_id", "contender_run_id"],
+            ["run_comparison.baseline_run_id", "run_comparison.contender_run_id"],
+            ondelete="CASCADE",
+        ),
+    )
+
+
+def _ancestry_timestamp(commit: Commit) -> Optional[datetime]:
+    """
+    Return the timestamp of the fork point commit of `commit` (which is
+    `commit` itself for a commit on the default branch), or None if that is
+    not known.
+    """
+    if commit.sha == commit.fork_point_sha:
+        return commit.timestamp
+
+    if not commit.fork_point_sha:
+        return None
+
+    return current_session.scalars(
+        s.select(Commit.timestamp).filter(
+            Commit.sha == commit.fork_point_sha,
+            Commit.repository == commit.repository,
+        )
+    ).first()
+
+
+def get_run_comparison(
+    baseline_run_id: str, contender_run_id: str
+) -> Optional[RunComparison]:
+    """Return the (valid) precomputed comparison of these two runs, if any."""
+    return current_session.scalars(
+        s.select(RunComparison).filter(
+            RunComparison.baseline_run_id == baseline_run_id,
+            RunComparison.contender_run_id == contender_run_id,
+            RunComparison.svs_type == Config.SVS_TYPE,
+            RunComparison.distribution_commits == Config.DISTRIBUTION_COMMITS,
+        )
+    ).first()
+
+
+def get_run_comparison_items(
+    comparison: RunComparison,
+    cursor: Optional[str],
+    page_size: Optional[int],
+) -> Tuple[List[THistFingerprint], List[RunComparisonItem]]:
+    """
+    Return a page of items of a precomputed comparison: the (up to
+    `page_size`) history fingerprints after `cursor`, and the items for those.
+    """
+    filters = [
+        RunComparisonItem.baseline_run_id == comparison.baseline_run_id,
+        RunComparisonItem.contender_run_id == comparison.contender_run_id,
+    ]
+    if cursor:
+        filters.append(RunComparisonItem.history_fingerprint > cursor)
+
+    history_fingerprints = list(
+        current_session.scalars(
+            s.select(RunComparisonItem.history_fingerprint.distinct())
+            .where(*filters)
+            .order_by(RunComparisonItem.history_fingerprint)
+            .limit(page_size)
+        ).all()
+    )
+    if not history_fingerprints:
+        return [], []
+
+    items = current_session.scalars(
+        s.select(RunComparisonItem)
+        .where(
+            *filters[:2],
+            RunComparisonItem.history_fingerprint.in_(history_fingerprints),
+        )
+        .order_by(RunComparisonItem.position)
+    ).all()
+    return history_fingerprints, list(items)
+
+
+def store_run_comparison(
+    baseline_run_id: str,
+    contender_run_id: str,
+    baseline_commit: Optional[Commit],
+    items: List[dict],
+) -> None:
+    """
+    Insert or overwrite the precomputed comparison of these two runs. Each
+    item in `items` is a dict with the keys history_fingerprint,
+    percent_change, z_score, data (in the order of the API response).
+
+    Do not commit the session.
+    """
+    current_session.execute(
+        s.delete(RunComparison).filter(
+            RunComparison.baseline_run_id == baseline_run_id,
+            RunComparison.contender_run_id == contender_run_id,
+        )
+    )
+
+    current_session.execute(
+        postgresql_insert(RunComparison).values(
+            baseline_run_id=baseline_run_id,
+            contender_run_id=contender_run_id,
+            baseline_repository=baseline_commit.repository if baseline_commit else None,
+            baseline_ancestry_timestamp=(
+                _ancestry_timestamp(baseline_commit) if baseline_commit else None
+            ),
+            svs_type=Config.SVS_TYPE,
+            distribution_commits=Config.DISTRIBUTION_COMMITS,
+            computed_at=_utcnow(),
+        )
+    )
+
+    if items:
+        current_session.execute(
+            postgresql_insert(RunComparisonItem).values(
+                [
+                    dict(
+                        item,
+                        baseline_run_id=baseline_run_id,
+                        contender_run_id=contender_run_id,
+                        position=position,
+                    )
+                    for position, item in enumerate(items)
+                ]
+            )
+        )
+
+
+def mark_run_completed(run_id: str) -> None:
+    """
+    Mark this run as complete (again): its comparisons are (re)computed by the
+    next iteration of the precompute job. Commit the session.
+    """
+    statement = postgresql_insert(CompletedRun).values(
+        run_id=run_id, completed_at=_utcnow(), comparisons_computed_at=None
+    )
+    current_session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[CompletedRun.run_id],
+            set_={
+                "completed_at": statement.excluded.completed_at,
+                "comparisons_computed_at": None,
+            },
+        )
+    )
+    current_session.commit()
+
+
+def invalidate_run_comparisons(run_id: str, commit: Optional[Commit]) -> None:
+    """
+    A result of run `run_id` (for `commit`) was added, changed or removed:
+
+    - the run is not considered to be complete anymore,
+    - delete the precomputed comparisons that this run is part of,
+    - delete the precomputed comparisons that may be affected via the z-score
+      (the baseline commit's ancestry may contain `commit`). Conservatively,
+      that is all comparisons with a baseline commit in the same repository
+      with a fork point that is not older than `commit`'s fork point. Mark
+      the contender runs of those for recomputation.
+
+    Do not commit the session: this is meant to be part of the transaction
+    that changes the result.
+
+    No-op unless Config.RUN_COMPARE_PRECOMPUTE is set: then nothing is
+    precomputed, and result writes should not pay for these statements.
+    """
+    if not Config.RUN_COMPARE_PRECOMPUTE:
+        return
+
+    current_session.execute(
+        s.delete(CompletedRun).filter(CompletedRun.run_id == run_id)
+    )
+    current_session.execute(
+        s.delete(RunComparison)
+        .filter(
+            s.or_(
+                RunComparison.baseline_run_id == run_id,
+                RunComparison.contender_run_id == run_id,
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    if commit is None or commit.timestamp is None:
+        # Not part of the git graph: cannot be in any ancestry.
+        return
+
+    ancestry_timestamp = _ancestry_timestamp(commit)
+    affected: s.ColumnElement[bool]
+    if ancestry_timestamp is None:
+        affected = RunComparison.baseline_ancestry_timestamp.is_(None)
+    else:
+        affected = s.or_(
+            RunComparison.baseline_ancestry_timestamp.is_(None),
+            RunComparison.baseline_ancestry_timestamp >= ancestry_timestamp,
+        )
+
+    contender_run_ids = current_session.scalars(
+        s.delete(RunComparison)
+        .filter(RunComparison.baseline_repository == commit.repository, affected)
+        .returning(RunComparison.contender_run_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    if contender_run_ids:
+        current_session.execute(
+            s.update(CompletedRun)
+            .filter(CompletedRun.run_id.in_(set(contender_run_ids)))
+            .values(comparisons_computed_at=None)
+            .execution_options(synchronize_session=False)
+        )
+
+
+s.Index("run_comparison_contender_run_id_index", RunComparison.contender_run_id)
+s.Index(
+    "run_comparison_baseline_ancestry_index",
+    RunComparison.baseline_repository,
+    RunComparison.baseline_ancestry_timestamp,
+)
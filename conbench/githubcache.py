@@ -0,0 +1,119 @@
+"""
+Persistent (SQLite) cache for GitHub HTTP API responses, as used by
+conbench.entities.commit.GitHubHTTPApiClient.
+
+Each entry holds the deserialized JSON response body for a URL, together
+with the ETag and Last-Modified response header values. These are sent back
+with the next request for the same URL (If-None-Match, If-Modified-Since):
+if the resource did not change, GitHub responds with 304 Not Modified, and
+that response does not count against the rate limit quota.
+
+How long an entry may be served without asking GitHub at all is up to the
+caller: forever for immutable resources (e.g. a commit addressed by its
+full hash), for a short time for others, or never (always revalidate).
+
+Entries for mutable resources that were not stored (or confirmed to be
+current) within `max_age` seconds are deleted from time to time, so that
+the cache does not grow without bound. Callers should not cache responses
+that are unlikely to be requested again (e.g. commit list result pages).
+
+The database file can be shared by the processes on a machine (SQLite takes
+care of locking).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+# Prune at most that often (per process).
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+class GitHubResponseCache:
+    def __init__(self, path: str, max_age: float):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn_pid: Optional[int] = None
+        self._conn_: Optional[sqlite3.Connection] = None
+        self._pruned_at = 0.0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """
+        One connection per process (a connection must not be used across
+        fork()), shared by threads (serialized via `_lock`).
+        """
+        if self._conn_ is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS response ("
+                    "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+                    "body TEXT NOT NULL, stored_at REAL NOT NULL, "
+                    "immutable INTEGER NOT NULL)"
+                )
+            self._conn_, self._conn_pid = conn, os.getpid()
+        return self._conn_
+
+    def get(
+        self, url: str
+    ) -> Optional[Tuple[Any, Optional[str], Optional[str], float, bool]]:
+        """
+        Return (body, etag, last_modified, stored_at, immutable) or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, stored_at, immutable "
+                "FROM response WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, stored_at, immutable = row
+        return json.loads(body), etag, last_modified, stored_at, bool(immutable)
+
+    def set(
+        self,
+        url: str,
+        body: Any,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        immutable: bool,
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response "
+                "(url, etag, last_modified, body, stored_at, immutable) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(body), time.time(), immutable),
+            )
+        if time.monotonic() - self._pruned_at > PRUNE_INTERVAL_SECONDS:
+            self.prune()
+
+    def touch(self, url: str) -> None:
+        """The cached response was confirmed to be current (304)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE response SET stored_at = ? WHERE url = ?", (time.time(), url)
+            )
+
+    def prune(self) -> int:
+        """
+        Delete the entries for mutable resources that are older than
+        `max_age`. Return the number of deleted entries.
+        """
+        with self._lock, self._conn:
+            self._pruned_at = time.monotonic()
+            cursor = self._conn.execute(
+                "DELETE FROM response WHERE immutable = 0 AND stored_at < ?",
+                (time.time() - self.max_age,),
+            )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM response")
@@ -33,7 +33,11 @@ backlog = 300
 # of this are created by higher-level orchestration (so that more than one CPU
 # core is after all serving requests).
 # https://github.com/conbench/conbench/issues/1018
-workers = 1
+# With CONBENCH_BMRT_CACHE_BUILDER_PROCESS=true the BMRT cache is built by a
+# single builder process and shared with all worker processes (via
+# memory-mapped snapshots); then it is reasonable to run more than one worker
+# per container (set GUNICORN_WORKERS).
+workers = int(os.environ.get("GUNICORN_WORKERS", 1))
 threads = 15
 
 # This is the worker timeout; an observer process will terminate the observed
@@ -63,7 +67,7 @@ def post_worker_init(worker):
     import conbench
 
     worker.log.info("gunicorn post_worker_init hook: conbench.job.start_jobs()")
-    conbench.job.start_jobs()
+    conbench.job.start_jobs(app=worker.wsgi)
 
 
 def worker_int(worker):
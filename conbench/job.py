@@ -4,15 +4,23 @@ thread).
 
 Currently managed jobs:
 
-- long-running thread for periodic BMRT cache population/refresh
+- long-running thread for periodic BMRT cache population/refresh (or, with
+  Config.BMRT_CACHE_BUILDER_PROCESS: for attaching to the snapshots published
+  by the builder process, which is started/supervised by that thread)
 - long-running thread for periodic prometheus gauge re-init/set()
+- with Config.RUN_COMPARE_PRECOMPUTE: long-running thread for precomputing
+  run comparisons (see conbench/runcompare.py)
+- with Config.COMMIT_ENRICHMENT_ASYNC: long-running thread for resolving
+  commit metadata (see conbench/commitenrich.py)
 """
 
 import logging
 import signal
 
 import conbench.bmrt
+import conbench.commitenrich
 import conbench.metrics
+import conbench.runcompare
 import conbench.util
 from conbench.config import Config
 
@@ -27,7 +35,12 @@ _STARTED = False
 _THREADS = []
 
 
-def start_jobs():
+def start_jobs(app=None):
+    """
+    `app`: the Flask application object; jobs that need an application
+    context (for DB interaction via `current_session`) are only started if
+    given.
+    """
     if not Config.CREATE_ALL_TABLES:
         # This needs to be done more cleanly -- when running the DB migration,
         # the app should not even initialize so far.
@@ -41,6 +54,18 @@ def start_jobs():
     log.info("start job: metrics.periodically_set_q_rem()")
     _THREADS.append(conbench.metrics.periodically_set_q_rem())
 
+    if Config.RUN_COMPARE_PRECOMPUTE and app is not None:
+        log.info("start job: periodic run comparison precomputation")
+        _THREADS.append(
+            conbench.runcompare.periodically_precompute_run_comparisons(
+                app, Config.RUN_COMPARE_IDLE_SECONDS
+            )
+        )
+
+    if Config.COMMIT_ENRICHMENT_ASYNC and app is not None:
+        log.info("start job: commit metadata resolution")
+        _THREADS.append(conbench.commitenrich.periodically_enrich_commits(app))
+
     # This state-keeping var is so far only used for logging.
     global _STARTED
     _STARTED = True
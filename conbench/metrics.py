@@ -54,6 +54,14 @@ COUNTER_GITHUB_HTTP_API_403RESPONSES = prometheus_client.Counter(
 )
 
 
+COUNTER_GITHUB_HTTP_API_CACHED_RESPONSES = prometheus_client.Counter(
+    "conbench_github_httpapi_cached_responses_total",
+    "The total number of GitHub HTTP API responses served from the response cache",
+    # fresh: without request, not_modified: after a 304 response
+    labelnames=["kind"],
+)
+
+
 GAUGE_GITHUB_HTTP_API_QUOTA_REMAINING = prometheus_client.Gauge(
     "conbench_github_httpapi_quota_remaining",
     "A gauge that shows the last-observed x-ratelimit-remaining response "
@@ -65,6 +73,36 @@ GAUGE_BMRT_CACHE_LAST_UPDATE_SECONDS = prometheus_client.Gauge(
     "The time the last iteration of fetch_and_cache_most_recent_results() took",
 )
 
+COUNTER_BMRT_CACHE_PUSHED_RESULTS = prometheus_client.Counter(
+    "conbench_bmrt_cache_pushed_results_total",
+    "The total number of freshly ingested benchmark results reported to the "
+    "BMRT cache for a push-based (early) cache update.",
+)
+
+COUNTER_HISTORY_CACHE_HITS = prometheus_client.Counter(
+    "conbench_history_cache_hits_total",
+    "The total number of benchmark result histories served from the "
+    "(per-process) history cache.",
+)
+
+COUNTER_HISTORY_CACHE_MISSES = prometheus_client.Counter(
+    "conbench_history_cache_misses_total",
+    "The total number of benchmark result histories that had to be queried "
+    "and computed (not cached, expired, or outdated).",
+)
+
+COUNTER_HISTORY_CACHE_EVICTIONS = prometheus_client.Counter(
+    "conbench_history_cache_evictions_total",
+    "The total number of histories removed from the history cache",
+    # size: make room (LRU), ttl: expired, invalidated: new/changed result
+    labelnames=["reason"],
+)
+
+GAUGE_HISTORY_CACHE_BYTES = prometheus_client.Gauge(
+    "conbench_history_cache_bytes",
+    "The estimated memory consumption of the history cache",
+)
+
 
 # The topic of Gauge initiatlization in the Prometheus ecosystem is confusing.
 # The spec says "Gauges MUST start at 0"
@@ -0,0 +1,264 @@
+"""
+Precomputed run comparisons (Config.RUN_COMPARE_PRECOMPUTE).
+
+Right after a run has finished, CI tooling (benchalerts) typically requests
+the comparison of the run against its baseline run(s) via GET
+/api/compare/runs/<baseline>...<contender>/. Generating that response (page
+by page) requires joining the results of both runs and computing z-scores
+for all history fingerprints, while the client waits.
+
+The job here (a thread per process, see conbench/job.py) does that work
+ahead of time:
+
+- It marks runs as complete: runs for which no result was submitted for
+  Config.RUN_COMPARE_IDLE_SECONDS (a client can also explicitly finish a run
+  via POST /api/runs/<run_id>/finish/).
+- For each complete run: it resolves the candidate baseline runs (see
+  api.runs.get_candidate_baseline_runs()), compares the run against each of
+  them, and stores the comparisons (see entities/run_comparison.py).
+
+GET /api/compare/runs/ then serves stored comparisons from the database.
+Stored comparisons are deleted as soon as a result changes that they depend
+on; for those, the response is computed on demand again.
+
+Multiple processes may run this job concurrently: a complete run is claimed
+by exactly one of them (row lock with SKIP LOCKED).
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import flask
+import sqlalchemy as s
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from uuid_extensions import uuid7
+
+import conbench.job
+from conbench.dbsession import current_session
+
+from .entities.benchmark_result import BenchmarkResult
+from .entities.run_comparison import CompletedRun, store_run_comparison
+
+log = logging.getLogger(__name__)
+
+# How often to look for complete runs.
+POLL_INTERVAL_SECONDS = 30
+
+# Only consider runs with results submitted within that time window (before
+# the idle period) as candidates for being complete.
+IDLE_LOOKBACK_SECONDS = 86400
+
+
+def _utc_datetime(unix_time: float) -> datetime:
+    return datetime.fromtimestamp(unix_time, timezone.utc).replace(tzinfo=None)
+
+
+def mark_idle_runs_completed(idle_seconds: float) -> int:
+    """
+    Mark the runs as complete for which the most recent result was inserted
+    more than `idle_seconds` ago (and less than IDLE_LOOKBACK_SECONDS before
+    that), unless already marked. Return the number of newly marked runs.
+    Commit the session.
+    """
+    now = time.time()
+    idle_since = now - idle_seconds
+    earliest = idle_since - IDLE_LOOKBACK_SECONDS
+
+    # The primary key (UUID 7) reflects the insertion time. Results inserted
+    # before 2023-06 have a different kind of primary key: filter those out
+    # via the (user-given) result timestamp.
+    idle_runs = (
+        s.select(
+            BenchmarkResult.run_id,
+            s.literal(_utc_datetime(now), s.DateTime(timezone=False)),
+        )
+        .filter(
+            BenchmarkResult.id >= uuid7(earliest * 10**9).hex,
+            BenchmarkResult.timestamp >= _utc_datetime(earliest),
+        )
+        .group_by(BenchmarkResult.run_id)
+        .having(s.func.max(BenchmarkResult.id) < uuid7(idle_since * 10**9).hex)
+    )
+    statement = (
+        postgresql_insert(CompletedRun)
+        .from_select(["run_id", "completed_at"], idle_runs)
+        .on_conflict_do_nothing()
+        .returning(CompletedRun.run_id)
+    )
+    n_marked = len(current_session.scalars(statement).all())
+    current_session.commit()
+    return n_marked
+
+
+def claim_completed_run() -> Optional[str]:
+    """
+    Claim a complete run whose comparisons have not been computed yet (mark
+    them as computed, so that other processes skip this run). Return its ID,
+    or None if there is no such run. Commit the session.
+
+    If computing fails (or the process goes away), the run is not retried;
+    its comparisons are then computed on demand.
+    """
+    claimable = (
+        s.select(CompletedRun.run_id)
+        .filter(CompletedRun.comparisons_computed_at.is_(None))
+        .order_by(CompletedRun.completed_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    now = _utc_datetime(time.time())
+    run_id = current_session.scalars(
+        s.update(CompletedRun)
+        .filter(CompletedRun.run_id == claimable)
+        .values(comparisons_computed_at=now)
+        .returning(CompletedRun.run_id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    current_session.commit()
+    return run_id
+
+
+def _runs_data_version(run_ids: List[str]) -> Tuple[int, Optional[str]]:
+    """Number of results and most recently inserted result for these runs."""
+    row = current_session.execute(
+        s.select(s.func.count(), s.func.max(BenchmarkResult.id)).filter(
+            BenchmarkResult.run_id.in_(run_ids)
+        )
+    ).one()
+    return row[0], row[1]
+
+
+def compute_and_store_comparisons(contender_run_id: str) -> List[str]:
+    """
+    Compare this run against its candidate baseline runs, store the
+    comparisons. Return the baseline run IDs for which a comparison was
+    stored. Commit the session.
+    """
+    # Avoid circular import (conbench.api imports entities, and vice versa).
+    from .api.compare import CompareRunsAPI
+    from .api.runs import get_candidate_baseline_runs
+
+    contender_result = BenchmarkResult.first(run_id=contender_run_id)
+    if contender_result is None:
+        # Removed in the meantime.
+        return []
+
+    candidates = get_candidate_baseline_runs(contender_result)
+    baseline_run_ids = sorted(
+        {
+            candidate["baseline_run_id"]
+            for candidate in candidates.values()
+            if candidate["baseline_run_id"]
+        }
+    )
+
+    stored = []
+    for baseline_run_id in baseline_run_ids:
+        run_ids = [baseline_run_id, contender_run_id]
+        version = _runs_data_version(run_ids)
+
+        history_fingerprints = CompareRunsAPI._get_page_of_history_fingerprints(
+            run_ids, cursor=None, page_size=None
+        )
+        comparators = CompareRunsAPI.get_comparators(
+            baseline_run_id,
+            contender_run_id,
+            history_fingerprints,
+            threshold=None,
+            threshold_z=None,
+        )
+        items = [
+            {
+                "history_fingerprint": comparator.history_fingerprint,
+                "percent_change": comparator.percent_change,
+                "z_score": comparator.z_score,
+                "data": comparator._dict_for_api_json,
+            }
+            for comparator in comparators
+        ]
+
+        if _runs_data_version(run_ids) != version:
+            # A result was added/removed while computing: this may be stale.
+            log.info(
+                "run comparison %s...%s: results changed, do not store",
+                baseline_run_id,
+                contender_run_id,
+            )
+            continue
+
+        store_run_comparison(
+            baseline_run_id,
+            contender_run_id,
+            CompareRunsAPI._get_commit(baseline_run_id),
+            items,
+        )
+        current_session.commit()
+        stored.append(baseline_run_id)
+
+    return stored
+
+
+def precompute_once(idle_seconds: float, should_stop=lambda: False) -> None:
+    """
+    Mark idle runs as complete, then process complete runs until there are
+    none left (or until `should_stop()`).
+    """
+    n_marked = mark_idle_runs_completed(idle_seconds)
+    if n_marked:
+        log.info("run comparisons: %s run(s) became idle", n_marked)
+
+    while not should_stop():
+        run_id = claim_completed_run()
+        if run_id is None:
+            return
+
+        t0 = time.monotonic()
+        try:
+            baseline_run_ids = compute_and_store_comparisons(run_id)
+        except Exception as exc:
+            log.exception("run comparisons for run %s failed: %s", run_id, exc)
+            current_session.rollback()
+            continue
+
+        log.info(
+            "run comparisons for run %s: stored %s comparison(s), took %.3f s",
+            run_id,
+            len(baseline_run_ids),
+            time.monotonic() - t0,
+        )
+
+
+def periodically_precompute_run_comparisons(
+    app: flask.Flask, idle_seconds: float
+) -> threading.Thread:
+    """
+    Return right after having spawned a thread that triggers periodic action.
+    """
+
+    def _run_forever():
+        while True:
+            # Build responsive sleep loop that inspects SHUTDOWN often.
+            deadline = time.monotonic() + POLL_INTERVAL_SECONDS
+            while time.monotonic() < deadline:
+                if conbench.job.SHUTDOWN:
+                    log.debug("run comparisons: shut down")
+                    return
+                time.sleep(0.1)
+
+            try:
+                # Fresh DB session per iteration (removed upon leaving the
+                # app context).
+                with app.app_context():
+                    precompute_once(
+                        idle_seconds, should_stop=lambda: conbench.job.SHUTDOWN
+                    )
+            except Exception as exc:
+                log.exception("run comparisons: exception: %s", exc)
+
+    t = threading.Thread(target=_run_forever, name="run-compare-precompute")
+    t.start()
+    return t
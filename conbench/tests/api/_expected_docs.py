@@ -268,6 +268,24 @@
                 },
                 "description": "OK",
             },
+            "BenchmarkResultBatchCreated": {
+                "content": {
+                    "application/json": {
+                        "example": {
+                            "results": [
+                                {"id": "some-benchmark-uuid-1", "status": 201},
+                                {
+                                    "description": {
+                                        "run_id": ["Missing data for required field."]
+                                    },
+                                    "status": 400,
+                                },
+                            ]
+                        }
+                    }
+                },
+                "description": "OK",
+            },
             "BenchmarkResultCreated": {
                 "content": {
                     "application/json": {
@@ -1727,6 +1745,91 @@
                 "tags": ["Index"],
             }
         },
+        "/api/benchmark-results/batch/": {
+            "post": {
+                "description": "Submit many BenchmarkResults with one request.\nThe request body is either a JSON array of BenchmarkResult objects (with Content-Type `application/json`), or newline-delimited JSON, one BenchmarkResult object per line (with Content-Type `application/x-ndjson`). Each BenchmarkResult object is validated and processed like in `POST /api/benchmark-results/`; the related entities (case, context, hardware, commit, ...) are looked up (or created) once per batch, and all valid results are inserted in one transaction.\nThe response contains one status object per submitted result (in the same order), with `status` 201 and the `id` of the new result, or with `status` 400 and a `description` of why this result was rejected (other results of the batch are not affected by that).",
+                "requestBody": {
+                    "content": {
+                        "application/json": {
+                            "schema": {
+                                "items": {
+                                    "$ref": "#/components/schemas/BenchmarkResultCreate"
+                                },
+                                "type": "array",
+                            }
+                        },
+                        "application/x-ndjson": {
+                            "schema": {
+                                "$ref": "#/components/schemas/BenchmarkResultCreate"
+                            }
+                        },
+                    }
+                },
+                "responses": {
+                    "200": {
+                        "$ref": "#/components/responses/BenchmarkResultBatchCreated"
+                    },
+                    "400": {"$ref": "#/components/responses/400"},
+                    "401": {"$ref": "#/components/responses/401"},
+                },
+                "tags": ["Benchmarks"],
+            }
+        },
+        "/api/benchmark-results/export/": {
+            "get": {
+                "description": "Export all benchmark results matching the given filters with a\nsingle (streaming) response, in order of DB insertion.\n\nThe response body is newline-delimited JSON (one benchmark result\nobject per line, as in `GET /api/benchmark-results/`), or an\nApache Arrow IPC stream with one row per benchmark result (see the\n`format` query parameter). The response is emitted while results\nare read from the database, so that the size of the export is not\nlimited by memory.\n\nAs for `GET /api/benchmark-results/`, results from before\n`2023-06-03 UTC` are only returned when the `run_id` query\nparameter is used.\n",
+                "parameters": [
+                    {
+                        "description": "Export format. If not given, the format is chosen based on the\nAccept request header (`application/x-ndjson` or\n`application/vnd.apache.arrow.stream`), defaulting to NDJSON.\n",
+                        "in": "query",
+                        "name": "format",
+                        "schema": {"enum": ["ndjson", "arrow"], "type": "string"},
+                    },
+                    {
+                        "description": "Filter results to one specific `run_id`.",
+                        "in": "query",
+                        "name": "run_id",
+                        "schema": {"type": "string"},
+                    },
+                    {
+                        "description": "Filter results to one specific `run_reason`.",
+                        "in": "query",
+                        "name": "run_reason",
+                        "schema": {"type": "string"},
+                    },
+                    {
+                        "description": "The earliest (least recent) benchmark result timestamp to return.",
+                        "in": "query",
+                        "name": "earliest_timestamp",
+                        "schema": {"format": "date-time", "type": "string"},
+                    },
+                    {
+                        "description": "The latest (most recent) benchmark result timestamp to return.",
+                        "in": "query",
+                        "name": "latest_timestamp",
+                        "schema": {"format": "date-time", "type": "string"},
+                    },
+                    {
+                        "description": "Filter results to one specific benchmark name.",
+                        "in": "query",
+                        "name": "benchmark_name",
+                        "schema": {"type": "string"},
+                    },
+                    {
+                        "description": "Filter results to one specific history fingerprint.",
+                        "in": "query",
+                        "name": "history_fingerprint",
+                        "schema": {"type": "string"},
+                    },
+                ],
+                "responses": {
+                    "200": {"$ref": "#/components/responses/200"},
+                    "400": {"$ref": "#/components/responses/400"},
+                    "401": {"$ref": "#/components/responses/401"},
+                },
+                "tags": ["Benchmarks"],
+            }
+        },
         "/api/benchmarks/": {
             "get": {
                 "description": 'Return benchmark results.\n\nNote that this endpoint does not provide on-the-fly change detection\nanalysis (lookback z-score method) since the "baseline" is ill-defined.\n\nThis endpoint implements pagination; see the `cursor` and `page_size` query\nparameters for how it works.\n\nFor legacy reasons, this endpoint will not return results from before\n`2023-06-03 UTC`, unless the `run_id` query parameter is used to filter\nbenchmark results.\n',
@@ -2034,17 +2137,27 @@
         },
         "/api/history/download/{benchmark_result_id}/": {
             "get": {
-                "description": "Download time series",
+                "description": "Download time series\n\nThe file format is CSV (default), Parquet, or an Apache Arrow IPC\nstream (see the `format` query parameter). Parquet and Arrow\ndownloads also contain the per-iteration `data` and `times` (list\ncolumns) and the lookback z-score analysis columns for each\nresult, and carry what all results have in common (history\nfingerprint, benchmark name, case permutation, hardware, SVS type)\nas schema metadata.\n",
                 "parameters": [
                     {
                         "in": "path",
                         "name": "benchmark_result_id",
                         "required": True,
                         "schema": {"type": "string"},
-                    }
+                    },
+                    {
+                        "description": "File format. If not given, the format is chosen based on the\nAccept request header (`text/csv`,\n`application/vnd.apache.parquet` or\n`application/vnd.apache.arrow.stream`), defaulting to CSV.\n",
+                        "in": "query",
+                        "name": "format",
+                        "schema": {
+                            "enum": ["csv", "parquet", "arrow"],
+                            "type": "string",
+                        },
+                    },
                 ],
                 "responses": {
                     "200": {"$ref": "#/components/responses/HistoryList"},
+                    "400": {"$ref": "#/components/responses/400"},
                     "401": {"$ref": "#/components/responses/401"},
                     "404": {"$ref": "#/components/responses/404"},
                 },
@@ -2197,6 +2310,25 @@
                 "tags": ["Runs"],
             }
         },
+        "/api/runs/{run_id}/finish/": {
+            "post": {
+                "description": "Signal that all benchmark results of a run have been submitted.\n\nIf the Conbench server is configured to precompute run comparisons,\nthis triggers comparing the run against its candidate baseline runs\n(see `GET /api/runs/{run_id}/`) in the background. Once done, `GET\n/api/compare/runs/` responses for these comparisons are served from\nthe precomputed data. Without this signal, a run is considered to be\nfinished when no benchmark result has been submitted for it for a\nwhile.\n\nSubmitting another benchmark result for the run later on is fine:\nthe run is then considered to be active again.\n",
+                "parameters": [
+                    {
+                        "in": "path",
+                        "name": "run_id",
+                        "required": True,
+                        "schema": {"type": "string"},
+                    }
+                ],
+                "responses": {
+                    "202": {"$ref": "#/components/responses/202"},
+                    "401": {"$ref": "#/components/responses/401"},
+                    "404": {"$ref": "#/components/responses/404"},
+                },
+                "tags": ["Runs"],
+            }
+        },
         "/api/users/": {
             "get": {
                 "description": "Get a list of users.",
@@ -1,8 +1,12 @@
+import threading
+import time
 from typing import List, Optional, Set, Tuple
 
 import pytest
 
+from ...api import compare
 from ...api._examples import _api_compare_entity, _api_compare_list
+from ...api._scheduler import CostAwareScheduler, SchedulerBusy
 from ...api.compare import CompareRunsAPI
 from ...tests.api import _asserts, _fixtures
 from ...tests.helpers import _uuid
@@ -331,6 +335,16 @@ class TestCompareBenchmarkResultsGet(_asserts.GetEnforcer):
         response = client.get("/api/compare/benchmark-results/foo...bar/")
         self.assert_404_not_found(response)
 
+    def test_compare_busy(self, client, monkeypatch):
+        self.authenticate(client)
+        scheduler = CostAwareScheduler(
+            max_running=1, cost_budget=1, max_queued=0, max_wait_seconds=1
+        )
+        monkeypatch.setattr(compare, "_compare_scheduler", scheduler)
+        response = client.get("/api/compare/benchmark-results/foo...bar/")
+        assert response.status_code == 429, response.text
+        assert int(response.headers["Retry-After"]) >= 1
+
     @pytest.mark.parametrize(
         ["baseline_result_id", "expected_z_score"],
         [
@@ -616,3 +630,110 @@ class TestCompareRunsGet(_asserts.GetEnforcer):
         # Try to go past the end of the list.
         res = client.get(f"{url}&cursor=zzz")
         self.assert_200_ok(res, {"data": [], "metadata": {"next_page_cursor": None}})
+
+
+class TestCostAwareScheduler:
+    @staticmethod
+    def _start(scheduler, key, client, cost, func, results):
+        def target():
+            try:
+                results[key] = scheduler.run(key, client, cost, func)
+            except Exception as exc:
+                results[key] = exc
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        return thread
+
+    def test_concurrent_within_budget(self):
+        scheduler = CostAwareScheduler(
+            max_running=2, cost_budget=10, max_queued=10, max_wait_seconds=5
+        )
+        barrier = threading.Barrier(2, timeout=5)
+        results: dict = {}
+        # Two cheap jobs run concurrently (otherwise: BrokenBarrierError).
+        threads = [
+            self._start(scheduler, k, k, 5, lambda: barrier.wait(), results)
+            for k in ("a", "b")
+        ]
+        for thread in threads:
+            thread.join()
+        assert not any(isinstance(r, Exception) for r in results.values())
+
+    def test_identical_requests_share_computation(self):
+        scheduler = CostAwareScheduler(
+            max_running=2, cost_budget=10, max_queued=10, max_wait_seconds=5
+        )
+        calls = []
+        release = threading.Event()
+
+        def func():
+            calls.append(1)
+            release.wait(5)
+            return {"result": 42}
+
+        results: dict = {}
+        t1 = self._start(scheduler, "k", "client1", 1, func, results)
+        while not calls:
+            time.sleep(0.01)
+        shared: list = []
+        t2 = threading.Thread(
+            target=lambda: shared.append(scheduler.run("k", "client2", 1, func))
+        )
+        t2.start()
+        time.sleep(0.05)
+        release.set()
+        t1.join()
+        t2.join()
+        assert len(calls) == 1
+        assert results["k"] == shared[0] == {"result": 42}
+
+    def test_fairness_and_budget(self):
+        scheduler = CostAwareScheduler(
+            max_running=4, cost_budget=10, max_queued=10, max_wait_seconds=5
+        )
+        order: list = []
+        release = threading.Event()
+        results: dict = {}
+
+        # Occupies the whole budget.
+        big = self._start(scheduler, "big", "c1", 10, lambda: release.wait(5), results)
+        while not scheduler._running:
+            time.sleep(0.01)
+
+        # Client c1 queues three jobs before c2 queues one; c2's job must not
+        # be served last.
+        threads = []
+        for key, client in (("x1", "c1"), ("x2", "c1"), ("x3", "c1"), ("y1", "c2")):
+            threads.append(
+                self._start(
+                    scheduler, key, client, 10, lambda k=key: order.append(k), results
+                )
+            )
+            while key not in scheduler._inflight:
+                time.sleep(0.01)
+
+        release.set()
+        for thread in [big] + threads:
+            thread.join()
+
+        assert order == ["x1", "y1", "x2", "x3"]
+
+    def test_busy(self):
+        scheduler = CostAwareScheduler(
+            max_running=1, cost_budget=1, max_queued=1, max_wait_seconds=0.1
+        )
+        release = threading.Event()
+        results: dict = {}
+        running = self._start(scheduler, "a", "c", 1, lambda: release.wait(5), results)
+        while not scheduler._running:
+            time.sleep(0.01)
+
+        # Times out in the queue.
+        with pytest.raises(SchedulerBusy) as exc_info:
+            scheduler.run("b", "c", 1, lambda: None)
+        assert exc_info.value.retry_after_seconds >= 1
+
+        release.set()
+        running.join()
+        assert scheduler.run("b", "c", 1, lambda: "done") == "done"
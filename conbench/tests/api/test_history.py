@@ -1,9 +1,12 @@
-from io import StringIO
+from io import BytesIO, StringIO
 from typing import List
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pandas import DatetimeIndex
 
+from ...api import history as history_api
 from ...api._examples import _api_history_entity
 from ...tests.api import _asserts, _fixtures
 
@@ -54,3 +57,60 @@ class TestHistoryGet(_asserts.GetEnforcer):
         )
         assert "svs" in df
         assert isinstance(df.index, DatetimeIndex)
+
+    def test_parquet_download(self, client, monkeypatch):
+        self.authenticate(client)
+        # One row group per result.
+        monkeypatch.setattr(history_api, "HISTORY_RECORD_BATCH_SIZE", 1)
+        benchmark_result = self._create()
+        other_result = _fixtures.benchmark_result(name=benchmark_result.case.name)
+        response = client.get(
+            f"/api/history/download/{benchmark_result.id}/?format=parquet"
+        )
+        assert response.status_code == 200
+        assert response.mimetype == "application/vnd.apache.parquet"
+        assert ".parquet" in response.headers["Content-Disposition"]
+
+        pfile = pq.ParquetFile(BytesIO(response.data))
+        assert pfile.num_row_groups == 2
+        table = pfile.read()
+        assert table.schema.remove_metadata() == history_api.HISTORY_ARROW_SCHEMA
+        metadata = table.schema.metadata
+        assert metadata[b"history_fingerprint"].decode() == (
+            benchmark_result.history_fingerprint
+        )
+        assert metadata[b"svs_type"].decode() == benchmark_result.svs_type
+        assert metadata[b"result_id"].decode() == benchmark_result.id
+
+        rows = {row["result_id"]: row for row in table.to_pylist()}
+        assert set(rows) == {benchmark_result.id, other_result.id}
+        row = rows[benchmark_result.id]
+        assert row["data"] == [float(x) for x in benchmark_result.data]
+        assert row["svs"] == benchmark_result.svs
+        assert row["commit_hash"] == benchmark_result.commit.sha
+        assert row["is_outlier"] is False
+
+    def test_arrow_download(self, client):
+        self.authenticate(client)
+        benchmark_result = self._create()
+        response = client.get(
+            f"/api/history/download/{benchmark_result.id}/",
+            headers={"Accept": "application/vnd.apache.arrow.stream"},
+        )
+        assert response.status_code == 200
+        assert response.mimetype == "application/vnd.apache.arrow.stream"
+
+        table = pa.ipc.open_stream(response.data).read_all()
+        assert table.num_rows == 1
+        assert table.column("result_id").to_pylist() == [benchmark_result.id]
+        assert table.schema.metadata[b"benchmark_name"].decode() == (
+            benchmark_result.case.name
+        )
+
+    def test_bad_download_format(self, client):
+        self.authenticate(client)
+        benchmark_result = self._create()
+        response = client.get(f"/api/history/download/{benchmark_result.id}/?format=x")
+        self.assert_400_bad_request(
+            response, {"_errors": ["format must be one of csv, parquet, arrow"]}
+        )
@@ -1,9 +1,15 @@
 import copy
 import datetime
+import gzip
+import json
 from typing import Tuple
 
+import pyarrow as pa
 import pytest
 
+import conbench.metrics
+
+from ...api import results as results_api
 from ...api._examples import _api_benchmark_entity
 from ...entities._entity import NotFound
 from ...entities.benchmark_result import BenchmarkResult
@@ -434,6 +440,96 @@ class TestBenchmarkList(_asserts.ListEnforcer):
         )
 
 
+class TestBenchmarkResultExport(_asserts.ApiEndpointTest):
+    url = "/api/benchmark-results/export/"
+
+    @pytest.fixture(autouse=True)
+    def small_chunks(self, monkeypatch):
+        # Have the response consist of more than one chunk / record batch.
+        monkeypatch.setattr(results_api, "EXPORT_CHUNK_SIZE", 2)
+
+    def _create_results(self):
+        run_id = _uuid()
+        ids = [
+            _fixtures.benchmark_result(run_id=run_id, name=name).id
+            for name in ("file-read", "file-read", "file-write", "file-read", "x")
+        ]
+        return run_id, ids
+
+    def test_export_ndjson(self, client):
+        self.authenticate(client)
+        run_id, ids = self._create_results()
+        _fixtures.benchmark_result(run_id=_uuid())
+
+        resp = client.get(f"{self.url}?run_id={run_id}")
+        assert resp.status_code == 200, resp.text
+        assert resp.mimetype == "application/x-ndjson"
+        exported = [json.loads(line) for line in resp.text.splitlines()]
+        # In order of insertion, same objects as in the list endpoint.
+        assert [r["id"] for r in exported] == ids
+        assert exported[0]["run_id"] == run_id
+        assert exported[0]["tags"]["name"] == "file-read"
+        assert (
+            exported[0]["stats"]
+            == client.get(f"/api/benchmark-results/{ids[0]}/").json["stats"]
+        )
+
+        resp = client.get(f"{self.url}?run_id={run_id}&benchmark_name=file-read")
+        assert [json.loads(line)["id"] for line in resp.text.splitlines()] == [
+            ids[0],
+            ids[1],
+            ids[3],
+        ]
+
+        fingerprint = exported[2]["history_fingerprint"]
+        resp = client.get(f"{self.url}?history_fingerprint={fingerprint}")
+        assert [json.loads(line)["id"] for line in resp.text.splitlines()] == [ids[2]]
+
+    @pytest.mark.parametrize(
+        "query, headers",
+        [
+            ("&format=arrow", {}),
+            ("", {"Accept": "application/vnd.apache.arrow.stream"}),
+        ],
+    )
+    def test_export_arrow(self, client, query, headers):
+        self.authenticate(client)
+        run_id, ids = self._create_results()
+
+        resp = client.get(f"{self.url}?run_id={run_id}{query}", headers=headers)
+        assert resp.status_code == 200, resp.text
+        assert resp.mimetype == "application/vnd.apache.arrow.stream"
+        reader = pa.ipc.open_stream(resp.data)
+        assert reader.schema == results_api.EXPORT_ARROW_SCHEMA
+        batches = list(reader)
+        assert [b.num_rows for b in batches] == [2, 2, 1]
+
+        table = pa.Table.from_batches(batches)
+        assert table.column("id").to_pylist() == ids
+        assert table.column("benchmark_name").to_pylist()[2] == "file-write"
+        result = BenchmarkResult.one(id=ids[0])
+        assert table.column("data").to_pylist()[0] == [float(x) for x in result.data]
+        assert table.column("mean").to_pylist()[0] == float(result.mean)
+        assert table.column("commit_hash").to_pylist()[0] == result.commit.sha
+
+    def test_export_empty(self, client):
+        self.authenticate(client)
+        resp = client.get(f"{self.url}?run_id={_uuid()}")
+        assert resp.status_code == 200, resp.text
+        assert resp.data == b""
+
+        resp = client.get(f"{self.url}?run_id={_uuid()}&format=arrow")
+        assert resp.status_code == 200, resp.text
+        assert pa.ipc.open_stream(resp.data).read_all().num_rows == 0
+
+    def test_bad_format(self, client):
+        self.authenticate(client)
+        resp = client.get(f"{self.url}?format=csv")
+        self.assert_400_bad_request(
+            resp, {"_errors": ["format must be one of ndjson, arrow"]}
+        )
+
+
 class TestBenchmarkResultPost(_asserts.PostEnforcer):
     url = "/api/benchmarks/"
     valid_payload = _fixtures.VALID_RESULT_PAYLOAD
@@ -1119,3 +1215,169 @@ class TestBenchmarkResultPost(_asserts.PostEnforcer):
         resp = client.post("/api/benchmark-results/", json=result)
         assert resp.status_code == 201, resp.text
         assert resp.json["stats"]["unit"] == "B/s", resp.json
+
+
+class TestBenchmarkResultBatchPost(_asserts.ApiEndpointTest):
+    url = "/api/benchmark-results/batch/"
+
+    def test_unauthenticated(self, client):
+        resp = client.post(self.url, json=[_fixtures.VALID_RESULT_PAYLOAD])
+        self.assert_401_unauthorized(resp)
+
+    @pytest.mark.parametrize(
+        "payload, message",
+        [
+            ([], "Empty batch."),
+            ({}, "expected a JSON array of benchmark results"),
+            ("foo", "expected a JSON array of benchmark results"),
+        ],
+    )
+    def test_bad_batch(self, client, payload, message):
+        self.authenticate(client)
+        resp = client.post(self.url, json=payload)
+        self.assert_400_bad_request(resp, {"_errors": [message]})
+
+    def test_create_batch(self, client):
+        self.authenticate(client)
+        run_id = _uuid()
+
+        result_bad_unit = copy.deepcopy(_fixtures.VALID_RESULT_PAYLOAD)
+        result_bad_unit["stats"] = {"data": (3, 5), "unit": "kg"}
+        result_no_run_id = copy.deepcopy(_fixtures.VALID_RESULT_PAYLOAD)
+        del result_no_run_id["run_id"]
+
+        items = [
+            dict(_fixtures.VALID_RESULT_PAYLOAD, run_id=run_id),
+            result_bad_unit,
+            dict(_fixtures.VALID_RESULT_PAYLOAD, run_id=run_id, batch_id="other"),
+            result_no_run_id,
+            dict(_fixtures.VALID_RESULT_PAYLOAD_FOR_CLUSTER, run_id=run_id),
+        ]
+        resp = client.post(self.url, json=items)
+        self.assert_200_ok(resp)
+
+        statuses = resp.json["results"]
+        assert [s["status"] for s in statuses] == [201, 400, 201, 400, 201]
+        assert "invalid unit string `kg`" in statuses[1]["description"]
+        assert "run_id" in statuses[3]["description"]
+
+        results = [BenchmarkResult.one(id=statuses[i]["id"]) for i in (0, 2, 4)]
+        assert all(r.run_id == run_id for r in results)
+        assert results[1].batch_id == "other"
+        # Related entities are shared, like for one-by-one submission.
+        assert results[0].case_id == results[1].case_id == results[2].case_id
+        assert results[0].hardware_id == results[1].hardware_id
+        assert results[0].hardware.type == "machine"
+        assert results[2].hardware.type == "cluster"
+
+        single = client.post(
+            "/api/benchmark-results/",
+            json=dict(_fixtures.VALID_RESULT_PAYLOAD, run_id=run_id),
+        )
+        assert single.status_code == 201, single.text
+        single_result = BenchmarkResult.one(id=single.json["id"])
+        for attr in ("case_id", "context_id", "info_id", "hardware_id", "commit_id"):
+            assert getattr(single_result, attr) == getattr(results[0], attr)
+        assert single_result.history_fingerprint == results[0].history_fingerprint
+        assert single_result.svs == results[0].svs
+
+    def test_create_batch_statuses_and_ingest_metrics(self, client):
+        self.authenticate(client)
+        run_id = _uuid()
+        repo_url = _fixtures.VALID_RESULT_PAYLOAD["github"]["repository"]
+        counter = conbench.metrics.COUNTER_BENCHMARK_RESULTS_INGESTED.labels(
+            repourl=repo_url
+        )
+        count_before = counter._value.get()
+
+        result_bad_unit = copy.deepcopy(_fixtures.VALID_RESULT_PAYLOAD)
+        result_bad_unit["stats"] = {"data": (3, 5), "unit": "kg"}
+        items = [
+            dict(_fixtures.VALID_RESULT_PAYLOAD, run_id=run_id),
+            dict(_fixtures.VALID_RESULT_PAYLOAD_WITH_ERROR, run_id=run_id),
+            result_bad_unit,
+            dict(_fixtures.VALID_RESULT_PAYLOAD, run_id=run_id, batch_id="b2"),
+        ]
+        resp = client.post(self.url, json=items)
+        self.assert_200_ok(resp)
+
+        statuses = resp.json["results"]
+        assert [s["status"] for s in statuses] == [201, 201, 400, 201]
+        created_ids = {statuses[i]["id"] for i in (0, 1, 3)}
+        assert {r.id for r in BenchmarkResult.all(run_id=run_id)} == created_ids
+        assert counter._value.get() == count_before + 3
+
+    def test_create_batch_ndjson(self, client):
+        self.authenticate(client)
+        run_id = _uuid()
+        lines = [
+            json.dumps(dict(_fixtures.VALID_RESULT_PAYLOAD, run_id=run_id)),
+            "",
+            json.dumps(dict(_fixtures.VALID_RESULT_PAYLOAD_WITH_ERROR, run_id=run_id)),
+        ]
+        resp = client.post(
+            self.url,
+            data="\n".join(lines) + "\n",
+            content_type="application/x-ndjson",
+        )
+        self.assert_200_ok(resp)
+        statuses = resp.json["results"]
+        assert [s["status"] for s in statuses] == [201, 201]
+        assert len(BenchmarkResult.all(run_id=run_id)) == 2
+
+        resp = client.post(self.url, data="{}\n{", content_type="application/x-ndjson")
+        assert resp.status_code == 400, resp.text
+        assert "line 2: invalid JSON" in resp.text
+
+    def test_create_batch_gzip(self, client):
+        self.authenticate(client)
+        run_id = _uuid()
+        items = [dict(_fixtures.VALID_RESULT_PAYLOAD, run_id=run_id)] * 3
+        resp = client.post(
+            self.url,
+            data=gzip.compress(json.dumps(items).encode()),
+            content_type="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+        self.assert_200_ok(resp)
+        assert [s["status"] for s in resp.json["results"]] == [201, 201, 201]
+        assert len(BenchmarkResult.all(run_id=run_id)) == 3
+
+    @pytest.mark.parametrize(
+        "content_type", ["application/json", "application/x-ndjson"]
+    )
+    def test_create_batch_gzip_too_large(self, client, monkeypatch, content_type):
+        self.authenticate(client)
+        monkeypatch.setitem(client.application.config, "MAX_CONTENT_LENGTH", 10**5)
+        # Small when compressed, too large when decompressed.
+        data = gzip.compress(b"\n" * 10**6)
+        assert len(data) < 10**5
+        resp = client.post(
+            self.url,
+            data=data,
+            content_type=content_type,
+            headers={"Content-Encoding": "gzip"},
+        )
+        assert resp.status_code == 413, resp.text
+
+    @pytest.mark.parametrize(
+        "content_type", ["application/json", "application/x-ndjson"]
+    )
+    @pytest.mark.parametrize(
+        "data",
+        [
+            b"not gzip",
+            # Truncated.
+            gzip.compress(json.dumps([_fixtures.VALID_RESULT_PAYLOAD]).encode())[:-20],
+        ],
+    )
+    def test_create_batch_gzip_invalid(self, client, content_type, data):
+        self.authenticate(client)
+        resp = client.post(
+            self.url,
+            data=data,
+            content_type=content_type,
+            headers={"Content-Encoding": "gzip"},
+        )
+        assert resp.status_code == 400, resp.text
+        assert "invalid gzip request body" in resp.text
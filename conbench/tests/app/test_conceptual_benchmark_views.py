@@ -1,9 +1,11 @@
 from datetime import datetime
 
+import numpy as np
 import pytest
 
 import conbench.bmrt
 import conbench.job
+from conbench.config import Config
 
 from ...tests.api import _fixtures
 from ...tests.app import _asserts
@@ -129,3 +131,198 @@ class TestCBenchmarks(_asserts.AppEndpointTest):
         assert resp.status_code == 200, f"{resp.status_code}\n{resp.text}"
 
         assert "benchmark name not known: `bname`" in resp.text
+
+    def test_cache_incremental_update(self, client):
+        conbench.bmrt.reinit()
+        self.authenticate(client)
+
+        resp = client.post("/api/benchmark-results/", json=benchmark_result_dict)
+        assert resp.status_code == 201, f"{resp.status_code}\n{resp.text}"
+
+        # Without previous population, this is a full population.
+        conbench.bmrt._fetch_and_cache_most_recent_results(incremental=True)
+        assert len(conbench.bmrt.get_snapshot().by_id) == 1
+        snapshot_before = conbench.bmrt.get_snapshot()
+
+        d = dict(benchmark_result_dict, tags={"name": "other-benchmark"})
+        resp = client.post("/api/benchmark-results/", json=d)
+        assert resp.status_code == 201, f"{resp.status_code}\n{resp.text}"
+        new_id = resp.json["id"]
+
+        conbench.bmrt._fetch_and_cache_most_recent_results(incremental=True)
+        cache = conbench.bmrt.get_snapshot()
+        assert len(cache.by_id) == 2
+        assert new_id in cache.by_id
+        assert set(cache.by_benchmark_name) == {"fun-benchmark", "other-benchmark"}
+        assert len(cache.by_4t_df) == 2
+        assert len(cache.by_4t_list) == 2
+        assert cache.meta.n_results == 2
+
+        # The snapshot exposed before the update was not mutated.
+        assert len(snapshot_before.by_id) == 1
+        assert len(snapshot_before.by_benchmark_name) == 1
+        assert cache.meta.generation > snapshot_before.meta.generation
+
+        # Re-running does not add results twice.
+        conbench.bmrt._fetch_and_cache_most_recent_results(incremental=True)
+        assert len(conbench.bmrt.get_snapshot().by_id) == 2
+
+        resp = client.get("/c-benchmarks/")
+        assert "2 unique benchmark names seen across the 2 newest results" in resp.text
+
+        # Views operating on the cached results (not only on the counts).
+        for relpath in [
+            "/c-benchmarks/other-benchmark",
+            "/c-benchmarks/other-benchmark/trends",
+        ]:
+            resp = client.get(relpath)
+            assert resp.status_code == 200, f"{resp.status_code}\n{resp.text}"
+
+    def test_cache_push_update(self, client, monkeypatch):
+        conbench.bmrt.reinit()
+        self.authenticate(client)
+
+        resp = client.post("/api/benchmark-results/", json=benchmark_result_dict)
+        assert resp.status_code == 201, f"{resp.status_code}\n{resp.text}"
+        conbench.bmrt._fetch_and_cache_most_recent_results()
+
+        # No consumer in this process: nothing gets queued.
+        resp = client.post("/api/benchmark-results/", json=benchmark_result_dict)
+        assert resp.status_code == 201, f"{resp.status_code}\n{resp.text}"
+        assert conbench.bmrt._drain_push_queue() == []
+
+        conbench.bmrt._push_consumer_active.set()
+        try:
+            d = dict(benchmark_result_dict, tags={"name": "pushed-benchmark"})
+            resp = client.post("/api/benchmark-results/", json=d)
+            assert resp.status_code == 201, f"{resp.status_code}\n{resp.text}"
+        finally:
+            conbench.bmrt._push_consumer_active.clear()
+
+        new_id = resp.json["id"]
+        pushed = conbench.bmrt._drain_push_queue()
+        assert pushed == [new_id]
+
+        conbench.bmrt._apply_pushed(pushed, after_refresh=None)
+        cache = conbench.bmrt.get_snapshot()
+        assert new_id in cache.by_id
+        assert "pushed-benchmark" in cache.by_benchmark_name
+        # The high-water mark is left to the periodic scan, which picks up
+        # the result that was not pushed.
+        assert len(cache.by_id) == 2
+        conbench.bmrt._fetch_and_cache_most_recent_results(incremental=True)
+        assert len(conbench.bmrt.get_snapshot().by_id) == 3
+
+        # Builder process mode: reported via PostgreSQL NOTIFY.
+        monkeypatch.setattr(Config, "BMRT_CACHE_BUILDER_PROCESS", True)
+        listener = conbench.bmrt._PgNotifyListener(Config.SQLALCHEMY_DATABASE_URI)
+        try:
+            assert listener.drain() == []
+            resp = client.post("/api/benchmark-results/", json=benchmark_result_dict)
+            assert resp.status_code == 201, f"{resp.status_code}\n{resp.text}"
+            assert listener.drain() == [resp.json["id"]]
+        finally:
+            listener.close()
+
+    def test_cache_warm_start(self, client, tmp_path):
+        conbench.bmrt.reinit()
+        self.authenticate(client)
+        persist_dir = str(tmp_path)
+
+        # Nothing to start from.
+        assert conbench.bmrt._warm_start(persist_dir) is None
+
+        resp = client.post("/api/benchmark-results/", json=benchmark_result_dict)
+        assert resp.status_code == 201, f"{resp.status_code}\n{resp.text}"
+        conbench.bmrt._fetch_and_cache_most_recent_results()
+        snapshot_before = conbench.bmrt.get_snapshot()
+        hwm_before = conbench.bmrt._refresh_state["hwm_id"]
+        conbench.bmrt._snapshot_writer(persist_dir)()
+
+        # Simulate a restart; a result gets submitted in the meantime.
+        conbench.bmrt.reinit()
+        d = dict(benchmark_result_dict, tags={"name": "other-benchmark"})
+        resp = client.post("/api/benchmark-results/", json=d)
+        assert resp.status_code == 201, f"{resp.status_code}\n{resp.text}"
+        new_id = resp.json["id"]
+
+        full_refresh_at = conbench.bmrt._warm_start(persist_dir)
+        assert full_refresh_at is not None
+        cache = conbench.bmrt.get_snapshot()
+        assert isinstance(cache.results.ids, np.memmap)
+        assert set(cache.by_id) == set(snapshot_before.by_id)
+        assert cache.meta.generation == snapshot_before.meta.generation
+        assert conbench.bmrt._refresh_state["hwm_id"] == hwm_before
+
+        resp = client.get("/c-benchmarks/")
+        assert "1 unique benchmark names seen across the 1 newest results" in resp.text
+
+        # Catch up from the high-water mark.
+        conbench.bmrt._fetch_and_cache_most_recent_results(incremental=True)
+        cache = conbench.bmrt.get_snapshot()
+        assert len(cache.by_id) == 2
+        assert new_id in cache.by_id
+        assert cache.meta.generation > snapshot_before.meta.generation
+
+    def test_cache_snapshot_etag(self, client):
+        conbench.bmrt.reinit()
+        self.authenticate(client)
+
+        resp = client.post("/api/benchmark-results/", json=benchmark_result_dict)
+        assert resp.status_code == 201, f"{resp.status_code}\n{resp.text}"
+        conbench.bmrt._fetch_and_cache_most_recent_results()
+
+        snapshot = conbench.bmrt.get_snapshot()
+        with pytest.raises(TypeError):
+            snapshot.by_benchmark_name["foo"] = snapshot.by_benchmark_name[  # type: ignore
+                "fun-benchmark"
+            ]
+
+        resp = client.get("/c-benchmarks/")
+        assert resp.status_code == 200
+        etag = resp.headers["ETag"]
+        assert "no-cache" in resp.headers["Cache-Control"]
+
+        # Unchanged cache generation: 304, no body.
+        resp = client.get("/c-benchmarks/", headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.data == b""
+
+        # Different page: different ETag.
+        resp = client.get(
+            "/c-benchmarks/fun-benchmark", headers={"If-None-Match": etag}
+        )
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+
+        # New cache generation: page gets rendered again.
+        conbench.bmrt._fetch_and_cache_most_recent_results()
+        assert conbench.bmrt.get_snapshot().meta.generation > snapshot.meta.generation
+        resp = client.get("/c-benchmarks/", headers={"If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+
+    def test_cache_builder_process(self, client, monkeypatch, tmp_path):
+        conbench.bmrt.reinit()
+        conbench.bmrt._FIRST_REFRESH_DONE_EVENT.clear()
+        self.authenticate(client)
+
+        resp = client.post("/api/benchmark-results/", json=benchmark_result_dict)
+        assert resp.status_code == 201, f"{resp.status_code}\n{resp.text}"
+
+        # The cache gets populated in a child process, and this process
+        # attaches to the snapshot written by that.
+        monkeypatch.setattr(Config, "BMRT_CACHE_BUILDER_PROCESS", True)
+        monkeypatch.setattr(Config, "BMRT_CACHE_SNAPSHOT_DIR", str(tmp_path))
+        monkeypatch.setattr(conbench.job, "SHUTDOWN", False)
+        t = conbench.bmrt.periodically_fetch_last_n_benchmark_results()
+        try:
+            conbench.bmrt.wait_for_first_bmrt_cache_population(timeout=120)
+        finally:
+            conbench.job.SHUTDOWN = True
+            t.join()
+
+        assert len(conbench.bmrt.get_snapshot().by_id) == 1
+        assert isinstance(conbench.bmrt.get_snapshot().results.svs, np.memmap)
+        resp = client.get("/c-benchmarks/")
+        assert "1 unique benchmark names seen across the 1 newest results" in resp.text
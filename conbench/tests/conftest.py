@@ -4,6 +4,7 @@ from .. import create_application
 from ..config import TestConfig
 from ..db import _session as Session
 from ..db import configure_engine, create_all, drop_all, empty_db_tables
+from ..entities import _entity_cache
 
 pytest.register_assert_rewrite("conbench.tests.api._asserts")
 pytest.register_assert_rewrite("conbench.tests.app._asserts")
@@ -23,6 +24,8 @@ def create_db_tables():
 @pytest.fixture(autouse=True)
 def clear_db_state_between_tests():
     empty_db_tables()
+    # Primary keys in the entity cache refer to rows that are gone now.
+    _entity_cache.clear()
 
 
 @pytest.fixture
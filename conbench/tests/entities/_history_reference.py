@@ -0,0 +1,199 @@
+"""
+The previous, pandas-based implementation of the rolling statistics in
+conbench.entities.history (per-group rolling aggregations with a custom window
+indexer, and a Python loop over history fingerprints). Kept as the reference
+for the NumPy-based implementation (see test_history_rolling_stats.py).
+"""
+
+import copy
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ...config import Config
+
+
+class _CommitIndexer(pd.api.indexers.BaseIndexer):
+    """pandas isn't great about rolling over ranges, so this class lets us roll over
+    the commit timestamp column correctly (not caring about time between commits)."""
+
+    def get_window_bounds(
+        self,
+        num_values: int = 0,
+        min_periods: Optional[int] = None,
+        center: Optional[bool] = None,
+        closed: Optional[str] = None,
+        step: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return numpy arrays of the respective start and end indexes of all rolling
+        windows for this slice of commit timestamps.
+        """
+        # self.index_array is the (sorted) current slice of the timestamp column,
+        # converted to an int64 np array. Find the dense rank of each timestamp.
+        commit_ranks = pd.Series(self.index_array).rank(method="dense").values
+
+        # np.searchsorted() finds the indices into which values would need to be
+        # inserted to maintain order. We can use that to find the indexes of the end of
+        # the window (same as the current commit) and start of the window (the current
+        # commit minus the window size).
+        end_ixs = np.searchsorted(commit_ranks, commit_ranks, side=closed)  # type: ignore[call-overload]
+        start_ixs = np.searchsorted(
+            commit_ranks, commit_ranks - self.window_size, side=closed
+        )  # type: ignore[call-overload]
+        return start_ixs, end_ixs
+
+
+def reference_add_rolling_stats_columns_to_df(
+    df: pd.DataFrame, include_current_commit_in_rolling_stats: bool
+) -> pd.DataFrame:
+    """Previous (pandas-based) implementation of
+    history._add_rolling_stats_columns_to_df()."""
+    df = reference_detect_shifts_with_trimmed_estimators(df=df)
+
+    # pandas likes the data to be sorted
+    df.sort_values(
+        ["history_fingerprint", "timestamp"], inplace=True, ignore_index=True
+    )
+
+    # Clean up begins_distribution_change so it's a non-null boolean column
+    df["begins_distribution_change"] = [
+        bool(x.get("begins_distribution_change", False)) if x else False
+        for x in df["change_annotations"]
+    ]
+
+    # NOTE(EV): If uncommented, this line will integrate manually-specified distribution
+    # changes with those automatically detected. Before enabling this, we want a way for
+    # users to manually remove an automatically-detected step-change.
+    #
+    # # Add in step changes automatically detected
+    # df["begins_distribution_change"] = df["begins_distribution_change"] | df["is_step"]
+
+    # Add column with cumulative sum of distribution changes, to identify the segment
+    df["segment_id"] = (
+        df.groupby(["history_fingerprint"])
+        .rolling(
+            _CommitIndexer(window_size=len(df) + 1),
+            on="timestamp",
+            closed="right",
+            min_periods=1,
+        )["begins_distribution_change"]
+        .sum()
+        .values
+    )
+
+    # Add column with rolling mean of the SVSs (only inside of the segment)
+    df.loc[~df.is_outlier, "rolling_mean_excluding_this_commit"] = (
+        df.loc[~df.is_outlier]
+        .groupby(["history_fingerprint", "segment_id"])
+        .rolling(
+            _CommitIndexer(window_size=Config.DISTRIBUTION_COMMITS),
+            on="timestamp",
+            # Exclude the current commit first...
+            closed="left",
+            min_periods=1,
+        )["svs"]
+        .mean()
+        .values
+    )
+    # (and fill NaNs at the beginning of segments with the first value)
+    df.loc[~df.is_outlier, "rolling_mean_excluding_this_commit"] = df.loc[
+        ~df.is_outlier, "rolling_mean_excluding_this_commit"
+    ].combine_first(df.loc[~df.is_outlier, "svs"])
+
+    # ...but if requested, include the current commit
+    if include_current_commit_in_rolling_stats:
+        df.loc[~df.is_outlier, "rolling_mean"] = (
+            df.loc[~df.is_outlier]
+            .groupby(["history_fingerprint", "segment_id"])
+            .rolling(
+                _CommitIndexer(window_size=Config.DISTRIBUTION_COMMITS),
+                on="timestamp",
+                closed="right",
+                min_periods=1,
+            )["svs"]
+            .mean()
+            .values
+        )
+    else:
+        df["rolling_mean"] = df["rolling_mean_excluding_this_commit"]
+
+    # Add column with the residuals from the exclusive rolling mean, since we always
+    # want to compare to the baseline distribution
+    df["residual"] = df["svs"] - df["rolling_mean_excluding_this_commit"]
+
+    # Add column with the rolling standard deviation of the residuals
+    # (these can go outside the segment since we assume they don't change much)
+    df.loc[~df.is_outlier, "rolling_stddev"] = (
+        df.loc[~df.is_outlier]
+        .groupby(["history_fingerprint"])  # not segment
+        .rolling(
+            _CommitIndexer(window_size=Config.DISTRIBUTION_COMMITS),
+            on="timestamp",
+            closed="right" if include_current_commit_in_rolling_stats else "left",
+            min_periods=1,
+        )["residual"]
+        .std()
+        .values
+    )
+
+    return df
+
+
+def reference_detect_shifts_with_trimmed_estimators(
+    df: pd.DataFrame, z_score_threshold=5.0
+) -> pd.DataFrame:
+    """Previous (pandas-based) implementation of
+    history._detect_shifts_with_trimmed_estimators()."""
+    tmp_df = copy.deepcopy(df)
+
+    # skip computation if no history
+    if df.shape[0] == 0:
+        tmp_df["is_step"] = pd.Series([], dtype=bool)
+        tmp_df["is_outlier"] = pd.Series([], dtype=bool)
+        return tmp_df
+
+    # pandas likes the data to be sorted
+    tmp_df.sort_values(
+        ["history_fingerprint", "timestamp", "result_timestamp"],
+        inplace=True,
+        ignore_index=True,
+    )
+
+    # split / apply
+    out_group_df_list = []
+    for _, group_df in tmp_df.groupby(["history_fingerprint"]):
+        # clean copy will only get result columns
+        out_group_df = copy.deepcopy(group_df)
+
+        group_df["svs_diff"] = group_df["svs"].diff()
+        svs_diff_clipped = copy.deepcopy(group_df.svs_diff)
+        svs_diff_clipped.loc[
+            (group_df.svs_diff < group_df.svs_diff.quantile(0.05))
+            | (group_df.svs_diff > group_df.svs_diff.quantile(0.95))
+        ] = np.nan
+        group_df["rolling_mean"] = svs_diff_clipped.rolling(
+            Config.DISTRIBUTION_COMMITS, min_periods=1
+        ).mean()
+        group_df["rolling_std"] = svs_diff_clipped.rolling(
+            Config.DISTRIBUTION_COMMITS, min_periods=1
+        ).std()
+        group_df["z_score"] = (
+            group_df.svs_diff - group_df.rolling_mean
+        ) / group_df.rolling_std
+
+        group_df["is_shift"] = group_df.z_score.abs() > z_score_threshold
+        group_df["reverts"] = group_df.is_shift & group_df.is_shift.shift(-1)
+        out_group_df["is_step"] = (
+            group_df.is_shift
+            & ~group_df.reverts
+            & ~group_df.reverts.shift(1, fill_value=False)
+        )
+        out_group_df["is_outlier"] = group_df.is_shift & group_df.reverts
+
+        out_group_df_list.append(out_group_df)
+
+    # combine
+    out_df = pd.concat(out_group_df_list)
+
+    return out_df
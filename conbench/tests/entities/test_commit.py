@@ -7,15 +7,19 @@ from datetime import timezone
 import pytest
 import sqlalchemy as s
 
+from ...config import Config
 from ...entities.commit import (
     CantFindAncestorCommitsError,
     Commit,
     GitHubHTTPApiClient,
+    _github,
     backfill_default_branch_commits,
     get_github_commit_metadata,
     repository_to_name,
     repository_to_url,
+    update_default_branch_seq,
 )
+from ...entities.commit_backfill import CommitBackfill
 from ...tests.api import _fixtures
 
 this_dir = os.path.abspath(os.path.dirname(__file__))
@@ -86,6 +90,79 @@ def test_ancestor_commit_query():
         assert actual_ancestor_ids == expected_ancestor_ids
 
 
+def test_ancestor_commit_query_limit():
+    commits, _ = _fixtures.gen_fake_data()
+    for commit_sha in ["11111", "33333", "66666", "bbbbb", "ddddd", "00000"]:
+        all_ancestor_ids = [
+            row.ancestor_id
+            for row in commits[commit_sha]
+            .commit_ancestry_query.order_by(s.desc("commit_order"))
+            .all()
+        ]
+        for limit in [1, 2, 3, 10]:
+            limited_ancestor_ids = [
+                row.ancestor_id
+                for row in commits[commit_sha].get_commit_ancestry_query(limit).all()
+            ]
+            assert limited_ancestor_ids == all_ancestor_ids[:limit]
+
+
+def test_default_branch_seq():
+    kwargs = {"repository": "r", "message": "m", "author_name": "a", "branch": "b"}
+
+    def _create(sha, day):
+        return Commit.create(
+            {
+                "sha": sha,
+                "fork_point_sha": sha,
+                "timestamp": datetime.datetime(2022, 1, day),
+                **kwargs,
+            }
+        )
+
+    def _seqs():
+        return {
+            c.sha: c.default_branch_seq
+            for c in Commit.all(repository="r")
+            if c.default_branch_seq is not None
+        }
+
+    _create("1", 1)
+    _create("4", 4)
+    assert _seqs() == {"1": 1, "4": 2}
+
+    # Inserted in the middle (as by backfilling): later commits are renumbered.
+    _create("2", 2)
+    Commit.upsert_do_nothing(
+        [
+            {
+                "sha": "3",
+                "fork_point_sha": "3",
+                "timestamp": datetime.datetime(2022, 1, 3),
+                **kwargs,
+            }
+        ]
+    )
+    update_default_branch_seq("r", datetime.datetime(2022, 1, 3))
+    assert _seqs() == {"1": 1, "2": 2, "3": 3, "4": 4}
+
+    # Not on the default branch: not part of the index.
+    Commit.create(
+        {
+            "sha": "5",
+            "fork_point_sha": "3",
+            "timestamp": datetime.datetime(2022, 1, 5),
+            **dict(kwargs, branch="fork:b"),
+        }
+    )
+    assert _seqs() == {"1": 1, "2": 2, "3": 3, "4": 4}
+
+    branch_commit = Commit.first(sha="5", repository="r")
+    assert [
+        row.ancestor_hash for row in branch_commit.get_commit_ancestry_query(3)
+    ] == ["5", "3", "2"]
+
+
 def test_ancestor_commit_query_bad_input():
     default_kwargs = {"repository": "r", "message": "m", "author_name": "a"}
     kwargs = default_kwargs.copy()
@@ -335,6 +412,72 @@ def test_backfill_default_branch_commits():
     assert len(commits) == 339
 
 
+def test_backfill_default_branch_commits_paged_resumable(monkeypatch):
+    repository = "https://github.com/org/big"
+    start = datetime.datetime(2022, 1, 1)
+    # 250 commits (3 result pages), newest first.
+    github_commits = [
+        {
+            "sha": f"{i:040x}",
+            "parents": [{"sha": f"{i - 1:040x}"}],
+            "author": None,
+            "commit": {
+                "author": {
+                    "name": "a",
+                    "date": (start + datetime.timedelta(hours=i)).isoformat() + "Z",
+                },
+                "message": f"commit {i}",
+            },
+        }
+        for i in reversed(range(250))
+    ]
+
+    requested_pages = []
+    fail_pages = {3}
+
+    def _get_response(url, **kwargs):
+        page = int(url.split("&page=")[1])
+        requested_pages.append(page)
+        if page in fail_pages:
+            fail_pages.remove(page)
+            raise Exception("simulated error")
+        first, end = (page - 1) * 100, page * 100
+        return github_commits[first:end]
+
+    monkeypatch.setattr(_github, "_get_response", _get_response)
+    monkeypatch.setattr(_github, "get_default_branch", lambda name: "org:main")
+    monkeypatch.setattr(Config, "GITHUB_API_CONCURRENCY", 2)
+
+    new_commit = Commit.create(
+        dict(
+            sha="f" * 40,
+            branch="org:main",
+            repository=repository,
+            fork_point_sha="f" * 40,
+            message="new",
+            author_name="a",
+            timestamp=start + datetime.timedelta(hours=250),
+        )
+    )
+
+    # Interrupted: the first two pages are in the database.
+    with pytest.raises(Exception, match="simulated error"):
+        backfill_default_branch_commits(repository, new_commit)
+    assert len(Commit.all(repository=repository)) == 201
+    assert CommitBackfill.first(repository=repository).pages_done == 2
+
+    # Resumed (with page 3), then nothing left to do for this commit.
+    requested_pages.clear()
+    backfill_default_branch_commits(repository, new_commit)
+    assert requested_pages[0] == 3
+    assert not CommitBackfill.all()
+
+    commits = Commit.all(repository=repository, order_by=Commit.timestamp)
+    assert len(commits) == 251
+    assert [c.default_branch_seq for c in commits] == list(range(1, 252))
+    assert commits[0].message == "commit 0"
+
+
 def test_parse_commits():
     path = os.path.join(this_dir, "github_commits.json")
     with open(path) as f:
@@ -428,3 +571,75 @@ def test_parse_pull_request_commit():
         "author_avatar": "https://avatars.githubusercontent.com/u/878798?v=4",
     }
     assert GitHubHTTPApiClient._parse_commit(commit) == expected
+
+
+def test_backfill_default_branch_commits_resumes_every_window(monkeypatch):
+    repository = "https://github.com/org/windows"
+    start = datetime.datetime(2022, 1, 1)
+    github_commits = [
+        {
+            "sha": f"{i:040x}",
+            "parents": [{"sha": f"{i - 1:040x}"}],
+            "author": None,
+            "commit": {
+                "author": {
+                    "name": "a",
+                    "date": (start + datetime.timedelta(hours=i)).isoformat() + "Z",
+                },
+                "message": f"commit {i}",
+            },
+        }
+        for i in reversed(range(100))
+    ]
+
+    requested_windows = set()
+
+    def _get_response(url, **kwargs):
+        params = dict(p.split("=", 1) for p in url.split("?", 1)[1].split("&"))
+        requested_windows.add((params["since"], params["until"]))
+        since, until = params["since"], params["until"]
+        in_window = [
+            c for c in github_commits if since <= c["commit"]["author"]["date"] <= until
+        ]
+        # Fewer than 100 commits per window: one result page.
+        return in_window if params["page"] == "1" else []
+
+    monkeypatch.setattr(_github, "_get_response", _get_response)
+    monkeypatch.setattr(_github, "get_default_branch", lambda name: "org:main")
+
+    # Two backfills of this repository (e.g. in different processes) were
+    # interrupted, each keeps track of its own window.
+    windows = [(0, 30), (50, 80)]
+    for since, until in windows:
+        CommitBackfill.create(
+            dict(
+                repository=repository,
+                branch="org:main",
+                since=start + datetime.timedelta(hours=since),
+                until=start + datetime.timedelta(hours=until),
+                pages_done=0,
+            )
+        )
+    assert len(CommitBackfill.all(repository=repository)) == 2
+
+    new_commit = Commit.create(
+        dict(
+            sha="f" * 40,
+            branch="org:main",
+            repository=repository,
+            fork_point_sha="f" * 40,
+            message="new",
+            author_name="a",
+            timestamp=start + datetime.timedelta(hours=10),
+        )
+    )
+    backfill_default_branch_commits(repository, new_commit)
+
+    assert not CommitBackfill.all(repository=repository)
+    for since, until in windows:
+        assert (
+            (start + datetime.timedelta(hours=since)).isoformat() + "Z",
+            (start + datetime.timedelta(hours=until)).isoformat() + "Z",
+        ) in requested_windows
+    # Both windows (exclusive), and the commits before the new commit.
+    assert len(Commit.all(repository=repository)) == 29 + 29 + 1
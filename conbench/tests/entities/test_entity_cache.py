@@ -0,0 +1,72 @@
+import sqlalchemy as s
+
+from ...entities import _entity_cache
+from ...entities.case import Case
+from ...entities.context import Context
+from ...entities.hardware import Machine
+from ...tests.api import _fixtures
+
+
+def _counter_value(counter, entity):
+    return counter.labels(entity=entity)._value.get()
+
+
+class _StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        s.event.listen(s.engine.Engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *args):
+        s.event.remove(s.engine.Engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args, **kwargs):
+        self.count += 1
+
+
+def test_get_or_create_cached():
+    props = {"name": "file-write", "tags": {"dataset": "nyctaxi", "n": 1}}
+    hits_before = _counter_value(_entity_cache.COUNTER_ENTITY_CACHE_HITS, "Case")
+
+    case = Case.get_or_create(props)
+    with _StatementCounter() as statements:
+        # Same props, different key order: served from the cache.
+        cached = Case.get_or_create(
+            {"tags": {"n": 1, "dataset": "nyctaxi"}, "name": "file-write"}
+        )
+        assert cached.id == case.id
+        assert cached.name == "file-write"
+    assert statements.count == 0
+    assert _counter_value(_entity_cache.COUNTER_ENTITY_CACHE_HITS, "Case") == (
+        hits_before + 1
+    )
+
+    # Different props (also: different entity type with the same props) miss.
+    other = Case.get_or_create({"name": "file-write", "tags": {"dataset": "x"}})
+    assert other.id != case.id
+    context = Context.get_or_create({"tags": props["tags"]})
+    assert Context.get_or_create({"tags": props["tags"]}).id == context.id
+
+
+def test_get_or_create_many_cached():
+    machine_info = _fixtures.VALID_RESULT_PAYLOAD["machine_info"]
+    machine = Machine.get_or_create(machine_info)
+
+    with _StatementCounter() as statements:
+        machines = Machine.get_or_create_many([machine_info, machine_info])
+    assert statements.count == 0
+    assert [m.id for m in machines] == [machine.id, machine.id]
+    assert machines[0].hash == machine.hash
+
+    contexts = Context.get_or_create_many([{"tags": {"a": "1"}}, {"tags": {"a": "2"}}])
+    assert Context.get_or_create({"tags": {"a": "2"}}).id == contexts[1].id
+
+
+def test_cache_disabled(monkeypatch):
+    monkeypatch.setattr(_entity_cache.cache, "max_bytes", 0)
+    case = Case.get_or_create({"name": "n", "tags": {}})
+    with _StatementCounter() as statements:
+        assert Case.get_or_create({"name": "n", "tags": {}}).id == case.id
+    assert statements.count > 0
@@ -11,8 +11,12 @@ from conbench.types import TBenchmarkName
 
 from ...config import Config
 from ...db import _session as Session
+from ...entities import _history_cache
+from ...entities import commit as commit_module
+from ...entities import history
 from ...entities.benchmark_result import BenchmarkResult
 from ...entities.commit import Commit
+from ...entities.distribution_stats import get_distribution_stats
 from ...entities.history import (
     _detect_shifts_with_trimmed_estimators,
     get_history_for_fingerprint,
@@ -449,3 +453,146 @@ def test_set_z_scores_one_rep():
         history_fingerprints=[br.history_fingerprint],
     )
     assert_equal_leeway(br.z_score, -2.121)
+
+
+def test_set_z_scores_materialized_distribution_stats(monkeypatch):
+    commits, _ = _fixtures.gen_fake_data()
+
+    _fixtures.benchmark_result(name="a", results=[1], commit=commits["11111"])
+    br2 = _fixtures.benchmark_result(name="a", results=[2], commit=commits["22222"])
+    br = _fixtures.benchmark_result(name="a", results=[3], commit=commits["33333"])
+    fp = br.history_fingerprint
+
+    def _z_score(baseline_commit: Commit):
+        set_z_scores(
+            contender_benchmark_results=[br],
+            baseline_commit=baseline_commit,
+            history_fingerprints=[fp],
+        )
+        return br.z_score
+
+    assert get_distribution_stats(commits["22222"].id, [fp]) == []
+    assert_equal_leeway(_z_score(commits["22222"]), -2.121)
+    assert len(get_distribution_stats(commits["22222"].id, [fp])) == 1
+
+    # Served from the table.
+    with monkeypatch.context() as m:
+        m.setattr(history, "_calculate_distribution_stats", None)
+        assert_equal_leeway(_z_score(commits["22222"]), -2.121)
+
+    # A result for a later commit does not affect the row. The row for the
+    # commit of the new result is not calculated upon submission, but upon
+    # the first lookup.
+    _fixtures.benchmark_result(name="a", results=[5], commit=commits["44444"])
+    assert len(get_distribution_stats(commits["22222"].id, [fp])) == 1
+    assert get_distribution_stats(commits["44444"].id, [fp]) == []
+    _z_score(commits["44444"])
+    assert len(get_distribution_stats(commits["44444"].id, [fp])) == 1
+
+    # A result for an earlier commit invalidates the rows for that commit and
+    # all later commits on the default branch.
+    br_earlier = _fixtures.benchmark_result(
+        name="a", results=[4], commit=commits["11111"]
+    )
+    assert get_distribution_stats(commits["22222"].id, [fp]) == []
+    assert get_distribution_stats(commits["44444"].id, [fp]) == []
+    assert_equal_leeway(_z_score(commits["22222"]), -2.309)
+
+    # Same for changing and deleting a result. A distribution change at
+    # 22222 leaves a single result in the distribution: no z-score.
+    br2.update({"change_annotations": {"begins_distribution_change": True}})
+    assert get_distribution_stats(commits["22222"].id, [fp]) == []
+    assert _z_score(commits["22222"]) is None
+
+    br2.update({"change_annotations": {"begins_distribution_change": None}})
+    assert_equal_leeway(_z_score(commits["22222"]), -2.309)
+
+    br_earlier.delete()
+    assert get_distribution_stats(commits["22222"].id, [fp]) == []
+    assert_equal_leeway(_z_score(commits["22222"]), -2.121)
+
+    # Non-default-branch baseline commits are not materialized.
+    _z_score(commits["ddddd"])
+    assert get_distribution_stats(commits["ddddd"].id, [fp]) == []
+
+
+def test_backfill_invalidates_distribution_stats(monkeypatch):
+    commits, _ = _fixtures.gen_fake_data()
+    br = _fixtures.benchmark_result(name="a", results=[1], commit=commits["11111"])
+    _fixtures.benchmark_result(name="a", results=[2], commit=commits["22222"])
+    fp = br.history_fingerprint
+    for sha in ("11111", "22222"):
+        set_z_scores(
+            contender_benchmark_results=[br],
+            baseline_commit=commits[sha],
+            history_fingerprints=[fp],
+        )
+        assert len(get_distribution_stats(commits[sha].id, [fp])) == 1
+
+    # Backfill a default branch commit between 11111 and 22222.
+    repository = commits["11111"].repository
+    backfilled = {
+        "sha": "1a1a1",
+        "repository": repository,
+        "github": {
+            "parent": "11111",
+            "date": datetime(2022, 1, 1, 12),
+            "message": "backfilled",
+            "author_name": "someone",
+            "author_login": None,
+            "author_avatar": None,
+        },
+    }
+    monkeypatch.setattr(
+        commit_module._github,
+        "iter_commits_to_branch",
+        lambda **kwargs: iter([(1, [backfilled])]),
+    )
+    commit_module._backfill_window(
+        repository, "org/repo", "default", datetime(1970, 1, 1), datetime(2022, 1, 3)
+    )
+
+    assert len(get_distribution_stats(commits["11111"].id, [fp])) == 1
+    assert get_distribution_stats(commits["22222"].id, [fp]) == []
+
+
+def test_get_history_for_fingerprint_cache(monkeypatch):
+    commits, _ = _fixtures.gen_fake_data()
+    br = _fixtures.benchmark_result(name="a", results=[1], commit=commits["11111"])
+    _fixtures.benchmark_result(name="a", results=[2], commit=commits["22222"])
+    fp = br.history_fingerprint
+    name = cast(TBenchmarkName, "a")
+
+    def _svs_by_sha():
+        return {
+            s.commit_hash: (s.svs, s.zscorestats.begins_distribution_change)
+            for s in get_history_for_fingerprint(fp, name)
+        }
+
+    _history_cache.cache.clear()
+    assert _svs_by_sha() == {"11111": (1.0, False), "22222": (2.0, False)}
+
+    # Served from the cache.
+    with monkeypatch.context() as m:
+        m.setattr(history, "_query_history_for_fingerprint", None)
+        assert len(_svs_by_sha()) == 2
+
+    # New result: detected via data version.
+    _history_cache.cache.clear()
+    assert len(_svs_by_sha()) == 2
+    _fixtures.benchmark_result(name="a", results=[3], commit=commits["33333"])
+    assert _svs_by_sha()["33333"] == (3.0, False)
+
+    # Changed change annotations: cache invalidated by BenchmarkResult.update().
+    br.update({"change_annotations": {"begins_distribution_change": True}})
+    assert _svs_by_sha()["11111"] == (1.0, True)
+
+    # Changed by another process (the local cache is not invalidated):
+    # detected via data version.
+    with monkeypatch.context() as m:
+        m.setattr(_history_cache, "invalidate", lambda fp: None)
+        br.update({"change_annotations": {"begins_distribution_change": False}})
+    assert _svs_by_sha()["11111"] == (1.0, False)
+
+    br.delete()
+    assert "11111" not in _svs_by_sha()
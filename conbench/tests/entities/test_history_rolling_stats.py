@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ...entities._rolling_stats import (
+    commit_windows,
+    grouped_quantile,
+    new_group_mask,
+    rolling_mean_std,
+    row_windows,
+)
+from ...entities.history import (
+    _add_rolling_stats_columns_to_df,
+    _detect_shifts_with_trimmed_estimators,
+)
+from ._history_reference import (
+    reference_add_rolling_stats_columns_to_df,
+    reference_detect_shifts_with_trimmed_estimators,
+)
+
+
+def synthetic_history_df(
+    n_fingerprints: int, n_commits: int, seed: int = 0
+) -> pd.DataFrame:
+    """
+    Histories with a bit of everything: several results per commit (for some
+    commits), steps, outliers, constant stretches, manually annotated
+    distribution changes, fingerprints with few results. Rows are shuffled.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for f in range(n_fingerprints):
+        ncommits = int(rng.integers(1, n_commits + 1))
+        reps = rng.choice([1, 1, 1, 2, 3], size=ncommits)
+        commit_idx = np.repeat(np.arange(ncommits), reps)
+        n = len(commit_idx)
+
+        svs = 10.0 + f + rng.normal(scale=0.1, size=n)
+        if n > 20:
+            step_at = int(rng.integers(10, n))
+            svs[step_at:] += rng.choice([-3.0, 5.0])
+            outliers = rng.choice(n, size=max(1, n // 50), replace=False)
+            svs[outliers] += 50.0
+        if f % 4 == 0:
+            # Constant stretch (identical values are common for e.g. counts).
+            svs[: n // 2] = 7.0
+        if f % 5 == 0:
+            svs = np.round(svs)
+
+        annotations = [None] * n
+        if n > 10 and f % 3 == 0:
+            annotations[n // 3] = {"begins_distribution_change": True}
+            annotations[n // 3 + 1] = {"begins_distribution_change": False}
+            annotations[n // 3 + 2] = {}
+
+        frames.append(
+            pd.DataFrame(
+                {
+                    "history_fingerprint": f"fp-{f}",
+                    "timestamp": pd.Timestamp("2023-01-01")
+                    + pd.to_timedelta(commit_idx, unit="h"),
+                    "result_timestamp": pd.Timestamp("2023-06-01")
+                    + pd.to_timedelta(rng.permutation(n), unit="s"),
+                    "svs": svs,
+                    "change_annotations": annotations,
+                }
+            )
+        )
+
+    df = pd.concat(frames, ignore_index=True)
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def assert_frames_match(result: pd.DataFrame, expected: pd.DataFrame):
+    assert list(result.columns) == list(expected.columns)
+    assert len(result) == len(expected)
+    for col in expected.columns:
+        r, e = result[col].to_numpy(), expected[col].to_numpy()
+        if e.dtype.kind != "f":
+            assert (r == e).all(), col
+            continue
+
+        ok = np.isclose(r, e, rtol=1e-9, atol=1e-12, equal_nan=True)
+        if col == "rolling_stddev":
+            # pandas' online (add/remove) variance algorithm accumulates
+            # rounding errors (relative error of a few 1e-9 was observed where
+            # the NumPy implementation is within 1e-11 of the exact value).
+            # When a window becomes constant after larger values left it,
+            # pandas reports e.g. 4e-8 instead of 0.
+            ok |= np.isclose(r, e, rtol=1e-7, atol=0)
+            ok |= (r == 0) & (e < 1e-6)
+        assert ok.all(), (col, r[~ok][:5], e[~ok][:5])
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_detect_shifts_matches_reference(seed):
+    df = synthetic_history_df(n_fingerprints=30, n_commits=300, seed=seed)
+    result = _detect_shifts_with_trimmed_estimators(df.copy())
+    expected = reference_detect_shifts_with_trimmed_estimators(df.copy())
+    assert_frames_match(result, expected.reset_index(drop=True))
+    assert result.is_step.any()
+    assert result.is_outlier.any()
+
+
+@pytest.mark.parametrize("include_current_commit", [True, False])
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_rolling_stats_match_reference(seed, include_current_commit):
+    df = synthetic_history_df(n_fingerprints=30, n_commits=300, seed=seed)
+    result = _add_rolling_stats_columns_to_df(
+        df.copy(), include_current_commit_in_rolling_stats=include_current_commit
+    )
+    expected = reference_add_rolling_stats_columns_to_df(
+        df.copy(), include_current_commit_in_rolling_stats=include_current_commit
+    )
+    assert_frames_match(result, expected)
+    assert result.segment_id.max() == 1
+
+
+def test_rolling_stats_empty_and_tiny():
+    df = synthetic_history_df(n_fingerprints=1, n_commits=1)
+    for include in (True, False):
+        result = _add_rolling_stats_columns_to_df(
+            df.copy(), include_current_commit_in_rolling_stats=include
+        )
+        expected = reference_add_rolling_stats_columns_to_df(
+            df.copy(), include_current_commit_in_rolling_stats=include
+        )
+        assert_frames_match(result, expected)
+
+    result = _detect_shifts_with_trimmed_estimators(df.iloc[:0])
+    assert list(result.columns) == list(df.columns) + ["is_step", "is_outlier"]
+    assert len(result) == 0
+
+
+def test_rolling_mean_std_primitives():
+    # Two groups; NaNs are skipped; constant windows yield exact results.
+    x = np.array([1.0, np.nan, 3.0, 3.0, 3.0, 0.1, 0.2, 0.3])
+    g = np.array([0, 0, 0, 0, 0, 1, 1, 1])
+    new_group = new_group_mask(g)
+    start, end = row_windows(new_group, 2)
+    mean, std = rolling_mean_std(x, new_group, start, end)
+
+    ref = pd.Series(x).groupby(g).rolling(2, min_periods=1)
+    np.testing.assert_allclose(mean, ref.mean().to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(std, ref.std().to_numpy(), rtol=1e-12)
+    assert mean[4] == 3.0
+    assert std[4] == 0.0
+
+    q = grouped_quantile(x, new_group, 0.05)
+    assert q[0] == pd.Series(x[:5]).quantile(0.05)
+    assert q[-1] == pd.Series(x[5:]).quantile(0.05)
+
+
+def test_commit_windows():
+    g = np.array([0, 0, 0, 0, 1, 1])
+    ts = np.array([1, 1, 2, 3, 1, 2])
+    new_group = new_group_mask(g)
+    new_commit = new_group_mask(g, ts)
+
+    start, end = commit_windows(new_group, new_commit, 2, closed="right")
+    assert start.tolist() == [0, 0, 0, 2, 4, 4]
+    assert end.tolist() == [2, 2, 3, 4, 5, 6]
+
+    start, end = commit_windows(new_group, new_commit, 2, closed="left")
+    assert start.tolist() == [0, 0, 0, 0, 4, 4]
+    assert end.tolist() == [0, 0, 2, 3, 4, 5]
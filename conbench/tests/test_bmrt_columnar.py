@@ -0,0 +1,142 @@
+import numpy as np
+
+from conbench.bmrt_columnar import (
+    BMRTResultList,
+    BMRTResultsById,
+    BMRTRow,
+    ColumnarResults,
+    TimeseriesFrame,
+)
+
+
+def _row(i: int, bname="bench", case_id="case1", data=None) -> BMRTRow:
+    data = data if data is not None else [float(i), float(i) + 1]
+    return BMRTRow(
+        id=f"{i:032x}",
+        case_id=case_id,
+        context_id="ctx1",
+        run_id=f"run{i // 2}",
+        data=data,
+        svs=min(data) if data else float("nan"),
+        svs_type="best",
+        unit="s",
+        benchmark_name=bname,  # type: ignore
+        started_at=1_600_000_000.0 + i,
+        hardware_checksum="hw1",
+        hardware_name="machine",
+        ui_hardware_short="machine",
+        case_text_id=f"x={case_id}",
+        case_dict={"name": bname, "x": case_id},
+        context_dict={"c": "1"},
+        ui_non_null_sample_count=str(len(data)),
+        run_reason="commit",
+    )
+
+
+def _store(rows) -> ColumnarResults:
+    b = ColumnarResults.empty().builder()
+    for r in rows:
+        b.add(r)
+    return b.finish()
+
+
+def test_view_attributes():
+    row = _row(3, data=[1.5, 2.5, 3.5])
+    store = _store([_row(1), row])
+    v = store[1]
+    assert v.id == row.id
+    assert v.benchmark_name == "bench"
+    assert v.case_id == "case1"
+    assert v.run_id == "run1"
+    assert v.data == [1.5, 2.5, 3.5]
+    assert v.svs == 1.5
+    assert v.started_at == row.started_at
+    assert v.ui_non_null_sample_count == "3"
+    assert v.case_dict == row.case_dict
+    assert v.context_dict == row.context_dict
+    assert v.case_text_id == "x=case1"
+    assert v.ui_time_started_at.endswith(" UTC")
+    # Case dictionaries are stored once per case ID.
+    assert store[0].case_dict is store[1].case_dict
+
+
+def test_lookup_by_id():
+    rows = [_row(i) for i in (5, 1, 3)]
+    by_id = BMRTResultsById(_store(rows))
+    assert len(by_id) == 3
+    for r in rows:
+        assert r.id in by_id
+        assert by_id[r.id].started_at == r.started_at
+    assert f"{2:032x}" not in by_id
+    assert "ünicode" not in by_id
+
+
+def test_group_rows_sorted_newest_first():
+    rows = [_row(i, bname="a" if i % 2 else "b") for i in range(6)]
+    store = _store(rows)
+    groups = store.group_rows(("benchmark_name",))
+    assert set(groups) == {("a",), ("b",)}
+    a = BMRTResultList(store, groups[("a",)])
+    assert [r.id for r in a] == [rows[i].id for i in (5, 3, 1)]
+    assert a[0].id == rows[5].id
+    assert isinstance(a[:2], BMRTResultList)
+    assert len(a[:2]) == 2
+
+
+def test_take_and_concat():
+    rows = [_row(i, data=[float(i)] * (i % 3)) for i in range(5)]
+    store = _store(rows)
+
+    kept = store.take(np.array([1, 3, 4]))
+    assert [kept[i].id for i in range(3)] == [rows[i].id for i in (1, 3, 4)]
+    assert [kept[i].data for i in range(3)] == [rows[i].data for i in (1, 3, 4)]
+
+    b = kept.builder()
+    b.add(_row(10, case_id="case2"))
+    merged = kept.concat(b)
+    assert len(merged) == 4
+    assert merged[3].case_id == "case2"
+    assert merged[3].case_dict == {"name": "bench", "x": "case2"}
+    assert merged[0].case_dict == rows[1].case_dict
+    assert merged.row_for_id(rows[4].id) == 2
+    assert list(
+        merged.contains_ids(np.array([rows[0].id, rows[1].id], dtype=np.bytes_))
+    ) == [False, True]
+
+    # The input stores were not modified.
+    assert len(kept) == 3
+    assert len(store) == 5
+
+
+def test_timeseries_frame():
+    rows = [
+        _row(i, bname="a" if i % 2 else "b", case_id=f"case{i % 3}")
+        for i in (4, 0, 5, 1, 3, 2, 7, 6)
+    ]
+    store = _store(rows)
+    frame = TimeseriesFrame(store, ("benchmark_name", "case_id"))
+
+    expected = {}
+    for r in rows:
+        expected.setdefault((r.benchmark_name, r.case_id), []).append(r)
+    assert set(frame) == set(expected)
+    assert len(frame) == len(expected)
+    assert frame.offsets[-1] == len(store)
+
+    for key, rs in expected.items():
+        df = frame[key]
+        rs = sorted(rs, key=lambda r: r.started_at)
+        assert list(df.columns) == ["svs"]
+        assert df.index.name == "time"
+        assert str(df.index.tz) == "UTC"
+        assert [t.timestamp() for t in df.index] == [r.started_at for r in rs]
+        assert df["svs"].tolist() == [r.svs for r in rs]
+        j = frame.series_id(key)
+        assert frame.df["series_id"].iloc[frame.offsets[j]] == j
+        start, end = frame.offsets[j], frame.offsets[j + 1]
+        assert [store.id_at(i) for i in frame.rows[start:end]] == [r.id for r in rs]
+
+    assert ("x", "y") not in frame
+    empty = TimeseriesFrame(ColumnarResults.empty(), ("benchmark_name",))
+    assert len(empty) == 0
+    assert dict(empty.items()) == {}
@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+
+import conbench.bmrt_snapshot
+from conbench.bmrt_snapshot import (
+    builder_lock_held,
+    current_name,
+    load_snapshot,
+    try_lock_builder,
+    write_snapshot,
+)
+
+from .test_bmrt_columnar import _row, _store
+
+
+def test_snapshot_roundtrip(tmp_path):
+    d = str(tmp_path)
+    assert current_name(d) is None
+    assert load_snapshot(d) is None
+
+    rows = [
+        _row(i, case_id=f"case{i % 2}", data=[float(i)] * (i % 3)) for i in range(5)
+    ]
+    store = _store(rows)
+    name = write_snapshot(d, store, {"hwm_id": rows[-1].id})
+    assert current_name(d) == name
+
+    snap = load_snapshot(d)
+    assert snap is not None
+    assert snap.name == name
+    assert snap.meta == {"hwm_id": rows[-1].id}
+
+    s = snap.store
+    assert isinstance(s.svs, np.memmap)
+    assert not s.svs.flags.writeable
+    assert len(s) == 5
+    for i, r in enumerate(rows):
+        assert s[i].id == r.id
+        assert s[i].data == r.data
+        assert s[i].case_dict == r.case_dict
+        assert s.row_for_id(r.id) == i
+
+    # The string tables of a loaded store can seed a builder (codes of new
+    # values are appended).
+    b = s.builder()
+    b.add(_row(10, case_id="case9"))
+    merged = s.concat(b)
+    assert merged[5].case_id == "case9"
+    assert merged[0].case_id == "case0"
+
+
+def test_snapshot_generations(tmp_path):
+    d = str(tmp_path)
+    store = _store([_row(1)])
+    names = [write_snapshot(d, store, {}) for _ in range(4)]
+    assert len(set(names)) == 4
+    assert current_name(d) == names[-1]
+    gens = sorted(n for n in os.listdir(d) if n.startswith("gen-"))
+    assert gens == sorted(names[-2:])
+
+    # A store attached before its generation got removed stays usable.
+    snap = load_snapshot(d)
+    assert snap is not None
+    write_snapshot(d, store, {})
+    write_snapshot(d, store, {})
+    assert not os.path.exists(os.path.join(d, snap.name))
+    assert snap.store[0].data == [1.0, 2.0]
+
+
+def test_builder_lock(tmp_path):
+    d = str(tmp_path)
+    assert not builder_lock_held(d)
+    f = try_lock_builder(d)
+    assert f is not None
+    assert builder_lock_held(d)
+    assert try_lock_builder(d) is None
+    f.close()
+    assert not builder_lock_held(d)
+
+
+def test_snapshot_format_version(tmp_path, monkeypatch):
+    d = str(tmp_path)
+    write_snapshot(d, _store([_row(1)]), {})
+    assert load_snapshot(d) is not None
+
+    # Snapshots written by a different code version (e.g. persisted across a
+    # deployment) are ignored.
+    monkeypatch.setattr(conbench.bmrt_snapshot, "FORMAT_VERSION", 0)
+    assert load_snapshot(d) is None
@@ -0,0 +1,49 @@
+import time
+
+from conbench.cachetools import SizedLRUCacheWithTTL
+
+
+def test_sized_lru_cache_evicts_least_recently_used():
+    evictions = []
+    cache = SizedLRUCacheWithTTL(
+        max_bytes=10, ttl=60, sizeof=len, on_evict=evictions.append
+    )
+
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    assert cache.get("a") == "xxxx"  # now 'b' is the least recently used
+    cache.set("c", "xxxx")
+    assert cache.get("b") is None
+    assert cache.get("a") == "xxxx"
+    assert cache.get("c") == "xxxx"
+    assert cache.total_bytes == 8
+    assert evictions == ["size"]
+
+    # Replacing a value does not count as eviction.
+    cache.set("a", "xx")
+    assert cache.total_bytes == 6
+    assert evictions == ["size"]
+
+    # Too large for the cache as a whole.
+    cache.set("d", "x" * 11)
+    assert cache.get("d") is None
+    assert len(cache) == 2
+
+    cache.invalidate("a")
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert cache.total_bytes == 4
+    assert evictions == ["size", "invalidated"]
+
+
+def test_sized_lru_cache_ttl():
+    evictions = []
+    cache = SizedLRUCacheWithTTL(
+        max_bytes=10, ttl=0.05, sizeof=len, on_evict=evictions.append
+    )
+    cache.set("a", "x")
+    assert cache.get("a") == "x"
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.total_bytes == 0
+    assert evictions == ["ttl"]
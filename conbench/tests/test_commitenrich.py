@@ -0,0 +1,85 @@
+import time
+
+import conbench.commitenrich
+from conbench.config import Config
+from conbench.dbsession import current_session
+from conbench.entities.benchmark_result import (
+    commit_fetch_info_and_create_in_db_if_not_exists,
+)
+from conbench.entities.commit import Commit, _github
+from conbench.entities.commit_enrichment import (
+    PendingCommitEnrichment,
+    enqueue_commit_enrichment,
+)
+
+SHA = "02addad336ba19a654f9c857ede546331be7b631"
+REPO_URL = "https://github.com/org/repo"
+
+
+def _cinfo(sha=SHA):
+    return {"repo_url": REPO_URL, "commit_hash": sha, "branch": None, "pr_number": None}
+
+
+def test_enrich_commit_async(monkeypatch):
+    monkeypatch.setattr(Config, "COMMIT_ENRICHMENT_ASYNC", True)
+    backfilled = []
+    monkeypatch.setattr(
+        conbench.commitenrich,
+        "backfill_default_branch_commits",
+        lambda repo_url, commit: backfilled.append((repo_url, commit.sha)),
+    )
+
+    # Stored right away, without metadata.
+    commit = commit_fetch_info_and_create_in_db_if_not_exists(_cinfo())
+    assert commit.timestamp is None
+    assert commit.fork_point_sha is None
+    # Deduplicated.
+    enqueue_commit_enrichment(_cinfo())
+    current_session.commit()
+    assert len(PendingCommitEnrichment.all()) == 1
+
+    assert conbench.commitenrich.enrich_once() == 1
+    assert not PendingCommitEnrichment.all()
+    assert backfilled == [(REPO_URL, SHA)]
+
+    commit = Commit.first(sha=SHA, repository=REPO_URL)
+    assert commit.timestamp is not None
+    assert commit.message
+    assert commit.branch == "org:default_branch"
+    assert commit.fork_point_sha == SHA
+    assert commit.default_branch_seq == 1
+
+    # Nothing left to do.
+    assert conbench.commitenrich.enrich_once() == 0
+
+
+def test_enrich_commit_retry_and_quota(monkeypatch):
+    monkeypatch.setattr(Config, "COMMIT_ENRICHMENT_ASYNC", True)
+    commit_fetch_info_and_create_in_db_if_not_exists(_cinfo("unknown commit"))
+
+    # Fetching metadata fails: retried later.
+    assert conbench.commitenrich.enrich_once() == 0
+    job = PendingCommitEnrichment.first(sha="unknown commit")
+    assert job.attempts == 1
+    assert conbench.commitenrich.enrich_once() == 0
+    current_session.refresh(job)
+    assert job.attempts == 1
+
+    # Paused while the quota is low: the job is not even claimed.
+    current_session.execute(
+        PendingCommitEnrichment.__table__.update().values(not_before=job.enqueued_at)
+    )
+    current_session.commit()
+    monkeypatch.setattr(_github, "quota_remaining", 0)
+    monkeypatch.setattr(_github, "quota_reset_at", time.time() + 600)
+    assert conbench.commitenrich.enrich_once() == 0
+    current_session.refresh(job)
+    assert job.attempts == 1
+
+    # Give up eventually.
+    monkeypatch.setattr(_github, "quota_remaining", None)
+    monkeypatch.setattr(conbench.commitenrich, "MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(conbench.commitenrich, "RETRY_DELAY_SECONDS", 0)
+    assert conbench.commitenrich.enrich_once() == 0
+    assert not PendingCommitEnrichment.all()
+    assert Commit.first(sha="unknown commit").timestamp is None
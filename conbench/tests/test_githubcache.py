@@ -0,0 +1,153 @@
+import time
+from datetime import datetime
+
+import pytest
+
+import conbench.entities.commit
+from conbench import githubcache
+from conbench.config import Config
+from conbench.entities.commit import GitHubHTTPApiClient
+from conbench.githubcache import GitHubResponseCache
+
+SHA = "a" * 40
+
+
+class _Response:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = headers or {}
+        self.text = ""
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def client_and_requests(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        Config, "GITHUB_API_CACHE_PATH", str(tmp_path / "ghcache.sqlite3")
+    )
+    client = GitHubHTTPApiClient()
+
+    # Sent requests, and the responses to send (by URL suffix).
+    sent = []
+    responses = {}
+
+    def _get(url, headers):
+        sent.append((url, headers))
+        for suffix, response in responses.items():
+            if url.endswith(suffix):
+                if callable(response):
+                    return response(headers)
+                return response
+        raise AssertionError(f"unexpected request: {url}")
+
+    monkeypatch.setattr(conbench.entities.commit.requests, "get", _get)
+    return client, sent, responses
+
+
+def test_conditional_request(client_and_requests, monkeypatch):
+    client, sent, responses = client_and_requests
+    repo = {"fork": False, "owner": {"login": "org"}, "default_branch": "main"}
+    responses["/repos/org/repo2"] = _Response(200, repo, {"ETag": '"v1"'})
+
+    assert client.get_default_branch("org/repo2") == "org:main"
+    assert len(sent) == 1
+    assert "If-None-Match" not in sent[0][1]
+
+    # Within the TTL: served from the cache, no request.
+    assert client.get_default_branch("org/repo2") == "org:main"
+    assert len(sent) == 1
+
+    # TTL expired: revalidate. Not modified: use cached response.
+    monkeypatch.setattr(Config, "GITHUB_API_CACHE_TTL_SECONDS", 0)
+    responses["/repos/org/repo2"] = lambda headers: (
+        _Response(304)
+        if headers.get("If-None-Match") == '"v1"'
+        else _Response(200, dict(repo, default_branch="other"))
+    )
+    assert client.get_default_branch("org/repo2") == "org:main"
+    assert len(sent) == 2
+    assert sent[1][1]["If-None-Match"] == '"v1"'
+
+
+def test_immutable_commit(client_and_requests):
+    client, sent, responses = client_and_requests
+    commit = {
+        "parents": [],
+        "author": None,
+        "commit": {
+            "author": {"name": "a", "date": "2023-01-01T00:00:00Z"},
+            "message": "msg",
+        },
+    }
+    responses[f"/commits/{SHA}"] = _Response(200, commit, {"ETag": '"c"'})
+    responses["/commits/main"] = _Response(200, commit, {"ETag": '"m"'})
+
+    first = client.get_commit_info("org/repo2", SHA)
+    # Never asks GitHub again for a commit addressed by its hash, also not
+    # from another client (process) sharing the cache file.
+    assert client.get_commit_info("org/repo2", SHA) == first
+    assert GitHubHTTPApiClient().get_commit_info("org/repo2", SHA) == first
+    assert len(sent) == 1
+
+    # Not a commit hash: revalidated.
+    client.get_commit_info("org/repo2", "main")
+    client.get_commit_info("org/repo2", "main")
+    assert len(sent) == 3
+    assert sent[2][1]["If-None-Match"] == '"m"'
+
+
+def test_commit_list_pages_not_cached(client_and_requests):
+    client, sent, responses = client_and_requests
+    commit = {
+        "sha": SHA,
+        "parents": [],
+        "author": None,
+        "commit": {
+            "author": {"name": "a", "date": "2023-01-01T00:00:00Z"},
+            "message": "msg",
+        },
+    }
+    responses["&page=1"] = _Response(200, [commit], {"ETag": '"p"'})
+    responses["&page=2"] = _Response(200, [], {"ETag": '"e"'})
+
+    for _ in range(2):
+        pages = client.iter_commits_to_branch(
+            name="org/repo2",
+            branch="main",
+            since=datetime(2022, 1, 1),
+            until=datetime(2024, 1, 1),
+        )
+        assert [len(commits) for _, commits in pages] == [1]
+
+    assert all("If-None-Match" not in headers for _, headers in sent)
+    assert client._cache is not None
+    count = client._cache._conn.execute("SELECT COUNT(*) FROM response").fetchone()
+    assert count == (0,)
+
+
+def test_prune(tmp_path, monkeypatch):
+    cache = GitHubResponseCache(str(tmp_path / "ghcache.sqlite3"), max_age=60)
+    now = time.time()
+    cache.set("mutable", {}, etag=None, last_modified=None, immutable=False)
+    cache.set("immutable", {}, etag=None, last_modified=None, immutable=True)
+
+    # Not yet expired.
+    assert cache.prune() == 0
+
+    monkeypatch.setattr(githubcache.time, "time", lambda: now + 30)
+    cache.set("recent", {}, etag=None, last_modified=None, immutable=False)
+    monkeypatch.setattr(githubcache.time, "time", lambda: now + 61)
+    assert cache.prune() == 1
+    assert cache.get("mutable") is None
+    assert cache.get("immutable") is not None
+    assert cache.get("recent") is not None
+
+    # Also done by set(), at most every PRUNE_INTERVAL_SECONDS.
+    monkeypatch.setattr(githubcache.time, "time", lambda: now + 100)
+    monkeypatch.setattr(githubcache, "PRUNE_INTERVAL_SECONDS", 0)
+    cache.set("new", {}, etag=None, last_modified=None, immutable=False)
+    assert cache.get("recent") is None
+    assert cache.get("new") is not None
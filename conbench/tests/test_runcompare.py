@@ -0,0 +1,134 @@
+import copy
+
+import conbench.runcompare
+from conbench.api.compare import CompareRunsAPI
+from conbench.config import Config
+from conbench.entities.run_comparison import (
+    CompletedRun,
+    RunComparison,
+    RunComparisonItem,
+    get_run_comparison,
+)
+
+from .api import _asserts, _fixtures
+
+
+class TestRunComparePrecompute(_asserts.ApiEndpointTest):
+    def _get_all_pages(self, client, baseline_run_id, contender_run_id, **params):
+        url = f"/api/compare/runs/{baseline_run_id}...{contender_run_id}/"
+        pages = []
+        cursor = None
+        while True:
+            query_string = dict(params, page_size=1)
+            if cursor:
+                query_string["cursor"] = cursor
+            resp = client.get(url, query_string=query_string)
+            self.assert_200_ok(resp)
+            pages.append(resp.json)
+            cursor = resp.json["metadata"]["next_page_cursor"]
+            if cursor is None:
+                return pages
+
+    def test_finish_precompute_serve_invalidate(self, client, monkeypatch):
+        self.authenticate(client)
+        _, benchmark_results = _fixtures.gen_fake_data()
+        contender = benchmark_results[7]  # on a PR branch
+
+        resp = client.post(f"/api/runs/{contender.run_id}/finish/")
+        assert resp.status_code == 202, resp.text
+        assert CompletedRun.first(run_id=contender.run_id)
+
+        conbench.runcompare.precompute_once(idle_seconds=3600)
+
+        stored = RunComparison.all(contender_run_id=contender.run_id)
+        baseline_run_ids = {c.baseline_run_id for c in stored}
+        assert baseline_run_ids == {
+            candidate["baseline_run_id"]
+            for candidate in client.get(f"/api/runs/{contender.run_id}/")
+            .json["candidate_baseline_runs"]
+            .values()
+            if candidate["baseline_run_id"]
+        }
+        assert baseline_run_ids
+
+        stored_items = {
+            (item.baseline_run_id, item.position): copy.deepcopy(item.data)
+            for item in RunComparisonItem.all(contender_run_id=contender.run_id)
+        }
+
+        # Served from storage: identical to the responses computed on demand,
+        # also for non-default thresholds.
+        for baseline_run_id in baseline_run_ids:
+            for params in ({}, {"threshold": "1", "threshold_z": "0.5"}):
+                monkeypatch.setattr(Config, "RUN_COMPARE_PRECOMPUTE", False)
+                expected = self._get_all_pages(
+                    client, baseline_run_id, contender.run_id, **params
+                )
+                monkeypatch.setattr(Config, "RUN_COMPARE_PRECOMPUTE", True)
+                # Make sure that nothing is computed on demand.
+                monkeypatch.setattr(CompareRunsAPI, "get_comparators", None)
+                assert (
+                    self._get_all_pages(
+                        client, baseline_run_id, contender.run_id, **params
+                    )
+                    == expected
+                )
+                monkeypatch.undo()
+
+        # Applying other thresholds does not modify the stored items (also not
+        # the instances in the session of the request).
+        for baseline_run_id in baseline_run_ids:
+            with client.application.test_request_context():
+                items = RunComparisonItem.all(
+                    baseline_run_id=baseline_run_id, contender_run_id=contender.run_id
+                )
+                CompareRunsAPI()._get_stored_response_as_dict(
+                    f"{baseline_run_id}...{contender.run_id}",
+                    cursor=None,
+                    page_size=None,
+                    threshold=1,
+                    threshold_z=0.5,
+                )
+                for item in items:
+                    assert item.data == stored_items[(baseline_run_id, item.position)]
+
+        # A new result for the contender run: the run is active again, the
+        # stored comparisons are gone.
+        monkeypatch.setattr(Config, "RUN_COMPARE_PRECOMPUTE", True)
+        _fixtures.benchmark_result(
+            run_id=contender.run_id,
+            commit=contender.commit,
+            reason=contender.run_reason,
+        )
+        assert not CompletedRun.first(run_id=contender.run_id)
+        for baseline_run_id in baseline_run_ids:
+            assert get_run_comparison(baseline_run_id, contender.run_id) is None
+
+    def test_result_writes_do_not_invalidate_when_disabled(self, client):
+        result = _fixtures.benchmark_result()
+        assert conbench.runcompare.mark_idle_runs_completed(idle_seconds=0) == 1
+
+        # Config.RUN_COMPARE_PRECOMPUTE is off: nothing to invalidate.
+        _fixtures.benchmark_result(run_id=result.run_id)
+        assert CompletedRun.first(run_id=result.run_id)
+
+    def test_idle_runs_are_marked_completed(self, client):
+        result = _fixtures.benchmark_result()
+
+        assert conbench.runcompare.mark_idle_runs_completed(idle_seconds=3600) == 0
+        assert not CompletedRun.first(run_id=result.run_id)
+
+        assert conbench.runcompare.mark_idle_runs_completed(idle_seconds=0) == 1
+        assert CompletedRun.first(run_id=result.run_id)
+        # Already marked.
+        assert conbench.runcompare.mark_idle_runs_completed(idle_seconds=0) == 0
+
+        # There is no other run: no baseline run, nothing stored.
+        conbench.runcompare.precompute_once(idle_seconds=0)
+        assert CompletedRun.first(run_id=result.run_id).comparisons_computed_at
+        assert not RunComparison.all(contender_run_id=result.run_id)
+
+    def test_finish_unknown_run(self, client):
+        self.authenticate(client)
+        resp = client.post("/api/runs/foo/finish/")
+        self.assert_404_not_found(resp)
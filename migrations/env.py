@@ -10,9 +10,13 @@ from conbench.entities._entity import Base
 from conbench.entities import (  # noqa  # isort:skip
     case,
     commit,
+    commit_backfill,
+    commit_enrichment,
     context as _,
+    distribution_stats,
     info,
     hardware,
+    run_comparison,
     benchmark_result,
     user,
 )
@@ -0,0 +1,39 @@
+"""commit backfill per window
+
+Revision ID: 9e4c2a7b1f03
+Revises: 5d1e8c0f7a2b
+Create Date: 2026-10-18 23:48:06.114523
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9e4c2a7b1f03"
+down_revision = "5d1e8c0f7a2b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_constraint("commit_backfill_pkey", "commit_backfill", type_="primary")
+    op.create_primary_key(
+        "commit_backfill_pkey",
+        "commit_backfill",
+        ["repository", "branch", "since", "until"],
+    )
+
+
+def downgrade():
+    # Keep the most recent window per repository and branch.
+    op.execute(
+        """
+        DELETE FROM commit_backfill a USING commit_backfill b
+        WHERE a.repository = b.repository AND a.branch = b.branch
+        AND (a.until, a.since) < (b.until, b.since)
+        """
+    )
+    op.drop_constraint("commit_backfill_pkey", "commit_backfill", type_="primary")
+    op.create_primary_key(
+        "commit_backfill_pkey", "commit_backfill", ["repository", "branch"]
+    )
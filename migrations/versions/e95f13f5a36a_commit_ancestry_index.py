@@ -0,0 +1,64 @@
+"""commit ancestry index
+
+Revision ID: e95f13f5a36a
+Revises: 41525d651e0f
+Create Date: 2026-10-18 16:21:09.118342
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e95f13f5a36a"
+down_revision = "41525d651e0f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "commit", sa.Column("default_branch_seq", sa.Integer(), nullable=True)
+    )
+
+    # Number the existing default-branch commits, per repository.
+    op.execute(
+        """
+        UPDATE commit SET default_branch_seq = numbered.seq
+        FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY repository ORDER BY timestamp, id
+            ) AS seq
+            FROM commit
+            WHERE sha = fork_point_sha AND timestamp IS NOT NULL
+        ) AS numbered
+        WHERE commit.id = numbered.id
+        """
+    )
+
+    op.create_index(
+        "commit_default_branch_seq_index",
+        "commit",
+        ["repository", "default_branch_seq"],
+        unique=False,
+    )
+    op.create_index(
+        "commit_default_branch_timestamp_index",
+        "commit",
+        ["repository", "timestamp"],
+        unique=False,
+        postgresql_where=sa.text("sha = fork_point_sha"),
+    )
+    op.create_index(
+        "commit_fork_point_index",
+        "commit",
+        ["repository", "fork_point_sha"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("commit_fork_point_index", table_name="commit")
+    op.drop_index("commit_default_branch_timestamp_index", table_name="commit")
+    op.drop_index("commit_default_branch_seq_index", table_name="commit")
+    op.drop_column("commit", "default_branch_seq")